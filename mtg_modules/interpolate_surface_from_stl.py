@@ -17,6 +17,11 @@ Definition:
     The mesh of the STL file must be a perfectly ordered grid of vertices that
     conforms to the scanned surface. One can fit such grid over a scanned mesh
     using the shrinkwrap modifier in the Blender modeling software.
+
+    The surface either interpolates the grid (one control point per vertex) or approximates
+    it by least squares with fewer control points (approximation mode). In approximation
+    mode, the number of control points is given, or increased until the deviation of the
+    grid vertices is under a maximum, and a fit error report is printed.
     
 -------------------------------------------------------------------------------------------------------------------------
 Update notes
@@ -24,6 +29,10 @@ Update notes
 Date		    Notes
 ¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
 2022-11-17		Polished the script + added comments and header
+2026-10-18		Least-squares approximation mode (target number of control points or maximum
+                deviation) with a fit error report
+                Grid size detected from the vertices (usize, vsize = 0, grid_tolerance), vectorized grid sorting
+                Vertices read from the memory-mapped binary STL and deduplicated by chunks
 
 -------------------------------------------------------------------------------------------------------------------------
 """
@@ -37,16 +46,123 @@ from geomdl.visualization import VisMPL as vis
 
 # Common modules
 import numpy as np
-from stl import mesh
 import matplotlib.pyplot as plt
 
 # MTG imports
 from mtg_modules.sort_vertices import *
+from mtg_modules.stl_reader import stlVertices
+from mtg_modules.surface_evaluator import surfaceEvaluator, basisMatrix
 
 # ========================================================================================
 # FUNCTION DEFINITIONS
 # ========================================================================================
 
+# Function gridParams
+#
+#   Description: chord length parameters of a grid of points, averaged over the rows and the
+#                columns (same parameters as fitting.compute_params_surface, vectorized)
+#
+#   Returns:
+#       uk, vl : np.array, shapes (size_u,) and (size_v,), the parameters of the grid rows and columns
+#
+#   Parameters:
+#       grid : np.array, shape (size_u, size_v, 3), the grid of points
+#
+def gridParams(grid):
+    params = []
+    for axis in (0, 1):
+        chords = np.linalg.norm(np.diff(grid, axis=axis), axis=2)
+        cumul = np.concatenate((np.zeros((1, chords.shape[1]) if axis == 0 else (chords.shape[0], 1)), np.cumsum(chords, axis=axis)), axis=axis)
+        total = np.take(cumul, [-1], axis=axis)
+        total[total == 0] = 1
+        params.append(np.mean(cumul / total, axis=1 - axis))
+    return params[0], params[1]
+
+# Function approximationKnots
+#
+#   Description: clamped knot vector of a least-squares approximation with at least one
+#                parameter in each knot span (The NURBS Book eq. 9.68 and 9.69)
+#
+#   Returns:
+#       np.array, the knot vector
+#
+#   Parameters:
+#       degree : int, the degree
+#       nb_ctrlpts : int, the number of control points
+#       params : np.array, the parameters of the data points
+#
+def approximationKnots(degree, nb_ctrlpts, params):
+    d = len(params) / (nb_ctrlpts - degree)
+    j = np.arange(1, nb_ctrlpts - degree)
+    i = (j * d).astype(int)
+    alpha = j * d - i
+    internal = (1 - alpha) * params[i - 1] + alpha * params[i]
+    return np.concatenate((np.zeros(degree + 1), internal, np.ones(degree + 1)))
+
+# Function approximateRows
+#
+#   Description: least-squares approximation of the rows of points along the first axis,
+#                the first and last points of each row are interpolated
+#
+#   Returns:
+#       np.array, shape (nb_ctrlpts, ...), the control points
+#
+#   Parameters:
+#       points : np.array, shape (nb_points, ...), the points
+#       degree : int, the degree
+#       knotvector : np.array, the knot vector
+#       params : np.array, shape (nb_points,), the parameters of the points
+#
+def approximateRows(points, degree, knotvector, params):
+    basis = basisMatrix(degree, knotvector, params)[0]
+    ctrlpts = np.empty((basis.shape[1],) + points.shape[1:])
+    ctrlpts[0] = points[0]
+    ctrlpts[-1] = points[-1]
+    if basis.shape[1] > 2:
+        flat = points.reshape(len(points), -1)
+        rhs = flat[1:-1] - np.outer(basis[1:-1, 0], flat[0]) - np.outer(basis[1:-1, -1], flat[-1])
+        inner = np.linalg.lstsq(basis[1:-1, 1:-1], rhs, rcond=None)[0]
+        ctrlpts[1:-1] = inner.reshape((len(inner),) + points.shape[1:])
+    return ctrlpts
+
+# Function approximate_surface
+#
+#   Description: least-squares approximation of a grid of points by a B-spline surface (fit
+#                along v for each row of the grid, then along u for each column of the result)
+#
+#   Returns:
+#       surf : the NURBS-Python surface object
+#       deviations : np.array, shape (size_u * size_v,), the distance of each grid point to
+#                    the surface point of its parameters
+#
+#   Parameters:
+#       grid : np.array, shape (size_u, size_v, 3), the grid of points
+#       udeg, vdeg : int, the degrees along u and v
+#       ctrlpts_size_u, ctrlpts_size_v : int, the number of control points along u and v
+#
+def approximate_surface(grid, udeg, vdeg, ctrlpts_size_u, ctrlpts_size_v):
+    uk, vl = gridParams(grid)
+    knotvector_u = approximationKnots(udeg, ctrlpts_size_u, uk)
+    knotvector_v = approximationKnots(vdeg, ctrlpts_size_v, vl)
+    temp = approximateRows(np.swapaxes(grid, 0, 1), vdeg, knotvector_v, vl)
+    ctrlpts = approximateRows(np.swapaxes(temp, 0, 1), udeg, knotvector_u, uk)
+
+    surf = BSpline.Surface()
+    surf.degree_u = udeg
+    surf.degree_v = vdeg
+    surf.ctrlpts_size_u = ctrlpts_size_u
+    surf.ctrlpts_size_v = ctrlpts_size_v
+    surf.ctrlpts = ctrlpts.reshape(-1, 3).tolist()
+    surf.knotvector_u = knotvector_u.tolist()
+    surf.knotvector_v = knotvector_v.tolist()
+
+    # Deviation of the grid points
+    evaluator = surfaceEvaluator(surf)
+    uu, vv = np.meshgrid(uk, vl, indexing='ij')
+    fitted = evaluator.points(np.stack((uu.ravel(), vv.ravel()), axis=1))
+    deviations = np.linalg.norm(fitted - grid.reshape(-1, 3), axis=1)
+    return surf, deviations
+
 # Function interpolate_surface_from_stl
 #
 #   Description: Interpolate a NURBS surface from an STL file
@@ -56,30 +172,38 @@ from mtg_modules.sort_vertices import *
 #
 #   Parameters:
 #       file : mesh, imported STL file
-#       usize : int, number of control points along u
-#       vsize : int, number of control points along v
+#       usize : int, number of control points along u (grid size, 0 to detect it)
+#       vsize : int, number of control points along v (grid size, 0 to detect it)
 #       udeg : int, spline degree along u
 #       vdeg : int, spline degree along v
 #       eval_delta : int, delta value of the uv pair to evaluate the surface
 #       export_json = True : bool, set to True to export a json file of the surface
 #       render_surf = False : bool, set to True to plot the surface in matplotlib
 #       render_eval = False : bool, set to True to plot the evaluated points in matplotlib
+#       ctrlpts_size = None : list of int [size u, size v], number of control points of the least-squares
+#                             approximation (approximation mode)
+#       max_deviation = None : float, mm, maximum deviation of the grid vertices, the number of control
+#                              points is increased until it is reached (approximation mode)
+#       memory_budget = 256e6 : float, bytes, working memory of the vertex deduplication of the STL file
+#       grid_tolerance = None : float, mm, largest gap inside a grid line when the grid size is detected
+#                               (None : a quarter of the largest gap, see sortGrid)
 #
-def interpolate_surface_from_stl(file, usize, vsize, udeg, vdeg, eval_delta, export_json = True, render_surf = False, render_eval = False):
+def interpolate_surface_from_stl(file, usize, vsize, udeg, vdeg, eval_delta, export_json = True, render_surf = False, render_eval = False, ctrlpts_size = None, max_deviation = None, memory_budget = 256e6, grid_tolerance = None):
     # Check if the file is in STL format
     if file.find('.stl') == -1:
         raise Exception('Error: the file to import must be in STL format.')
         
-    # import the mesh from an STL file
-    myMesh = mesh.Mesh.from_file(file)
-
-    # Rearrange the coordinates (XYZ) of the STL to be used for interpolation
-    points = np.around(np.unique(myMesh.vectors.reshape([int(myMesh.vectors.size/3), 3]), axis=0),2).tolist()
+    # Unique coordinates (XYZ) of the STL vertices to be used for interpolation (memory-mapped binary STL)
+    points = stlVertices(file, 2, memory_budget)
     
-    # Sort the points list to be used for surface interpolation
-    points = sortUV(points,usize,vsize)
+    # Sort the points to be used for surface interpolation (grid size detected if usize or vsize is 0)
+    points, usize, vsize = sortGrid(points, usize, vsize, grid_tolerance, (udeg + 1, vdeg + 1))
+    print('Surface grid of %i × %i vertices' % (usize, vsize))
 
-    surf = fitting.interpolate_surface(points, usize, vsize, udeg, vdeg)
+    if ctrlpts_size is None and max_deviation is None:
+        surf = fitting.interpolate_surface(points.tolist(), usize, vsize, udeg, vdeg)
+    else:
+        surf = approximate_stl_grid(points.reshape(usize, vsize, 3), udeg, vdeg, ctrlpts_size, max_deviation)
     surf.delta = eval_delta
 
     # Export the surface data in json format to reuse later using import_json
@@ -102,4 +226,48 @@ def interpolate_surface_from_stl(file, usize, vsize, udeg, vdeg, eval_delta, exp
         plt.show()
     
     # Return the interpolate surface object
-    return surf    
\ No newline at end of file
+    return surf    
+
+# Function approximate_stl_grid
+#
+#   Description: least-squares approximation of the grid of a STL file, with a given number of
+#                control points or with the least control points reaching a maximum deviation,
+#                and prints the fit error report
+#
+#   Returns:
+#       surf : the NURBS-Python surface object
+#
+#   Parameters:
+#       grid : np.array, shape (size_u, size_v, 3), the sorted grid of vertices
+#       udeg, vdeg : int, the degrees along u and v
+#       ctrlpts_size : list of int [size u, size v], the number of control points (None to use max_deviation)
+#       max_deviation : float, mm, the maximum deviation of the grid vertices (None to use ctrlpts_size)
+#
+def approximate_stl_grid(grid, udeg, vdeg, ctrlpts_size = None, max_deviation = None):
+    size_u, size_v = grid.shape[0:2]
+    if ctrlpts_size is not None:
+        nb_u = min(max(int(ctrlpts_size[0]), udeg + 1), size_u)
+        nb_v = min(max(int(ctrlpts_size[1]), vdeg + 1), size_v)
+        surf, deviations = approximate_surface(grid, udeg, vdeg, nb_u, nb_v)
+    else:
+        # Control points increased by 25 % until the maximum deviation (the grid size interpolates the vertices)
+        nb_u, nb_v = udeg + 1, vdeg + 1
+        while True:
+            surf, deviations = approximate_surface(grid, udeg, vdeg, nb_u, nb_v)
+            if deviations.max() <= max_deviation or (nb_u == size_u and nb_v == size_v):
+                break
+            nb_u = min(max(int(1.25 * nb_u), nb_u + 1), size_u)
+            nb_v = min(max(int(1.25 * nb_v), nb_v + 1), size_v)
+
+    # As many control points as vertices : interpolation
+    if nb_u == size_u and nb_v == size_v:
+        surf = fitting.interpolate_surface(grid.reshape(-1, 3).tolist(), size_u, size_v, udeg, vdeg)
+        deviations = np.zeros(size_u * size_v)
+
+    print('Surface approximation fit report :')
+    print(' Grid vertices = %i × %i, control points = %i × %i (%.1f %% of the vertices)' % (size_u, size_v, nb_u, nb_v, 100 * nb_u * nb_v / (size_u * size_v)))
+    print(' Deviation of the vertices : max = %.4f mm, RMS = %.4f mm, mean = %.4f mm' % (deviations.max(), np.sqrt(np.mean(deviations**2)), deviations.mean()))
+    if max_deviation is not None and deviations.max() > max_deviation:
+        print(' Maximum deviation of %.4f mm not reached' % max_deviation)
+    print('')
+    return surf
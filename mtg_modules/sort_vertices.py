@@ -14,6 +14,14 @@ Definition:
     The script allows the sorting of a list of vertices coordinates given as list [x,y,z]
     in ascending order of x and then acsending order of y inside each of the already sorted
     rows and columns parametrized by the grid size u × v.
+
+    Each vertex gets a column and a row index, and the grid is ordered by a single lexsort. The
+    columns are the groups of sorted x coordinates, the rows the groups of sorted y coordinates
+    inside each column (graded, jittered or slightly rotated grids). A given grid size splits
+    the groups at their largest gaps, a detected grid size (size 0) splits them at the gaps
+    larger than a tolerance. Missing vertices (empty grid cells), duplicate vertices (several
+    vertices in a cell), a grid size too small for the fitted surface and rows that do not line
+    up from a column to the next (strongly rotated grid) raise an error.
     
 -------------------------------------------------------------------------------------------------------------------------
 Update notes
@@ -21,10 +29,18 @@ Update notes
 Date		    Notes
 ¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
 2022-11-17		Polished the script + added comments and header
+2026-10-18		Grid size detection, vectorized sorting (np.lexsort) and missing / duplicate vertices errors
+2026-10-18		Given grid size split at the largest gaps, rows found inside each column
+2026-10-18		Minimum grid size and row alignment errors (degenerate detected grids)
 
 -------------------------------------------------------------------------------------------------------------------------
 """
 
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
 # ========================================================================================
 # FUNCTION DEFINITIONS
 # ========================================================================================
@@ -46,7 +62,121 @@ def sort_u(point):
 def sort_v(point):
     return point[1]
 
-# Function sort_u, sort_v
+# Function gridLines
+#
+#   Description: groups the coordinates of the vertices in the lines of the grid (columns on x,
+#                or rows on y inside each column): the sorted coordinates of each group are split
+#                at its largest gaps if the number of lines is known, or where the gap to the next
+#                coordinate is larger than the tolerance
+#
+#   Returns:
+#       lines : np.array of int, shape (N,), the line index of each vertex inside its group
+#       nb_lines : int, the largest number of lines of a group
+#
+#   Parameters:
+#       coords : np.array, shape (N,), the coordinates of the vertices
+#       nb_lines = None : int, the number of lines of each group (None or 0 : detected with the tolerance)
+#       tolerance = None : float, the largest gap inside a line (None : a quarter of the largest gap)
+#       groups = None : np.array of int, shape (N,), the group index (0 to G-1) of each vertex (None : a single group)
+#
+def gridLines(coords, nb_lines = None, tolerance = None, groups = None):
+    if len(coords) == 0:
+        return np.zeros(0, dtype=int), 0
+    groups = np.zeros(len(coords), dtype=int) if groups is None else groups
+    order = np.lexsort((coords, groups))
+    sorted_groups = groups[order]
+    new_group = np.concatenate(([True], np.diff(sorted_groups) != 0))
+    starts = np.flatnonzero(new_group)
+    gaps = np.concatenate(([0], np.diff(coords[order])))
+    gaps[new_group] = -np.inf
+
+    if nb_lines:
+        # Rank of each gap inside its group, from the largest
+        by_gap = np.lexsort((-gaps, sorted_groups))
+        rank = np.empty(len(coords), dtype=int)
+        rank[by_gap] = np.arange(len(coords)) - starts[sorted_groups[by_gap]]
+        breaks = (rank < int(nb_lines) - 1) & ~new_group
+    else:
+        if tolerance is None:
+            tolerance = 0.25 * gaps.max() if len(coords) > 1 else 0
+        breaks = gaps > tolerance
+
+    # Line index restarting at 0 in each group
+    counts = np.cumsum(breaks)
+    lines = np.empty(len(coords), dtype=int)
+    lines[order] = counts - counts[starts[sorted_groups]]
+    return lines, int(lines.max()) + 1
+
+# Function sortGrid
+#
+#   Description: orders the vertices of a grid in ascending order of x (columns, u), then of y
+#                inside each column (rows, v), and detects the grid size if it is not given.
+#                The columns of a given grid size are split at the largest gaps of x (or taken
+#                by chunks of v sorted vertices if the columns overlap, rotated grid), the rows
+#                are found inside each column so that the rows do not need to be aligned on y.
+#
+#   Returns:
+#       points : np.array, shape (u * v, 3), the sorted vertices
+#       u, v : int, the grid size following the u and v directions
+#
+#   Parameters:
+#       points : array-like, shape (N,3), the vertices
+#       u = None : int, the expected grid size following u (None or 0 : detected)
+#       v = None : int, the expected grid size following v (None or 0 : detected)
+#       tolerance = None : float, the largest gap between the coordinates of a grid line when the
+#                          grid size is detected (see gridLines)
+#       min_size = (2, 2) : tuple of int, the smallest grid size following u and v (degree + 1 of
+#                           the fitted surface)
+#
+def sortGrid(points, u = None, v = None, tolerance = None, min_size = (2, 2)):
+    points = np.asarray(points, dtype=float)
+    if u and v and len(points) != int(u) * int(v):
+        raise Exception('Error: the %s × %s grid needs %i vertices but the mesh has %i.' % (u, v, int(u) * int(v), len(points)))
+
+    columns, size_u = gridLines(points[:, 0], u, tolerance)
+    if u and v and np.any(np.bincount(columns, minlength=size_u) != int(v)):
+        # Overlapping columns (rotated grid) : chunks of v vertices sorted by x
+        columns = np.empty(len(points), dtype=int)
+        columns[np.argsort(points[:, 0], kind='stable')] = np.arange(len(points)) // int(v)
+        size_u = int(u)
+    rows, size_v = gridLines(points[:, 1], v, tolerance, columns)
+
+    if u and int(u) != size_u or v and int(v) != size_v:
+        raise Exception('Error: the grid size is %i × %i (%i vertices) but %s × %s was given.' % (size_u, size_v, len(points), u, v))
+    if size_u < min_size[0] or size_v < min_size[1]:
+        raise Exception('Error: the grid size is %i × %i but at least %i × %i is needed (rotated or irregular grid?), give the grid size or the tolerance.'
+                        % (size_u, size_v, min_size[0], min_size[1]))
+
+    # Vertices of each grid cell
+    cells = columns * size_v + rows
+    counts = np.bincount(cells, minlength=size_u * size_v)
+    if np.any(counts > 1):
+        cell = np.argmax(counts > 1)
+        duplicates = points[cells == cell]
+        raise Exception('Error: %i grid cells have duplicate vertices (%i vertices in the cell of column %i, row %i, at x = %g, y = %g).'
+                        % (np.sum(counts > 1), counts[cell], cell // size_v, cell % size_v, duplicates[0, 0], duplicates[0, 1]))
+    if np.any(counts == 0):
+        column_counts = np.bincount(columns, minlength=size_u)
+        column = np.argmin(column_counts)
+        raise Exception('Error: %i vertices are missing in the %i × %i grid (column %i has %i vertices, near x = %g).'
+                        % (np.sum(counts == 0), size_u, size_v, column, column_counts[column], points[columns == column, 0].mean()))
+
+    # Rows of the neighbouring columns must line up: a vertex must be closer on y to the same row of
+    #   the next column than to the previous or next row of the next column
+    grid = points[np.lexsort((rows, columns))]
+    y = grid[:, 1].reshape(size_u, size_v)
+    shifts = np.abs(np.diff(y, axis=0))
+    misaligned = np.zeros(shifts.shape, dtype=bool)
+    misaligned[:, :-1] |= np.abs(y[1:, 1:] - y[:-1, :-1]) < shifts[:, :-1]
+    misaligned[:, 1:] |= np.abs(y[1:, :-1] - y[:-1, 1:]) < shifts[:, 1:]
+    if np.any(misaligned):
+        column, row = np.argwhere(misaligned)[0]
+        raise Exception('Error: the rows of the %i × %i grid do not line up (row %i shifts by %g from column %i to %i, near x = %g), the grid is rotated or irregular.'
+                        % (size_u, size_v, row, shifts[column, row], column, column + 1, grid[column * size_v + row, 0]))
+
+    return grid, size_u, size_v
+
+# Function sortUV
 #
 #   Description: The function calls the sorting functions to order the vertices of the grid
 #                   that will be used to fit the NURBS surface
@@ -60,11 +190,4 @@ def sort_v(point):
 #       v : the grid size following the v-direction. same as the number of control points of a reconstructed surface.
 #
 def sortUV(myList, u, v):
-    finalList = []
-    myList.sort(key=sort_u)
-    for i in range(u):
-        temp = myList[i*v:(i+1)*v]
-        temp.sort(key=sort_v)
-        for j in temp:
-            finalList.append(j)
-    return finalList
\ No newline at end of file
+    return sortGrid(myList, u, v)[0].tolist()
@@ -0,0 +1,147 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(stl_reader.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Streaming reader of large binary STL files (scanner exports of hundreds of MB).
+
+    A binary STL file is an 80 bytes header, the number of triangles (uint32) and a 50 bytes
+    record per triangle (normal, 3 vertices as float32 and an attribute uint16). The file is
+    memory-mapped and the records are viewed as a structured NumPy array, without reading or
+    copying the file.
+
+    The unique vertices are found by chunks of triangles sized from a memory budget: the
+    vertices of each chunk are rounded and deduplicated, and the unique vertices of the
+    chunks are merged when they exceed the budget. Only the unique vertices are held in
+    memory with the current chunk.
+
+    ASCII STL files are read with numpy-stl (mesh.Mesh.from_file).
+
+Example of implementation:
+
+    vertices = stlVertices('prefs/meshes/sine_20x20.stl', decimals = 2, memory_budget = 64e6)
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the streaming binary STL reader (memory map, chunked vertex deduplication)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import os
+import numpy as np
+from stl import mesh
+
+# Record of a triangle in a binary STL file
+STL_RECORD = np.dtype([('normal', '<f4', (3,)), ('vectors', '<f4', (3, 3)), ('attr', '<u2')])
+
+# Working memory of the deduplication per triangle (3 vertices, float32 copies of np.unique)
+STL_BYTES_PER_TRIANGLE = 3 * 3 * 4 * 4
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function mapSTL
+#
+#   Description: memory-maps the triangle records of a binary STL file
+#
+#   Returns:
+#       np.memmap of STL_RECORD, shape (nb_triangles,), the read-only triangle records
+#       (None if the file is not a binary STL)
+#
+#   Parameters:
+#       path : string, the STL file path
+#
+def mapSTL(path):
+    size = os.path.getsize(path)
+    if size < 84:
+        return None
+    with open(path, 'rb') as fid:
+        fid.seek(80)
+        nb_triangles = int(np.frombuffer(fid.read(4), '<u4')[0])
+    if size != 84 + STL_RECORD.itemsize * nb_triangles:
+        return None
+    if nb_triangles == 0:
+        return np.zeros(0, STL_RECORD)
+    return np.memmap(path, STL_RECORD, 'r', 84, (nb_triangles,))
+
+# Function stlTriangles
+#
+#   Description: vertices of the triangles of a STL file, a view of the memory-mapped records
+#                for a binary file
+#
+#   Returns:
+#       np.array, shape (nb_triangles, 3, 3), the vertices of each triangle (float32)
+#
+#   Parameters:
+#       path : string, the STL file path
+#
+def stlTriangles(path):
+    records = mapSTL(path)
+    if records is None:
+        return mesh.Mesh.from_file(path).vectors
+    return records['vectors']
+
+# Function uniqueRows
+#
+#   Description: unique vertices of a float32 array, compared as 12 bytes keys (a single key
+#                sort, much faster than np.unique with axis=0)
+#
+#   Returns:
+#       np.array, shape (N,3), the unique vertices (float32, in the order of their bytes)
+#
+#   Parameters:
+#       vertices : np.array, shape (M,3), the vertices (float32)
+#
+def uniqueRows(vertices):
+    # -0.0 + 0.0 = 0.0, the same vertex has a single byte key
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32) + np.float32(0)
+    keys = np.unique(vertices.view(np.dtype((np.void, vertices.dtype.itemsize * 3))).ravel())
+    return keys.view(np.float32).reshape(-1, 3)
+
+# Function stlVertices
+#
+#   Description: unique rounded vertices of a STL file, deduplicated by chunks of triangles
+#
+#   Returns:
+#       np.array, shape (N,3), the unique vertices in ascending order (same as np.unique with axis=0)
+#
+#   Parameters:
+#       path : string, the STL file path
+#       decimals : int, the number of decimals of the rounded coordinates
+#       memory_budget : float, bytes, the working memory of the chunks and of the merges
+#
+def stlVertices(path, decimals = 2, memory_budget = 256e6):
+    triangles = stlTriangles(path)
+    chunk_size = max(int(memory_budget // STL_BYTES_PER_TRIANGLE), 1)
+    merge_size = max(int(memory_budget // (3 * 4 * 4)), 1)
+
+    uniques = []
+    pending = 0
+    for start in range(0, len(triangles), chunk_size):
+        chunk = np.around(np.asarray(triangles[start:start + chunk_size]).reshape(-1, 3), decimals)
+        uniques.append(uniqueRows(chunk))
+        pending += len(uniques[-1])
+
+        # Merge of the unique vertices of the chunks (duplicates across chunks)
+        if pending > merge_size and len(uniques) > 1:
+            uniques = [uniqueRows(np.concatenate(uniques))]
+            pending = len(uniques[0])
+
+    vertices = uniqueRows(np.concatenate(uniques)) if len(uniques) else np.zeros((0, 3), dtype=np.float32)
+    return vertices[np.lexsort(vertices.T[::-1])]
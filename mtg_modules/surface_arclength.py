@@ -0,0 +1,150 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_arclength.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Cumulative arc length tables along the u and v isocurves of the projection surface.
+
+    The isocurves of a regular grid of fixed parameters are sampled following the sweep
+    parameter. The length of each sample interval is integrated from the norm of the
+    surface derivative (2 points Gauss-Legendre quadrature) and accumulated from the
+    surface border. The tables are computed once per surface.
+
+    The arc length at a uv pair is then interpolated in the tables (linearly between the
+    two neighbouring isocurves), and the sweep parameter at a given arc length on the
+    isocurve of a uv pair is found by a binary search plus a linear interpolation: placing
+    a point at a distance along the surface from another one needs no closest point search.
+
+Example of implementation:
+
+    surfArc = arcLengthTables(surfaceEvaluator(surf), 256)
+    s = surfArc.length([[0.2, 0.5]], 0)
+    uv, inside = surfArc.paramAt([[0.2, 0.5]], 0, s + 10)
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the arc length tables (Gauss-Legendre lengths, binary search of the parameters)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class arcLengthTables
+#
+#   Description: cumulative arc lengths of the u and v isocurves of a surface
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator (or any evaluator with a derivatives method), the surface
+#       samples : int, number of samples following the sweep and the fixed parameters of the isocurves
+#
+class arcLengthTables:
+    def __init__(self, evaluator, samples = 256):
+        self.params = np.linspace(0, 1, samples)
+
+        # Gauss-Legendre points of the sample intervals
+        h = self.params[1] - self.params[0]
+        gauss = np.concatenate((self.params[:-1] + h * (0.5 - 0.5 / np.sqrt(3)),
+                                self.params[:-1] + h * (0.5 + 0.5 / np.sqrt(3))))
+
+        # tables[d][i, j] : arc length along direction d (0 : u, 1 : v) from the border to the sample i
+        #   of the sweep parameter, on the isocurve of the sample j of the fixed parameter
+        self.tables = []
+        for direction in (0, 1):
+            sweep, fixed = np.meshgrid(gauss, self.params, indexing='ij')
+            uv = np.stack((sweep, fixed) if direction == 0 else (fixed, sweep), axis=-1).reshape(-1, 2)
+            ders = evaluator.derivatives(uv, 1)
+            speed = np.linalg.norm(ders[:, 1, 0] if direction == 0 else ders[:, 0, 1], axis=1).reshape(len(gauss), samples)
+            lengths = 0.5 * h * (speed[:samples - 1] + speed[samples - 1:])
+            self.tables.append(np.concatenate((np.zeros((1, samples)), np.cumsum(lengths, axis=0)), axis=0))
+
+    # Method isocurves
+    #
+    #   Description: cumulative arc lengths of the isocurves through many uv pairs, interpolated
+    #                linearly between the two neighbouring isocurves of the table
+    #
+    #   Returns:
+    #       np.array, shape (N, samples), the cumulative arc length at the samples of each isocurve
+    #
+    #   Parameters:
+    #       uv : np.array, shape (N,2), the uv pairs
+    #       direction : int, the sweep direction of the isocurves (0 : u, 1 : v)
+    #
+    def isocurves(self, uv, direction):
+        fixed = np.clip(uv[:, 1 - direction], 0, 1) * (len(self.params) - 1)
+        j = np.minimum(np.floor(fixed).astype(int), len(self.params) - 2)
+        w = (fixed - j)[:, None]
+        table = self.tables[direction]
+        return (1 - w) * table[:, j].T + w * table[:, j + 1].T
+
+    # Method length
+    #
+    #   Description: arc length from the surface border along the isocurves through many uv pairs
+    #
+    #   Returns:
+    #       np.array, shape (N,), the arc lengths
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #       direction : int, the sweep direction of the isocurves (0 : u, 1 : v)
+    #
+    def length(self, uv, direction):
+        uv = np.atleast_2d(np.asarray(uv, dtype=float))
+        curves = self.isocurves(uv, direction)
+        sweep = np.clip(uv[:, direction], 0, 1) * (len(self.params) - 1)
+        i = np.minimum(np.floor(sweep).astype(int), len(self.params) - 2)
+        rows = np.arange(len(uv))
+        t = sweep - i
+        return (1 - t) * curves[rows, i] + t * curves[rows, i + 1]
+
+    # Method paramAt
+    #
+    #   Description: moves many uv pairs along their isocurve to a given arc length
+    #
+    #   Returns:
+    #       uv : np.array, shape (N,2), the uv pairs at the arc lengths
+    #       inside : np.array of bool, shape (N,), False if the arc length is outside the isocurve
+    #                (the uv pair is clamped to the surface border)
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #       direction : int, the sweep direction of the isocurves (0 : u, 1 : v)
+    #       lengths : array-like, shape (N,), the arc lengths from the surface border
+    #
+    def paramAt(self, uv, direction, lengths):
+        uv = np.array(np.atleast_2d(uv), dtype=float)
+        lengths = np.broadcast_to(np.asarray(lengths, dtype=float), (len(uv),))
+        curves = self.isocurves(uv, direction)
+        inside = (lengths >= 0) & (lengths <= curves[:, -1])
+
+        # Binary search of the sample interval of each arc length, then linear interpolation
+        rows = np.arange(len(uv))
+        lo = np.zeros(len(uv), dtype=int)
+        hi = np.full(len(uv), len(self.params) - 1)
+        while np.any(hi - lo > 1):
+            mid = (lo + hi) // 2
+            below = curves[rows, mid] <= lengths
+            lo = np.where(below, mid, lo)
+            hi = np.where(below, hi, mid)
+        span = curves[rows, hi] - curves[rows, lo]
+        t = np.clip((lengths - curves[rows, lo]) / np.where(span > 0, span, 1), 0, 1)
+        uv[:, direction] = self.params[lo] + t * (self.params[hi] - self.params[lo])
+        return uv, inside
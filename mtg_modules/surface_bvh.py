@@ -0,0 +1,436 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_bvh.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Bézier patch decomposition and bounding volume hierarchy (BVH) of the projection surface
+    for batch segment / ray intersections and minimum distance queries.
+
+    The NURBS is split into Bézier patches by knot insertion (The NURBS Book, A5.6), one
+    patch per pair of non-degenerate knot spans. By the convex hull property, each patch
+    is inside the axis-aligned bounding box (AABB) of its control points. A BVH is built
+    over the patch boxes (median split along the largest extent).
+
+    Queries are done in batch: the BVH is traversed for all the queries together, keeping
+    the (query, node) pairs whose boxes overlap, down to the (query, patch) candidate pairs.
+    Each candidate pair is then solved by Newton iterations on the surface, started inside
+    the patch:
+        - segment / ray intersection : S(u,v) = A + t (B - A), unknowns u, v, t
+        - minimum distance : point inversion of the query point (projectPoints)
+
+Example of implementation:
+
+    surfBVH = surfaceBVH(surfaceEvaluator(surf))
+    hit, t, uv, points = surfBVH.intersectSegments(starts, ends)
+    uv, points, distances = surfBVH.closestPoints(query_points)
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version (Bézier decomposition, BVH, segment / ray intersection, minimum distance)
+                Generic box tree (boxTree) shared with the patch index of multi-patch surfaces
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# MTG imports
+from mtg_modules.surface_evaluator import normalizeRows
+from mtg_modules.surface_projection import projectPoints
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function decomposeCurve
+#
+#   Description: decomposes a B-spline curve into Bézier segments by knot insertion
+#                (The NURBS Book, A5.6). The control points can have any trailing
+#                dimensions, so a whole control net is decomposed along one direction at once.
+#
+#   Returns:
+#       bezier : np.array, shape (nb_segments, degree+1, ...), the control points of each Bézier segment
+#       breaks : np.array, shape (nb_segments+1,), the parameters at the ends of the segments
+#
+#   Parameters:
+#       degree : int, degree of the curve
+#       knotvector : np.array, the knot vector
+#       ctrlpts : np.array, shape (nb_ctrlpts, ...), the (weighted) control points
+#
+def decomposeCurve(degree, knotvector, ctrlpts):
+    p = degree
+    U = np.asarray(knotvector, dtype=float)
+    m = len(U) - 1
+    breaks = np.unique(U[p:m - p + 1])
+    bezier = np.zeros((len(breaks) - 1, p + 1) + ctrlpts.shape[1:])
+    alphas = np.zeros(p)
+
+    a = p
+    b = p + 1
+    nb = 0
+    bezier[nb, 0:p + 1] = ctrlpts[0:p + 1]
+    while b < m:
+        i = b
+        while b < m and U[b + 1] == U[b]:
+            b += 1
+        mult = b - i + 1
+        if mult < p:
+            # Insert the knot U[b] r times
+            numer = U[b] - U[a]
+            for j in range(p, mult, -1):
+                alphas[j - mult - 1] = numer / (U[a + j] - U[a])
+            r = p - mult
+            for j in range(1, r + 1):
+                save = r - j
+                s = mult + j
+                for k in range(p, s - 1, -1):
+                    alpha = alphas[k - s]
+                    bezier[nb, k] = alpha * bezier[nb, k] + (1.0 - alpha) * bezier[nb, k - 1]
+                if b < m:
+                    bezier[nb + 1, save] = bezier[nb, p]
+        nb += 1
+        if b < m:
+            # Initialize the next segment
+            bezier[nb, p - mult:p + 1] = ctrlpts[b - mult:b + 1]
+            a = b
+            b += 1
+
+    return bezier, breaks
+
+# Function bezierPatches
+#
+#   Description: decomposes a NURBS surface into Bézier patches (decomposition along u, then v)
+#
+#   Returns:
+#       patches : np.array, shape (nb_spans_u, nb_spans_v, degree_u+1, degree_v+1, 4), the
+#                 weighted control points of each patch
+#       breaks_u, breaks_v : np.array, the parameters at the ends of the patches
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator, the batch evaluator of the surface
+#
+def bezierPatches(evaluator):
+    p = evaluator.degree_u
+    q = evaluator.degree_v
+
+    # Along u: shape (nb_spans_u, p+1, size_v, 4)
+    strips, breaks_u = decomposeCurve(p, evaluator.knotvector_u, evaluator.ctrlptsw)
+
+    # Along v, the v index first: shape (nb_spans_v, q+1, nb_spans_u, p+1, 4)
+    patches, breaks_v = decomposeCurve(q, evaluator.knotvector_v, np.moveaxis(strips, 2, 0))
+    return np.transpose(patches, (2, 0, 3, 1, 4)), breaks_u, breaks_v
+
+# Function boxDistances
+#
+#   Description: distance between points and axis-aligned boxes (null if inside)
+#
+#   Returns:
+#       np.array, shape (N,), the distances
+#
+#   Parameters:
+#       points : np.array, shape (N,3), the points
+#       box_min, box_max : np.array, shape (N,3), the box corners
+#
+def boxDistances(points, box_min, box_max):
+    return np.linalg.norm(np.maximum(np.maximum(box_min - points, points - box_max), 0), axis=1)
+
+# Function segmentBoxOverlaps
+#
+#   Description: slab test between segments and axis-aligned boxes
+#
+#   Returns:
+#       np.array of bool, shape (N,), True if the segment crosses the box
+#
+#   Parameters:
+#       starts, ends : np.array, shape (N,3), the segment ends
+#       box_min, box_max : np.array, shape (N,3), the box corners
+#
+def segmentBoxOverlaps(starts, ends, box_min, box_max):
+    direction = ends - starts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = 1.0 / direction
+        t1 = (box_min - starts) * inv
+        t2 = (box_max - starts) * inv
+    t_near = np.where(direction == 0, -np.inf, np.minimum(t1, t2))
+    t_far = np.where(direction == 0, np.inf, np.maximum(t1, t2))
+
+    # Segment parallel to a slab: must be between its planes
+    outside = (direction == 0) & ((starts < box_min) | (starts > box_max))
+    t_enter = np.maximum(np.max(t_near, axis=1), 0)
+    t_exit = np.minimum(np.min(t_far, axis=1), 1)
+    return (t_enter <= t_exit) & ~np.any(outside, axis=1)
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class boxTree
+#
+#   Description: bounding volume hierarchy of axis-aligned boxes (any dimension), built by
+#                median splits along the largest extent of the box centers
+#
+#   Parameters:
+#       box_min, box_max : np.array, shape (nb_boxes, dim), the box corners
+#       leaf_size : int, maximum number of boxes in a leaf node
+#
+class boxTree:
+    def __init__(self, box_min, box_max, leaf_size = 4):
+        self.box_min = box_min
+        self.box_max = box_max
+        self.leaf_size = leaf_size
+        self.build()
+
+    # Method build
+    #
+    #   Description: builds the tree nodes. Node k has the bounding box node_min[k], node_max[k]
+    #                and either two children (node_left[k], node_right[k]) or, for a leaf, the
+    #                boxes order[node_start[k]:node_end[k]].
+    #
+    def build(self):
+        centers = (self.box_min + self.box_max) / 2
+        self.order = np.arange(len(centers))
+        node_min, node_max, node_left, node_right, node_start, node_end = [], [], [], [], [], []
+
+        stack = [(0, len(centers), -1, False)]
+        while stack:
+            start, end, parent, isRight = stack.pop()
+            k = len(node_min)
+            if parent >= 0:
+                if isRight:
+                    node_right[parent] = k
+                else:
+                    node_left[parent] = k
+            idx = self.order[start:end]
+            node_min.append(self.box_min[idx].min(axis=0))
+            node_max.append(self.box_max[idx].max(axis=0))
+            node_left.append(-1)
+            node_right.append(-1)
+            node_start.append(start)
+            node_end.append(end)
+
+            if end - start > self.leaf_size:
+                # Median split along the largest extent of the box centers
+                axis = np.argmax(np.ptp(centers[idx], axis=0))
+                self.order[start:end] = idx[np.argsort(centers[idx, axis], kind='stable')]
+                middle = (start + end) // 2
+                stack.append((middle, end, k, True))
+                stack.append((start, middle, k, False))
+
+        self.node_min = np.array(node_min)
+        self.node_max = np.array(node_max)
+        self.node_left = np.array(node_left)
+        self.node_right = np.array(node_right)
+        self.node_start = np.array(node_start)
+        self.node_end = np.array(node_end)
+
+    # Method candidates
+    #
+    #   Description: traverses the tree for many queries at once and returns the (query, box)
+    #                pairs that pass the overlap test
+    #
+    #   Returns:
+    #       queries, boxes : np.array of int, the query and box indices of the candidate pairs
+    #
+    #   Parameters:
+    #       nb_queries : int, number of queries
+    #       overlaps : function (query indices, box_min, box_max) -> np.array of bool, the overlap test
+    #
+    def candidates(self, nb_queries, overlaps):
+        queries = np.arange(nb_queries)
+        nodes = np.zeros(nb_queries, dtype=int)
+        found_queries, found_boxes = [], []
+
+        while len(queries) > 0:
+            keep = overlaps(queries, self.node_min[nodes], self.node_max[nodes])
+            queries, nodes = queries[keep], nodes[keep]
+
+            # Leaves: test each of their boxes
+            leaf = self.node_left[nodes] < 0
+            for query, node in zip(queries[leaf], nodes[leaf]):
+                boxes = self.order[self.node_start[node]:self.node_end[node]]
+                hits = overlaps(np.full(len(boxes), query), self.box_min[boxes], self.box_max[boxes])
+                found_queries.append(np.full(np.count_nonzero(hits), query))
+                found_boxes.append(boxes[hits])
+
+            # Inner nodes: continue with both children
+            queries = np.concatenate((queries[~leaf], queries[~leaf]))
+            nodes = np.concatenate((self.node_left[nodes[~leaf]], self.node_right[nodes[~leaf]]))
+
+        if len(found_queries) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        return np.concatenate(found_queries), np.concatenate(found_boxes)
+
+# Class surfaceBVH
+#
+#   Description: bounding volume hierarchy of the Bézier patches of a surface
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator, the batch evaluator of the surface
+#       leaf_size : int, maximum number of patches in a leaf node
+#
+class surfaceBVH(boxTree):
+    def __init__(self, evaluator, leaf_size = 4):
+        self.evaluator = evaluator
+
+        # Bézier patches, their uv domain and their bounding box (convex hull of the control points)
+        patches, breaks_u, breaks_v = bezierPatches(evaluator)
+        nb_u, nb_v = patches.shape[0:2]
+        ctrlpts = patches[..., 0:3] / patches[..., 3, None]
+        self.patch_min = ctrlpts.min(axis=(2, 3)).reshape(-1, 3)
+        self.patch_max = ctrlpts.max(axis=(2, 3)).reshape(-1, 3)
+        iu, iv = np.meshgrid(np.arange(nb_u), np.arange(nb_v), indexing='ij')
+        self.patch_uv_min = np.stack((breaks_u[iu.ravel()], breaks_v[iv.ravel()]), axis=1)
+        self.patch_uv_max = np.stack((breaks_u[iu.ravel() + 1], breaks_v[iv.ravel() + 1]), axis=1)
+
+        # The corners of the Bézier patches are on the surface
+        self.corners = ctrlpts[:, :, [0, 0, -1, -1], [0, -1, 0, -1]].reshape(-1, 3)
+        boxTree.__init__(self, self.patch_min, self.patch_max, leaf_size)
+
+    # Method intersectSegments
+    #
+    #   Description: first intersection of many segments [A, B] with the surface
+    #
+    #   Returns:
+    #       hit : np.array of bool, shape (N,), True if the segment crosses the surface
+    #       t : np.array, shape (N,), the position of the intersection on the segment (A + t (B - A)),
+    #           np.inf if no intersection
+    #       uv : np.array, shape (N,2), the uv of the intersection
+    #       points : np.array, shape (N,3), the intersection points
+    #
+    #   Parameters:
+    #       starts, ends : array-like, shape (N,3), the segment ends A and B
+    #       tolerance : float, mm, the tolerance on the intersection point
+    #       max_iterations : int, the maximum number of Newton iterations
+    #
+    def intersectSegments(self, starts, ends, tolerance = 1e-6, max_iterations = 20):
+        starts = np.atleast_2d(np.asarray(starts, dtype=float))
+        ends = np.atleast_2d(np.asarray(ends, dtype=float))
+        nb = len(starts)
+        hit = np.zeros(nb, dtype=bool)
+        t_hit = np.full(nb, np.inf)
+        uv_hit = np.zeros((nb, 2))
+        points_hit = np.zeros((nb, 3))
+
+        queries, patches = self.candidates(nb, lambda q, box_min, box_max: segmentBoxOverlaps(starts[q], ends[q], box_min, box_max))
+        if len(queries) == 0:
+            return hit, t_hit, uv_hit, points_hit
+
+        # Newton seeds: center and quarter points of each candidate patch
+        seeds = np.array([[0.5, 0.5], [0.25, 0.25], [0.25, 0.75], [0.75, 0.25], [0.75, 0.75]])
+        queries = np.repeat(queries, len(seeds))
+        patches = np.repeat(patches, len(seeds))
+        uv_min = self.patch_uv_min[patches]
+        uv_max = self.patch_uv_max[patches]
+        uv = uv_min + np.tile(seeds, (len(queries) // len(seeds), 1)) * (uv_max - uv_min)
+        a = starts[queries]
+        d = ends[queries] - a
+
+        # Initial t: projection of the seed point on the segment
+        t = np.clip(np.sum((self.evaluator.points(uv) - a) * d, axis=1) / np.maximum(np.sum(d * d, axis=1), 1e-300), 0, 1)
+
+        # Newton iterations on F(u,v,t) = S(u,v) - A - t d, jacobian [Su, Sv, -d]
+        converged = np.zeros(len(queries), dtype=bool)
+        for iteration in range(max_iterations):
+            skl = self.evaluator.derivatives(uv, 1)
+            residuals = skl[:, 0, 0] - a - t[:, None] * d
+            converged = np.linalg.norm(residuals, axis=1) <= tolerance
+            if np.all(converged):
+                break
+            jacobians = np.stack((skl[:, 1, 0], skl[:, 0, 1], -d), axis=2)
+            singular = np.abs(np.linalg.det(jacobians)) < 1e-300
+            jacobians[singular] = np.eye(3)
+            step = np.linalg.solve(jacobians, -residuals[..., None])[..., 0]
+            step[singular | converged] = 0
+
+            # The solution is kept in the patch (with a margin) so it does not converge elsewhere
+            margin = 0.5 * (uv_max - uv_min)
+            uv = np.clip(uv + step[:, 0:2], np.maximum(uv_min - margin, 0), np.minimum(uv_max + margin, 1))
+            t = t + step[:, 2]
+
+        # Valid intersections are on the segment and inside their patch
+        eps = 1e-9
+        valid = (converged & (t >= -eps) & (t <= 1 + eps)
+                 & np.all(uv >= self.patch_uv_min[patches] - eps, axis=1) & np.all(uv <= self.patch_uv_max[patches] + eps, axis=1))
+
+        # First intersection of each segment
+        for k in np.flatnonzero(valid):
+            query = queries[k]
+            if t[k] < t_hit[query]:
+                hit[query] = True
+                t_hit[query] = min(max(t[k], 0), 1)
+                uv_hit[query] = uv[k]
+        points_hit[hit] = self.evaluator.points(uv_hit[hit])
+        return hit, t_hit, uv_hit, points_hit
+
+    # Method intersectRays
+    #
+    #   Description: first intersection of many rays with the surface
+    #
+    #   Returns:
+    #       hit, t, uv, points : same as intersectSegments, t being the distance along the ray direction
+    #
+    #   Parameters:
+    #       origins : array-like, shape (N,3), the ray origins
+    #       directions : array-like, shape (N,3), the ray directions
+    #
+    def intersectRays(self, origins, directions):
+        origins = np.atleast_2d(np.asarray(origins, dtype=float))
+        directions = normalizeRows(np.atleast_2d(np.asarray(directions, dtype=float)))
+
+        # Segments long enough to leave the bounding box of the surface
+        length = np.max(np.linalg.norm(origins - (self.node_min[0] + self.node_max[0]) / 2, axis=1)) + np.linalg.norm(self.node_max[0] - self.node_min[0])
+        hit, t, uv, points = self.intersectSegments(origins, origins + length * directions)
+        t[hit] = t[hit] * length
+        return hit, t, uv, points
+
+    # Method closestPoints
+    #
+    #   Description: minimum distance between many points and the surface. The distance is
+    #                signed: negative if the point is on the other side of the surface normal.
+    #
+    #   Returns:
+    #       uv : np.array, shape (N,2), the uv of the closest surface points
+    #       points : np.array, shape (N,3), the closest surface points
+    #       distances : np.array, shape (N,), the signed distances
+    #
+    #   Parameters:
+    #       query_points : array-like, shape (N,3), the points
+    #       tolerance : float, mm, the convergence tolerance of the point inversion
+    #
+    def closestPoints(self, query_points, tolerance = 1e-6):
+        query_points = np.atleast_2d(np.asarray(query_points, dtype=float))
+        nb = len(query_points)
+
+        # Upper bound of the distance: the closest patch corner (on the surface)
+        bounds = np.array([np.min(np.linalg.norm(self.corners - point, axis=1)) for point in query_points])
+
+        # Patches whose box is not farther than the upper bound
+        queries, patches = self.candidates(nb, lambda q, box_min, box_max: boxDistances(query_points[q], box_min, box_max) <= bounds[q])
+        uv_start = (self.patch_uv_min[patches] + self.patch_uv_max[patches]) / 2
+        uv, points = projectPoints(self.evaluator, query_points[queries], uv_start, tolerance)[0:2]
+        distances = np.linalg.norm(points - query_points[queries], axis=1)
+
+        # Closest of the candidates of each query
+        best = np.full(nb, -1)
+        for k in np.argsort(distances)[::-1]:
+            best[queries[k]] = k
+        uv_best = uv[best]
+        skl = self.evaluator.derivatives(uv_best, 1)
+        normals = normalizeRows(np.cross(skl[:, 1, 0], skl[:, 0, 1]))
+        points_best = skl[:, 0, 0]
+        signs = np.where(np.sum((query_points - points_best) * normals, axis=1) < 0, -1.0, 1.0)
+        return uv_best, points_best, signs * distances[best]
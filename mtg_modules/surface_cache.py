@@ -0,0 +1,93 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_cache.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Content hashes and file names of the data precomputed from a projection surface
+    and saved next to it in the mesh folder (e.g. prefs/meshes/).
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version (array and file content hashes, cache file names)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import os
+import hashlib
+import numpy as np
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function contentHash
+#
+#   Description: calculates a hash of arrays and parameters. Arrays are hashed with
+#                their shape, type and raw bytes, other values with their representation.
+#
+#   Returns:
+#       string, the hexadecimal SHA-1 digest
+#
+#   Parameters:
+#       *items : np.array, list, float, int or string, the content to hash
+#
+def contentHash(*items):
+    sha = hashlib.sha1()
+    for item in items:
+        if isinstance(item, np.ndarray):
+            item = np.ascontiguousarray(item)
+            sha.update(str((item.shape, item.dtype.str)).encode())
+            sha.update(item.tobytes())
+        else:
+            sha.update(repr(item).encode())
+    return sha.hexdigest()
+
+# Function fileHash
+#
+#   Description: calculates the hash of the content of a file, read by chunks
+#
+#   Returns:
+#       string, the hexadecimal SHA-1 digest
+#
+#   Parameters:
+#       path : string, the file path
+#       chunk_size : int, number of bytes read at once
+#
+def fileHash(path, chunk_size = 1 << 20):
+    sha = hashlib.sha1()
+    with open(path, 'rb') as fid:
+        for chunk in iter(lambda: fid.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+# Function cachePath
+#
+#   Description: builds the file name of data precomputed from a surface file,
+#                located next to it: <surface name>_<tag>_<key>.npz
+#
+#   Returns:
+#       string, the cache file path
+#
+#   Parameters:
+#       source : string, the path of the surface file (json or stl)
+#       tag : string, the kind of precomputed data (e.g. 'tables')
+#       key : string, the content hash identifying the precomputed data
+#       extension : string, the cache file extension
+#
+def cachePath(source, tag, key, extension = '.npz'):
+    return os.path.splitext(source)[0] + '_' + tag + '_' + key[0:16] + extension
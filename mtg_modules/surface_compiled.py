@@ -0,0 +1,243 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_compiled.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Compiled binary format of the projection surfaces.
+
+    The first time a json surface (or a surface interpolated from a stl file) is used,
+    its definition is saved next to it in an uncompressed npz file: degrees, knot vectors,
+    weighted control points, span tables of the knot vectors and evaluation delta of each
+    of its patches (a json file can hold several surfaces). The next runs load the
+    compiled file instead of parsing the json (exchange.import_json) or interpolating
+    the stl: the arrays are memory-mapped directly in the npz file.
+
+    The compiled file records the size, the modification time and the content hash of
+    its source file. It is stale, and compiled again, if the source changed (same size
+    and time, or else same content hash, means unchanged).
+
+    The compiled file also records the parameters used to create the surface from its
+    source (stl interpolation). The surfaces already fitted on an unchanged stl file are
+    listed with their parameters (compiledParams), most recently used first, so the fit
+    can be reused without asking its parameters again.
+
+Example of implementation:
+
+    evaluators, deltas = loadCompiledSurface('prefs/meshes/sine_20x20.json')
+    if evaluators is None:
+        surfs = exchange.import_json('prefs/meshes/sine_20x20.json')
+        evaluators, deltas = compileSurface(surfs, 'prefs/meshes/sine_20x20.json')
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the compiled surface format (memory-mapped npz, staleness check)
+                Version 2: several patches per compiled file
+                Fit parameters recorded in the compiled file, listed by compiledParams
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import os
+import glob
+import json
+import struct
+import zipfile
+import numpy as np
+
+# MTG imports
+from mtg_modules.surface_cache import contentHash, fileHash, cachePath
+from mtg_modules.surface_evaluator import surfaceEvaluator
+
+# Version of the compiled surface format (compiled files of another version are compiled again)
+COMPILED_SURFACE_VERSION = 2
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function mapArchive
+#
+#   Description: memory-maps the arrays of an uncompressed npz file (np.load does not
+#                memory-map the arrays of an archive)
+#
+#   Returns:
+#       dict, the read-only arrays by name
+#
+#   Parameters:
+#       path : string, the npz file path
+#
+def mapArchive(path):
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as fid:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise Exception('Cannot memory-map the compressed array %s of %s' % (info.filename, path))
+
+            # Start of the npy data: local file header (30 bytes), file name and extra field
+            fid.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', fid.read(30)[26:30])
+            fid.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(fid)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(fid)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(fid)
+
+            name = os.path.splitext(info.filename)[0]
+            arrays[name] = np.memmap(path, dtype, 'r', fid.tell(), shape, 'F' if fortran else 'C')
+    return arrays
+
+# Function compiledPath
+#
+#   Description: builds the path of the compiled file of a surface source
+#
+#   Returns:
+#       string, the compiled file path
+#
+#   Parameters:
+#       source : string, the path of the surface file (json or stl)
+#       *params : the parameters used to create the surface from the source (stl interpolation)
+#
+def compiledPath(source, *params):
+    return cachePath(source, 'compiled', contentHash(COMPILED_SURFACE_VERSION, *params))
+
+# Function isStale
+#
+#   Description: checks a compiled file against its format version and its source file (same
+#                size and modification time, or else same content hash, means unchanged)
+#
+#   Returns:
+#       bool, True if the compiled file must be compiled again
+#
+#   Parameters:
+#       compiled : dict, the arrays of the compiled file (see mapArchive)
+#       source : string, the path of the surface file (json or stl)
+#       path : string, the compiled file path
+#
+def isStale(compiled, source, path):
+    if int(compiled['version'][0]) != COMPILED_SURFACE_VERSION:
+        return True
+
+    stat = os.stat(source)
+    if int(compiled['source_size'][0]) != stat.st_size:
+        print('Compiled surface %s is stale (source size changed)' % path)
+        return True
+    if float(compiled['source_mtime'][0]) != stat.st_mtime and str(compiled['source_hash'][0]) != fileHash(source):
+        print('Compiled surface %s is stale (source content changed)' % path)
+        return True
+    return False
+
+# Function compileSurface
+#
+#   Description: saves the compiled file of the patches of a surface and returns their evaluators
+#
+#   Returns:
+#       evaluators : list of surfaceEvaluator, the batch evaluators of the patches
+#       deltas : list of list of float, the evaluation delta of each patch following u and v
+#
+#   Parameters:
+#       surfs : list of NURBS-Python surfaces, the patches of the surface
+#       source : string, the path of the surface file (json or stl)
+#       *params : the parameters used to create the surface from the source (stl interpolation)
+#
+def compileSurface(surfs, source, *params):
+    evaluators = [surfaceEvaluator(surf) for surf in surfs]
+    deltas = [[float(d) for d in surf.delta] for surf in surfs]
+    stat = os.stat(source)
+    arrays = {'version': np.array([COMPILED_SURFACE_VERSION]),
+              'nb_patches': np.array([len(surfs)]),
+              'source_size': np.array([stat.st_size]),
+              'source_mtime': np.array([stat.st_mtime]),
+              'source_hash': np.array([fileHash(source)]),
+              'params': np.array([json.dumps(list(params))])}
+    for k, evaluator in enumerate(evaluators):
+        patch = 'patch%i_' % k
+        arrays[patch + 'degrees'] = np.array([evaluator.degree_u, evaluator.degree_v])
+        arrays[patch + 'knotvector_u'] = evaluator.knotvector_u
+        arrays[patch + 'knotvector_v'] = evaluator.knotvector_v
+        arrays[patch + 'ctrlptsw'] = evaluator.ctrlptsw
+        arrays[patch + 'rational'] = np.array([evaluator.rational])
+        arrays[patch + 'span_table_u'] = evaluator.span_tables[0]
+        arrays[patch + 'span_table_v'] = evaluator.span_tables[1]
+        arrays[patch + 'delta'] = np.array(deltas[k])
+
+    path = compiledPath(source, *params)
+    np.savez(path, **arrays)
+    print('Compiled surface saved to : %s\n' % path)
+    return evaluators, deltas
+
+# Function loadCompiledSurface
+#
+#   Description: loads the compiled file of a surface if it exists and is not stale
+#
+#   Returns:
+#       evaluators : list of surfaceEvaluator, the batch evaluators of the patches (None if the
+#                    compiled file is missing or stale)
+#       deltas : list of list of float, the evaluation delta of each patch following u and v
+#                (None if the compiled file is missing or stale)
+#
+#   Parameters:
+#       source : string, the path of the surface file (json or stl)
+#       *params : the parameters used to create the surface from the source (stl interpolation)
+#
+def loadCompiledSurface(source, *params):
+    path = compiledPath(source, *params)
+    if not os.path.exists(path):
+        return None, None
+
+    compiled = mapArchive(path)
+    if isStale(compiled, source, path):
+        return None, None
+
+    evaluators = []
+    deltas = []
+    for k in range(int(compiled['nb_patches'][0])):
+        patch = 'patch%i_' % k
+        evaluator = surfaceEvaluator()
+        evaluator.degree_u, evaluator.degree_v = [int(d) for d in compiled[patch + 'degrees']]
+        evaluator.knotvector_u = compiled[patch + 'knotvector_u']
+        evaluator.knotvector_v = compiled[patch + 'knotvector_v']
+        evaluator.ctrlptsw = compiled[patch + 'ctrlptsw']
+        evaluator.rational = bool(compiled[patch + 'rational'][0])
+        evaluator.span_tables = [compiled[patch + 'span_table_u'], compiled[patch + 'span_table_v']]
+        evaluators.append(evaluator)
+        deltas.append([float(d) for d in compiled[patch + 'delta']])
+    print('Loading compiled surface from : %s...\n' % path)
+
+    # Last use of the compiled file (order of compiledParams)
+    os.utime(path)
+    return evaluators, deltas
+
+# Function compiledParams
+#
+#   Description: lists the parameters of the compiled files of a surface source that are not
+#                stale, most recently used first
+#
+#   Returns:
+#       list of list, the parameters used to create each compiled surface from the source
+#
+#   Parameters:
+#       source : string, the path of the surface file (json or stl)
+#
+def compiledParams(source):
+    found = []
+    for path in glob.glob(cachePath(glob.escape(source), 'compiled', '*')):
+        compiled = mapArchive(path)
+        if 'params' in compiled and not isStale(compiled, source, path):
+            found.append((os.path.getmtime(path), json.loads(str(compiled['params'][0]))))
+    found.sort(key=lambda item: item[0], reverse=True)
+    return [params for mtime, params in found]
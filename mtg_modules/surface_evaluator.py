@@ -0,0 +1,537 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_evaluator.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Vectorized evaluation of the NURBS projection surface.
+
+    The NURBS-Python module evaluates the surface one uv pair at a time in pure Python.
+    The surfaceEvaluator class copies the knot vectors and the (weighted) control points
+    of the surface in NumPy arrays once, then evaluates points, derivatives, normals and
+    tangents for a whole (N,2) array of uv pairs in a single call using the basis
+    function matrices of each direction.
+
+Example of implementation:
+
+    surfEval = surfaceEvaluator(surf)
+    points, normals, tangents_u, tangents_v = surfEval.evaluate([[0.1, 0.2], [0.3, 0.4]])
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the batch evaluator (points, normals, tangents and derivatives)
+                Content hash of the surface definition
+                Normal curvature along a direction from the fundamental forms (normalCurvatures)
+                Span tables of the knot vectors for a constant time knot span search
+                Principal curvatures from the fundamental forms (principalCurvatures)
+                Compiled kernel of the derivatives when enabled (surface_kernels)
+                Kernels given per evaluator (withKernels) in place of the process-wide switch
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import copy
+import numpy as np
+from math import factorial
+
+# MTG imports
+from mtg_modules.surface_cache import contentHash
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function findSpans
+#
+#   Description: finds the knot span index of each parameter (The NURBS Book, A2.1)
+#
+#   Returns:
+#       spans : np.array of int, the knot span index of each parameter
+#
+#   Parameters:
+#       degree : int, degree of the basis functions
+#       knotvector : np.array, the knot vector
+#       params : np.array, the parameters to locate in the knot vector
+#       table : np.array of int, the span table of the knot vector (see spanTable), None to search
+#               the knot vector
+#
+def findSpans(degree, knotvector, params, table = None):
+    # Index of the last control point
+    n = len(knotvector) - degree - 2
+
+    # The last knot span is closed on the right to include the end of the domain
+    if table is None:
+        spans = np.searchsorted(knotvector, params, side='right') - 1
+        return np.clip(spans, degree, n)
+
+    # Span of the start of the table cell of each parameter, moved to the span of the parameter
+    lower = knotvector[degree]
+    upper = knotvector[n + 1]
+    cells = np.clip(((params - lower) * (len(table) / (upper - lower))).astype(int), 0, len(table) - 1)
+    spans = table[cells]
+    while True:
+        ahead = (spans < n) & (params >= knotvector[np.minimum(spans + 1, n + 1)])
+        if not np.any(ahead):
+            break
+        spans[ahead] += 1
+    while True:
+        behind = (spans > degree) & (params < knotvector[spans])
+        if not np.any(behind):
+            break
+        spans[behind] -= 1
+    return spans
+
+# Function spanTable
+#
+#   Description: precomputes the knot span at the start of each cell of a regular grid of the
+#                parameter domain, so that findSpans locates a parameter in constant time
+#                (at most a few knots per cell to step over)
+#
+#   Returns:
+#       np.array of int, the knot span index at the start of each cell
+#
+#   Parameters:
+#       degree : int, degree of the basis functions
+#       knotvector : np.array, the knot vector
+#       size : int, number of cells (4 times the number of knots if None)
+#
+def spanTable(degree, knotvector, size = None):
+    if size is None:
+        size = 4 * len(knotvector)
+    lower = knotvector[degree]
+    upper = knotvector[len(knotvector) - degree - 1]
+    return findSpans(degree, knotvector, lower + (upper - lower) * np.arange(size) / size)
+
+# Function dersBasisFuns
+#
+#   Description: computes the non-vanishing basis functions and their derivatives
+#                for many parameters at once (The NURBS Book, A2.3)
+#
+#   Returns:
+#       ders : np.array, shape (N, order+1, degree+1), ders[:,k,j] is the k-th derivative
+#              of the basis function N[span-degree+j] at each parameter
+#
+#   Parameters:
+#       degree : int, degree of the basis functions
+#       knotvector : np.array, the knot vector
+#       spans : np.array of int, the knot span index of each parameter
+#       params : np.array, the parameters at which to evaluate the basis functions
+#       order : int, the highest derivative order to compute
+#
+def dersBasisFuns(degree, knotvector, spans, params, order):
+    p = degree
+    nb = len(params)
+    ndu = np.zeros((nb, p + 1, p + 1))
+    left = np.zeros((nb, p + 1))
+    right = np.zeros((nb, p + 1))
+    ndu[:, 0, 0] = 1.0
+
+    # Basis functions and knot differences
+    for j in range(1, p + 1):
+        left[:, j] = params - knotvector[spans + 1 - j]
+        right[:, j] = knotvector[spans + j] - params
+        saved = np.zeros(nb)
+        for r in range(j):
+            ndu[:, j, r] = right[:, r + 1] + left[:, j - r]
+            temp = ndu[:, r, j - 1] / ndu[:, j, r]
+            ndu[:, r, j] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        ndu[:, j, j] = saved
+
+    ders = np.zeros((nb, order + 1, p + 1))
+    ders[:, 0, :] = ndu[:, :, p]
+
+    # Derivatives of order higher than the degree are null
+    max_order = min(order, p)
+    for r in range(p + 1):
+        s1 = 0
+        s2 = 1
+        a = np.zeros((nb, 2, p + 1))
+        a[:, 0, 0] = 1.0
+        for k in range(1, max_order + 1):
+            d = np.zeros(nb)
+            rk = r - k
+            pk = p - k
+            if r >= k:
+                a[:, s2, 0] = a[:, s1, 0] / ndu[:, pk + 1, rk]
+                d = a[:, s2, 0] * ndu[:, rk, pk]
+            j1 = 1 if rk >= -1 else -rk
+            j2 = k - 1 if r - 1 <= pk else p - r
+            for j in range(j1, j2 + 1):
+                a[:, s2, j] = (a[:, s1, j] - a[:, s1, j - 1]) / ndu[:, pk + 1, rk + j]
+                d = d + a[:, s2, j] * ndu[:, rk + j, pk]
+            if r <= pk:
+                a[:, s2, k] = -a[:, s1, k - 1] / ndu[:, pk + 1, r]
+                d = d + a[:, s2, k] * ndu[:, r, pk]
+            ders[:, k, r] = d
+            s1, s2 = s2, s1
+
+    # Multiply by the correct factors
+    factor = p
+    for k in range(1, max_order + 1):
+        ders[:, k, :] *= factor
+        factor *= (p - k)
+
+    return ders
+
+# Function basisMatrix
+#
+#   Description: assembles the dense basis function matrix of one parametric direction,
+#                i.e. the value (or derivative) of every basis function at every parameter.
+#
+#   Returns:
+#       mat : np.array, shape (order+1, N, nb_ctrlpts), mat[k] is the k-th derivative matrix
+#
+#   Parameters:
+#       degree : int, degree of the basis functions
+#       knotvector : np.array, the knot vector
+#       params : np.array, the parameters at which to evaluate the basis functions
+#       order : int, the highest derivative order to compute
+#
+def basisMatrix(degree, knotvector, params, order = 0):
+    params = np.asarray(params, dtype=float)
+    nb_ctrlpts = len(knotvector) - degree - 1
+    spans = findSpans(degree, knotvector, params)
+    ders = dersBasisFuns(degree, knotvector, spans, params, order)
+
+    mat = np.zeros((order + 1, len(params), nb_ctrlpts))
+    rows = np.arange(len(params))[:, None]
+    cols = spans[:, None] - degree + np.arange(degree + 1)[None, :]
+    for k in range(order + 1):
+        mat[k][rows, cols] = ders[:, k, :]
+    return mat
+
+# Function binomial
+#
+#   Description: binomial coefficient "n choose k" (math.comb is not available in Python 3.7)
+#
+#   Returns:
+#       int, the binomial coefficient
+#
+#   Parameters:
+#       n, k : int
+#
+def binomial(n, k):
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+# Function rationalDerivatives
+#
+#   Description: converts the derivatives of the weighted (homogeneous) surface into
+#                the derivatives of the rational surface (The NURBS Book, A4.4)
+#
+#   Returns:
+#       skl : np.array, shape (N, order+1, order+1, 3), skl[:,k,l] is the derivative
+#             of the surface k times w.r.t. u and l times w.r.t. v
+#
+#   Parameters:
+#       skl_w : np.array, shape (N, order+1, order+1, 4), derivatives of the weighted surface
+#       order : int, the highest derivative order
+#
+def rationalDerivatives(skl_w, order):
+    aders = skl_w[..., 0:3]
+    wders = skl_w[..., 3]
+    skl = np.zeros(aders.shape)
+    for k in range(order + 1):
+        for l in range(order - k + 1):
+            v = aders[:, k, l].copy()
+            for j in range(1, l + 1):
+                v -= binomial(l, j) * wders[:, 0, j, None] * skl[:, k, l - j]
+            for i in range(1, k + 1):
+                v -= binomial(k, i) * wders[:, i, 0, None] * skl[:, k - i, l]
+                v2 = np.zeros(v.shape)
+                for j in range(1, l + 1):
+                    v2 += binomial(l, j) * wders[:, i, j, None] * skl[:, k - i, l - j]
+                v -= binomial(k, i) * v2
+            skl[:, k, l] = v / wders[:, 0, 0, None]
+    return skl
+
+# Function normalizeRows
+#
+#   Description: normalizes each row of an array of vectors. Null vectors are left unchanged.
+#
+#   Returns:
+#       np.array, the array of unit vectors
+#
+#   Parameters:
+#       vectors : np.array, shape (N,3), the vectors to normalize
+#
+def normalizeRows(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+# Function normalCurvatures
+#
+#   Description: normal curvature of the surface along given tangent directions, from the
+#                first (E, F, G) and second (L, M, N) fundamental forms. The direction is
+#                written d = a Su + b Sv in the tangent plane, and
+#                    kn = (L a² + 2 M a b + N b²) / (E a² + 2 F a b + G b²)
+#                The curvature is positive where the surface bends toward its normal (concave
+#                seen from the normal side).
+#
+#   Returns:
+#       np.array, shape (N,), the signed normal curvatures (1/mm)
+#
+#   Parameters:
+#       skl : np.array, shape (N, order+1, order+1, 3) with order >= 2, the surface derivatives
+#       directions : array-like, shape (N,3), the directions (projected on the tangent plane)
+#
+def normalCurvatures(skl, directions):
+    directions = np.atleast_2d(np.asarray(directions, dtype=float))
+    su = skl[:, 1, 0]
+    sv = skl[:, 0, 1]
+    normals = normalizeRows(np.cross(su, sv))
+
+    # First and second fundamental forms
+    E = np.sum(su * su, axis=1)
+    F = np.sum(su * sv, axis=1)
+    G = np.sum(sv * sv, axis=1)
+    L = np.sum(skl[:, 2, 0] * normals, axis=1)
+    M = np.sum(skl[:, 1, 1] * normals, axis=1)
+    N = np.sum(skl[:, 0, 2] * normals, axis=1)
+
+    # Components a, b of the direction in the (Su, Sv) basis: [E F; F G] [a b] = [d.Su d.Sv]
+    du = np.sum(directions * su, axis=1)
+    dv = np.sum(directions * sv, axis=1)
+    det = E * G - F**2
+    det[det == 0] = np.inf
+    a = (G * du - F * dv) / det
+    b = (E * dv - F * du) / det
+
+    first = E * a**2 + 2 * F * a * b + G * b**2
+    first[first == 0] = np.inf
+    return (L * a**2 + 2 * M * a * b + N * b**2) / first
+
+# Function principalCurvatures
+#
+#   Description: principal curvatures of the surface from the mean (H) and Gaussian (K)
+#                curvatures of the fundamental forms, k = H ± sqrt(H² - K). Same sign
+#                convention as normalCurvatures.
+#
+#   Returns:
+#       np.array, shape (N,2), the smallest and largest principal curvatures (1/mm)
+#
+#   Parameters:
+#       skl : np.array, shape (N, order+1, order+1, 3) with order >= 2, the surface derivatives
+#
+def principalCurvatures(skl):
+    su = skl[:, 1, 0]
+    sv = skl[:, 0, 1]
+    normals = normalizeRows(np.cross(su, sv))
+    E = np.sum(su * su, axis=1)
+    F = np.sum(su * sv, axis=1)
+    G = np.sum(sv * sv, axis=1)
+    L = np.sum(skl[:, 2, 0] * normals, axis=1)
+    M = np.sum(skl[:, 1, 1] * normals, axis=1)
+    N = np.sum(skl[:, 0, 2] * normals, axis=1)
+
+    det = E * G - F**2
+    det[det == 0] = np.inf
+    H = (E * N - 2 * F * M + G * L) / (2 * det)
+    K = (L * N - M**2) / det
+    root = np.sqrt(np.maximum(H**2 - K, 0))
+    return np.column_stack((H - root, H + root))
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class surfaceEvaluator
+#
+#   Description: batch evaluator of a NURBS-Python surface. The knot vectors and the
+#                homogeneous control points are stored in NumPy arrays once, then all
+#                evaluations are done on (N,2) arrays of uv pairs.
+#
+#   Parameters:
+#       surf : NURBS-Python surface object (BSpline or NURBS)
+#
+class surfaceEvaluator:
+    def __init__(self, surf = None):
+        self.degree_u = 0               # Degree in the u-direction
+        self.degree_v = 0               # Degree in the v-direction
+        self.knotvector_u = None        # np.array, knot vector in the u-direction
+        self.knotvector_v = None        # np.array, knot vector in the v-direction
+        self.ctrlptsw = None            # np.array (size_u, size_v, 4), weighted control points [w*x, w*y, w*z, w]
+        self.rational = False           # True if the weights are not all equal to 1
+        self.grids = {}                 # Precomputed basis function matrices of the evaluation grids, by sample sizes
+        self.span_tables = [None, None] # np.array of int, the span tables of the u and v knot vectors
+        self.kernels = None             # Compiled kernels of the derivatives (see surface_kernels), None for the NumPy implementation
+
+        if surf is not None:
+            size_u = surf.ctrlpts_size_u
+            size_v = surf.ctrlpts_size_v
+            ctrlpts = np.array(surf.ctrlpts, dtype=float).reshape(size_u, size_v, 3)
+            weights = getattr(surf, 'weights', None)
+            if weights is None or len(weights) == 0:
+                weights = np.ones(size_u * size_v)
+            self.setData(surf.degree_u, surf.degree_v, surf.knotvector_u, surf.knotvector_v,
+                         ctrlpts, np.array(weights, dtype=float).reshape(size_u, size_v))
+
+    # Method setData
+    #
+    #   Description: assigns the surface definition to the evaluator
+    #
+    #   Parameters:
+    #       degree_u, degree_v : int, degrees of the surface
+    #       knotvector_u, knotvector_v : list or np.array, knot vectors of the surface
+    #       ctrlpts : np.array (size_u, size_v, 3), the control points
+    #       weights : np.array (size_u, size_v), the control point weights
+    #
+    def setData(self, degree_u, degree_v, knotvector_u, knotvector_v, ctrlpts, weights):
+        self.degree_u = int(degree_u)
+        self.degree_v = int(degree_v)
+        self.knotvector_u = np.array(knotvector_u, dtype=float)
+        self.knotvector_v = np.array(knotvector_v, dtype=float)
+        ctrlpts = np.asarray(ctrlpts, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        self.ctrlptsw = np.concatenate((ctrlpts * weights[..., None], weights[..., None]), axis=2)
+        self.rational = not np.allclose(weights, 1.0)
+        self.grids = {}
+        self.span_tables = [spanTable(self.degree_u, self.knotvector_u), spanTable(self.degree_v, self.knotvector_v)]
+
+    # Method withKernels
+    #
+    #   Description: evaluator of the same surface using compiled kernels, the arrays are shared
+    #                and this evaluator is not changed
+    #
+    #   Returns:
+    #       surfaceEvaluator, the new evaluator
+    #
+    #   Parameters:
+    #       kernels : types.SimpleNamespace, the compiled kernels (surface_kernels.compiledKernels),
+    #                 None for the NumPy implementation
+    #
+    def withKernels(self, kernels):
+        evaluator = copy.copy(self)
+        evaluator.kernels = kernels
+        return evaluator
+
+    # Method contentHash
+    #
+    #   Description: hash of the surface definition, used to identify the data precomputed from it
+    #
+    #   Returns:
+    #       string, the hexadecimal digest
+    #
+    def contentHash(self):
+        return contentHash(self.degree_u, self.degree_v, self.knotvector_u, self.knotvector_v, self.ctrlptsw)
+
+    # Method derivatives
+    #
+    #   Description: evaluates the surface derivatives up to a given order for many uv pairs
+    #
+    #   Returns:
+    #       skl : np.array, shape (N, order+1, order+1, 3). skl[:,0,0] is the point,
+    #             skl[:,1,0] the derivative w.r.t u, skl[:,0,1] w.r.t v, skl[:,2,0] the second
+    #             derivative w.r.t u, etc. Only the terms with k+l <= order are computed.
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs (a single pair of shape (2,) is accepted)
+    #       order : int, the highest derivative order
+    #
+    def derivatives(self, uv, order = 1):
+        uv = np.atleast_2d(np.asarray(uv, dtype=float))
+        p = self.degree_u
+        q = self.degree_v
+
+        # Compiled kernel, one uv pair at a time (see surface_kernels)
+        if self.kernels is not None:
+            return self.kernels.surfaceDerivatives(p, q, np.asarray(self.knotvector_u), np.asarray(self.knotvector_v),
+                                                   np.asarray(self.ctrlptsw), np.asarray(self.span_tables[0]),
+                                                   np.asarray(self.span_tables[1]), bool(self.rational),
+                                                   np.ascontiguousarray(uv), int(order))
+
+        # Basis functions of both directions on their knot span
+        spans_u = findSpans(p, self.knotvector_u, uv[:, 0], self.span_tables[0])
+        spans_v = findSpans(q, self.knotvector_v, uv[:, 1], self.span_tables[1])
+        ders_u = dersBasisFuns(p, self.knotvector_u, spans_u, uv[:, 0], order)
+        ders_v = dersBasisFuns(q, self.knotvector_v, spans_v, uv[:, 1], order)
+
+        # Non-vanishing control points of each uv pair, shape (N, p+1, q+1, 4)
+        idx_u = spans_u[:, None] - p + np.arange(p + 1)[None, :]
+        idx_v = spans_v[:, None] - q + np.arange(q + 1)[None, :]
+        local_ctrlpts = self.ctrlptsw[idx_u[:, :, None], idx_v[:, None, :]]
+
+        skl_w = np.zeros((len(uv), order + 1, order + 1, 4))
+        for k in range(order + 1):
+            for l in range(order - k + 1):
+                skl_w[:, k, l] = np.einsum('na,nabc,nb->nc', ders_u[:, k], local_ctrlpts, ders_v[:, l])
+
+        if self.rational:
+            return rationalDerivatives(skl_w, order)
+        return skl_w[..., 0:3].copy()
+
+    # Method points
+    #
+    #   Description: evaluates the surface points for many uv pairs
+    #
+    #   Returns:
+    #       np.array, shape (N,3), the evaluated points
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def points(self, uv):
+        return self.derivatives(uv, 0)[:, 0, 0]
+
+    # Method evaluate
+    #
+    #   Description: evaluates the points, the unit normals and the unit tangents
+    #                for many uv pairs in one call
+    #
+    #   Returns:
+    #       points : np.array (N,3), the evaluated points
+    #       normals : np.array (N,3), the unit normals (cross product of the tangents on u and v)
+    #       tangents_u : np.array (N,3), the unit tangents following u
+    #       tangents_v : np.array (N,3), the unit tangents following v
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def evaluate(self, uv):
+        skl = self.derivatives(uv, 1)
+        points = skl[:, 0, 0]
+        normals = normalizeRows(np.cross(skl[:, 1, 0], skl[:, 0, 1]))
+        tangents_u = normalizeRows(skl[:, 1, 0])
+        tangents_v = normalizeRows(skl[:, 0, 1])
+        return points, normals, tangents_u, tangents_v
+
+    # Method evaluateGrid
+    #
+    #   Description: evaluates the surface on a regular uv grid using the precomputed
+    #                basis function matrices of both directions. Equivalent to surf.evalpts.
+    #
+    #   Returns:
+    #       np.array, shape (sample_size_u * sample_size_v, 3), the evaluated points ordered
+    #       following u then v (same ordering as surf.evalpts)
+    #
+    #   Parameters:
+    #       sample_size_u : int, number of evaluated points following u
+    #       sample_size_v : int, number of evaluated points following v
+    #
+    def evaluateGrid(self, sample_size_u, sample_size_v):
+        key = (sample_size_u, sample_size_v)
+        if key not in self.grids:
+            params_u = np.linspace(self.knotvector_u[self.degree_u], self.knotvector_u[-(self.degree_u + 1)], sample_size_u)
+            params_v = np.linspace(self.knotvector_v[self.degree_v], self.knotvector_v[-(self.degree_v + 1)], sample_size_v)
+            self.grids[key] = (basisMatrix(self.degree_u, self.knotvector_u, params_u)[0],
+                               basisMatrix(self.degree_v, self.knotvector_v, params_v)[0])
+        mat_u, mat_v = self.grids[key]
+
+        # Tensor product of the basis function matrices with the weighted control points
+        gridw = np.einsum('ia,abc,jb->ijc', mat_u, self.ctrlptsw, mat_v)
+        grid = gridw[..., 0:3] / gridw[..., 3, None]
+        return grid.reshape(sample_size_u * sample_size_v, 3)
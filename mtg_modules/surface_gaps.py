@@ -0,0 +1,167 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_gaps.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Batch solver of the gap adjustment of a whole layer.
+
+    The gap adjustment places each reference position of a layer at an expected distance
+    from an anchor (a previous position of the layer, or a fixed position), the positions
+    in between following the offset of the last reference position. Instead of adjusting
+    the positions one by one, the offsets are solved for the whole layer with the arc length
+    tables of the surface (see surface_arclength):
+
+        - each reference position moves along its isocurve (u or v) by an arc length offset,
+          the anchor of a reference position is moved by the offset of the last reference
+          position before it (its parent)
+        - on the isocurve of a reference position, the expected distance from its anchor gives
+          its offset as the offset of its parent plus a constant: the offsets of a chain of
+          reference positions along the same direction are a cumulative sum
+        - the cumulative sums are refined by a few vectorized sweeps with the exact anchors
+          (the arc lengths of neighbouring isocurves differ slightly)
+        - a reference position outside the surface cuts its chain: the reference positions
+          after it in the chain are anchored on a position the solver cannot follow, they
+          are all left outside (sequential adjustment)
+
+Example of implementation:
+
+    uv, anchor_uv, inside, iterations, residuals = solveGapChain(surfArc, uv, refs, anchors, fixed_uv, directions, expected, opposite, outside)
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the batch gap solver (segmented cumulative offsets, refinement sweeps)
+2026-10-18		A reference position outside the surface cuts its chain (the following ones are left outside)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function shiftUV
+#
+#   Description: moves many uv pairs by arc length offsets along their u and v isocurves
+#
+#   Returns:
+#       uv : np.array, shape (N,2), the moved uv pairs
+#       inside : np.array of bool, shape (N,), False if a uv pair reached the surface border
+#
+#   Parameters:
+#       tables : arcLengthTables, the arc length tables of the surface
+#       uv : np.array, shape (N,2), the uv pairs
+#       offsets : np.array, shape (N,2), the arc length offsets following u and v
+#
+def shiftUV(tables, uv, offsets):
+    inside = np.ones(len(uv), dtype=bool)
+    for direction in (0, 1):
+        moved = offsets[:, direction] != 0
+        if np.any(moved):
+            lengths = tables.length(uv[moved], direction) + offsets[moved, direction]
+            uv = uv.copy()
+            uv[moved], found = tables.paramAt(uv[moved], direction, lengths)
+            inside[moved] &= found
+    return uv, inside
+
+# Function solveGapChain
+#
+#   Description: solves the positions of the reference positions of a layer at their expected
+#                distance along the surface from their anchor
+#
+#   Returns:
+#       uv : np.array, shape (R,2), the uv of the adjusted reference positions
+#       anchor_uv : np.array, shape (R,2), the uv of their adjusted anchors
+#       inside : np.array of bool, shape (R,), False if a reference position, or a reference position
+#                before it in its chain, falls outside the surface
+#       iterations : int, the number of refinement sweeps
+#       residuals : np.array, shape (R,), mm, the error of the arc length from the anchors
+#
+#   Parameters:
+#       tables : arcLengthTables, the arc length tables of the surface
+#       uv : np.array, shape (T,2), the uv of all the positions of the layer (not adjusted)
+#       refs : np.array of int, shape (R,), the indexes of the reference positions in the layer, ascending
+#       anchors : np.array of int, shape (R,), the index of the anchor of each reference position
+#                 (-1 for a fixed anchor)
+#       fixed_uv : np.array, shape (R,2), the uv of the fixed anchors (ignored for the others)
+#       directions : np.array of int, shape (R,), the isocurve of each reference position (0 : u, 1 : v)
+#       expected : np.array, shape (R,), mm, the expected distances from the anchors
+#       opposite : np.array of bool, shape (R,), True to place a reference position on the other
+#                  side of its anchor
+#       outside : np.array of bool, shape (R,), True for the reference positions (or anchors) already
+#                 known to be outside the surface (None : all inside)
+#       tolerance : float, mm, the largest offset change of the last refinement sweep
+#       max_iterations : int, the maximum number of refinement sweeps
+#
+def solveGapChain(tables, uv, refs, anchors, fixed_uv, directions, expected, opposite, outside = None, tolerance = 1e-9, max_iterations = 50):
+    nb_refs = len(refs)
+    if nb_refs == 0:
+        return np.zeros((0, 2)), np.zeros((0, 2)), np.zeros(0, dtype=bool), 0, np.zeros(0)
+    rows = np.arange(nb_refs)
+    ref_uv = uv[refs]
+    lengths = tables.length(ref_uv, 0) * (directions == 0) + tables.length(ref_uv, 1) * (directions == 1)
+
+    # Parent of each reference position : the last reference position at or before its anchor
+    fixed = anchors < 0
+    parents = np.where(fixed, -1, np.searchsorted(refs, anchors, side='right') - 1)
+    anchor_uv = np.where(fixed[:, None], fixed_uv, uv[np.maximum(anchors, 0)])
+
+    # Arc lengths of the anchors on the isocurves of the reference positions
+    def anchorLengths(anchor_uv):
+        on_iso = ref_uv.copy()
+        on_iso[rows, directions] = anchor_uv[rows, directions]
+        return tables.length(on_iso, 0) * (directions == 0) + tables.length(on_iso, 1) * (directions == 1)
+
+    # Side of the anchor (not adjusted positions)
+    sides = np.sign(lengths - anchorLengths(anchor_uv))
+    sides[sides == 0] = 1
+    sides[opposite] *= -1
+
+    # Offsets of chains of reference positions along the same direction : cumulative sums
+    steps = anchorLengths(anchor_uv) + sides * expected - lengths
+    starts = (parents < 0) | (directions != directions[np.maximum(parents, 0)]) | (parents != rows - 1)
+    starts[0] = True
+    sums = np.cumsum(steps)
+    offsets = sums - (sums - steps)[np.maximum.accumulate(np.where(starts, rows, 0))]
+
+    # Refinement sweeps with the exact anchors
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        parent_offsets = np.zeros((nb_refs, 2))
+        linked = parents >= 0
+        parent_offsets[linked, directions[parents[linked]]] = offsets[parents[linked]]
+        moved_anchor_uv = np.where(fixed[:, None], fixed_uv, shiftUV(tables, anchor_uv, parent_offsets)[0])
+        new_offsets = anchorLengths(moved_anchor_uv) + sides * expected - lengths
+        change = np.max(np.abs(new_offsets - offsets))
+        offsets = new_offsets
+        if change <= tolerance:
+            break
+
+    # Adjusted reference positions and residual of the arc lengths from the anchors
+    ref_offsets = np.zeros((nb_refs, 2))
+    ref_offsets[rows, directions] = offsets
+    adjusted_uv, inside = shiftUV(tables, ref_uv, ref_offsets)
+    if outside is not None:
+        inside &= ~outside
+
+    # A reference position outside the surface cuts its chain (the parents are before their children)
+    for n in range(nb_refs):
+        if parents[n] >= 0 and not inside[parents[n]]:
+            inside[n] = False
+    residuals = np.abs(sides * (tables.length(adjusted_uv, 0) * (directions == 0) + tables.length(adjusted_uv, 1) * (directions == 1) - anchorLengths(moved_anchor_uv)) - expected)
+    return adjusted_uv, moved_anchor_uv, inside, iterations, residuals
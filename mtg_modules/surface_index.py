@@ -0,0 +1,99 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_index.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Spatial index of dense samples of the projection surface.
+
+    The surface is sampled once on a regular uv grid (same points as surf.evalpts) and
+    the samples are stored in a KD-tree (scipy.spatial.cKDTree). The uv of the nearest
+    sample of a point is a starting guess for the closest point search that does not
+    depend on the surface being close to a linear function of x and y, as the relative
+    uv of relativeUVbyXY does. Scipy is optional: without it, the nearest samples are
+    found by brute force with NumPy (by chunks of points).
+
+Example of implementation:
+
+    surfIndex = surfaceSampleIndex(surfaceEvaluator(surf), 200)
+    uv, distances = surfIndex.nearest([[10, 20, 0], [30, 40, 1]])
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the surface sample index (KD-tree or NumPy brute force)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# Optional KD-tree
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class surfaceSampleIndex
+#
+#   Description: nearest surface sample of points in space
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator or surfaceTables, the batch evaluator of the surface
+#       sample_size : int, number of samples following u and v
+#       axes : tuple of int, the axes used in the distance (0, 1, 2 for x, y, z)
+#       memory_size : int, maximum number of point-to-sample distances calculated at once
+#                     by the brute force search
+#
+class surfaceSampleIndex:
+    def __init__(self, evaluator, sample_size = 200, axes = (0,1,2), memory_size = 4000000):
+        self.axes = list(axes)
+        self.memory_size = memory_size
+
+        # Regular uv grid, same ordering as surf.evalpts
+        uu, vv = np.meshgrid(np.linspace(0, 1, sample_size), np.linspace(0, 1, sample_size), indexing='ij')
+        self.uv = np.stack((uu.ravel(), vv.ravel()), axis=1)
+        self.samples = np.ascontiguousarray(evaluator.evaluateGrid(sample_size, sample_size)[:, self.axes])
+        self.tree = cKDTree(self.samples) if cKDTree is not None else None
+
+    # Method nearest
+    #
+    #   Description: finds the nearest surface sample of many points
+    #
+    #   Returns:
+    #       uv : np.array, shape (N,2), the uv pairs of the nearest samples
+    #       distances : np.array, shape (N,), the distances to the nearest samples
+    #
+    #   Parameters:
+    #       points : array-like, shape (N,3), the points
+    #
+    def nearest(self, points):
+        points = np.atleast_2d(np.asarray(points, dtype=float))[:, self.axes]
+        if self.tree is not None:
+            distances, idx = self.tree.query(points)
+        else:
+            idx = np.empty(len(points), dtype=int)
+            distances = np.empty(len(points))
+            chunk_size = max(1, self.memory_size // len(self.samples))
+            for start in range(0, len(points), chunk_size):
+                chunk = points[start:start + chunk_size]
+                squared = np.sum(chunk**2, axis=1)[:, None] - 2 * chunk @ self.samples.T + np.sum(self.samples**2, axis=1)[None, :]
+                idx[start:start + chunk_size] = np.argmin(squared, axis=1)
+                distances[start:start + chunk_size] = np.linalg.norm(chunk - self.samples[idx[start:start + chunk_size]], axis=1)
+        return self.uv[idx], distances
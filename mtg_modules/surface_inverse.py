@@ -0,0 +1,163 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_inverse.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Inverse map from the x, y coordinates to the uv parameters of the projection surface.
+
+    The surface point S(u,v) whose x, y match a target is found without assuming that u
+    and v are linear in x and y. The surface bounds (the x, y of the corners [0,0] and
+    [1,1]) are evaluated once. A table of the uv of a regular x, y grid covering the bounds
+    is solved once per surface (Newton point inversion on x, y). The uv of a target is
+    interpolated bilinearly in the table, then refined by Newton steps on the 2D system
+    S_xy(u,v) = (x,y) until the x, y residual is smaller than the tolerance. The points still
+    above the tolerance after these steps (folds, steep regions) are solved again by the full
+    Newton point inversion (projectPoints), and the points that never reach the tolerance are
+    flagged as not converged.
+
+    Targets outside the bounds are flagged (exceedX, exceedY) and inverted at the closest
+    x, y inside the bounds, as relativeUVbyXY does with the relative uv.
+
+Example of implementation:
+
+    surfInverse = surfaceInverseMap(surfaceEvaluator(surf))
+    relu, relv, exceedX, exceedY = surfInverse.relativeUV(x, y)
+    uv, exceed, converged = surfInverse.invert([[x1, y1], [x2, y2]])
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the x, y to uv inverse map (table + Newton refinement)
+                Convergence flag of the inverted points, full point inversion fallback
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# MTG imports
+from mtg_modules.surface_projection import projectPoints
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class surfaceInverseMap
+#
+#   Description: x, y to uv inverse map of a surface
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator or surfaceTables, the batch evaluator of the surface
+#       grid_size : int, number of nodes following x and y in the uv table
+#       tolerance : float, mm, the maximum x, y residual of the inverted points
+#       max_iterations : int, the maximum number of Newton steps of the refinement
+#
+class surfaceInverseMap:
+    def __init__(self, evaluator, grid_size = 64, tolerance = 1e-6, max_iterations = 5):
+        self.evaluator = evaluator
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+        # Surface bounds on x and y
+        corners = evaluator.points([[0,0],[1,1]])
+        self.min_xy = corners[0][0:2]
+        self.max_xy = corners[1][0:2]
+
+        # uv table of the x, y grid nodes, starting from the relative uv of each node
+        steps = np.linspace(0, 1, grid_size)
+        rel_x, rel_y = np.meshgrid(steps, steps, indexing='ij')
+        rel = np.stack((rel_x.ravel(), rel_y.ravel()), axis=1)
+        nodes = np.zeros((len(rel), 3))
+        nodes[:, 0:2] = self.min_xy + rel * (self.max_xy - self.min_xy)
+        uv = projectPoints(evaluator, nodes, rel, tolerance, 50, (0,1))[0]
+        self.table = uv.reshape(grid_size, grid_size, 2)
+
+    # Method invert
+    #
+    #   Description: finds the uv of the surface points matching many x, y coordinates
+    #
+    #   Returns:
+    #       uv : np.array, shape (N,2), the uv pairs
+    #       exceed : np.array of bool, shape (N,2), flags if x and y are outside the surface bounds
+    #       converged : np.array of bool, shape (N,), flags if the x, y residual of the surface
+    #                   point at uv is smaller than the tolerance
+    #
+    #   Parameters:
+    #       xy : array-like, shape (N,2), the x, y coordinates
+    #
+    def invert(self, xy):
+        xy = np.atleast_2d(np.asarray(xy, dtype=float))[:, 0:2]
+        rel = (xy - self.min_xy) / (self.max_xy - self.min_xy)
+        exceed = (rel < 0) | (rel > 1)
+        rel = np.clip(rel, 0, 1)
+        xy = self.min_xy + rel * (self.max_xy - self.min_xy)
+
+        # Bilinear interpolation in the uv table
+        nb_cells = self.table.shape[0] - 1
+        pos = rel * nb_cells
+        cell = np.clip(np.floor(pos).astype(int), 0, nb_cells - 1)
+        t = (pos - cell)[:, :, None]
+        i, j = cell[:, 0], cell[:, 1]
+        uv = ((1 - t[:, 0]) * (1 - t[:, 1]) * self.table[i, j] + t[:, 0] * (1 - t[:, 1]) * self.table[i + 1, j]
+              + (1 - t[:, 0]) * t[:, 1] * self.table[i, j + 1] + t[:, 0] * t[:, 1] * self.table[i + 1, j + 1])
+
+        # Newton refinement on S_xy(u,v) = (x,y), the residual of the last step is checked too
+        converged = np.zeros(len(uv), dtype=bool)
+        active = np.arange(len(uv))
+        for iteration in range(self.max_iterations + 1):
+            ders = self.evaluator.derivatives(uv[active], 1)
+            residuals = ders[:, 0, 0, 0:2] - xy[active]
+            far = np.max(np.abs(residuals), axis=1) > self.tolerance
+            converged[active[~far]] = True
+            active, ders, residuals = active[far], ders[far], residuals[far]
+            if len(active) == 0 or iteration == self.max_iterations:
+                break
+
+            # Solution of the 2x2 Jacobian system [Su_xy Sv_xy] step = -residual
+            su = ders[:, 1, 0, 0:2]
+            sv = ders[:, 0, 1, 0:2]
+            det = su[:, 0] * sv[:, 1] - sv[:, 0] * su[:, 1]
+            det[det == 0] = np.inf
+            step = np.stack((-(sv[:, 1] * residuals[:, 0] - sv[:, 0] * residuals[:, 1]) / det,
+                             -(su[:, 0] * residuals[:, 1] - su[:, 1] * residuals[:, 0]) / det), axis=1)
+            uv[active] = np.clip(uv[active] + step, 0, 1)
+
+        # Points not converged after the refinement (folds, steep regions): full point inversion on x, y
+        if len(active) > 0:
+            targets = np.zeros((len(active), 3))
+            targets[:, 0:2] = xy[active]
+            uv[active], points = projectPoints(self.evaluator, targets, uv[active], self.tolerance, 50, (0,1))[0:2]
+            converged[active] = np.max(np.abs(points[:, 0:2] - xy[active]), axis=1) <= self.tolerance
+
+        return uv, exceed, converged
+
+    # Method relativeUV
+    #
+    #   Description: single point version of invert, with the same returns as relativeUVbyXY
+    #                (the convergence flag is dropped: the caller checks the x, y residual of the
+    #                surface point if needed)
+    #
+    #   Returns:
+    #       u, v : float, the uv parameters (contained between 0 and 1, inclusively)
+    #       exceedX, exceedY : bool, flags if x and y are outside the surface bounds
+    #
+    #   Parameters:
+    #       x : float, the coordinate x value of the position to process
+    #       y : float, the coordinate y value of the position to process
+    #
+    def relativeUV(self, x, y):
+        uv, exceed, converged = self.invert([[x, y]])
+        return float(uv[0][0]), float(uv[0][1]), bool(exceed[0][0]), bool(exceed[0][1])
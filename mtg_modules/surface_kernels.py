@@ -0,0 +1,291 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_kernels.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Optional compiled kernels of the surface evaluation (Numba).
+
+    Most surface evaluations of the projection are single uv pairs (closest point searches,
+    inverse map refinements, surface queries), where the vectorized NumPy evaluation spends
+    its time in the overhead of many small array operations. The kernels below are the same
+    algorithms written as scalar loops:
+
+        - knot span search in the span table (The NURBS Book, A2.1)
+        - basis functions and their derivatives (The NURBS Book, A2.3)
+        - surface derivatives of the weighted control points and their rational
+          conversion (The NURBS Book, A3.6 and A4.4)
+        - rotation of the printhead triad around its normal
+
+    They are compiled by Numba at the first call of compiledKernels (Numba is only imported
+    then, and each kernel is compiled at its first call, cached on disk). The compilation is
+    done once per process, but the kernels are only used by the evaluators given the kernels
+    namespace (surfaceEvaluator.withKernels) and by their owner: the other evaluators keep the
+    NumPy implementations. Without Numba, the NumPy implementations are used everywhere, the
+    kernels are never run as plain Python.
+
+Example of implementation:
+
+    kernels = compiledKernels()
+    if kernels is not None:
+        skl = kernels.surfaceDerivatives(p, q, knotvector_u, knotvector_v, ctrlptsw, table_u, table_v, rational, uv, 2)
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the compiled kernels (span search, basis functions, surface derivatives, triad rotation)
+                Kernels returned by compiledKernels and used only by their owner (no process-wide switch)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import math
+import types
+import numpy as np
+
+# Compiled kernels, None until compiledKernels succeeds (compilation cache, shared by the owners of the kernels)
+compiled = None
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function findSpanKernel
+#
+#   Description: knot span index of a parameter, from the span table (same as findSpans)
+#
+#   Returns:
+#       int, the knot span index
+#
+#   Parameters:
+#       degree : int, degree of the basis functions
+#       knotvector : np.array, the knot vector
+#       table : np.array of int, the span table of the knot vector (see spanTable)
+#       t : float, the parameter
+#
+def findSpanKernel(degree, knotvector, table, t):
+    n = len(knotvector) - degree - 2
+    lower = knotvector[degree]
+    upper = knotvector[n + 1]
+    cell = int((t - lower) * (len(table) / (upper - lower)))
+    cell = min(max(cell, 0), len(table) - 1)
+    span = table[cell]
+    while span < n and t >= knotvector[span + 1]:
+        span += 1
+    while span > degree and t < knotvector[span]:
+        span -= 1
+    return span
+
+# Function basisDersKernel
+#
+#   Description: non-vanishing basis functions and their derivatives at a parameter
+#                (same as dersBasisFuns for a single parameter)
+#
+#   Returns:
+#       np.array, shape (order+1, degree+1), the k-th derivative of the basis function N[span-degree+j]
+#
+#   Parameters:
+#       degree : int, degree of the basis functions
+#       knotvector : np.array, the knot vector
+#       span : int, the knot span index of the parameter
+#       t : float, the parameter
+#       order : int, the highest derivative order to compute
+#
+def basisDersKernel(degree, knotvector, span, t, order):
+    p = degree
+    ndu = np.zeros((p + 1, p + 1))
+    left = np.zeros(p + 1)
+    right = np.zeros(p + 1)
+    ndu[0, 0] = 1.0
+
+    # Basis functions and knot differences
+    for j in range(1, p + 1):
+        left[j] = t - knotvector[span + 1 - j]
+        right[j] = knotvector[span + j] - t
+        saved = 0.0
+        for r in range(j):
+            ndu[j, r] = right[r + 1] + left[j - r]
+            temp = ndu[r, j - 1] / ndu[j, r]
+            ndu[r, j] = saved + right[r + 1] * temp
+            saved = left[j - r] * temp
+        ndu[j, j] = saved
+
+    ders = np.zeros((order + 1, p + 1))
+    for j in range(p + 1):
+        ders[0, j] = ndu[j, p]
+
+    # Derivatives of order higher than the degree are null
+    max_order = min(order, p)
+    a = np.zeros((2, p + 1))
+    for r in range(p + 1):
+        s1 = 0
+        s2 = 1
+        a[:, :] = 0.0
+        a[0, 0] = 1.0
+        for k in range(1, max_order + 1):
+            d = 0.0
+            rk = r - k
+            pk = p - k
+            if r >= k:
+                a[s2, 0] = a[s1, 0] / ndu[pk + 1, rk]
+                d = a[s2, 0] * ndu[rk, pk]
+            j1 = 1 if rk >= -1 else -rk
+            j2 = k - 1 if r - 1 <= pk else p - r
+            for j in range(j1, j2 + 1):
+                a[s2, j] = (a[s1, j] - a[s1, j - 1]) / ndu[pk + 1, rk + j]
+                d += a[s2, j] * ndu[rk + j, pk]
+            if r <= pk:
+                a[s2, k] = -a[s1, k - 1] / ndu[pk + 1, r]
+                d += a[s2, k] * ndu[r, pk]
+            ders[k, r] = d
+            s1, s2 = s2, s1
+
+    # Multiply by the correct factors
+    factor = p
+    for k in range(1, max_order + 1):
+        for j in range(p + 1):
+            ders[k, j] *= factor
+        factor *= (p - k)
+    return ders
+
+# Function surfaceDerivativesKernel
+#
+#   Description: surface derivatives up to a given order for many uv pairs, one uv pair at a
+#                time (same as surfaceEvaluator.derivatives)
+#
+#   Returns:
+#       np.array, shape (N, order+1, order+1, 3), the derivatives of the surface
+#
+#   Parameters:
+#       degree_u, degree_v : int, degrees of the surface
+#       knotvector_u, knotvector_v : np.array, knot vectors of the surface
+#       ctrlptsw : np.array (size_u, size_v, 4), weighted control points [w*x, w*y, w*z, w]
+#       table_u, table_v : np.array of int, the span tables of the knot vectors
+#       rational : bool, True to convert the derivatives of the weighted surface (NURBS)
+#       uv : np.array, shape (N,2), the uv pairs
+#       order : int, the highest derivative order
+#
+def surfaceDerivativesKernel(degree_u, degree_v, knotvector_u, knotvector_v, ctrlptsw, table_u, table_v, rational, uv, order):
+    p = degree_u
+    q = degree_v
+    skl = np.zeros((uv.shape[0], order + 1, order + 1, 3))
+    skl_w = np.zeros((order + 1, order + 1, 4))
+    for n in range(uv.shape[0]):
+        span_u = findSpanKernel(p, knotvector_u, table_u, uv[n, 0])
+        span_v = findSpanKernel(q, knotvector_v, table_v, uv[n, 1])
+        ders_u = basisDersKernel(p, knotvector_u, span_u, uv[n, 0], order)
+        ders_v = basisDersKernel(q, knotvector_v, span_v, uv[n, 1], order)
+
+        # Derivatives of the weighted surface from the non-vanishing control points
+        skl_w[:, :, :] = 0.0
+        for k in range(order + 1):
+            for l in range(order - k + 1):
+                for a in range(p + 1):
+                    for b in range(q + 1):
+                        weight = ders_u[k, a] * ders_v[l, b]
+                        for c in range(4):
+                            skl_w[k, l, c] += weight * ctrlptsw[span_u - p + a, span_v - q + b, c]
+
+        if not rational:
+            for k in range(order + 1):
+                for l in range(order - k + 1):
+                    for c in range(3):
+                        skl[n, k, l, c] = skl_w[k, l, c]
+            continue
+
+        # Rational conversion (The NURBS Book, A4.4)
+        for k in range(order + 1):
+            for l in range(order - k + 1):
+                for c in range(3):
+                    v = skl_w[k, l, c]
+                    for j in range(1, l + 1):
+                        v -= binomialKernel(l, j) * skl_w[0, j, 3] * skl[n, k, l - j, c]
+                    for i in range(1, k + 1):
+                        v -= binomialKernel(k, i) * skl_w[i, 0, 3] * skl[n, k - i, l, c]
+                        v2 = 0.0
+                        for j in range(1, l + 1):
+                            v2 += binomialKernel(l, j) * skl_w[i, j, 3] * skl[n, k - i, l - j, c]
+                        v -= binomialKernel(k, i) * v2
+                    skl[n, k, l, c] = v / skl_w[0, 0, 3]
+    return skl
+
+# Function binomialKernel
+#
+#   Description: binomial coefficient "n choose k" of small integers
+#
+#   Returns:
+#       float, the binomial coefficient
+#
+#   Parameters:
+#       n, k : int
+#
+def binomialKernel(n, k):
+    result = 1.0
+    for j in range(1, k + 1):
+        result = result * (n - k + j) / j
+    return result
+
+# Function rotateTriadKernel
+#
+#   Description: turns a triad (rows : direct tangent, perpendicular tangent, normal) around its
+#                normal by an angle, the same rotation as rotAroundNormal with the triad as its
+#                own rotation matrix (getRotMat)
+#
+#   Returns:
+#       np.array, shape (3,3), the turned triad
+#
+#   Parameters:
+#       triad : np.array, shape (3,3), the triad rows
+#       angle : float, deg, the angle around the normal
+#
+def rotateTriadKernel(triad, angle):
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    turned = np.empty((3, 3))
+    for j in range(3):
+        turned[0, j] = c * triad[0, j] - s * triad[1, j]
+        turned[1, j] = s * triad[0, j] + c * triad[1, j]
+        turned[2, j] = triad[2, j]
+    return turned
+
+# Function compiledKernels
+#
+#   Description: compiles the kernels with Numba (each kernel at its first call, cached on disk),
+#                once per process
+#
+#   Returns:
+#       types.SimpleNamespace, the compiled kernels (findSpan, basisDers, surfaceDerivatives,
+#       rotateTriad), None if Numba is not available (the NumPy implementations are kept)
+#
+def compiledKernels():
+    global compiled
+    global findSpanKernel, basisDersKernel, binomialKernel
+    if compiled is not None:
+        return compiled
+    try:
+        import numba
+    except ImportError:
+        print('Numba is not available, the surface evaluations keep the NumPy implementation\n')
+        return None
+
+    # The kernels calling each other refer to the module globals, replaced by their compiled version
+    findSpanKernel = numba.njit(cache=True)(findSpanKernel)
+    basisDersKernel = numba.njit(cache=True)(basisDersKernel)
+    binomialKernel = numba.njit(cache=True)(binomialKernel)
+    compiled = types.SimpleNamespace(findSpan=findSpanKernel,
+                                     basisDers=basisDersKernel,
+                                     surfaceDerivatives=numba.njit(cache=True)(surfaceDerivativesKernel),
+                                     rotateTriad=numba.njit(cache=True)(rotateTriadKernel))
+    return compiled
@@ -0,0 +1,334 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_mesh.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Projection surface defined directly by a raw STL triangle mesh (mesh mode), without the
+    Blender shrinkwrap and the NURBS interpolation.
+
+    The mesh is seen from above as a height field over the x, y rectangle of its vertices,
+    parametrized like the NURBS surfaces: u and v are the relative x and y positions in the
+    rectangle. The triangles are stored in box trees (see surface_bvh.boxTree):
+        - in x, y, to find the triangle under a x, y position: the surface point is on the
+          triangle (the highest one if several) and the normal is interpolated from the
+          vertex normals (area-weighted face normals) with the barycentric coordinates
+        - in x, y, z, for the segment / triangle intersections (Möller-Trumbore)
+
+    The derivatives have the same layout as surfaceEvaluator.derivatives: the tangents
+    follow the interpolated normal, the second derivatives are null (planar triangles).
+    The mesh can then be used in place of a surface evaluator (query, inverse map, closest
+    point search) and in place of the Bézier patches BVH for the nozzle line collisions.
+
+    Positions with no triangle under them (holes of the scan) take the height and normal of
+    the nearest vertex.
+
+Example of implementation:
+
+    surfMesh = meshSurface.fromFile('prefs/meshes/sine_20x20.stl')
+    points, normals = surfMesh.evaluate([[0.5, 0.5]])[0:2]
+    hit, t, uv, points = surfMesh.intersectSegments(starts, ends)
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the mesh mode (triangle box trees, interpolated normals, segment intersections)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# Optional KD-tree
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+# MTG imports
+from mtg_modules.surface_cache import contentHash
+from mtg_modules.surface_evaluator import normalizeRows
+from mtg_modules.surface_bvh import boxTree, segmentBoxOverlaps
+from mtg_modules.stl_reader import stlTriangles
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class meshSurface
+#
+#   Description: height field projection surface of a triangle mesh
+#
+#   Parameters:
+#       vectors : np.array, shape (nb_triangles, 3, 3), the vertices of each triangle (numpy-stl layout)
+#       leaf_size : int, maximum number of triangles in a leaf node of the box trees
+#
+class meshSurface(boxTree):
+    def __init__(self, vectors, leaf_size = 8):
+        # Indexed mesh: unique vertices and triangles of vertex indices
+        vectors = np.asarray(vectors, dtype=float)
+        self.vertices, faces = np.unique(vectors.reshape(-1, 3), axis=0, return_inverse=True)
+        faces = faces.reshape(-1, 3)
+
+        # Triangles oriented upward, area-weighted vertex normals
+        triangles = self.vertices[faces]
+        face_normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+        down = face_normals[:, 2] < 0
+        faces[down] = faces[down][:, [0, 2, 1]]
+        face_normals[down] = -face_normals[down]
+        self.faces = faces
+        self.vertex_normals = np.zeros_like(self.vertices)
+        for k in range(3):
+            np.add.at(self.vertex_normals, faces[:, k], face_normals)
+        self.vertex_normals = normalizeRows(self.vertex_normals)
+
+        # Parametrization rectangle
+        self.min_xy = self.vertices[:, 0:2].min(axis=0)
+        self.max_xy = self.vertices[:, 0:2].max(axis=0)
+        self.size_xy = self.max_xy - self.min_xy
+
+        # Box trees of the triangles in x, y (height queries) and in x, y, z (segment intersections)
+        triangles = self.vertices[faces]
+        boxTree.__init__(self, triangles[:, :, 0:2].min(axis=1), triangles[:, :, 0:2].max(axis=1), leaf_size)
+        self.tree3d = boxTree(triangles.min(axis=1), triangles.max(axis=1), leaf_size)
+        self.vertex_tree = None
+        self.grids = {}
+
+    # Method fromFile
+    #
+    #   Description: loads the mesh of a STL file (memory-mapped if binary, see stl_reader)
+    #
+    #   Returns:
+    #       meshSurface, the mesh projection surface
+    #
+    #   Parameters:
+    #       path : string, the STL file path
+    #       leaf_size : int, maximum number of triangles in a leaf node of the box trees
+    #
+    @classmethod
+    def fromFile(cls, path, leaf_size = 8):
+        return cls(stlTriangles(path), leaf_size)
+
+    # Method contentHash
+    #
+    #   Description: hash of the mesh, used to identify the data precomputed from it
+    #
+    #   Returns:
+    #       string, the hexadecimal digest
+    #
+    def contentHash(self):
+        return contentHash(self.vertices, self.faces)
+
+    # Method nearestVertices
+    #
+    #   Description: finds the nearest vertex in x, y of many positions (KD-tree if scipy is
+    #                available, else brute force)
+    #
+    #   Returns:
+    #       np.array of int, shape (N,), the vertex indices
+    #
+    #   Parameters:
+    #       xy : np.array, shape (N,2), the x, y positions
+    #
+    def nearestVertices(self, xy):
+        if cKDTree is not None:
+            if self.vertex_tree is None:
+                self.vertex_tree = cKDTree(self.vertices[:, 0:2])
+            return self.vertex_tree.query(xy)[1]
+        return np.array([np.argmin(np.sum((self.vertices[:, 0:2] - p)**2, axis=1)) for p in xy], dtype=int)
+
+    # Method locate
+    #
+    #   Description: finds the highest triangle under many x, y positions
+    #
+    #   Returns:
+    #       heights : np.array, shape (N,), the z of the surface under each position
+    #       normals : np.array, shape (N,3), the interpolated unit normals
+    #
+    #   Parameters:
+    #       xy : array-like, shape (N,2), the x, y positions
+    #
+    def locate(self, xy):
+        xy = np.atleast_2d(np.asarray(xy, dtype=float))[:, 0:2]
+        queries, faces = self.candidates(len(xy), lambda q, box_min, box_max: np.all((xy[q] >= box_min) & (xy[q] <= box_max), axis=1))
+
+        # Barycentric coordinates of the positions in the candidate triangles (x, y projection)
+        tri = self.vertices[self.faces[faces]]
+        v0 = tri[:, 1, 0:2] - tri[:, 0, 0:2]
+        v1 = tri[:, 2, 0:2] - tri[:, 0, 0:2]
+        v2 = xy[queries] - tri[:, 0, 0:2]
+        det = v0[:, 0] * v1[:, 1] - v1[:, 0] * v0[:, 1]
+        flat = np.abs(det) < 1e-300
+        det[flat] = 1
+        l1 = (v2[:, 0] * v1[:, 1] - v1[:, 0] * v2[:, 1]) / det
+        l2 = (v0[:, 0] * v2[:, 1] - v2[:, 0] * v0[:, 1]) / det
+        bary = np.stack((1 - l1 - l2, l1, l2), axis=1)
+        eps = 1e-9
+        inside = ~flat & np.all(bary >= -eps, axis=1)
+        queries, faces, tri, bary = queries[inside], faces[inside], tri[inside], bary[inside]
+        z = np.einsum('nk,nk->n', bary, tri[:, :, 2])
+
+        # Highest triangle of each position
+        heights = np.full(len(xy), -np.inf)
+        np.maximum.at(heights, queries, z)
+        best = z >= heights[queries]
+        normals = np.zeros((len(xy), 3))
+        normals[queries[best]] = np.einsum('nk,nkc->nc', bary[best], self.vertex_normals[self.faces[faces[best]]])
+
+        # Positions without triangle: nearest vertex
+        missed = np.isinf(heights)
+        if np.any(missed):
+            nearest = self.nearestVertices(xy[missed])
+            heights[missed] = self.vertices[nearest, 2]
+            normals[missed] = self.vertex_normals[nearest]
+        return heights, normalizeRows(normals)
+
+    # Method derivatives
+    #
+    #   Description: evaluates the surface derivatives up to a given order for many uv pairs
+    #
+    #   Returns:
+    #       skl : np.array, shape (N, order+1, order+1, 3), same layout as surfaceEvaluator.derivatives
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #       order : int, the highest derivative order
+    #
+    def derivatives(self, uv, order = 1):
+        uv = np.atleast_2d(np.asarray(uv, dtype=float))
+        xy = self.min_xy + uv * self.size_xy
+        heights, normals = self.locate(xy)
+
+        skl = np.zeros((len(uv), order + 1, order + 1, 3))
+        skl[:, 0, 0, 0:2] = xy
+        skl[:, 0, 0, 2] = heights
+        if order >= 1:
+            # Slopes of the tangent plane of the interpolated normal
+            nz = np.maximum(normals[:, 2], 1e-12)
+            skl[:, 1, 0, 0] = self.size_xy[0]
+            skl[:, 1, 0, 2] = -normals[:, 0] / nz * self.size_xy[0]
+            skl[:, 0, 1, 1] = self.size_xy[1]
+            skl[:, 0, 1, 2] = -normals[:, 1] / nz * self.size_xy[1]
+        return skl
+
+    # Method points
+    #
+    #   Description: evaluates the surface points for many uv pairs
+    #
+    #   Returns:
+    #       np.array, shape (N,3), the evaluated points
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def points(self, uv):
+        return self.derivatives(uv, 0)[:, 0, 0]
+
+    # Method evaluate
+    #
+    #   Description: evaluates the points, the unit normals and the unit tangents for many uv pairs
+    #
+    #   Returns:
+    #       points, normals, tangents_u, tangents_v : np.array (N,3), same as surfaceEvaluator.evaluate
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def evaluate(self, uv):
+        skl = self.derivatives(uv, 1)
+        normals = normalizeRows(np.cross(skl[:, 1, 0], skl[:, 0, 1]))
+        return skl[:, 0, 0], normals, normalizeRows(skl[:, 1, 0]), normalizeRows(skl[:, 0, 1])
+
+    # Method evaluateGrid
+    #
+    #   Description: evaluates the surface on a regular uv grid
+    #
+    #   Returns:
+    #       np.array, shape (sample_size_u * sample_size_v, 3), the evaluated points ordered
+    #       following u then v (same ordering as surfaceEvaluator.evaluateGrid)
+    #
+    #   Parameters:
+    #       sample_size_u, sample_size_v : int, number of evaluated points following u and v
+    #
+    def evaluateGrid(self, sample_size_u, sample_size_v):
+        key = (sample_size_u, sample_size_v)
+        if key not in self.grids:
+            uu, vv = np.meshgrid(np.linspace(0, 1, sample_size_u), np.linspace(0, 1, sample_size_v), indexing='ij')
+            self.grids[key] = self.points(np.stack((uu.ravel(), vv.ravel()), axis=1))
+        return self.grids[key]
+
+    # Method intersectSegments
+    #
+    #   Description: first intersection of many segments [A, B] with the triangles (Möller-Trumbore)
+    #
+    #   Returns:
+    #       hit : np.array of bool, shape (N,), True if the segment crosses the mesh
+    #       t : np.array, shape (N,), the position of the intersection on the segment (A + t (B - A)),
+    #           np.inf if no intersection
+    #       uv : np.array, shape (N,2), the uv of the intersection
+    #       points : np.array, shape (N,3), the intersection points
+    #
+    #   Parameters:
+    #       starts, ends : array-like, shape (N,3), the segment ends A and B
+    #
+    def intersectSegments(self, starts, ends):
+        starts = np.atleast_2d(np.asarray(starts, dtype=float))
+        ends = np.atleast_2d(np.asarray(ends, dtype=float))
+        queries, faces = self.tree3d.candidates(len(starts), lambda q, box_min, box_max: segmentBoxOverlaps(starts[q], ends[q], box_min, box_max))
+
+        tri = self.vertices[self.faces[faces]]
+        d = ends[queries] - starts[queries]
+        e1 = tri[:, 1] - tri[:, 0]
+        e2 = tri[:, 2] - tri[:, 0]
+        p = np.cross(d, e2)
+        det = np.sum(e1 * p, axis=1)
+        parallel = np.abs(det) < 1e-300
+        det[parallel] = 1
+        s = starts[queries] - tri[:, 0]
+        b1 = np.sum(s * p, axis=1) / det
+        q = np.cross(s, e1)
+        b2 = np.sum(d * q, axis=1) / det
+        t = np.sum(e2 * q, axis=1) / det
+        valid = ~parallel & (b1 >= 0) & (b2 >= 0) & (b1 + b2 <= 1) & (t >= 0) & (t <= 1)
+
+        # First intersection of each segment
+        t_hit = np.full(len(starts), np.inf)
+        np.minimum.at(t_hit, queries[valid], t[valid])
+        hit = np.isfinite(t_hit)
+        points = np.zeros((len(starts), 3))
+        points[hit] = starts[hit] + t_hit[hit, None] * (ends[hit] - starts[hit])
+        uv = (points[:, 0:2] - self.min_xy) / self.size_xy
+        return hit, t_hit, uv, points
+
+    # Method closestPoints
+    #
+    #   Description: surface points under many points (same x, y) and their signed distance along
+    #                the surface normal, positive above the surface. Same returns as
+    #                surfaceBVH.closestPoints, for the nozzle line collision checks.
+    #
+    #   Returns:
+    #       uv : np.array, shape (N,2), the uv of the surface points
+    #       points : np.array, shape (N,3), the surface points
+    #       distances : np.array, shape (N,), the signed distances
+    #
+    #   Parameters:
+    #       query_points : array-like, shape (N,3), the points
+    #
+    def closestPoints(self, query_points):
+        query_points = np.atleast_2d(np.asarray(query_points, dtype=float))
+        uv = np.clip((query_points[:, 0:2] - self.min_xy) / self.size_xy, 0, 1)
+        heights, normals = self.locate(query_points[:, 0:2])
+        points = np.concatenate((query_points[:, 0:2], heights[:, None]), axis=1)
+        return uv, points, (query_points[:, 2] - heights) * normals[:, 2]
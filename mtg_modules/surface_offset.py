@@ -0,0 +1,116 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_offset.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Offset surfaces of the projection surface at the layer heights.
+
+    The layers above the first two are the offset surfaces of the projection surface:
+    a point of the layer at height h is S(u,v) + h n(u,v), with the same normal. The
+    principal curvatures of the surface are sampled once on a regular uv grid (lowest fold
+    height), and the clearances of the targets are computed for any number of layer heights
+    in a single vectorized step.
+
+    Along a principal direction of curvature k (positive where the surface bends toward
+    its normal, concave seen from above), the radius of the offset surface is 1/k - h:
+
+        - the offset surface folds on itself (self-intersection) once h k >= 1
+        - a straight nozzle line of half width a over a concave region dips under the
+          offset surface of the layer below by the sagitta r - sqrt(r² - a²) at its ends,
+          the clearance of the layer is the layer height minus this sagitta
+
+Example of implementation:
+
+    surfOffset = offsetSurfaceStack(surfaceEvaluator(surf), 64)
+    print(surfOffset.foldHeight())
+    clearances, folded = surfOffset.clearances(uv, directions, heights, half_width, layer_height)
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the offset surface stack (folds and clearance of the nozzle line per layer)
+                Only the principal curvatures of the samples are kept, sagitta of the concave targets only
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# MTG imports
+from mtg_modules.surface_evaluator import normalCurvatures, principalCurvatures
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class offsetSurfaceStack
+#
+#   Description: offset surfaces of a surface at many layer heights, the principal curvatures
+#                of the surface are sampled once
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator (or any evaluator with a derivatives method), the surface
+#       samples : int, number of samples following u and v
+#
+class offsetSurfaceStack:
+    def __init__(self, evaluator, samples = 64):
+        self.evaluator = evaluator
+        u, v = np.meshgrid(np.linspace(0, 1, samples), np.linspace(0, 1, samples), indexing='ij')
+        self.curvatures = principalCurvatures(evaluator.derivatives(np.column_stack((u.ravel(), v.ravel())), 2))
+
+    # Method foldHeight
+    #
+    #   Description: lowest height at which an offset surface of the sampled grid folds on itself
+    #
+    #   Returns:
+    #       float, mm, the smallest concave radius of curvature (inf if the surface has no concave region)
+    #
+    def foldHeight(self):
+        k = np.max(self.curvatures[:, 1])
+        return 1 / k if k > 0 else np.inf
+
+    # Method clearances
+    #
+    #   Description: clearance of a straight nozzle line over the offset surface of the layer
+    #                below, for many targets and layer heights
+    #
+    #   Returns:
+    #       clearances : np.array, shape (T, L), mm, the clearance of the ends of the nozzle line
+    #                    (negative for a collision with the layer below)
+    #       folded : np.array of bool, shape (T, L), True where the offset surface of the layer
+    #                folds on itself at the target
+    #
+    #   Parameters:
+    #       uv : array-like, shape (T,2), the uv of the targets on the surface
+    #       directions : array-like, shape (T,3), the directions of the nozzle lines
+    #       heights : array-like, shape (L,), mm, the offset heights of the layers
+    #       half_width : float, mm, the half width of the nozzle line
+    #       layer_height : float, mm, the height between two layers
+    #
+    def clearances(self, uv, directions, heights, half_width, layer_height):
+        ders = self.evaluator.derivatives(np.atleast_2d(np.asarray(uv, dtype=float)), 2)
+        heights = np.atleast_1d(np.asarray(heights, dtype=float))
+        kn = normalCurvatures(ders, directions)[:, None]
+        folded = heights[None, :] * principalCurvatures(ders)[:, 1, None] >= 1
+
+        # Radius of the offset surface of the layer below along the nozzle line (concave regions only)
+        concave = np.broadcast_to(kn > 0, folded.shape)
+        radius = (1 / np.where(kn > 0, kn, 1) - (heights[None, :] - layer_height))[concave]
+
+        # Sagitta of the nozzle line, the whole half width if the radius is smaller
+        sagitta = np.zeros(folded.shape)
+        sagitta[concave] = np.where(radius > half_width, radius - np.sqrt(np.maximum(radius**2 - half_width**2, 0)), half_width)
+        return layer_height - sagitta, folded
@@ -0,0 +1,264 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_pass.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Isoparametric pass evaluation of the projection surface.
+
+    Along a printing pass in ±y (or ±x), the u (or v) parameter of the targets stays almost
+    constant and only the other parameter sweeps the surface. The basis functions of the
+    fixed direction are computed once at an anchor parameter t0 of the pass, with all their
+    derivatives up to the degree p of that direction, and contracted with the control net:
+
+        C_m(b) = sum_a N_a^(m)(t0) Pw_ab,    m = 0..p
+
+    Inside the knot span of t0, the homogeneous surface is a polynomial of degree p in the
+    fixed parameter, so its derivatives at any t of the span are given exactly by
+
+        d^k Sw / dt^k (t, s) = sum_b N_b(s) sum_{m>=k} (t - t0)^(m-k) / (m-k)! C_m(b)
+
+    Only the basis functions of the sweep direction are computed for each target, with the
+    knot span of the last target tried first. A new anchor is set when the fixed parameter
+    moves to another knot span (the anchor of each knot span is kept for the next passes).
+    Batches whose fixed parameters are not all in the same knot span are evaluated by the
+    full tensor product evaluator.
+
+Example of implementation:
+
+    surfPass = isoPassEvaluator(surfaceEvaluator(surf))
+    surfPass.setSweep(1)    # pass in ±y: u fixed, v sweeps
+    skl = surfPass.derivatives([[0.3, 0.4], [0.3, 0.45]], 2)
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the isoparametric pass evaluator
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+from math import factorial
+
+# MTG imports
+from mtg_modules.surface_evaluator import findSpans, dersBasisFuns, rationalDerivatives, normalizeRows
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class isoPassEvaluator
+#
+#   Description: surface evaluator specialized for passes along a constant u or v. Has the
+#                same evaluation methods as surfaceEvaluator and gives the same results.
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator, the full tensor product evaluator of the surface
+#
+class isoPassEvaluator:
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.sweep = None           # Index of the parameter sweeping along the pass (0 for u, 1 for v), None to disable
+        self.anchor_param = None    # Parameter t0 of the fixed direction at the anchor
+        self.anchor_span = None     # Knot span of t0
+        self.anchor_coefs = None    # np.array (p+1, nb_ctrlpts of the sweep direction, 4), the contracted control net C_m
+        self.anchor_cache = {}      # Anchors already set [t0, C_m], by sweep index and knot span of the fixed direction
+        self.sweep_span = None      # Knot span of the sweep direction of the last target
+        self.iso = 0                # Number of uv pairs evaluated along the pass
+        self.full = 0               # Number of uv pairs evaluated by the full evaluator
+        self.anchors = 0            # Number of anchors set
+
+    # Method setSweep
+    #
+    #   Description: sets the parameter sweeping along the next passes
+    #
+    #   Parameters:
+    #       sweep : int or None, 0 if u sweeps (v fixed), 1 if v sweeps (u fixed), None to disable
+    #
+    def setSweep(self, sweep):
+        if sweep != self.sweep:
+            self.sweep = sweep
+            self.anchor_span = None
+            self.sweep_span = None
+
+    # Method directions
+    #
+    #   Description: degrees and knot vectors of the fixed and sweep directions
+    #
+    #   Returns:
+    #       degree_f, knotvector_f, degree_s, knotvector_s
+    #
+    def directions(self):
+        e = self.evaluator
+        if self.sweep == 1:
+            return e.degree_u, e.knotvector_u, e.degree_v, e.knotvector_v
+        return e.degree_v, e.knotvector_v, e.degree_u, e.knotvector_u
+
+    # Method anchor
+    #
+    #   Description: contracts the control net with the basis functions of the fixed direction
+    #                and their derivatives at t0. The expansion being exact in the whole knot
+    #                span, the anchor is kept and reused for any parameter of the span.
+    #
+    #   Parameters:
+    #       param : float, the fixed parameter t0
+    #       span : int, the knot span of t0
+    #
+    def anchor(self, param, span):
+        key = (self.sweep, span)
+        if key in self.anchor_cache:
+            self.anchor_param, self.anchor_coefs = self.anchor_cache[key]
+            self.anchor_span = span
+            return
+
+        degree_f, knotvector_f = self.directions()[0:2]
+        ders_f = dersBasisFuns(degree_f, knotvector_f, np.array([span]), np.array([param]), degree_f)[0]
+        rows = np.arange(span - degree_f, span + 1)
+        if self.sweep == 1:
+            self.anchor_coefs = np.einsum('ma,abc->mbc', ders_f, self.evaluator.ctrlptsw[rows])
+        else:
+            self.anchor_coefs = np.einsum('mb,abc->mac', ders_f, self.evaluator.ctrlptsw[:, rows])
+        self.anchor_param = param
+        self.anchor_span = span
+        self.anchor_cache[key] = [param, self.anchor_coefs]
+        self.anchors += 1
+
+    # Method sweepSpans
+    #
+    #   Description: knot spans of the sweep parameters, trying the span of the last target first
+    #
+    #   Returns:
+    #       np.array of int, the knot spans
+    #
+    #   Parameters:
+    #       params : np.array, the sweep parameters
+    #
+    def sweepSpans(self, params):
+        degree_s, knotvector_s = self.directions()[2:4]
+        span = self.sweep_span
+        if span is not None and np.all((knotvector_s[span] <= params) & (params < knotvector_s[span + 1])):
+            return np.full(len(params), span)
+        spans = findSpans(degree_s, knotvector_s, params)
+        self.sweep_span = spans[-1]
+        return spans
+
+    # Method derivatives
+    #
+    #   Description: evaluates the surface derivatives up to a given order for many uv pairs
+    #
+    #   Returns:
+    #       skl : np.array, shape (N, order+1, order+1, 3), same as surfaceEvaluator.derivatives
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #       order : int, the highest derivative order
+    #
+    def derivatives(self, uv, order = 1):
+        uv = np.atleast_2d(np.asarray(uv, dtype=float))
+        if self.sweep is None:
+            self.full += len(uv)
+            return self.evaluator.derivatives(uv, order)
+
+        degree_f, knotvector_f, degree_s, knotvector_s = self.directions()
+        fixed = uv[:, 1 - self.sweep]
+        params = uv[:, self.sweep]
+
+        # All fixed parameters must be in the same knot span
+        spans_f = findSpans(degree_f, knotvector_f, fixed)
+        if np.any(spans_f != spans_f[0]):
+            self.full += len(uv)
+            return self.evaluator.derivatives(uv, order)
+        if spans_f[0] != self.anchor_span:
+            self.anchor(fixed[0], spans_f[0])
+        self.iso += len(uv)
+
+        # Exact expansion of the fixed direction derivatives around t0, T[n,k,m] = dt^(m-k) / (m-k)!
+        dt = fixed - self.anchor_param
+        taylor = np.zeros((len(uv), order + 1, degree_f + 1))
+        for k in range(order + 1):
+            for m in range(k, degree_f + 1):
+                taylor[:, k, m] = dt**(m - k) / factorial(m - k)
+
+        # Control points of the sweep span of each target, shape (p+1, N, q+1, 4)
+        spans_s = self.sweepSpans(params)
+        idx = spans_s[:, None] - degree_s + np.arange(degree_s + 1)[None, :]
+        local_coefs = self.anchor_coefs[:, idx]
+        iso_ctrlpts = np.einsum('nkm,mnbc->nkbc', taylor, local_coefs)
+
+        ders_s = dersBasisFuns(degree_s, knotvector_s, spans_s, params, order)
+        skl_w = np.zeros((len(uv), order + 1, order + 1, 4))
+        for k in range(order + 1):
+            for l in range(order - k + 1):
+                value = np.einsum('nb,nbc->nc', ders_s[:, l], iso_ctrlpts[:, k])
+                if self.sweep == 1:
+                    skl_w[:, k, l] = value
+                else:
+                    skl_w[:, l, k] = value
+
+        if self.evaluator.rational:
+            return rationalDerivatives(skl_w, order)
+        return skl_w[..., 0:3].copy()
+
+    # Method points
+    #
+    #   Description: evaluates the surface points for many uv pairs
+    #
+    #   Returns:
+    #       np.array, shape (N,3), the evaluated points
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def points(self, uv):
+        return self.derivatives(uv, 0)[:, 0, 0]
+
+    # Method evaluate
+    #
+    #   Description: evaluates the points, the unit normals and the unit tangents for many uv pairs
+    #
+    #   Returns:
+    #       points, normals, tangents_u, tangents_v : np.array (N,3), same as surfaceEvaluator.evaluate
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def evaluate(self, uv):
+        skl = self.derivatives(uv, 1)
+        normals = normalizeRows(np.cross(skl[:, 1, 0], skl[:, 0, 1]))
+        return skl[:, 0, 0], normals, normalizeRows(skl[:, 1, 0]), normalizeRows(skl[:, 0, 1])
+
+    # Method evaluateGrid
+    #
+    #   Description: evaluates the surface on a regular uv grid (full evaluator)
+    #
+    #   Returns:
+    #       np.array, shape (sample_size_u * sample_size_v, 3), same as surfaceEvaluator.evaluateGrid
+    #
+    #   Parameters:
+    #       sample_size_u, sample_size_v : int, number of points following u and v
+    #
+    def evaluateGrid(self, sample_size_u, sample_size_v):
+        return self.evaluator.evaluateGrid(sample_size_u, sample_size_v)
+
+    # Method summary
+    #
+    #   Description: formats the pass evaluation statistics for the run summary
+    #
+    #   Returns:
+    #       string, the number of uv pairs evaluated along passes and by the full evaluator
+    #
+    def summary(self):
+        return 'Pass evaluations = %i along passes (%i anchors), %i by the full evaluator' % (self.iso, self.anchors, self.full)
@@ -0,0 +1,88 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_patches.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Spatial index of the patches of a multi-patch projection surface.
+
+    A large substrate can be described by several NURBS patches (several surfaces in a
+    json file, or several json files). Like a single surface, each patch covers the x, y
+    rectangle between its corners [0,0] and [1,1]. The rectangles are stored in a box tree
+    (see surface_bvh.boxTree) to find the patch under a x, y position in O(log n). Where
+    patches overlap, the first patch is kept. Positions outside all the patches get the
+    patch of the nearest rectangle, as a single surface is extended past its bounds.
+
+Example of implementation:
+
+    surfPatchIndex = surfacePatchIndex([surfaceEvaluator(surf) for surf in exchange.import_json(path)])
+    patches, outside = surfPatchIndex.find([[10, 20], [300, 40]])
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the patch index (x, y rectangles of the patches in a box tree)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# MTG imports
+from mtg_modules.surface_bvh import boxTree
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class surfacePatchIndex
+#
+#   Description: finds the patch of a multi-patch surface under x, y positions
+#
+#   Parameters:
+#       evaluators : list of surfaceEvaluator (or evaluators with a points method), the patches
+#       leaf_size : int, maximum number of patches in a leaf node of the box tree
+#
+class surfacePatchIndex(boxTree):
+    def __init__(self, evaluators, leaf_size = 4):
+        corners = np.array([evaluator.points([[0,0],[1,1]])[:, 0:2] for evaluator in evaluators])
+        boxTree.__init__(self, corners.min(axis=1), corners.max(axis=1), leaf_size)
+
+    # Method find
+    #
+    #   Description: finds the patch under many x, y positions
+    #
+    #   Returns:
+    #       patches : np.array of int, shape (N,), the patch index of each position
+    #       outside : np.array of bool, shape (N,), True if the position is outside all the patches
+    #
+    #   Parameters:
+    #       xy : array-like, shape (N,2), the x, y positions
+    #
+    def find(self, xy):
+        xy = np.atleast_2d(np.asarray(xy, dtype=float))[:, 0:2]
+        queries, boxes = self.candidates(len(xy), lambda q, box_min, box_max: np.all((xy[q] >= box_min) & (xy[q] <= box_max), axis=1))
+
+        # First patch containing each position
+        nb_patches = len(self.box_min)
+        patches = np.full(len(xy), nb_patches)
+        np.minimum.at(patches, queries, boxes)
+
+        # Nearest patch of the positions outside all the patches
+        outside = patches == nb_patches
+        if np.any(outside):
+            gaps = np.maximum(np.maximum(self.box_min[None, :, :] - xy[outside, None, :], xy[outside, None, :] - self.box_max[None, :, :]), 0)
+            patches[outside] = np.argmin(np.sum(gaps**2, axis=2), axis=1)
+        return patches, outside
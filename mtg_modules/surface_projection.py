@@ -0,0 +1,253 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_projection.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Point inversion on the projection surface (closest point search in uv).
+
+    Newton iterations are done in uv on the squared distance function
+        f(u,v) = 1/2 |W (S(u,v) - P)|²
+    where W selects the axes of the distance (x, y and z for the 3D closest point, or
+    x and y only to find the surface point vertically aligned with P). The gradient and
+    the Hessian use the first and second derivatives of the surface (The NURBS Book,
+    Piegl & Tiller, section 6.1). Where the Hessian is not positive definite, the
+    Gauss-Newton approximation is used instead. Each step is bounded to the [0,1]
+    parameter domain and shortened by a backtracking line search until the distance
+    decreases.
+
+    All the points are solved together: each iteration evaluates the surface once for
+    the points that did not converge yet.
+
+    The closestPointSession class remembers the last converged uv of each caller to
+    warm-start the searches of consecutive targets.
+
+Example of implementation:
+
+    uv, points, iterations, converged = projectPoints(surfEval, targets, uv_start, 0.05)
+
+    session = closestPointSession()
+    uv_start, isWarm = session.seed('gap', uv_relative)
+    ...
+    session.record('gap', uv_relative, uv, iterations, isWarm, False)
+    print(session.summary())
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the Newton point inversion (batch, bounded line search)
+                Warm-started closest point session with hit rate and iteration statistics
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function projectPoints
+#
+#   Description: finds the uv pairs of the surface points the closest to many target points
+#                by Newton iterations on the squared distance. A point has converged when the
+#                length of its last step on the surface is smaller than the tolerance.
+#
+#   Returns:
+#       uv : np.array, shape (N,2), the uv pairs found
+#       points : np.array, shape (N,3), the surface points at uv
+#       iterations : np.array of int, shape (N,), the number of Newton iterations of each point
+#       converged : np.array of bool, shape (N,), the convergence of each point
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator or surfaceTables, the batch evaluator of the surface
+#       targets : array-like, shape (N,3), the target points
+#       uv_start : array-like, shape (N,2), the starting uv pairs
+#       tolerance : float, mm, the convergence tolerance on the step length
+#       max_iterations : int, the maximum number of Newton iterations
+#       axes : tuple of int, the axes used in the distance (0, 1, 2 for x, y, z)
+#       max_halvings : int, the maximum number of step halvings of the line search
+#
+def projectPoints(evaluator, targets, uv_start, tolerance, max_iterations = 20, axes = (0,1,2), max_halvings = 8):
+    targets = np.atleast_2d(np.asarray(targets, dtype=float))
+    uv = np.clip(np.atleast_2d(np.asarray(uv_start, dtype=float)), 0, 1)
+    weights = np.zeros(3)
+    weights[list(axes)] = 1
+
+    ders = evaluator.derivatives(uv, 2)
+    residuals = (ders[:, 0, 0] - targets) * weights
+    distances = np.sum(residuals**2, axis=1)
+    iterations = np.zeros(len(uv), dtype=int)
+    converged = np.zeros(len(uv), dtype=bool)
+
+    active = np.arange(len(uv))
+    for iteration in range(max_iterations):
+        if len(active) == 0:
+            break
+        iterations[active] += 1
+        d = ders[active]
+        r = residuals[active]
+        su = d[:, 1, 0] * weights
+        sv = d[:, 0, 1] * weights
+
+        # Gradient and Hessian of the squared distance
+        g_u = np.sum(r * su, axis=1)
+        g_v = np.sum(r * sv, axis=1)
+        jtj_uu = np.sum(su * su, axis=1)
+        jtj_uv = np.sum(su * sv, axis=1)
+        jtj_vv = np.sum(sv * sv, axis=1)
+        h_uu = jtj_uu + np.sum(r * d[:, 2, 0], axis=1)
+        h_uv = jtj_uv + np.sum(r * d[:, 1, 1], axis=1)
+        h_vv = jtj_vv + np.sum(r * d[:, 0, 2], axis=1)
+
+        # Gauss-Newton approximation where the Hessian is not positive definite
+        det = h_uu * h_vv - h_uv**2
+        indefinite = (h_uu <= 0) | (det <= 1e-12 * (jtj_uu * jtj_vv + 1e-300))
+        h_uu = np.where(indefinite, jtj_uu, h_uu)
+        h_uv = np.where(indefinite, jtj_uv, h_uv)
+        h_vv = np.where(indefinite, jtj_vv, h_vv)
+        det = h_uu * h_vv - h_uv**2
+        singular = det <= 0
+        det[singular] = 1
+
+        step = np.stack((-(h_vv * g_u - h_uv * g_v) / det, -(h_uu * g_v - h_uv * g_u) / det), axis=1)
+        step[singular] = 0
+
+        # Backtracking line search bounded to the parameter domain
+        uv_old = uv[active]
+        accepted = np.zeros(len(active), dtype=bool)
+        pending = np.arange(len(active))
+        alpha = 1.0
+        for halving in range(max_halvings + 1):
+            trial = np.clip(uv_old[pending] + alpha * step[pending], 0, 1)
+            trial_ders = evaluator.derivatives(trial, 2)
+            trial_residuals = (trial_ders[:, 0, 0] - targets[active[pending]]) * weights
+            trial_distances = np.sum(trial_residuals**2, axis=1)
+
+            better = trial_distances <= distances[active[pending]]
+            done = active[pending[better]]
+            uv[done] = trial[better]
+            ders[done] = trial_ders[better]
+            residuals[done] = trial_residuals[better]
+            distances[done] = trial_distances[better]
+            accepted[pending[better]] = True
+
+            pending = pending[~better]
+            if len(pending) == 0:
+                break
+            alpha /= 2
+
+        # Length on the surface of the step taken (or of the full step proposed if the
+        #   line search found no decrease, meaning the point is at the minimum already)
+        delta = np.where(accepted[:, None], uv[active] - uv_old, step)
+        length = np.linalg.norm(delta[:, 0:1] * su + delta[:, 1:2] * sv, axis=1)
+
+        small = length <= tolerance
+        converged[active] = small
+        active = active[accepted & ~small]
+
+    return uv, ders[:, 0, 0], iterations, converged
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class closestPointSession
+#
+#   Description: memory of the closest point searches of consecutive targets. The last
+#                converged uv of each caller (collision footprint ends, Heron points, gap
+#                adjustment...) is kept to warm-start its next search: the starting uv is the
+#                relative uv of the new target corrected by the difference between the last
+#                converged uv and the relative uv of the last target. Consecutive targets of a
+#                pass being close, this correction is nearly the same from one to the next.
+#                The session also gathers the search statistics for the run summary.
+#
+class closestPointSession:
+    def __init__(self):
+        self.memory = {}            # Last [converged uv, relative uv] of each caller
+        self.searches = 0           # Number of searches
+        self.iterations = 0         # Number of iterations of all searches
+        self.warm = 0               # Number of searches warm-started from the memory
+        self.warm_iterations = 0    # Number of iterations of the warm-started searches
+        self.fallbacks = 0          # Number of searches done by the fallback method
+
+    # Method seed
+    #
+    #   Description: gives the starting uv of a search for a caller
+    #
+    #   Returns:
+    #       uv : list of float, the starting uv pair
+    #       isWarm : bool, True if the starting uv comes from the memory of the caller
+    #
+    #   Parameters:
+    #       caller : string or None, the caller key (None for a search without memory)
+    #       uv_relative : list of float, the relative uv pair of the target (relativeUVbyXY)
+    #
+    def seed(self, caller, uv_relative):
+        if caller is None or caller not in self.memory:
+            return uv_relative, False
+        uv_last, uv_relative_last = self.memory[caller]
+        uv = np.clip(np.add(uv_relative, np.subtract(uv_last, uv_relative_last)), 0, 1)
+        return [float(uv[0]), float(uv[1])], True
+
+    # Method record
+    #
+    #   Description: adds a search to the statistics and remembers its result for the caller
+    #
+    #   Parameters:
+    #       caller : string or None, the caller key
+    #       uv_relative : list of float, the relative uv pair of the target
+    #       uv : list of float, the converged uv pair (None if the search did not converge)
+    #       iterations : int, the number of iterations of the search
+    #       isWarm : bool, True if the search was warm-started
+    #       isFallback : bool, True if the search was done by the fallback method
+    #
+    def record(self, caller, uv_relative, uv, iterations, isWarm, isFallback):
+        self.searches += 1
+        self.iterations += iterations
+        if isWarm:
+            self.warm += 1
+            self.warm_iterations += iterations
+        if isFallback:
+            self.fallbacks += 1
+        if caller is not None and uv is not None:
+            self.memory[caller] = [list(uv), list(uv_relative)]
+
+    # Method forget
+    #
+    #   Description: clears the memory of a caller, or of all callers
+    #
+    #   Parameters:
+    #       caller : string or None, the caller key (None for all callers)
+    #
+    def forget(self, caller = None):
+        if caller is None:
+            self.memory.clear()
+        else:
+            self.memory.pop(caller, None)
+
+    # Method summary
+    #
+    #   Description: formats the search statistics for the run summary
+    #
+    #   Returns:
+    #       string, the number of searches, iterations, fallbacks and warm starts
+    #
+    def summary(self):
+        cold = self.searches - self.warm
+        msg = 'Closest point searches = %i (%.1f iterations per search, %i fallbacks to the step walk)\n' % (self.searches, self.iterations / max(self.searches, 1), self.fallbacks)
+        msg += ' Warm-started searches = %i (%.1f %% hit rate, %.1f iterations per warm search, %.1f per cold search)' % (self.warm, 100 * self.warm / max(self.searches, 1),
+                self.warm_iterations / max(self.warm, 1), (self.iterations - self.warm_iterations) / max(cold, 1))
+        return msg
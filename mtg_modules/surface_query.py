@@ -0,0 +1,198 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_query.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Fused point + derivatives query of the projection surface with memoization.
+
+    A single query evaluates the point and the first and second derivatives of the
+    surface at a uv pair. The normal, the tangents and the curvature terms are all
+    derived from that one result. Results are kept in a LRU memo keyed on the quantized
+    uv pair so the repeated hits of the same uv (normal, tangents, curvature of a
+    projected target) are only evaluated once.
+
+Example of implementation:
+
+    surfQuery = surfaceQuery(surfaceEvaluator(surf))
+    sq = surfQuery.query([0.3, 0.4])
+    sq['point'], sq['normal'], sq['tangent_u'], sq['tangent_v'], sq['ders'][2][0]
+    print(surfQuery.summary())
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the surface query with LRU memo and hit / miss statistics
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import collections
+import numpy as np
+
+# MTG imports
+from mtg_modules.surface_evaluator import normalizeRows
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class surfaceQuery
+#
+#   Description: memoized query of the point, normal, tangents and second derivatives
+#                of a surface at uv pairs.
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator, the batch evaluator of the surface
+#       cache_size : int, maximum number of uv pairs kept in the LRU memo
+#       quantum : float, the uv quantization step used to build the memo keys
+#
+class surfaceQuery:
+    def __init__(self, evaluator, cache_size = 4096, quantum = 1e-9):
+        self.evaluator = evaluator
+        self.cache_size = cache_size
+        self.quantum = quantum
+        self.cache = collections.OrderedDict()  # LRU memo of the query results, by quantized uv
+        self.hits = 0                           # Number of queries served by the memo
+        self.misses = 0                         # Number of queries evaluated on the surface
+
+    # Method key
+    #
+    #   Description: quantizes a uv pair to build its memo key
+    #
+    #   Returns:
+    #       tuple of int, the memo key
+    #
+    #   Parameters:
+    #       uv : list of float, the uv pair
+    #
+    def key(self, uv):
+        return (int(round(uv[0] / self.quantum)), int(round(uv[1] / self.quantum)))
+
+    # Method compute
+    #
+    #   Description: evaluates the point and the derivatives up to the second order for
+    #                many uv pairs and packs the results of each pair
+    #
+    #   Returns:
+    #       list of dict, the query result of each uv pair
+    #
+    #   Parameters:
+    #       uv : np.array, shape (N,2), the uv pairs
+    #
+    def compute(self, uv):
+        ders = self.evaluator.derivatives(uv, 2)
+        normals = normalizeRows(np.cross(ders[:, 1, 0], ders[:, 0, 1]))
+        tangents_u = normalizeRows(ders[:, 1, 0])
+        tangents_v = normalizeRows(ders[:, 0, 1])
+
+        results = []
+        for k in range(len(uv)):
+            results.append({'uv': uv[k],
+                            'point': ders[k, 0, 0],
+                            'normal': normals[k],
+                            'tangent_u': tangents_u[k],
+                            'tangent_v': tangents_v[k],
+                            'ders': ders[k]})
+        return results
+
+    # Method store
+    #
+    #   Description: adds a query result to the memo and drops the least recently used one if full
+    #
+    #   Parameters:
+    #       key : tuple of int, the memo key
+    #       result : dict, the query result
+    #
+    def store(self, key, result):
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    # Method query
+    #
+    #   Description: returns the point, unit normal, unit tangents and derivatives
+    #                (ders[k][l], k times w.r.t. u and l times w.r.t. v, up to k+l = 2) at a uv pair
+    #
+    #   Returns:
+    #       dict, keys 'uv', 'point', 'normal', 'tangent_u', 'tangent_v' and 'ders'
+    #
+    #   Parameters:
+    #       uv : list of float, the uv pair
+    #
+    def query(self, uv):
+        key = self.key(uv)
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = self.compute(np.array([uv], dtype=float))[0]
+        self.store(key, result)
+        return result
+
+    # Method queryMany
+    #
+    #   Description: batch version of query. The pairs missing from the memo are
+    #                evaluated on the surface in a single call.
+    #
+    #   Returns:
+    #       dict of np.array, same keys as query with a leading dimension N
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def queryMany(self, uv):
+        uv = np.atleast_2d(np.asarray(uv, dtype=float))
+        keys = [self.key(pair) for pair in uv]
+        results = [self.cache.get(key) for key in keys]
+
+        missing = [k for k in range(len(uv)) if results[k] is None]
+        self.hits += len(uv) - len(missing)
+        self.misses += len(missing)
+        for k in range(len(uv)):
+            if results[k] is not None:
+                self.cache.move_to_end(keys[k])
+
+        # Evaluate all missing pairs at once
+        if len(missing) > 0:
+            for k, result in zip(missing, self.compute(uv[missing])):
+                results[k] = result
+                self.store(keys[k], result)
+
+        return {name: np.array([result[name] for result in results]) for name in results[0]} if len(results) > 0 else {}
+
+    # Method clear
+    #
+    #   Description: empties the memo and resets the statistics
+    #
+    def clear(self):
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    # Method summary
+    #
+    #   Description: formats the memo statistics for the run summary
+    #
+    #   Returns:
+    #       string, the number of hits, misses and hit rate of the memo
+    #
+    def summary(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total > 0 else 0
+        return 'Surface queries = %i (%i evaluated, %i served by memo, %.1f %% hit rate)' % (total, self.misses, self.hits, rate)
@@ -0,0 +1,243 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_sdf.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Signed distance field (SDF) of the projection surface on a regular voxel grid.
+
+    The grid covers the bounding box of the surface, extended by a margin on each side.
+    The signed distance of each grid node is the distance to its closest surface point
+    (Newton point inversion started from the nearest surface sample), positive on the
+    side of the surface normal. The grid is built once per surface, by chunks of nodes,
+    and saved next to the surface file (see surface_cache).
+
+    The distance and its gradient at any point are then interpolated trilinearly in the
+    grid in constant time, without any closest point search. Away from the surface, the
+    gradient is the unit direction from the closest surface point: a point minus its
+    distance times the gradient is its closest surface point.
+
+    The points outside the grid are not clamped to its boundary (the distance would be
+    underestimated by up to the distance to the grid): their distance and gradient come from
+    the exact closest point search used to build the grid. The interpolated distance is only
+    bounded inside the grid, by the interpolation error of the nodes.
+
+Example of implementation:
+
+    surfSDF = loadDistanceField(surfaceEvaluator(surf), 'prefs/meshes/sine_20x20.json', 1.0, 5.0)
+    distances, gradients = surfSDF.query([[10, 20, 0], [30, 40, 1]])
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the signed distance field (build, disk cache, trilinear lookup and gradient)
+                Exact closest point search for the points outside the grid
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import os
+import numpy as np
+
+# MTG imports
+from mtg_modules.surface_cache import contentHash, cachePath
+from mtg_modules.surface_evaluator import normalizeRows
+from mtg_modules.surface_projection import projectPoints
+from mtg_modules.surface_index import surfaceSampleIndex
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function loadDistanceField
+#
+#   Description: loads the signed distance field saved next to the surface file if it matches
+#                the surface, the resolution and the margin, otherwise builds it and saves it.
+#
+#   Returns:
+#       field : surfaceDistanceField, the signed distance field
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator, the batch evaluator of the surface
+#       source : string, the path of the surface file (json or stl)
+#       resolution : float, mm, the grid spacing
+#       margin : float, mm, the extension of the grid around the surface bounding box
+#
+def loadDistanceField(evaluator, source, resolution, margin):
+    key = contentHash(evaluator.contentHash(), float(resolution), float(margin))
+    fieldFile = cachePath(source, 'sdf', key)
+
+    if os.path.exists(fieldFile):
+        print('Loading signed distance field from : %s...' % fieldFile)
+        return surfaceDistanceField.load(fieldFile, evaluator)
+
+    print('Building signed distance field (resolution = %g mm, margin = %g mm)...' % (resolution, margin))
+    field = surfaceDistanceField.build(evaluator, resolution, margin)
+    field.save(fieldFile)
+    print('Signed distance field : %i × %i × %i nodes, saved to : %s\n' % (field.values.shape + (fieldFile,)))
+    return field
+
+# Function closestDistances
+#
+#   Description: exact signed distance of many points to the surface, from their closest surface
+#                point (Newton point inversion started from the nearest surface sample)
+#
+#   Returns:
+#       distances : np.array, shape (N,), the signed distances (positive on the side of the normal)
+#       gradients : np.array, shape (N,3), the unit directions from the closest surface points
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator or surfaceTables, the batch evaluator of the surface
+#       index : surfaceSampleIndex, the surface samples giving the starting uv
+#       points : np.array, shape (N,3), the points
+#       tolerance : float, mm, the convergence tolerance of the point inversion
+#
+def closestDistances(evaluator, index, points, tolerance):
+    uv_start = index.nearest(points)[0]
+    uv = projectPoints(evaluator, points, uv_start, tolerance)[0]
+    surface, normals = evaluator.evaluate(uv)[0:2]
+    offsets = points - surface
+    signs = np.where(np.sum(offsets * normals, axis=1) < 0, -1.0, 1.0)
+    return signs * np.linalg.norm(offsets, axis=1), signs[:, None] * normalizeRows(offsets)
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class surfaceDistanceField
+#
+#   Description: signed distance to the surface on a regular grid, interpolated trilinearly
+#
+#   Parameters:
+#       origin : array-like, shape (3,), the coordinates of the first grid node
+#       spacing : float, mm, the grid spacing
+#       values : np.array, shape (nb_x, nb_y, nb_z), the signed distance of each grid node
+#       evaluator : surfaceEvaluator or surfaceTables, the batch evaluator of the surface (exact
+#                   distances outside the grid)
+#       sample_size : int, number of surface samples following u and v for the starting uv
+#
+class surfaceDistanceField:
+    def __init__(self, origin, spacing, values, evaluator, sample_size = 64):
+        self.origin = np.asarray(origin, dtype=float)
+        self.spacing = float(spacing)
+        self.values = values
+        self.evaluator = evaluator
+        self.sample_size = sample_size
+        self.index = None           # Surface samples of the exact distances, built on the first point outside the grid
+
+    # Method build
+    #
+    #   Description: calculates the signed distance of the grid nodes covering a surface
+    #
+    #   Returns:
+    #       field : surfaceDistanceField, the signed distance field
+    #
+    #   Parameters:
+    #       evaluator : surfaceEvaluator or surfaceTables, the batch evaluator of the surface
+    #       resolution : float, mm, the grid spacing
+    #       margin : float, mm, the extension of the grid around the surface bounding box
+    #       sample_size : int, number of surface samples following u and v for the starting uv
+    #       chunk_size : int, number of grid nodes solved at once
+    #
+    @classmethod
+    def build(cls, evaluator, resolution, margin, sample_size = 64, chunk_size = 50000):
+        index = surfaceSampleIndex(evaluator, sample_size)
+        lower = index.samples.min(axis=0) - margin
+        upper = index.samples.max(axis=0) + margin
+        shape = tuple(np.ceil((upper - lower) / resolution).astype(int) + 1)
+
+        axes = [lower[k] + resolution * np.arange(shape[k]) for k in range(3)]
+        nodes = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        values = np.empty(len(nodes))
+        for start in range(0, len(nodes), chunk_size):
+            values[start:start + chunk_size] = closestDistances(evaluator, index, nodes[start:start + chunk_size], 1e-4 * resolution)[0]
+
+        field = cls(lower, resolution, values.reshape(shape), evaluator, sample_size)
+        field.index = index
+        return field
+
+    # Method save
+    #
+    #   Description: saves the signed distance field in a npz file
+    #
+    #   Parameters:
+    #       path : string, the file path
+    #
+    def save(self, path):
+        np.savez(path, origin=self.origin, spacing=self.spacing, values=self.values)
+
+    # Method load
+    #
+    #   Description: loads a signed distance field saved in a npz file
+    #
+    #   Returns:
+    #       field : surfaceDistanceField, the signed distance field
+    #
+    #   Parameters:
+    #       path : string, the file path
+    #       evaluator : surfaceEvaluator or surfaceTables, the batch evaluator of the surface
+    #
+    @classmethod
+    def load(cls, path, evaluator):
+        with np.load(path) as data:
+            return cls(data['origin'], data['spacing'], data['values'], evaluator)
+
+    # Method query
+    #
+    #   Description: interpolates the signed distance and its gradient at many points. The
+    #                points outside the grid get the exact distance (closestDistances).
+    #
+    #   Returns:
+    #       distances : np.array, shape (N,), the signed distances
+    #       gradients : np.array, shape (N,3), the unit gradients of the signed distance
+    #
+    #   Parameters:
+    #       points : array-like, shape (N,3), the points
+    #
+    def query(self, points):
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        nb_cells = np.array(self.values.shape) - 1
+        unclamped = (points - self.origin) / self.spacing
+        pos = np.clip(unclamped, 0, nb_cells)
+        cell = np.minimum(np.floor(pos).astype(int), nb_cells - 1)
+        t = pos - cell
+        i, j, k = cell[:, 0], cell[:, 1], cell[:, 2]
+
+        # Values of the 8 corners of the cells, c[a][b][c] at (i+a, j+b, k+c)
+        c = [[[self.values[i + a, j + b, k + d] for d in (0, 1)] for b in (0, 1)] for a in (0, 1)]
+        tx, ty, tz = t[:, 0], t[:, 1], t[:, 2]
+
+        # Trilinear interpolation, successively along x, y and z
+        cx = [[c[0][b][d] * (1 - tx) + c[1][b][d] * tx for d in (0, 1)] for b in (0, 1)]
+        cxy = [cx[0][d] * (1 - ty) + cx[1][d] * ty for d in (0, 1)]
+        distances = cxy[0] * (1 - tz) + cxy[1] * tz
+
+        # Exact gradient of the trilinear interpolation
+        dx = [[c[1][b][d] - c[0][b][d] for d in (0, 1)] for b in (0, 1)]
+        dxy = [dx[0][d] * (1 - ty) + dx[1][d] * ty for d in (0, 1)]
+        dy = [cx[1][d] - cx[0][d] for d in (0, 1)]
+        gradients = np.stack((dxy[0] * (1 - tz) + dxy[1] * tz,
+                              dy[0] * (1 - tz) + dy[1] * tz,
+                              cxy[1] - cxy[0]), axis=1) / self.spacing
+        gradients = normalizeRows(gradients)
+
+        # Points outside the grid
+        outside = np.any(pos != unclamped, axis=1)
+        if np.any(outside):
+            if self.index is None:
+                self.index = surfaceSampleIndex(self.evaluator, self.sample_size)
+            distances[outside], gradients[outside] = closestDistances(self.evaluator, self.index, points[outside], 1e-4 * self.spacing)
+
+        return distances, gradients
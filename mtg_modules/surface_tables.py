@@ -0,0 +1,319 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(surface_tables.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Precomputed dense lookup tables of the projection surface.
+
+    The NURBS is sampled once on a dense uv grid and the point, the tangents (first
+    derivatives) and the second derivatives are stored in tables. The grid nodes are
+    aligned on the knots of the surface: each knot span is subdivided in the same number
+    of cells. Values are interpolated bicubically (tensor product of 4-node Lagrange
+    stencils kept inside the knot span) so the interpolant never crosses a knot where
+    the spline loses continuity. For a polynomial spline of degree 3 or less, the
+    interpolation is exact; otherwise the error decreases with the 4th power of the cell size.
+
+    The number of subdivisions is chosen automatically to meet a tolerance in mm on the
+    surface points. The tables are saved next to the surface file, keyed by the content
+    hash of the surface, so the next jobs on the same substrate load them directly.
+
+    The surfaceTables class has the same evaluation methods as the surfaceEvaluator class
+    and can be used in its place.
+
+Example of implementation:
+
+    surfEval = loadSurfaceTables(surfaceEvaluator(surf), 'prefs\\meshes\\sine_20x20.json', 0.001)
+    points, normals, tangents_u, tangents_v = surfEval.evaluate([[0.1, 0.2], [0.3, 0.4]])
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the surface tables (automatic resolution, disk cache)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import os
+import numpy as np
+
+# MTG imports
+from mtg_modules.surface_evaluator import normalizeRows
+from mtg_modules.surface_cache import contentHash, cachePath
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function tableNodes
+#
+#   Description: parameters of the table nodes of one direction. Each knot span is
+#                divided in subdiv cells and has its own subdiv+1 nodes. The end nodes
+#                can be moved slightly inside the span so the derivatives sampled there
+#                are the ones of the span and not of its neighbour.
+#
+#   Returns:
+#       np.array, shape (nb_spans * (subdiv+1),), the node parameters
+#
+#   Parameters:
+#       breaks : np.array, the distinct knots of the direction
+#       subdiv : int, number of cells per knot span
+#       inset : float, fraction of the span width by which the end nodes are moved inside
+#
+def tableNodes(breaks, subdiv, inset = 0):
+    steps = np.linspace(0, 1, subdiv + 1)
+    steps[0], steps[-1] = inset, 1 - inset
+    return (breaks[:-1, None] + np.diff(breaks)[:, None] * steps[None, :]).ravel()
+
+# Function tableStencils
+#
+#   Description: indices and weights of the 4-node cubic Lagrange stencil of each parameter.
+#                The stencil is shifted to stay inside the knot span of the parameter.
+#
+#   Returns:
+#       idx : np.array of int, shape (N,4), the indices of the stencil nodes
+#       weights : np.array, shape (N,4), the Lagrange weights of the stencil nodes
+#
+#   Parameters:
+#       breaks : np.array, the distinct knots of the direction
+#       subdiv : int, number of cells per knot span (3 or more)
+#       params : np.array, the parameters to interpolate
+#
+def tableStencils(breaks, subdiv, params):
+    nb_spans = len(breaks) - 1
+    span = np.clip(np.searchsorted(breaks, params, side='right') - 1, 0, nb_spans - 1)
+
+    # Position of the parameter in the span, in number of cells
+    local = (params - breaks[span]) / (breaks[span + 1] - breaks[span]) * subdiv
+    first = np.clip(np.floor(local).astype(int) - 1, 0, subdiv - 3)
+    t = local - first
+
+    weights = np.stack((-(t - 1) * (t - 2) * (t - 3) / 6,
+                        t * (t - 2) * (t - 3) / 2,
+                        -t * (t - 1) * (t - 3) / 2,
+                        t * (t - 1) * (t - 2) / 6), axis=1)
+    idx = (span * (subdiv + 1) + first)[:, None] + np.arange(4)[None, :]
+    return idx, weights
+
+# Function loadSurfaceTables
+#
+#   Description: loads the surface tables saved next to the surface file if they match the
+#                surface and the tolerance, otherwise builds them and saves them.
+#
+#   Returns:
+#       tables : surfaceTables, the surface tables
+#
+#   Parameters:
+#       evaluator : surfaceEvaluator, the batch evaluator of the surface
+#       source : string, the path of the surface file (json or stl)
+#       tolerance : float, mm, the maximum interpolation error on the surface points
+#
+def loadSurfaceTables(evaluator, source, tolerance):
+    key = contentHash(evaluator.contentHash(), float(tolerance))
+    tablesFile = cachePath(source, 'tables', key)
+
+    if os.path.exists(tablesFile):
+        print('Loading surface tables from : %s...' % tablesFile)
+        return surfaceTables.load(tablesFile)
+
+    print('Building surface tables (tolerance = %g mm)...' % tolerance)
+    tables = surfaceTables.build(evaluator, tolerance)
+    tables.save(tablesFile)
+    print('Surface tables : %i × %i nodes, max error = %g mm, saved to : %s\n' % (tables.ders.shape[0], tables.ders.shape[1], tables.max_error, tablesFile))
+    return tables
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class surfaceTables
+#
+#   Description: dense tables of the surface point and derivatives on a knot-aligned uv grid,
+#                interpolated bicubically.
+#
+#   Parameters:
+#       breaks_u, breaks_v : np.array, the distinct knots of each direction
+#       subdiv_u, subdiv_v : int, number of cells per knot span of each direction
+#       ders : np.array, shape (nb_nodes_u, nb_nodes_v, 3, 3, 3), the surface derivatives
+#              ders[i,j,k,l] (k times w.r.t. u and l times w.r.t. v, up to k+l = 2) at each node
+#       max_error : float, mm, the measured maximum interpolation error on the surface points
+#
+class surfaceTables:
+    def __init__(self, breaks_u, breaks_v, subdiv_u, subdiv_v, ders, max_error = 0):
+        self.breaks_u = np.asarray(breaks_u, dtype=float)
+        self.breaks_v = np.asarray(breaks_v, dtype=float)
+        self.subdiv_u = int(subdiv_u)
+        self.subdiv_v = int(subdiv_v)
+        self.ders = ders
+        self.max_error = float(max_error)
+
+    # Method sample
+    #
+    #   Description: samples the surface derivatives at the table nodes
+    #
+    #   Returns:
+    #       np.array, shape (nb_nodes_u, nb_nodes_v, 3, 3, 3), the derivatives at the nodes
+    #
+    #   Parameters:
+    #       evaluator : surfaceEvaluator, the batch evaluator of the surface
+    #       breaks_u, breaks_v : np.array, the distinct knots of each direction
+    #       subdiv_u, subdiv_v : int, number of cells per knot span of each direction
+    #       chunk_size : int, number of nodes evaluated at once
+    #
+    @staticmethod
+    def sample(evaluator, breaks_u, breaks_v, subdiv_u, subdiv_v, chunk_size = 100000):
+        nodes_u = tableNodes(breaks_u, subdiv_u, 1e-10)
+        nodes_v = tableNodes(breaks_v, subdiv_v, 1e-10)
+        uu, vv = np.meshgrid(nodes_u, nodes_v, indexing='ij')
+        uv = np.stack((uu.ravel(), vv.ravel()), axis=1)
+
+        ders = np.empty((len(uv), 3, 3, 3))
+        for start in range(0, len(uv), chunk_size):
+            ders[start:start + chunk_size] = evaluator.derivatives(uv[start:start + chunk_size], 2)
+        return ders.reshape(len(nodes_u), len(nodes_v), 3, 3, 3)
+
+    # Method build
+    #
+    #   Description: builds the tables of a surface. The number of cells per knot span is
+    #                increased until the interpolation error on the surface points, measured
+    #                at random uv pairs, is smaller than the tolerance.
+    #
+    #   Returns:
+    #       tables : surfaceTables, the surface tables
+    #
+    #   Parameters:
+    #       evaluator : surfaceEvaluator, the batch evaluator of the surface
+    #       tolerance : float, mm, the maximum interpolation error on the surface points
+    #       nb_checks : int, number of random uv pairs used to measure the error
+    #       max_subdiv : int, maximum number of cells per knot span
+    #
+    @classmethod
+    def build(cls, evaluator, tolerance, nb_checks = 4096, max_subdiv = 64):
+        breaks_u = np.unique(evaluator.knotvector_u)
+        breaks_v = np.unique(evaluator.knotvector_v)
+
+        # Exact points at random uv pairs (fixed seed to get the same tables each time)
+        uv_check = np.random.default_rng(0).random((nb_checks, 2))
+        uv_check[:, 0] = breaks_u[0] + uv_check[:, 0] * (breaks_u[-1] - breaks_u[0])
+        uv_check[:, 1] = breaks_v[0] + uv_check[:, 1] * (breaks_v[-1] - breaks_v[0])
+        pts_check = evaluator.points(uv_check)
+
+        subdiv = 3
+        while True:
+            tables = cls(breaks_u, breaks_v, subdiv, subdiv, cls.sample(evaluator, breaks_u, breaks_v, subdiv, subdiv))
+            tables.max_error = np.max(np.linalg.norm(tables.points(uv_check) - pts_check, axis=1))
+            if tables.max_error <= tolerance:
+                break
+            if subdiv >= max_subdiv:
+                print('\nWARNING: surface tables tolerance (%g mm) not met with %i cells per knot span (max error = %g mm).' % (tolerance, subdiv, tables.max_error))
+                break
+
+            # The bicubic interpolation error decreases with the 4th power of the cell size
+            subdiv = min(max_subdiv, max(subdiv + 1, int(np.ceil(1.1 * subdiv * (tables.max_error / tolerance)**0.25))))
+
+        return tables
+
+    # Method save
+    #
+    #   Description: saves the tables in a npz file
+    #
+    #   Parameters:
+    #       path : string, the file path
+    #
+    def save(self, path):
+        np.savez(path, breaks_u=self.breaks_u, breaks_v=self.breaks_v, subdiv=np.array([self.subdiv_u, self.subdiv_v]),
+                 ders=self.ders, max_error=self.max_error)
+
+    # Method load
+    #
+    #   Description: loads tables saved in a npz file
+    #
+    #   Returns:
+    #       tables : surfaceTables, the surface tables
+    #
+    #   Parameters:
+    #       path : string, the file path
+    #
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['breaks_u'], data['breaks_v'], data['subdiv'][0], data['subdiv'][1], data['ders'], data['max_error'])
+
+    # Method derivatives
+    #
+    #   Description: interpolates the surface derivatives up to a given order for many uv pairs
+    #
+    #   Returns:
+    #       skl : np.array, shape (N, order+1, order+1, 3), same layout as surfaceEvaluator.derivatives
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #       order : int, the highest derivative order (2 at most)
+    #
+    def derivatives(self, uv, order = 1):
+        uv = np.atleast_2d(np.asarray(uv, dtype=float))
+        idx_u, w_u = tableStencils(self.breaks_u, self.subdiv_u, uv[:, 0])
+        idx_v, w_v = tableStencils(self.breaks_v, self.subdiv_v, uv[:, 1])
+
+        local = self.ders[idx_u[:, :, None], idx_v[:, None, :], 0:order + 1, 0:order + 1]
+        skl = np.einsum('na,nb,nab...->n...', w_u, w_v, local)
+
+        # Only the terms with k+l <= order are returned
+        for k in range(order + 1):
+            skl[:, k, order - k + 1:] = 0
+        return skl
+
+    # Method points
+    #
+    #   Description: interpolates the surface points for many uv pairs
+    #
+    #   Returns:
+    #       np.array, shape (N,3), the interpolated points
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def points(self, uv):
+        return self.derivatives(uv, 0)[:, 0, 0]
+
+    # Method evaluate
+    #
+    #   Description: interpolates the points, the unit normals and the unit tangents for many uv pairs
+    #
+    #   Returns:
+    #       points, normals, tangents_u, tangents_v : np.array (N,3), same as surfaceEvaluator.evaluate
+    #
+    #   Parameters:
+    #       uv : array-like, shape (N,2), the uv pairs
+    #
+    def evaluate(self, uv):
+        skl = self.derivatives(uv, 1)
+        normals = normalizeRows(np.cross(skl[:, 1, 0], skl[:, 0, 1]))
+        return skl[:, 0, 0], normals, normalizeRows(skl[:, 1, 0]), normalizeRows(skl[:, 0, 1])
+
+    # Method evaluateGrid
+    #
+    #   Description: interpolates the surface on a regular uv grid (same ordering as surf.evalpts)
+    #
+    #   Returns:
+    #       np.array, shape (sample_size_u * sample_size_v, 3), the interpolated points
+    #
+    #   Parameters:
+    #       sample_size_u, sample_size_v : int, number of points following u and v
+    #
+    def evaluateGrid(self, sample_size_u, sample_size_v):
+        uu, vv = np.meshgrid(np.linspace(self.breaks_u[0], self.breaks_u[-1], sample_size_u),
+                             np.linspace(self.breaks_v[0], self.breaks_v[-1], sample_size_v), indexing='ij')
+        return self.points(np.stack((uu.ravel(), vv.ravel()), axis=1))
@@ -0,0 +1,130 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(toolpath_array.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Structured NumPy array of the toolpath points.
+
+    Each point of the toolpath is a record of the structured dtype TOOLPATH_DTYPE:
+
+        - x, y, z, a, b, c : float64, the pose of the point (mm, deg)
+        - direction : int8, the printing direction code (index in DIRECTIONS : +x, -x, +y, -y)
+        - flags : uint16, the bitmask of the special attributes of the point (FLAG_*)
+
+    The generation functions of the toolpath (addPass, addConnection, changeOrientation)
+    return arrays of points, the projection tests the flags of the points with bitwise
+    operations and the special attributes are added in place (points['flags'] |= FLAG_PURGE).
+    The readable names of the flags are only needed for the exports and the debug (flagNames).
+
+Example of implementation:
+
+    points = toolpathArray([point(10, 20, start, directionCode('+y'), FLAG_PASS | FLAG_REFPOS)])
+    points['flags'][-1] |= FLAG_PURGE
+    if points[0]['flags'] & FLAG_REFPOS:
+        print(flagNames(points[0]['flags']))
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the toolpath array (pose columns, direction code, bitmask of the special attributes)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# Structured dtype of a toolpath point
+TOOLPATH_DTYPE = np.dtype([('x', 'f8'), ('y', 'f8'), ('z', 'f8'),
+                           ('a', 'f8'), ('b', 'f8'), ('c', 'f8'),
+                           ('direction', 'i1'), ('flags', 'u2')])
+POSE_FIELDS = ['x', 'y', 'z', 'a', 'b', 'c']
+
+# Printing directions, the direction code of a point is the index in this list
+DIRECTIONS = ['+x', '-x', '+y', '-y']
+
+# Special attributes of a point (bitmask)
+FLAG_PASS = 1                   # point of a pass of a microscaffold
+FLAG_WALL = 2                   # perpendicular offset for the wall creation
+FLAG_REFPOS = 4                 # reference position of the gap adjustment
+FLAG_LASTPASS = 8               # end of the last pass of a printing pass (bleeding)
+FLAG_COAST = 16                 # coast at end of a layer (extrusion stops)
+FLAG_COAST_PAUSE = 32           # pause after the completion of a layer (stop and go)
+FLAG_PURGE = 64                 # extrusion starts for the next layer (stop and go)
+FLAG_CLEAR_COL_NP = 128         # Z clearance of the layer change bleeding
+
+# Readable names of the flags (exports and debug), in the order of the former special strings
+FLAG_NAMES = [(FLAG_PASS, 'pass'), (FLAG_WALL, 'wall'), (FLAG_LASTPASS, 'lastPass'), (FLAG_REFPOS, 'refPos'),
+              (FLAG_COAST, 'coast'), (FLAG_COAST_PAUSE, 'coast pause'), (FLAG_PURGE, 'purge'),
+              (FLAG_CLEAR_COL_NP, 'clearColNP')]
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function directionCode
+#
+#   Description: code of a printing direction
+#
+#   Returns:
+#       int, the index of the direction in DIRECTIONS
+#
+#   Parameters:
+#       direction : string, the printing direction ('+x', '-x', '+y' or '-y')
+#
+def directionCode(direction):
+    return DIRECTIONS.index(direction)
+
+# Function point
+#
+#   Description: toolpath point at a new x, y, keeping the z and the orientation of a previous point
+#
+#   Returns:
+#       tuple, the record of the point (see toolpathArray)
+#
+#   Parameters:
+#       x, y : float, mm, the position of the point
+#       prev : record or tuple, the previous point
+#       direction : int, the printing direction code (see directionCode)
+#       flags : int, the special attributes of the point (FLAG_*)
+#
+def point(x, y, prev, direction, flags = 0):
+    return (x, y, prev[2], prev[3], prev[4], prev[5], direction, flags)
+
+# Function toolpathArray
+#
+#   Description: structured array of toolpath points
+#
+#   Returns:
+#       np.array of TOOLPATH_DTYPE, shape (N,), the points
+#
+#   Parameters:
+#       points : list of tuple, the records (x, y, z, a, b, c, direction, flags) of the points
+#
+def toolpathArray(points):
+    return np.array(points, dtype=TOOLPATH_DTYPE)
+
+# Function flagNames
+#
+#   Description: readable special attributes of a point, for the exports and the debug
+#
+#   Returns:
+#       string, the names of the flags separated by commas
+#
+#   Parameters:
+#       flags : int, the special attributes of the point (FLAG_*)
+#
+def flagNames(flags):
+    return ','.join(name for flag, name in FLAG_NAMES if int(flags) & flag)
@@ -0,0 +1,2789 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(toolpath_generator.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Toolpath generation engine of the microscaffold network.
+
+    A ToolpathGenerator holds all the state of one generation (process parameters, surface
+    patches, projection table, gap adjustment references, plot collections, statistics) on
+    the instance, without any module variable: many generations can run one after the other
+    or side by side in the same process, or in worker processes importing this module.
+
+    The parameters are a dictionary of plain values (see DEFAULT_PARAMS for the names, the
+    defaults and the units), copied by the generator. The projection surface is the list of
+    the batch evaluators of its patches (see surface_compiled and surface_mesh), None for a
+    planar network. The generation returns:
+
+        - the toolpath : structured array of the processed targets (see toolpath_array)
+        - the statistics : dictionary of the print forecast and of the surface evaluations
+        - the visual data : dictionary of the plot collections (VISUAL_FIELDS), optional
+
+    The RoboDK program is only needed outside of the debug mode, the move instructions are
+    then added to it during the generation.
+
+    The compiled kernels (use_jit_kernels) are compiled once per process but only used by the
+    generators enabling them: each one evaluates its own copies of the patch evaluators
+    (surfaceEvaluator.withKernels), the evaluators given by the caller are not changed.
+
+Example of implementation:
+
+    generator = ToolpathGenerator({'nb_layers': 4, 'pore_size_nominal': [0.750]}, surfEvals)
+    toolpath, stats, visual = generator.generate()
+    print(stats['print_dist'], len(visual['xs']))
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the generator engine (from the functions and the main loop of the MTG script)
+                Analytic local radius (use_analytic_curvature) evaluated target by target in
+                    managePosProjection: the uv and the tangents of a target are only known after
+                    the gap adjustment of the previous one, so the normal curvature is not batched
+                    over the targets (a single-row normalCurvatures call on the queried derivatives)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import copy
+import math as m
+from math import pi
+import numpy as np
+from datetime import datetime as dt
+from tqdm import tqdm
+
+# MTG imports
+from mtg_modules.math_tools import distanceP1P2, getRotMat, heronRadius, projectVector, rotAroundNormal, unit_vector
+from mtg_modules.surface_evaluator import surfaceEvaluator, normalCurvatures
+from mtg_modules.surface_query import surfaceQuery
+from mtg_modules.surface_tables import surfaceTables, loadSurfaceTables
+from mtg_modules.surface_projection import projectPoints, closestPointSession
+from mtg_modules.surface_index import surfaceSampleIndex
+from mtg_modules.surface_inverse import surfaceInverseMap
+from mtg_modules.surface_pass import isoPassEvaluator
+from mtg_modules.surface_bvh import surfaceBVH
+from mtg_modules.surface_sdf import surfaceDistanceField, loadDistanceField
+from mtg_modules.surface_patches import surfacePatchIndex
+from mtg_modules.surface_mesh import meshSurface
+from mtg_modules.surface_arclength import arcLengthTables
+from mtg_modules.surface_gaps import solveGapChain
+from mtg_modules.surface_offset import offsetSurfaceStack
+from mtg_modules import surface_kernels
+from mtg_modules.toolpath_array import *
+from mtg_modules.toolpath_targets import *
+
+# RoboDK API (only used outside of the debug mode)
+try:
+    from robolink import INSTRUCTION_COMMENT
+    from robodk import transl, Mat, Fanuc_2_Pose
+except ImportError:
+    INSTRUCTION_COMMENT = transl = Mat = Fanuc_2_Pose = None
+
+# ========================================================================================
+# VARIABLES
+# ========================================================================================
+
+# Multinozzle configuration
+MLTNZL_CONFIG_MEK_SN123 = {'name':'MEK SN 01-03','nb':26, 'd':0.250, 's':1.000}
+MLTNZL_CONFIGS = [MLTNZL_CONFIG_MEK_SN123]
+
+# Reservoir parameters
+RESERVOIR_48 = '48 cm³'                 # 48 cm³ reservoir type
+RESERVOIR_250 = '250 cm³'               # 250 cm³ reservoir type
+AVAILABLE_VOLUME_48 = 52.93022 - 5.07999     # cm³, available 48 cm³ ink cartridge volume as per MEK's drawings (= vol piston end - vol piston start)
+AVAILABLE_VOLUME_250 = 250              # cm³, available 250 cm³ ink cartridge volume (= vol piston end - vol piston start)
+
+# Material parameters
+#   rho: g/cm³, w: wt%, f: vol%, n: -, K: Pa.s^n, eta_inf: Pa.s, eta_0: Pa.s, tau_0: Pa, lambda: s, a: -
+white_color = (210/255,210/255,210/255)
+red_color = (200/255,0,0)
+drak_grey_color = (60/255,60/255,60/255)
+MAT_INK6040 = {'name':'Ink 60/40', 'rho':0.905, 'color':white_color, 'w':0, 'f':0, 'n':0.467858145410312, 'k':603.94862937638, 'eta_inf':0, 'eta_0':0, 'tau_0':0, 'lambda':0, 'a':0}
+MAT_ABRA012C = {'name':'Abra 0:12C', 'rho':1.272, 'color':drak_grey_color, 'w':12, 'f':24, 'n':0.5392, 'k':1351.06, 'eta_inf':0, 'eta_0':0, 'tau_0':0, 'lambda':0, 'a':0}
+MAT_EPON014 = {'name':'EPON 0:14', 'rho':1.2137, 'color':red_color, 'w':0, 'f':0, 'n':0.618, 'k':582.45, 'eta_inf':0, 'eta_0':0, 'tau_0':0, 'lambda':0, 'a':0}
+MATERIALS = [MAT_INK6040, MAT_ABRA012C, MAT_EPON014] #MAT_ABRA510, MAT_ABRA108, MAT_ABRABENCH, MAT_EPON014, MAT_EPON512, MAT_EPON1010]
+
+# Parameters of the generator and their default values (the values of the input window are converted to these units)
+DEFAULT_PARAMS = {
+    # Robot parameters
+    'travel_speed': 100,                        # mm/s, max travel speed for the Fanuc movements
+    'scaff_speed': 50,                          # mm/s, max target printing speed for the Fanuc movements
+    'reg_travel_speed': 'R[20]',                # registry for travel speed for the Fanuc movements
+    'reg_scaff_speed': 'R[21]',                 # registry for printing speed for the Fanuc movements
+    'reg_rot_speed': 'R[25]',                   # registry for printing speed for the Fanuc rotations
+    'scaff_extr_speed': '4-5 VDC',              # voltage, scaffold printing speed. See multinozzle controler.
+    'MLTNZL_CONFIG': MLTNZL_CONFIG_MEK_SN123['name'],   # name of the multinozzle configuration (MLTNZL_CONFIGS)
+    'MATERIAL_CHOICE': MAT_INK6040['name'],     # name of the material (MATERIALS)
+    'RESERVOIR_TYPE': RESERVOIR_48,             # reservoir type (RESERVOIR_48 or RESERVOIR_250)
+    'pressure_buildup_time': 5000.0,            # ms, time to wait for the pressure to build up before starting the print
+    'pressure_buildup_z': 7.0,                  # mm, Z offset when building up the pressure to avoid accumulating material on the printhead
+    'pressure_retract_time': 1000.0,            # ms, time to wait for the pressure to relief in the reservoir before no more material should be extruded
+    'pressure_post_retract_time': 2000.0,       # ms, wait time after changing layer before starting next extrusion
+    'stopAndGo': False,                         # Include stop and go to prevent material losses when changing layers
+    'CLEARANCE': 100,                           # mm, clearance value to travel before the approach point
+    'retraction_time': 5000,                    # ms, time to wait at the end of the print for retraction when pressure is retrieved
+    'TX': 1.20,                                 # empirical tax multiplier to account for over-extrusion (start, wall creation, end)
+
+    # Print geometry
+    'start_x': 0.0,                             # mm, X distance from origin to corner of overall dimensions
+    'start_y': 0.0,                             # mm, Y distance from origin to corner of overall dimensions
+    'start_z': 0.0,                             # mm, Z origin of the print
+    'center_print': 'None',                     # 'None', 'On X', 'On Y' or 'Both', centers the scaffold network (overrides start_x and start_y)
+    'nb_layers': 2,                             # number of layers
+    'nb_rows': 3,                               # number of rows of scaffolds (following X, odd)
+    'nb_cols': 3,                               # number of columns of scaffolds (following Y, odd)
+    'layer_height_fraction': 0.8,               # layer height as a fraction of the nozzle diameter
+    'layer_xy_offset': 0.0,                     # mm, alternate layer offset in XY
+    'layer_change_clearance': 0.0,              # mm, the clearance distance at which to raise the printhead while rotating & changing layer
+    'layer_change_bleed_nominal': [26.0, 40.0], # mm, length of deposition for first layer before first wall and after last wall, for each thickness
+    'layer_change_bleed_clearance': 4.0,        # mm, vertical offset applied to the end of bleeding when changing layers
+    'printing_bleed_nominal': [8.0, 18.75],     # mm, length of deposition for second layer before first wall and after last wall, for each thickness
+    'approach_length': 10.0,                    # mm, length of travel to the first point
+    'retract_length': 10.0,                     # mm, length of retraction from the last point
+    'segments_per_scaffold': 1,                 # Number of points used to create a scaffold unit
+    'wall_distance_nominal': [1.0, 0.0],        # mm, distance traveled by the nozzles for the walls creation, for each thickness
+    'pore_size_nominal': [0.750, 0.184],        # mm, pore size (air gap distance between filaments of the same layer), for each thickness
+    'thickness_nominal': [4.0, 6.0],            # mm, the thickness of each pore size
+    'rotOdd': [180, 0, -90],                    # Euler angles Rx, Ry, Rz values for Odd layers
+    'rotEven': [180, 0, -180],                  # Euler angles Rx, Ry, Rz values for Even layers
+    'theta_threshold': 15,                      # deg, theta angle threshold to detect for various toolpath adjustments
+
+    # Projection options
+    'compensateDeformation': True,              # Compensate gaps due to toolpath deformation
+    'adjustOrigin': False,                      # Move the projected origin to the corresponding X and Y origin on the non-planar surface
+    'check_col': True,                          # Check the collision of the nozzles with the surface
+    'adjust_pore_size': 'None',                 # 'None', 'On X', 'On Y' or 'Both', printhead rotation adjusting the pore size on curved surfaces
+    'collision_clearance': 0.250,               # mm, offset aplied to a position via its normal when in collision with the surface
+    'show_geom': True,                          # Calculate the filaments geometry for the visualization (nozzles_locations)
+    'project_filaments': False,                 # Project each filaments on the surface if show_geom is True
+    'debug': True,                              # Debug mode : no RoboDK program if set to True
+    'debugAutoAdjustPoreSize': False,           # Keep the Heron points of the pore size adjustment for the visualization
+    'debugGapSolver': False,                    # Also adjust the reference positions solved by the batch gap solver sequentially, the largest distance is reported
+    'use_analytic_curvature': True,             # Local radius of the pore size adjustment from the normal curvature of the surface instead of the Heron circle of two closest points
+    'use_jit_kernels': False,                   # Evaluate the surface and turn the triads with the kernels compiled by Numba (NumPy if Numba is not available)
+
+    # Surface objects of each patch
+    'surf_query_cache_size': 4096,              # Number of uv pairs kept in the surface query memo
+    'use_surface_tables': False,                # Interpolate the surface in precomputed dense tables (cached next to the surface file) instead of evaluating the NURBS
+    'surface_tables_tolerance': 0.001,          # mm, maximum interpolation error of the surface tables on the surface points
+    'use_pass_evaluator': True,                 # Evaluate the surface along the passes with the isoparametric pass evaluator
+    'use_inverse_map': True,                    # Find the uv of a x, y with the exact inverse map instead of assuming u and v linear in x and y
+    'inverse_map_grid_size': 64,                # Number of x and y nodes of the uv table of the inverse map
+    'use_surface_index': False,                 # Start the closest point searches from the nearest surface sample instead of the relative uv (strongly curved surfaces). Not built with the inverse map and the 'xy' metric
+    'surface_index_samples': 200,               # Number of surface samples following u and v in the surface index
+    'use_surface_bvh': False,                   # Check the collisions on the whole nozzle line (all nozzles and line crossing) instead of the two footprint ends
+    'surface_bvh_leaf_size': 4,                 # Maximum number of Bézier patches in a leaf of the BVH
+    'use_distance_field': False,                # Check the collisions on the whole nozzle line by lookups in the signed distance field (cached next to the surface file)
+    'distance_field_resolution': 1.0,           # mm, grid spacing of the signed distance field
+    'distance_field_margin': 5.0,               # mm, extension of the signed distance field around the surface bounding box
+    'use_arc_length_gap': False,                # Place the reference positions of the gap adjustment at the expected distance along the surface (arc length tables)
+    'arc_length_samples': 256,                  # Number of samples following u and v of the arc length tables
+    'use_batch_gap_solver': False,              # Solve the gap adjustment of the reference positions of a whole layer at once (arc length tables)
+    'use_offset_surfaces': False,               # Check the clearance of the nozzle line over the layer below for the layers above the second, lifted if needed
+    'offset_surface_samples': 64,               # Number of samples following u and v of the principal curvatures (fold height of the offset surfaces)
+
+    # Iteration parameters of the getClosest method
+    'col_check_precision': 0.05,                # mm, the precision at which the nearest coordinate can be found
+    'col_check_step': 0.05,                     # mm, the step distance to move to get closer to the target point
+    'col_check_stop': 100000,                   # number of iteration to stop the getClosest algorithm
+    'col_check_newton': True,                   # Newton point inversion in getClosest, warm-started by the caller's last search (fixed-step walk as fallback). Not used with the inverse map and the 'xy' metric
+    'col_check_newton_iter': 20,                # maximum number of Newton iterations of getClosest
+    'col_check_metric': 'xy',                   # 'xy' to match the target x, y on the surface (same as the step walk), 'xyz' for the 3D closest point
+    }
+
+# Plot collections of the visual data
+VISUAL_FIELDS = ['xs', 'ys', 'zs', 'normals', 'tangentsu', 'tangentsv', 'collisions', 'collisions_coords', 'printhead_locations',
+                 'nozzles_locations', 'heronFoot', 'heronPt1', 'heronPt2', 'heronPt3', 'refPositions', 'wrongPosGap', 'newPosGap',
+                 'posToCheck', 'dirVectors']
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class ToolpathGenerator
+#
+#   Description: generation of the toolpath of a (non) planar microscaffold network, all the
+#                state of the generation is kept on the instance. The process parameters, the
+#                surface patches and the network dimensions are set up by the constructor, a
+#                single generation is run by an instance (see generate).
+#
+#   Parameters:
+#       params : dict, the parameters of the generation, the missing ones take their default
+#                value (see DEFAULT_PARAMS)
+#       surface : list, the batch evaluators of the patches of the projection surface
+#                 (None or empty for a planar network)
+#       sources : list of string, the source file (json or stl) of each patch, next to which the
+#                 surface tables and the signed distance fields are cached (None : not cached)
+#
+class ToolpathGenerator:
+    def __init__(self, params = None, surface = None, sources = None):
+        # Parameters (copied, the defaults are used for the missing ones)
+        params = dict(DEFAULT_PARAMS, **(params or {}))
+        for name, value in params.items():
+            if name not in DEFAULT_PARAMS:
+                raise Exception('Toolpath generator error : unknown parameter "%s".\n' % name)
+            setattr(self, name, copy.deepcopy(value))
+
+        # Projection surface
+        if surface is None:
+            surface = []
+        elif not isinstance(surface, (list, tuple)):
+            surface = [surface]
+        if sources is None:
+            sources = [None] * len(surface)
+        self.planar = len(surface) == 0         # True for a planar network (no projection surface)
+
+        # Process variables
+        self.curr_process = {'id':0,'multinozzle_width':0,'nozzle_distance':0,'layer_change_bleed':0, 'printing_bleed':0}
+        self.prev_process = {'id':0,'multinozzle_width':0,'nozzle_distance':0,'layer_change_bleed':0, 'printing_bleed':0}
+        self.theta = 0                          # printhead rotation angle around Z for pore size variation
+        self.xOffset = 0                        # Distance required to center the print on X axis
+        self.yOffset = 0                        # Distance required to center the print on Y axis
+        self.AVAILABLE_VOLUME = 0               # cm³, available volume of the reservoir type
+        self.projection_pos = projectionTable() # Layer 1 and 2 x,y,z projected positions and collision offsets, by target identifier, to be reused for other layers
+        self.prevRefPos = {'pos':None, 'offset':np.array([0,0,0])}   # reference position variable for gap adjustment
+        self.overallDimRefPos = {'pos':None}    # position of the overall dimension of the microscaffold, located in the middle of the last printed microscaffold unit
+        self.lastRef = None                     # Position of the last reference point for the second layer
+        self.gapSolution = {}                   # uv of the reference positions of the current layer solved by the batch gap solver, by target identifier
+        self.offsetLifts = {}                   # mm, lift of the targets of the layers above the second, by (projected target identifier, layer index)
+        self.offsetChecks = {}                  # Clearance check of each layer above the second [nb targets, nb lifted, min clearance, nb folded], by layer
+        self.gapSolverReports = []              # Report of the batch gap solver of each layer [layer, nb reference positions, sweeps, max arc residual, max chord error, mean chord error, nb outside, max deviation from the sequential adjustment]
+        self.closestSession = closestPointSession() # Memory of the last uv found by each caller of getClosest (warm start) and search statistics
+
+        # Surface objects
+        self.surfPatches = []                   # Surface objects of each patch [surfEval, surfQuery, surfPass, surfCorners, surfInverse, surfIndex, surfBVH, surfSDF, surfArc, surfOffset]
+        self.surfPatch = None                   # Index of the selected patch (its objects are assigned to the surface attributes below)
+        self.surfPatchIndex = None              # Spatial index of the x, y rectangles of the patches (multi-patch projection surface)
+        self.surfEval = None                    # Batch evaluator of the projection surface
+        self.surfQuery = None                   # Memoized query of the point, normal, tangents and curvature of the projection surface
+        self.surfPass = None                    # Isoparametric pass evaluator of the projection surface
+        self.surfCorners = None                 # Points of the surface corners [0,0] and [1,1]
+        self.surfInverse = None                 # Exact x, y to uv inverse map of the projection surface
+        self.surfIndex = None                   # KD-tree of dense surface samples giving the starting uv of the closest point searches
+        self.surfBVH = None                     # Bounding volume hierarchy of the Bézier patches of the projection surface
+        self.surfSDF = None                     # Signed distance field of the projection surface
+        self.surfArc = None                     # Cumulative arc length tables along the u and v isocurves of the projection surface
+        self.surfOffset = None                  # Offset surfaces of the projection surface at the layer heights
+
+        # Plot collections (see VISUAL_FIELDS)
+        self.xs = []                            # X list of values for 3D plot
+        self.ys = []                            # Y list of values for 3D plot
+        self.zs = []                            # Z list of values for 3D plot
+        self.normals = []                       # vector list of normal
+        self.tangentsu = []                     # vector list of tangents following u
+        self.tangentsv = []                     # vector list of tangents following v
+        self.collisions = []                    # vector list of collision footprints
+        self.collisions_coords = []             # XYZ coordinates list for collision coordinates
+        self.printhead_locations = []           # XYZ coordinates list for 3D plot of multinozzle footprint
+        self.nozzles_locations = []             # XYZ coordinates list for 3D plot of filaments
+        self.heronFoot = []
+        self.heronPt1 = []
+        self.heronPt2 = []
+        self.heronPt3 = []
+        self.curvatureChecks = []               # [analytic, Heron] local radius of each target (debugAutoAdjustPoreSize)
+        self.refPositions = []                  # List of reference positions to adjust the gap
+        self.wrongPosGap = []                   # List of initial positions of unadjusted toolpath coordinates
+        self.newPosGap = []                     # List of newly adjusted positions of toolpath coordinates
+        self.posToCheck = []                    # List of points used to find the closest point on the surface for adjusting gaps
+        self.dirVectors = []                    # List of vectors showing the direction of the gap adjustment for each coordinate
+
+        # Toolpath and statistics
+        self.prog = None                        # RoboDK program receiving the toolpath (outside of the debug mode)
+        self.currPos = [0,0,0]                  # Current position used for statistics calculation
+        self.lastPos = [0,0,0]                  # Last current position used for statistics calculation
+        self.print_dist = 0                     # Total forecast of the print distance
+        self.toolpathTargets = []               # Real positions of the processed targets (records of TOOLPATH_DTYPE)
+        self.toolpath = None                    # Structured array of the processed targets (poses, direction codes and flags)
+        self.execution_time = None              # Duration of the generation
+
+        # Compiled kernels of the surface evaluations (Numba is imported and the kernels compiled only if enabled)
+        self.kernels = surface_kernels.compiledKernels() if self.use_jit_kernels else None
+
+        self.setupProcess()
+        self.preparePatches(surface, sources)
+        self.setupNetwork()
+
+    # Method setupProcess
+    #
+    #   Description: checks the parameters and calculates the multinozzle and process parameters
+    #                of the first thickness.
+    #
+    #   Returns: nothing.
+    #
+    def setupProcess(self):
+        # Check if either row or col is an even value
+        if self.nb_rows % 2 == 0 or self.nb_cols % 2 == 0:
+            raise Exception('Toolpath error : the number of rows and columns must be and odd number.\n')
+
+        # Auto-adjust wall_distance list to pore_size_nominal list
+        if len(self.wall_distance_nominal) == 1 and self.wall_distance_nominal[0] == 0:
+            self.wall_distance_nominal = list(np.zeros(len(self.pore_size_nominal)))
+
+        # if len(wall_distance_nominal) < len(pore_size_nominal):
+        #     wall_distance_nominal = wall_distance_nominal
+
+        # Check if wall_distance, pore_size_nominal and thickness_nominal have same length
+        if not len(self.wall_distance_nominal) == len(self.pore_size_nominal) and not len(self.pore_size_nominal) == len(self.thickness_nominal):
+            raise Exception('Printing parameters error : the length for wall_distance, pore_size and thickness must all be equal.\n')
+
+        # Multinozzle configuration parameters
+        for config in MLTNZL_CONFIGS:
+            if self.MLTNZL_CONFIG == config['name']:
+                self.MLTNZL_CONFIG = config
+        print('Using "%s" mutlinozzle configuration' % self.MLTNZL_CONFIG['name'])
+
+        # Material choice parameters
+        for mat in MATERIALS:
+            if self.MATERIAL_CHOICE == mat['name']:
+                self.MATERIAL_CHOICE = mat
+        self.rho_selected = self.MATERIAL_CHOICE['rho']
+        print('Using "%s" material' % self.MATERIAL_CHOICE['name'])
+
+        # Initialization of the multinozzle parameters
+        self.NB_NOZZLES = self.MLTNZL_CONFIG['nb']            # Number of nozzles. Also, width of the deposition in mm
+        self.NOZZLE_DIAMETER = self.MLTNZL_CONFIG['d']        # mm, default nozzle diameter
+        self.NOZZLE_TRUE_DISTANCE = self.MLTNZL_CONFIG['s']   # mm, distance between the center of each nozzle (is the real, unchanged, physical width)
+        self.NOZZLE_DISTANCE = self.MLTNZL_CONFIG['s']        # mm, distance between the center of each nozzle (will vary depending on the multinozzle rotation around its axis)
+        self.MULTINOZZLE_TRUE_WIDTH = (self.NB_NOZZLES - 1) * self.NOZZLE_TRUE_DISTANCE    # mm, width of the multinozzle nozzles array (is the real, unchanged, physical width)
+        self.MULTINOZZLE_WIDTH = (self.NB_NOZZLES - 1) * self.NOZZLE_DISTANCE              # mm, width of the multinozzle nozzles array (will vary depending on the multinozzle rotation around its axis)
+        self.NOZZLE_AREA = pi * (self.NOZZLE_DIAMETER / 2)**2
+
+        # Nominal layer_change_bleeding parameter
+        if len(self.layer_change_bleed_nominal) < len(self.thickness_nominal):
+            self.layer_change_bleed_nominal = list(np.multiply(self.layer_change_bleed_nominal[0], np.ones(len(self.thickness_nominal))))
+        self.layer_change_bleed = self.layer_change_bleed_nominal[0]
+
+        # Nominal printing_bleed parameter
+        if len(self.printing_bleed_nominal) < len(self.thickness_nominal):
+            self.printing_bleed_nominal = list(np.multiply(self.printing_bleed_nominal[0], np.ones(len(self.thickness_nominal))))
+        self.printing_bleed = self.printing_bleed_nominal[0]
+
+        # Check if wall_distance is greater than the nozzle distance
+        for wall in self.wall_distance_nominal:
+            if wall > self.NOZZLE_DISTANCE:
+                print('\nWARNING: wall distance (%.1f) is greater than Nozzle distance (%.1f).' % (wall, self.NOZZLE_DISTANCE))
+
+        # Check if walls are compatible with pore size
+        for i in range(len(self.pore_size_nominal)):
+            if self.pore_size_nominal[i] < self.NOZZLE_TRUE_DISTANCE - self.NOZZLE_DIAMETER and self.wall_distance_nominal[i] > 0:
+                # Pore size is reduced = multinozzle rotates = walls are incompatible
+                print('\nWARNING: wall_distance = %.2f is not compatible with p = %.3f mm. wall_distance is set to 0.' % (self.wall_distance_nominal[i], self.pore_size_nominal[i]))
+                self.wall_distance_nominal[i] = 0
+        self.wall_distance = self.wall_distance_nominal[0]
+
+        # Reservoir type parameters
+        if self.RESERVOIR_TYPE == RESERVOIR_48:
+            self.AVAILABLE_VOLUME = AVAILABLE_VOLUME_48
+        elif self.RESERVOIR_TYPE == RESERVOIR_250:
+            self.AVAILABLE_VOLUME = AVAILABLE_VOLUME_250
+
+        # Nominal pore size parameters
+        for i in range(len(self.pore_size_nominal)):
+            if self.pore_size_nominal[i] < 0:
+                self.pore_size_nominal[i] = 0
+            elif self.pore_size_nominal[i] > (self.NOZZLE_TRUE_DISTANCE - self.NOZZLE_DIAMETER):
+                self.pore_size_nominal[i] = (self.NOZZLE_TRUE_DISTANCE - self.NOZZLE_DIAMETER)
+        self.curr_pore_size = self.pore_size_nominal[0]
+
+        # Initialize last pore size and wall distance values
+        self.last_pore_size = self.pore_size_nominal[0]
+        self.last_wall_distance = self.wall_distance_nominal[0]
+
+        # Calculation of the required printhead rotation and new apparent width to obtain the desired nominal pore size
+        #   for first thickness here
+        if (self.curr_pore_size + self.NOZZLE_DIAMETER) > self.NOZZLE_TRUE_DISTANCE:
+            raise Exception('Multinozzle configuration error. The nominal pore size cannot be greater than the nozzle diameter + center-to-center spacing.')
+        self.theta = m.degrees(m.acos((self.curr_pore_size + self.NOZZLE_DIAMETER) / self.NOZZLE_TRUE_DISTANCE))
+        self.MULTINOZZLE_WIDTH = self.MULTINOZZLE_TRUE_WIDTH * m.cos(m.radians(self.theta))
+        self.NOZZLE_DISTANCE = self.NOZZLE_TRUE_DISTANCE * m.cos(m.radians(self.theta))
+        self.curr_process['multinozzle_width'] = self.MULTINOZZLE_WIDTH
+        self.curr_process['nozzle_distance'] = self.NOZZLE_DISTANCE
+        self.curr_process['layer_change_bleed'] = self.layer_change_bleed
+        self.curr_process['printing_bleed'] = self.printing_bleed
+        self.prev_process['multinozzle_width'] = self.MULTINOZZLE_WIDTH
+        self.prev_process['nozzle_distance'] = self.NOZZLE_DISTANCE
+        self.prev_process['layer_change_bleed'] = self.layer_change_bleed
+        self.prev_process['printing_bleed'] = self.printing_bleed
+
+        self.gapDistance = self.NOZZLE_DISTANCE
+        self.pass_amplitude_x = (self.MULTINOZZLE_WIDTH + self.gapDistance)
+        self.pass_amplitude_y = (self.MULTINOZZLE_WIDTH + self.NOZZLE_DISTANCE)
+        self.pass_step_x = self.pass_amplitude_x / self.segments_per_scaffold
+        self.pass_step_y = self.pass_amplitude_y / self.segments_per_scaffold
+
+    # Method preparePatches
+    #
+    #   Description: creates the surface objects of each patch of the projection surface (query,
+    #                pass evaluator, inverse map, BVH...) and selects the first patch.
+    #
+    #   Returns: nothing.
+    #
+    #   Parameters:
+    #       surface : list, the batch evaluators of the patches
+    #       sources : list of string, the source file of each patch (None : the surface tables
+    #                 and signed distance fields are not cached)
+    #
+    def preparePatches(self, surface, sources):
+        # Batch evaluator and memoized query of each patch of the projection surface
+        for surfEval, surfSource in zip(surface, sources):
+            if self.kernels is not None and isinstance(surfEval, surfaceEvaluator):
+                surfEval = surfEval.withKernels(self.kernels)
+            surfBVH = None
+            surfSDF = None
+            surfPass = None
+            surfInverse = None
+            surfIndex = None
+            surfArc = None
+            surfOffset = None
+            if isinstance(surfEval, meshSurface):
+                # The triangle mesh answers the nozzle line collision queries itself
+                surfBVH = surfEval
+            elif self.use_surface_bvh:
+                surfBVH = surfaceBVH(surfEval, self.surface_bvh_leaf_size)
+            if self.use_distance_field and surfSource is None:
+                surfSDF = surfaceDistanceField.build(surfEval, self.distance_field_resolution, self.distance_field_margin)
+            elif self.use_distance_field:
+                surfSDF = loadDistanceField(surfEval, surfSource, self.distance_field_resolution, self.distance_field_margin)
+            if self.use_surface_tables and isinstance(surfEval, surfaceEvaluator):
+                surfEval = loadSurfaceTables(surfEval, surfSource, self.surface_tables_tolerance) if surfSource is not None else surfaceTables.build(surfEval, self.surface_tables_tolerance)
+            if self.use_pass_evaluator and isinstance(surfEval, surfaceEvaluator):
+                surfPass = isoPassEvaluator(surfEval)
+                surfEval = surfPass
+            surfQuery = surfaceQuery(surfEval, self.surf_query_cache_size)
+            surfCorners = surfEval.points([[0,0],[1,1]])
+            if self.use_inverse_map:
+                surfInverse = surfaceInverseMap(surfEval, self.inverse_map_grid_size)
+            if self.use_surface_index and self.col_check_newton and not (self.use_inverse_map and self.col_check_metric == 'xy'):
+                # (the seeds only start the Newton searches, which the inverse map replaces with the 'xy' metric)
+                surfIndex = surfaceSampleIndex(surfEval, self.surface_index_samples, (0,1) if self.col_check_metric == 'xy' else (0,1,2))
+            if self.use_arc_length_gap or self.use_batch_gap_solver:
+                surfArc = arcLengthTables(surfEval, self.arc_length_samples)
+            if self.use_offset_surfaces:
+                surfOffset = offsetSurfaceStack(surfEval, self.offset_surface_samples)
+            if surfPass is not None:
+                # The pass evaluation statistics count the generation only, not the samples of the structures above
+                surfPass.full = 0
+            self.surfPatches.append([surfEval, surfQuery, surfPass, surfCorners, surfInverse, surfIndex, surfBVH, surfSDF, surfArc, surfOffset])
+
+        # Patch index of a multi-patch projection surface, the first patch is selected
+        if len(self.surfPatches) > 1:
+            self.surfPatchIndex = surfacePatchIndex([patch[0] for patch in self.surfPatches])
+            print('Projection surface of %i patches\n' % len(self.surfPatches))
+        if len(self.surfPatches) > 0:
+            self.selectPatch(0)
+
+    # Method setupNetwork
+    #
+    #   Description: calculates the overall dimensions of the network, the origin offsets of
+    #                the centering options and the layer height.
+    #
+    #   Returns: nothing.
+    #
+    def setupNetwork(self):
+        # Centering options --------------------------------
+        # to center the whole print, we divide by 2 the total width and length of the network
+        #
+        #   The total dimensions are composed of :
+        #       the multinozzle width × number or rows and columns,
+        #       the nozzle distance (offset separation scaffolds),
+        #       2× half of a nozzle diameter (from both sides of the print)
+        #       and the wall distances between scaffolds
+
+        self.init_rows = self.nb_rows
+        self.init_cols = self.nb_cols
+        self.totDimX = self.nb_rows * self.MULTINOZZLE_WIDTH + (self.nb_rows-1) * self.NOZZLE_DISTANCE + self.NOZZLE_DIAMETER + self.wall_distance
+        self.totDimY = self.nb_cols * self.MULTINOZZLE_WIDTH + (self.nb_cols-1) * self.NOZZLE_DISTANCE + self.NOZZLE_DIAMETER + self.wall_distance
+        if self.center_print == 'On X' or self.center_print == 'Both':
+            self.xOffset = self.totDimX / 2
+            self.start_x = 0
+        if self.center_print == 'On Y' or self.center_print == 'Both':
+            self.yOffset = self.totDimY / 2
+            self.start_y = 0
+        self.start_x -= self.xOffset
+        self.start_y -= self.yOffset
+
+        # Coast at end parameter for layer change
+        self.coast_at_end = self.scaff_speed * self.pressure_retract_time/1000
+        if self.stopAndGo and (self.coast_at_end > self.totDimX or self.coast_at_end > self.totDimY):
+            raise Exception('Toolpath error : the required coast at end dimension is greater than at least one of the sides of the network. Review the ramp down time parameter or enlarge the network.\n\nCoast at end = %.2f mm\nDim X = %.2f mm\nDim Y = %.2f mm\n' % (self.coast_at_end, self.totDimX, self.totDimY))
+
+        # Program name (for RoboDK and the exports filename)
+        self.program_name = self.MATERIAL_CHOICE['name'][0] + str(self.nb_layers)+str(int(self.curr_pore_size*1000))
+
+        # Setting the layer height parameters and Z offset
+        self.layer_height = self.layer_height_fraction * self.NOZZLE_DIAMETER
+        self.totDimZ = self.NOZZLE_DIAMETER + self.nb_layers * self.layer_height
+
+    # Method generate
+    #
+    #   Description: generates the toolpath of the network, layer after layer, from the approach
+    #                to the retraction. Outside of the debug mode, the moves and instructions are
+    #                added to the RoboDK program.
+    #
+    #   Returns:
+    #       toolpath : np.array of TOOLPATH_DTYPE, the processed targets
+    #       stats : dict, the statistics of the print (see statistics)
+    #       visual : dict, the plot collections by name (see VISUAL_FIELDS), None if not requested
+    #
+    #   Parameters:
+    #       prog : RoboDK program item receiving the toolpath (required outside of the debug mode)
+    #       visual : bool, set to True to return the plot collections
+    #
+    def generate(self, prog = None, visual = True):
+        if self.toolpath is not None:
+            raise Exception('Toolpath generator error : the toolpath is already generated, use a new generator for another generation.\n')
+        if not self.debug and prog is None:
+            raise Exception('Toolpath generator error : a RoboDK program is required outside of the debug mode.\n')
+        self.prog = prog
+        start = dt.now()
+
+        # Setting the rotation for the first time
+        rot = self.rotOdd
+
+        # Traveling & Approach --------------------------------
+        if not self.debug:
+            self.prog.RunInstruction('SetSpeedByRegister('+self.reg_travel_speed+')')
+            self.prog.RunInstruction('Traveling move', INSTRUCTION_COMMENT)
+
+        posApp = toolpathArray([(
+            self.start_x + (self.MULTINOZZLE_WIDTH + self.NOZZLE_DIAMETER)/2,
+            self.start_y - self.approach_length - self.layer_change_bleed + self.NOZZLE_DIAMETER/2,
+            self.CLEARANCE,
+            rot[0],
+            rot[1],
+            rot[2] + self.theta,
+            directionCode('+y'),
+            0)])[0]
+        self.targetAndMove(TRAVEL_TARGET, posApp, 0, self.debug, False, False)
+
+        if not self.debug:
+            self.prog.RunInstruction('SetSpeedByRegister('+self.reg_scaff_speed+')')
+            self.prog.RunInstruction('Approach move', INSTRUCTION_COMMENT)
+
+        posApp['z'] = self.start_z + self.NOZZLE_DIAMETER + self.pressure_buildup_z
+        posApp['flags'] = FLAG_REFPOS # A the refPos special attribute for the approach position
+        self.targetAndMove(APPROACH_TARGET, posApp, 0, self.debug, True, False)
+        posApp['flags'] = 0 # Remove the special attribute for the first posApp
+        if not self.debug:
+            self.prog.RunInstruction('Start of print', INSTRUCTION_COMMENT)
+            self.prog.RunInstruction('Extruder(''ON'','+self.scaff_extr_speed+')')
+            self.prog.Pause(self.pressure_buildup_time)
+
+        posApp['y'] += self.approach_length
+        posApp['z'] -= self.pressure_buildup_z / 2
+        self.targetAndMove(targetId(1, 1, 1, KIND_START, 2), posApp, 0, self.debug, True, True)
+
+        # Print's toolpath MAIN LOOP (loop for each layer) --------------------------------
+        prevPos = posApp
+        prevPos['y'] +=  self.layer_change_bleed
+        prevPos['z'] -= self.pressure_buildup_z / 2
+        self.targetAndMove(targetId(1, 1, 1, KIND_START, 3), prevPos, 0, self.debug)
+
+        #--------------------------------------------------------------------------------------------------------------------
+        # Main loop on each layer.
+        #--------------------------------------------------------------------------------------------------------------------
+        layer_index_offset = 0
+
+        # For every layer,
+        #   we loop on the number of columns and rows to generate the array containing the scaffolds.
+        for i in tqdm(range(self.nb_layers),'Layers generated'):  # First layer starts at i = 0
+            # RoboDK comment for each layer
+            if not self.debug:
+                self.prog.RunInstruction('Layer %i' % (i+1), INSTRUCTION_COMMENT)
+
+            # Setting the same z and rotation for one particular layer
+            rot = self.rotOdd if i % 2 == 0 else self.rotEven
+
+            # Setting the Z position according to the layer index
+            z = self.start_z + self.NOZZLE_DIAMETER + i*self.layer_height
+            prevPos['z'] = z
+
+            # Choosing the current process parameters according z relative to the thickness
+            #   parameters include : wall_distance, pore_size, printing_bleed and layer_change_bleed
+            if i % 2 == 0:
+                self.curr_pore_size = self.pore_size_nominal[-1]
+                for k in range(len(self.thickness_nominal)):
+                    if z < self.thickness_nominal[k] - self.layer_height:
+                        # Save some previous process parameters
+                        self.prev_process['multinozzle_width'] = self.MULTINOZZLE_WIDTH
+                        self.prev_process['nozzle_distance'] = self.NOZZLE_DISTANCE
+                        self.prev_process['layer_change_bleed'] = self.layer_change_bleed
+                        self.prev_process['printing_bleed'] = self.printing_bleed
+
+                        # Update current  values
+                        self.curr_pore_size = self.pore_size_nominal[k]
+                        self.wall_distance = self.wall_distance_nominal[k]
+
+                        # Nominal bleeding parameters
+                        self.layer_change_bleed = self.layer_change_bleed_nominal[k]
+                        self.printing_bleed = self.printing_bleed_nominal[k]
+
+                        # Add the layer to the list of layers to be projected if pore size or wall values change
+                        if (self.curr_pore_size != self.last_pore_size or self.wall_distance != self.last_wall_distance):# and i % 2 == 0:
+                            self.overallDimRefPos = {'pos':None}
+                            layer_index_offset = i
+                            self.curr_process['id'] = k
+
+                            # Definition of the new thickness's microscaffold network geometry
+                            self.theta = m.degrees(m.acos((self.curr_pore_size + self.NOZZLE_DIAMETER) / self.NOZZLE_TRUE_DISTANCE))
+                            self.MULTINOZZLE_WIDTH = self.MULTINOZZLE_TRUE_WIDTH * m.cos(m.radians(self.theta))
+                            self.NOZZLE_DISTANCE = self.NOZZLE_TRUE_DISTANCE * m.cos(m.radians(self.theta))
+
+                            self.gapDistance = self.NOZZLE_DISTANCE
+                            self.pass_amplitude_x = (self.MULTINOZZLE_WIDTH + self.gapDistance)
+                            self.pass_amplitude_y = (self.MULTINOZZLE_WIDTH + self.NOZZLE_DISTANCE)
+                            self.pass_step_x = self.pass_amplitude_x / self.segments_per_scaffold
+                            self.pass_step_y = self.pass_amplitude_y / self.segments_per_scaffold
+
+                            self.nb_rows = m.ceil((self.totDimX - self.wall_distance - self.NOZZLE_DIAMETER - (self.init_rows-1) * self.NOZZLE_DISTANCE) / self.MULTINOZZLE_WIDTH)
+                            self.nb_cols = m.ceil((self.totDimY - self.NOZZLE_DIAMETER - self.wall_distance - (self.init_cols-1) * self.NOZZLE_DISTANCE) / self.MULTINOZZLE_WIDTH)
+
+                            # new process dimension
+                            newTotDimX = self.nb_rows * self.MULTINOZZLE_WIDTH + (self.nb_rows-1) * self.NOZZLE_DISTANCE + self.NOZZLE_DIAMETER + self.wall_distance
+                            newTotDimY = self.nb_cols * self.MULTINOZZLE_WIDTH + (self.nb_cols-1) * self.NOZZLE_DISTANCE + self.NOZZLE_DIAMETER + self.wall_distance
+
+                            if self.nb_rows % 2 == 0:
+                                if newTotDimX - self.MULTINOZZLE_WIDTH > self.totDimX:
+                                    self.nb_rows -= 1
+                                else:
+                                    self.nb_rows += 1
+                            if self.nb_cols % 2 == 0:
+                                if newTotDimY - self.MULTINOZZLE_WIDTH > self.totDimY:
+                                    self.nb_cols -= 1
+                                else:
+                                    self.nb_cols += 1
+
+                        break
+
+                # Update last values
+                #if i % 2 == 0:
+                self.last_pore_size = self.curr_pore_size
+                self.last_wall_distance = self.wall_distance
+                self.curr_process['multinozzle_width'] = self.MULTINOZZLE_WIDTH
+                self.curr_process['nozzle_distance'] = self.NOZZLE_DISTANCE
+                self.curr_process['layer_change_bleed'] = self.layer_change_bleed
+                self.curr_process['printing_bleed'] = self.printing_bleed
+
+            # Batch gap adjustment of the reference positions of the first two layers, from the nominal layer targets
+            if self.use_batch_gap_solver and self.compensateDeformation and not self.planar and i - layer_index_offset <= 1:
+                self.solveLayerGaps(i, i - layer_index_offset, self.nominalLayerTargets(i, i - layer_index_offset, prevPos))
+
+            # Clearance check of the offset surfaces of the layers above the second of the thickness level
+            if self.use_offset_surfaces and not self.planar and i - layer_index_offset == 2:
+                self.checkOffsetLayers(i, layer_index_offset)
+
+            # Switching layer if not the first one
+            if i != 0:
+                # Setting the motion speed to a different speed for rotations
+                if not self.debug:
+                    self.prog.RunInstruction('SetSpeedByRegister('+self.reg_rot_speed+')')
+
+                newOrient = self.changeOrientation(i - layer_index_offset, prevPos)
+                # Remove the last point to the newOrient if we don't need walls, otherwise we add a useless point
+                nbPointsToAdd = len(newOrient)
+                if self.planar and self.wall_distance == 0 and len(newOrient) > 1 and self.layer_change_bleed_clearance == 0:
+                    nbPointsToAdd = len(newOrient)-1
+
+                for j in range(nbPointsToAdd):
+                    # Calculating an index offset as function of layer change bleed clearance
+                    if self.planar:
+                        if self.layer_change_bleed_clearance > 0:
+                            nbPointsOffset = 2
+                        else:
+                            nbPointsOffset = 1
+                    else:
+                        nbPointsOffset = 2
+
+                    # Adding the special attribute "purge" to the target position
+                    if self.stopAndGo and j == nbPointsToAdd - nbPointsOffset:
+                        newOrient['flags'][j] |= FLAG_PURGE
+
+                    # Adding the special attribute "clearColNP" to the target position
+                    if self.layer_change_bleed_clearance > 0 and j == nbPointsToAdd - nbPointsOffset:
+                        newOrient['flags'][j] |= FLAG_CLEAR_COL_NP
+
+                    self.targetAndMove(targetId(i - layer_index_offset + 1, 1, 1, KIND_START, j + 1), newOrient[j], i - layer_index_offset, self.debug)
+
+                    # Setting the motion speed to a higher speed for printing scaffolds before printing the network again
+                    if not self.debug and ((nbPointsToAdd > 1 and j == nbPointsToAdd-1) or nbPointsToAdd == 1):
+                        self.prog.RunInstruction('SetSpeedByRegister('+self.reg_scaff_speed+')')
+
+                prevPos = newOrient[-1]
+
+            # Loop on r is used to create passes according to the columns and rows of scaffolds of nb_cols X nb_rows needed
+            #--------------------------
+            # To always have the same grid of c x r, we permute this loop max value when the layer changes
+            for r in range(self.nb_rows if i % 2 == 0 else self.nb_cols):#tqdm(range(nb_rows if i % 2 == 0 else nb_cols),'rows generated'):
+                # Loop on c is used to create passes according to the columns and rows of scaffolds of nb_cols X nb_rows needed
+                #--------------------------
+                # To always have the same grid of c x r, we permute this loop max value when the layer changes
+
+                # Adding coast at end by default
+                addCoast = self.stopAndGo
+                for c in range(self.nb_cols if i % 2 == 0 else self.nb_rows):
+                    # Pass for scaffold
+                    newPass = self.addPass(i - layer_index_offset, r, c, prevPos, addCoast)
+
+                    # Add points to the toolpath for non-planar
+                    if not self.planar or self.wall_distance > 0: # if we need walls (while planar), otherwise we add points when curving (walls or not)
+                        for j in range(len(newPass)):
+                            if newPass[j]['flags'] == FLAG_COAST:
+                                addCoast = False
+                            self.targetAndMove(targetId(i - layer_index_offset + 1, r + 1, c + 1, KIND_PASS, j + 1), newPass[j], i - layer_index_offset, self.debug)
+
+                    # Add points to the toolpath in planar mode
+                    if self.planar:
+                        # if we need to add a coast in planar mode
+                        if addCoast:
+                            for j in range(len(newPass)):
+                                if newPass[j]['flags'] == FLAG_COAST:
+                                    addCoast = False
+                                    self.targetAndMove(targetId(i - layer_index_offset + 1, r + 1, c + 1, KIND_PASS, j + 1), newPass[j], i - layer_index_offset, self.debug)
+
+                        # if there is a layer change bleed clearance, we need to add the last point of the last pass
+                        if self.layer_change_bleed_clearance > 0 and (r == (self.nb_rows-1 if i % 2 == 0 else self.nb_cols-1)) and (c == (self.nb_cols-1 if i % 2 == 0 else self.nb_rows-1)):
+                            self.targetAndMove(targetId(i - layer_index_offset + 1, r + 1, c + 1, KIND_PASS, 1), newPass[-1], i - layer_index_offset, self.debug)
+
+                    prevPos = newPass[-1]
+                #--------------------------
+                # EndLoop "for c" (cols)
+
+                newConnection = self.addConnection(i - layer_index_offset, r, prevPos)
+                # Remove the last point to the newConnection if we don't need walls, otherwise we add a useless point
+                nbPointsToAdd = len(newConnection)
+                if self.planar and self.wall_distance == 0 and len(newConnection) > 2:
+                    nbPointsToAdd = len(newConnection)-1
+
+                for j in range(nbPointsToAdd):
+                    self.targetAndMove(targetId(i - layer_index_offset + 1, r + 1, c + 1, KIND_CON, j + 1), newConnection[j], i - layer_index_offset, self.debug)
+                prevPos = newConnection[-1]
+            #--------------------------
+            # EndLoop "for r" (rows)
+        #--------------------------
+        # EndLoop "for i" (layers)
+
+        # Retraction -------------------------------------------------------------
+        if not self.debug:
+            self.prog.RunInstruction('Extruder(''OFF'')')
+            self.prog.RunInstruction('End of print', INSTRUCTION_COMMENT)
+        posRet = prevPos
+        # Even number of layers
+        if self.nb_layers % 2 == 0:
+            offset = self.layer_xy_offset if (self.nb_layers-4) % 4 == 0 else 0
+            posRet['x'] -= (offset + self.retract_length)
+            posRet['y'] += offset
+
+        # Odd number of layers
+        else:
+            offset = self.layer_xy_offset if (self.nb_layers-3) % 4 == 0 else 0
+            posRet['x'] += offset
+            posRet['y'] += (offset + self.retract_length)
+        #posRet[2] += layer_height
+
+        # Resetting the previous ref position for non-planar gap compensation
+        if not self.planar and not self.nb_layers % 2 == 0:
+            self.prevRefPos = {'pos':None, 'offset':np.array([0,0,0])}
+            posRet['flags'] = FLAG_REFPOS
+
+        self.targetAndMove(RETRACT_TARGET, posRet, i, self.debug, True, False)
+        self.toolpath = toolpathArray(self.toolpathTargets)
+
+        # RoboDK program completion
+        if not self.debug:
+            self.prog.Pause(self.retraction_time) # Wait for retraction to complete
+            self.prog.RunInstruction('onPathFinish')
+            self.prog.RunInstruction('GoHome')
+
+        self.execution_time = dt.now() - start
+        return self.toolpath, self.statistics(), {name: getattr(self, name) for name in VISUAL_FIELDS} if visual else None
+
+    # Method statistics
+    #
+    #   Description: forecast of the print (dimensions, distance, volume, mass and time) and
+    #                statistics of the surface evaluations of the generation.
+    #
+    #   Returns:
+    #       stats : dict, the statistics
+    #           totDimX, totDimY, totDimZ : float, mm, the print dimensions
+    #           print_dist : float, mm, the print distance
+    #           tot_volume : float, cm³, the print volume
+    #           tot_mass : float, g, the print mass
+    #           available_volume : float, cm³, the available volume of the reservoir
+    #           travel_time, print_time, tot_time : float, s, the forecast times
+    #           collisions : int, the number of collisions avoided
+    #           execution_time : datetime.timedelta, the duration of the generation
+    #           surface_summary : string, the statistics of the surface evaluations (one line each)
+    #
+    def statistics(self):
+        # To-do : take over-extrusion into consideration
+        TX = 1 if self.wall_distance == 0 else self.TX
+        tot_volume = self.print_dist * self.NOZZLE_AREA * self.NB_NOZZLES *(1/1000) * TX # mm³ to cm³
+        tot_mass = tot_volume * self.rho_selected
+        travel_time = self.CLEARANCE / self.travel_speed + self.pressure_buildup_time/1000 + self.retraction_time/1000 # TO-DO : add other purge & retraction time
+        print_time = (self.print_dist + m.sqrt(self.approach_length**2 + self.layer_height**2) + m.sqrt(self.retract_length**2 + self.layer_height**2)) / self.scaff_speed
+
+        # Surface evaluation statistics of the non-planar projection
+        summary = ''
+        for k, patch in enumerate(self.surfPatches):
+            if len(self.surfPatches) > 1:
+                summary += ' Patch %i :\n' % (k + 1)
+            summary += ' ' + patch[1].summary() + '\n'
+            if patch[2] is not None:
+                summary += ' ' + patch[2].summary() + '\n'
+        if self.closestSession.searches > 0:
+            summary += ' ' + self.closestSession.summary() + '\n'
+        if len(self.offsetChecks) > 0:
+            checks = np.array([self.offsetChecks[k] for k in sorted(self.offsetChecks)])
+            folded = [k + 1 for k in sorted(self.offsetChecks) if self.offsetChecks[k][3] > 0]
+            foldHeights = [patch[9].foldHeight() for patch in self.surfPatches if patch[9] is not None]
+            summary += ' Offset surfaces : %i layers checked, %i targets lifted (min clearance %.3f mm), fold height %.3f mm%s\n' % (len(checks), np.sum(checks[:,1]), np.min(checks[:,2]), min(foldHeights),
+                                                                                                                           ', folded from layer %i' % folded[0] if len(folded) > 0 else '')
+        for report in self.gapSolverReports:
+            summary += ' Gap solver layer %i : %i reference positions, %i sweeps, %.2e mm max arc residual, chord error %.3f mm max / %.3f mm mean (%i outside)' % tuple(report[0:7])
+            summary += ', %.2e mm max deviation from the sequential adjustment\n' % report[7] if self.debugGapSolver else '\n'
+        if len(self.curvatureChecks) > 0:
+            radii = np.array(self.curvatureChecks)
+            finite = np.all(np.isfinite(radii), axis=1)
+            deviations = np.abs(radii[finite,0] - radii[finite,1]) / radii[finite,1] if np.any(finite) else np.zeros(1)
+            summary += ' Analytic local radius vs Heron = %.2f %% median, %.2f %% max deviation (%i targets, %i planar)\n' % (100 * np.median(deviations), 100 * np.max(deviations), len(radii), np.count_nonzero(~finite))
+
+        return {'totDimX': self.totDimX,
+                'totDimY': self.totDimY,
+                'totDimZ': self.totDimZ,
+                'print_dist': self.print_dist,
+                'tot_volume': tot_volume,
+                'tot_mass': tot_mass,
+                'available_volume': self.AVAILABLE_VOLUME,
+                'travel_time': travel_time,
+                'print_time': print_time,
+                'tot_time': travel_time + print_time,
+                'collisions': len(self.collisions),
+                'execution_time': self.execution_time,
+                'surface_summary': summary}
+
+    # Method addPass
+    #
+    #   Description: calculates a linear movement the length equivalent to 1 microscaffold,
+    #                to compose a row or column of the network.
+    #
+    #   Returns:
+    #       coords: np.array of TOOLPATH_DTYPE, the set of coordinates to be added to the toolpath.
+    #
+    #   Parameters:
+    #       i : int, layer index
+    #       r : int, network row index
+    #       c : int, network column index
+    #       prevPos : record, previous cartesian position kept in memory
+    #       addCoast : bool, coast at end parameter (distance for retraction)
+    #
+    def addPass(self, i, r, c, prevPos, addCoast):
+        coords = []
+        needCoast = True
+
+        # print('----------------------------------')
+        for k in range(self.segments_per_scaffold):
+            # Odd layers 1,3,5,... (i = 0, 2, 4, ...) ---------------------------------
+            if i % 2 == 0:
+                if r % 2 == 0:
+                    y = prevPos[1] + self.pass_step_y
+                    print_direction = '+y'
+                else:
+                    y = prevPos[1] - self.pass_step_y
+                    print_direction = '-y'
+                x = prevPos[0]
+
+                # Coast at end --------------------------------------------------------
+                # For the layer end, if the next coordinate exceed the coast at end dimension,
+                # then we add the coast at end point before adding the coordinate
+                if addCoast and needCoast and r == self.nb_rows - 1:
+                    coastY = self.start_y + self.totDimY - self.coast_at_end
+                    if y > coastY:
+                        needCoast = False
+                        coastCoord = point(x, coastY, prevPos, directionCode(print_direction), FLAG_COAST)
+                        coords.append(coastCoord)
+
+            # Even layers 2,4,6,... (i = 1, 3, 5, ...) --------------------------------
+            else:
+                if r % 2 == 0:
+                    x = prevPos[0] - self.pass_step_x
+                    print_direction = '-x'
+                else:
+                    x = prevPos[0] + self.pass_step_x
+                    print_direction = '+x'
+                y = prevPos[1]
+
+                # For the layer end, if the next coordinate exceed the coast at end dimension,
+                # then we add the coast at end point before adding the coordinate
+                if addCoast and needCoast and r == self.nb_cols - 1:
+                    coastX = self.start_x + self.coast_at_end
+                    if x < coastX:
+                        needCoast = False
+                        coastCoord = point(coastX, y, prevPos, directionCode(print_direction), FLAG_COAST)
+                        coords.append(coastCoord)
+
+            prevPos = point(x, y, prevPos, directionCode(print_direction), FLAG_PASS | (FLAG_REFPOS if i == 1 else 0))
+            coords.append(prevPos)
+        # print(coords)
+        # print('----------------------------------')
+
+        # Perpendicular offset for wall creation ---------------------------------
+        # if the printed scaffold is not the last one of the col or row
+        if self.wall_distance > 0 and c != (self.nb_cols if i % 2 == 0 else self.nb_rows) - 1:
+            # Wall direction depending on the theta angle
+            cos_d = np.cos(np.radians(self.theta)) * self.wall_distance
+            sin_d = np.sin(np.radians(self.theta)) * self.wall_distance
+
+            if c % 2 == 0: # if scaffold to be printing is after even values of c
+                if i % 2 == 0:
+                    #x = prevPos[0] - wall_distance
+                    x = prevPos[0] - cos_d
+                    y = prevPos[1] - sin_d
+                else:
+                    #y = prevPos[1] + wall_distance
+                    x = prevPos[0] - sin_d
+                    y = prevPos[1] + cos_d
+            else: # if scaffold to be printing is after odd values of c
+                if i % 2 == 0:
+                    #x = prevPos[0] + wall_distance
+                    x = prevPos[0] + cos_d
+                    y = prevPos[1] + sin_d
+                else:
+                    #y = prevPos[1] - wall_distance
+                    x = prevPos[0] + sin_d
+                    y = prevPos[1] - cos_d
+
+            prevPos = point(x, y, prevPos, prevPos[6], FLAG_WALL)
+            coords.append(prevPos)
+
+        return toolpathArray(coords)
+
+    # Method addConnection
+    #
+    #   Description: calculates a connection coordinate between rows of the network.
+    #
+    #   Returns:
+    #       coords: np.array of TOOLPATH_DTYPE, the set of coordinates to be added to the toolpath.
+    #
+    #   Parameters:
+    #       i : int, layer index
+    #       r : int, network row index
+    #       prevPos : record, previous cartesian position kept in memory
+    #
+    def addConnection(self, i, r, prevPos):
+        coords = []
+
+        # Always add a bleeding after all the pass
+        if r == (self.nb_rows if i % 2 == 0 else self.nb_cols) - 1: # if last pass of the layer
+            firstBleed = self.layer_change_bleed
+            flags = 0
+            if self.stopAndGo:
+                flags |= FLAG_COAST_PAUSE
+            if self.layer_change_bleed_clearance > 0:
+                flags |= FLAG_CLEAR_COL_NP
+        else: # if last pass of a printing pass (not the last of the layer)
+            firstBleed = self.printing_bleed
+            flags = FLAG_LASTPASS
+            if i == 1:
+                flags |= FLAG_REFPOS
+        if i % 2 == 0:
+            if r % 2 == 0:
+                y = prevPos[1] +  firstBleed
+                print_direction = '+y'
+            else:
+                y = prevPos[1] -  firstBleed
+                print_direction = '-y'
+            x = prevPos[0]
+        else:
+            if r % 2 == 0:
+                x = prevPos[0] -  firstBleed
+                print_direction = '-x'
+            else:
+                x = prevPos[0] +  firstBleed
+                print_direction = '+x'
+            y = prevPos[1]
+
+        prevPos = point(x, y, prevPos, directionCode(print_direction), flags)
+        coords.append(prevPos)
+
+        # Travel from on pass to the other if it's not the last pass of the layer
+        if r != (self.nb_rows if i % 2 == 0 else self.nb_cols) - 1:
+            # Create a middle point for a curve path,
+            # only if theta angle is under the threshold,
+            # otherwise, we don't need this point.
+            if self.theta < self.theta_threshold:
+                if i % 2 == 0:
+                    x = prevPos[0] + (self.MULTINOZZLE_WIDTH + self.NOZZLE_DISTANCE)/2
+                    if r % 2 == 0:
+                        y = prevPos[1] + self.printing_bleed
+                        print_direction = '+y'
+                    else:
+                        y = prevPos[1] - self.printing_bleed
+                        print_direction = '-y'
+                else:
+                    if r % 2 == 0:
+                        x = prevPos[0] - self.printing_bleed
+                        print_direction = '-x'
+                    else:
+                        x = prevPos[0] + self.printing_bleed
+                        print_direction = '+x'
+                    y = prevPos[1] - (self.MULTINOZZLE_WIDTH + self.NOZZLE_DISTANCE)/2
+
+                prevPos = point(x, y, prevPos, directionCode(print_direction))
+                coords.append(prevPos)
+
+            # Create a point to switch from a pass to another
+            if i % 2 == 0:
+                # For odd layers
+                if self.theta < self.theta_threshold:
+                    x = prevPos[0] + (self.MULTINOZZLE_WIDTH + self.NOZZLE_DISTANCE)/2
+                    if r % 2 == 0:
+                        y = prevPos[1] - self.printing_bleed
+                        print_direction = '-y'
+                    else:
+                        y = prevPos[1] + self.printing_bleed
+                        print_direction = '+y'
+                else:
+                    x = prevPos[0] + (self.MULTINOZZLE_WIDTH + self.NOZZLE_DISTANCE)
+                    if r % 2 == 0:
+                        print_direction = '-y'
+                    else:
+                        print_direction = '+y'
+            else:
+                # For even layers
+                if self.theta < self.theta_threshold:
+                    y = prevPos[1] - (self.MULTINOZZLE_WIDTH + self.NOZZLE_DISTANCE)/2
+                    if r % 2 == 0:
+                        x = prevPos[0] + self.printing_bleed
+                        print_direction = '+x'
+                    else:
+                        x = prevPos[0] - self.printing_bleed
+                        print_direction = '-x'
+                else:
+                    y = prevPos[1] - (self.MULTINOZZLE_WIDTH + self.NOZZLE_DISTANCE)
+                    if r % 2 == 0:
+                        print_direction = '+x'
+                    else:
+                        print_direction = '-x'
+
+            prevPos = point(x, y, prevPos, directionCode(print_direction), FLAG_REFPOS if i < 1 else 0)
+            coords.append(prevPos)
+
+            # Create a new Start point after the first bleeding traveling from one pass to another
+            if i % 2 == 0:
+                if r % 2 == 0:
+                    y = prevPos[1] -  self.printing_bleed
+                    print_direction = '-y'
+                else:
+                    y = prevPos[1] +  self.printing_bleed
+                    print_direction = '+y'
+                x = prevPos[0]
+            else:
+                if r % 2 == 0:
+                    x = prevPos[0] +  self.printing_bleed
+                    print_direction = '+x'
+                else:
+                    x = prevPos[0] -  self.printing_bleed
+                    print_direction = '-x'
+                y = prevPos[1]
+
+            prevPos = point(x, y, prevPos, directionCode(print_direction), FLAG_REFPOS if i == 1 else 0)
+            coords.append(prevPos)
+
+        else:   # If we are at end of a layer
+            # +Z offset to clear the non-planar surface when rotating the printhead (if curving the network)
+            if self.layer_change_clearance > 0:
+                offsetZ = prevPos[2] + self.layer_change_clearance
+                prevPos = (prevPos[0], prevPos[1], offsetZ) + tuple(prevPos)[3:7] + (0,)
+                coords.append(prevPos)
+
+        return toolpathArray(coords)
+
+    # Method changeOrientation
+    #
+    #   Description: calculates a change of direction and Z increment between layers of the network.
+    #
+    #   Returns:
+    #       coords: np.array of TOOLPATH_DTYPE, the set of coordinates to be added to the toolpath.
+    #
+    #   Parameters:
+    #       i : int, layer index<
+    #       prevPos : record, previous cartesian position kept in memory
+    #
+    def changeOrientation(self, i, prevPos):
+        coords = []
+
+        # +Z offset to clear the non-planar surface when rotating the printhead (if curving the network)
+        # IMPORTANT : here, we calculate the new Z offset but we don't add it to the coordinates collection coords,
+        #             because the Z value of prevPos has been reset to the proper Z value for the layer with no offset
+        if self.layer_change_clearance > 0:
+            offsetZ = prevPos[2] + self.layer_change_clearance
+            prevPos = (prevPos[0], prevPos[1], offsetZ) + tuple(prevPos)[3:8]
+            # coords.append(prevPos)
+
+        # Backing up to get in position for next layer's pass
+        if i % 2 ==0:
+            x = prevPos[0] + (self.layer_change_bleed + self.MULTINOZZLE_WIDTH / 2 + self.NOZZLE_DISTANCE) + (self.prev_process['nozzle_distance'] - self.curr_process['nozzle_distance']) + (self.prev_process['layer_change_bleed'] - self.curr_process['layer_change_bleed'])
+            y = prevPos[1] - (self.layer_change_bleed + self.MULTINOZZLE_WIDTH / 2) + (self.curr_process['multinozzle_width']/2 - self.prev_process['multinozzle_width']/2)# + (prev_process['layer_change_bleed'] - curr_process['layer_change_bleed'])
+            print_direction = '+y'
+        else:
+            x = prevPos[0] + (self.layer_change_bleed + self.MULTINOZZLE_WIDTH / 2)
+            y = prevPos[1] - (self.layer_change_bleed + self.MULTINOZZLE_WIDTH / 2 + self.NOZZLE_DISTANCE)
+            print_direction = '-x'
+
+        # prevRefPos always resets at layer change
+        if not self.planar:
+            self.prevRefPos = {'pos':None, 'offset':np.array([0,0,0])}
+
+        # Special target attribut selection
+        if i <= 2:
+            flags = FLAG_REFPOS
+        else:
+            flags = 0
+        # if stopAndGo:
+        #     flags |= FLAG_COAST_PAUSE
+        # else:
+        #     flags |= FLAG_CLEAR_COL_NP
+
+        prevPos = point(x, y, prevPos, directionCode(print_direction), flags)
+        coords.append(prevPos)
+
+
+        # -Z offset to clear the non-planar surface when rotating the printhead (if curving the network)
+        if self.layer_change_clearance > 0:
+            offsetZ = prevPos[2] - self.layer_change_clearance
+            prevPos = (prevPos[0], prevPos[1], offsetZ) + tuple(prevPos)[3:7] + (0,)
+            coords.append(prevPos)
+
+        # Adding a new point for the bleeding / start of new layer
+        # New layer is odd : 1,3,5,... (i = 0, 2, 4, ...) ----------------------------------
+        if i % 2 == 0:
+            y = prevPos[1] + self.layer_change_bleed
+            print_direction = '+y'
+        # New layer is even : 2,4,6,... (i = 1, 3, 5, ...) --------------------------------
+        else:
+            x = prevPos[0] - self.layer_change_bleed
+            print_direction = '-x'
+
+        if i == 1:
+            flags = FLAG_REFPOS
+        #     prevRefPos = {'pos':None, 'offset':0.0}
+        else:
+            flags = 0
+        prevPos = point(x, y, prevPos, directionCode(print_direction), flags)
+        coords.append(prevPos)
+
+        return toolpathArray(coords)
+
+    # Method targetAndMove
+    #
+    #   Description: processes each calculated coordinate of the network. The function
+    #                calls the non-planar projection method, integrates the toolpath
+    #                with RoboDK, manages special moves and calculates
+    #                the print distance.
+    #
+    #   Returns: nothing.
+    #
+    #   Parameters:
+    #       target : int, the target identifier (includes layer, row, column indexes, see targetId)
+    #       position : record of TOOLPATH_DTYPE, the cartesian position to process
+    #       i : int, layer index
+    #       debug : bool, flag to prevent calling the RoboDK API
+    #       showOnGraph : bool, flag to add processed data to the visualization plot
+    #       calculateDist : bool, flag to include the processed position into the
+    #                       distance calculation or not
+    #
+    def targetAndMove(self, target, position, i, debug=False, showOnGraph=True, calculateDist=True):
+
+        # Get the position's real position (projected or not), it's rotation matrix and special target attribution
+        realPosition, rotMat, flags = self.managePosProjection(target, position, i, debug, showOnGraph)
+
+        # # Z position clearance to try and avoid smudging the material losses accumulation when changing layers
+        # if flags & (FLAG_CLEAR_COL_NP | FLAG_PURGE | FLAG_COAST_PAUSE) and layer_change_bleed_clearance > 0:
+        #     realPosition[2] = realPosition[2] + layer_change_bleed_clearance # mm
+
+        # RoboDK integration ------------------------------------------------------------------------------
+        if not debug:
+            #target = RDK.AddTarget(targetName(target))
+
+            if not self.planar:
+                # Creation of the pose matrix by RoboDK's syntax using the projected point's rotation matrix
+                pose = transl(realPosition[0], realPosition[1], realPosition[2])*Mat(rotMat.tolist())
+                #target.setPose(poseMat)
+            else:
+                # Creation of the pose matrix by RoboDK's syntax using the planar generated coordinate
+                #target.setPose(Fanuc_2_Pose(realPosition))
+                pose = Fanuc_2_Pose(realPosition)
+
+            # RoboDK move instruction
+            self.prog.MoveL(pose)
+
+            # Special specific instructions that may be include with the target
+            #   (a coast pause target is also a coast target, as with the former 'coast' substring test)
+            if flags & (FLAG_COAST | FLAG_COAST_PAUSE):
+                # Stop the extrusion for the end of a layer
+                self.prog.RunInstruction('Extruder(''OFF'')')
+            elif flags & FLAG_COAST_PAUSE:
+                # Add a pause after the completion of a layer
+                self.prog.Pause(self.pressure_post_retract_time)
+            elif flags & FLAG_PURGE:
+                # Start the extrusion for next layer
+                self.prog.RunInstruction('Extruder(''ON'','+self.scaff_extr_speed+')')
+                self.prog.Pause(self.pressure_buildup_time)
+
+
+        # Toolpath visualization intergration and statistics ----------------------------------------------
+        # Updating the plot collection and toolpath statistics
+        if showOnGraph:
+            self.addToVisualization(realPosition)
+        self.toolpathTargets.append(tuple(realPosition[0:6]) + (position['direction'], flags))
+
+        # Updating the current/last position and calculation of toolpath print distance
+        self.currPos = [realPosition[0], realPosition[1], realPosition[2]]
+        if calculateDist:
+            self.print_dist += np.linalg.norm(np.array(self.currPos)-np.array(self.lastPos))
+
+        self.lastPos = self.currPos
+
+    # Method managePosProjection
+    #
+    #   Description: manages the projection of each position of the toolpath
+    #                calls the collision detection function
+    #
+    #   Returns:
+    #       realPosition : list, the final position of the coordinate, planar or not
+    #       rotMat : np.matrix, the rotation matrix of the realPosition
+    #       flags : int, the special target attributions of the position (FLAG_*)
+    #
+    #   Parameters:
+    #       target : int, the target identifier (includes layer, row, column indexes, see targetId)
+    #       position : record of TOOLPATH_DTYPE, the cartesian position to process
+    #       i : int, layer index
+    #       debug : bool, flag to prevent calling the RoboDK API
+    #       showOnGraph : bool, flag to add processed data to the visualization plot
+    #
+    def managePosProjection(self, target, position, i, debug, showOnGraph):
+        rotMat = None
+
+        # Uncomment to debug targets
+        #print('%s = %s' % (targetName(target), str(position)))
+
+        # Retrieving the position's informations
+        x, y, z, a, b, c = [float(position[field]) for field in POSE_FIELDS]
+        print_direction = DIRECTIONS[position['direction']]
+        flags = int(position['flags'])
+
+        # List of special targets requiring collision check, triad definition or specific operations
+        specialTargets = [RETRACT_TARGET, targetId(3, 1, 1, KIND_START, 1), targetId(3, 1, 1, KIND_START, 2)]#, targetId(3, 1, 1, KIND_START, 3)]
+
+        # Z position clearance to try and avoid smudging the material losses accumulation when changing layers
+        if (flags & FLAG_CLEAR_COL_NP) and self.layer_change_bleed_clearance > 0:
+            z = z + self.layer_change_bleed_clearance # mm
+
+        # Non-planar toolpath. Projection of the coordinate on the surface ------------------------------------------------------
+        if not self.planar:
+            # ===============================================================
+            # retrieve the surface information for the first two layers
+            if i <= 1 or target in specialTargets:
+                # Passes in ±y keep u almost constant and sweep v, passes in ±x keep v and sweep u
+                if self.surfPass is not None:
+                    self.surfPass.setSweep(1 if 'y' in print_direction else 0)
+
+                # Retrieving the relative u and relative v to evaluate the surface according to the relative position of X and Y over the surface
+                relu, relv, exceedX, exceedY = self.relativeUVbyXY(x, y)
+
+                # The uv list must contain floats value for normal assessment
+                uv = [float(relu),float(relv)]
+
+                # Evaluate the point on the surface according to it's relative position on x and y,
+                #   with the normal and the tangents (in the printing direction and perpendicular) of the first two layers only.
+                #   The point, normal, tangents and curvature all come from the same memoized surface query
+                ptEval, normal, tangent = self.surfaceFrame(uv)
+
+                # Assign new coordinates inside or outside the NURBS
+                ptEval = self.assignNewXYZ(x, y, ptEval, exceedX, exceedY, tangent)
+
+                # ==============================================================================
+                # Adjustment of the toolpath to correct the gap created by toolpath deformation
+                if self.compensateDeformation and (i <= 1 or target in specialTargets):
+                    if flags & FLAG_REFPOS:
+                        # Calling the adjustGap method for reference positions
+                        ptEval, uv = self.adjustGap(ptEval, uv, normal, i, print_direction, target, flags)
+                    else:
+                        # Side adjustment of the rest of the point for the first layer according to the previous
+                        #   calculated offset for the current printing pass
+                        offset = self.prevRefPos['offset']
+
+                        if np.linalg.norm(offset) > 0:
+                            to_check = offset + ptEval
+                            ptEval, distance, isClosest, uv = self.getClosest(to_check, target, normal[1], self.col_check_precision, self.col_check_step, self.col_check_stop, False, True, 'gapOffset')
+
+                    self.lastRef = ptEval
+                    if flags & FLAG_LASTPASS:
+                        self.prevRefPos['pos'] = ptEval
+
+                    # Finding the normal and the tangents (in the printing direction and perpendicular) at the evaluated point of the first two layers
+                    normal, tangent = self.surfaceFrame(uv)[1:]
+
+                # =============================================================================
+                # Tangents identification with respect to printing direction
+                # Triad orientation for deposition going on +/- y
+                if print_direction == '+y' or print_direction == '-y':
+                    if not debug: # for RoboDK
+                        perp_tangent = [tangent[0], tangent[1]]
+                        #direct_tangent = tangent[0], tuple(i*-1 for i in tangent[2])
+                    else:
+                        perp_tangent = [tangent[0], list(np.multiply(-1, tangent[1]))]
+                        # perp_tangent = [tangent[0], [i*-1 for i in tangent[1]]]
+                    direct_tangent = [tangent[0], tangent[2]]
+                # Triad orientation for deposition going on +/- x
+                elif print_direction == '-x' or print_direction == '+x':
+                    if not debug: # for RoboDK
+                        perp_tangent = [tangent[0], list(np.multiply(-1, tangent[2]))]
+                        # perp_tangent = [tangent[0], [i*-1 for i in tangent[2]]]
+                    else:
+                        perp_tangent = [tangent[0], tangent[2]]
+                    direct_tangent = [tangent[0], tangent[1]]
+
+                # ===============================================================================
+                # Checking the local curvature for concave of convex local region
+                if self.wall_distance == 0 and ((i == 0 and 'X' in self.adjust_pore_size) or (i == 1 and 'Y' in self.adjust_pore_size) or 'Both' in self.adjust_pore_size):
+                    # Local radius from the normal curvature of the surface along the nozzle array (no closest point search)
+                    #   Evaluated target by target: the uv and the tangents of a target are only known after its gap
+                    #   adjustment (which follows the adjusted previous target), and the radius sets its pose right away.
+                    #   The derivatives come from the surface query of uv, only the fundamental forms are computed here.
+                    ders = self.surfQuery.query(uv)['ders']
+                    if self.use_analytic_curvature:
+                        normal_curvature = normalCurvatures(np.array([ders]), [perp_tangent[1]])[0]
+                        local_radius = 1 / abs(normal_curvature) if abs(normal_curvature) > 1e-12 else m.inf
+
+                    # Local radius from the Heron circle of the surface points at both ends of the nozzle array
+                    if not self.use_analytic_curvature or self.debugAutoAdjustPoreSize:
+                        # Calculating the three points of the circle arc
+                        mltnzl_limit_coords = self.getMultinozzleFootprint(perp_tangent, self.MULTINOZZLE_WIDTH)
+                        # p1_getClosest = multiprocessing.Process(target = getClosest, args=(list(mltnzl_limit_coords[1]),'ptHeron1',normal[1], col_check_precision, col_check_step, col_check_stop, False, True))
+                        # p2_getClosest = multiprocessing.Process(target = getClosest, args=(list(mltnzl_limit_coords[0]),'ptHeron2',normal[1], col_check_precision, col_check_step, col_check_stop, False, True))
+                        ptHeron1 = self.getClosest(mltnzl_limit_coords[1],target,normal[1], self.col_check_precision, self.col_check_step, self.col_check_stop, False, True, 'heron1')[0]
+                        ptHeron2 = self.getClosest(mltnzl_limit_coords[0],target,normal[1], self.col_check_precision, self.col_check_step, self.col_check_stop, False, True, 'heron2')[0]
+                        local_three_pts = [np.array(ptHeron1), np.array(perp_tangent[0]), np.array(ptHeron2)]
+
+                        # Debugging plot
+                        self.heronFoot.append(mltnzl_limit_coords)
+                        self.heronPt1.append(ptHeron1)
+                        self.heronPt2.append(perp_tangent[0])
+                        self.heronPt3.append(ptHeron2)
+
+                        # Calculating the local radius at the multinozzle footprint (validation of the analytic radius in debug)
+                        if self.use_analytic_curvature:
+                            heron_radius = heronRadius(local_three_pts)
+                            self.curvatureChecks.append([local_radius, heron_radius])
+                            print('%s: analytic radius = %.3f mm, Heron radius = %.3f mm' % (targetName(target), local_radius, heron_radius))
+                        else:
+                            local_radius = heronRadius(local_three_pts)
+
+                    # If radius is not infinite (non-planar)
+                    if not m.isinf(local_radius):
+                        curr_radius = local_radius
+                        gamma = m.atan(0.5*self.curr_process['multinozzle_width'] / curr_radius)
+
+                        # Calculating second derivative at the ptEval (already computed by the surface query of uv)
+                        if i == 0:
+                            curvature = ders[2][0]    # fuu = second derivite of w.r.t u
+                        else:
+                            curvature = ders[0][2]    # fuu = second derivite of w.r.t v
+
+                        # # Calculating current radius
+                        # if curvature[2] > 0: # if curvature is concave, radius is reduced as layers increase
+                        #     curr_radius = local_radius - z#NOZZLE_DIAMETER - i*layer_height
+                        # elif curvature[2] < 0:  # if curvature is convex, radius is increased as layers increase
+                        #     curr_radius = local_radius + z#NOZZLE_DIAMETER + i*layer_height
+                        # else:   # no curvature (planar)
+                        #     curr_radius = local_radius
+
+                        # Calculating aperture angle on the multinozzle
+                        #gamma = m.atan(0.5*MULTINOZZLE_WIDTH / curr_radius)
+                        #gamma = m.atan(0.5*curr_process['multinozzle_width'] / curr_radius)
+
+                        # Calculating current radius
+                        # if curvature[2] > 0: # if curvature is concave, radius is reduced as layers increase
+                        #     curr_radius = local_radius - z#NOZZLE_DIAMETER - i*layer_height
+                        # elif curvature[2] < 0:  # if curvature is convex, radius is increased as layers increase
+                        #     curr_radius = local_radius + z#NOZZLE_DIAMETER + i*layer_height
+                        # else:   # no curvature (planar)
+                        #     curr_radius = local_radius
+
+                    # If radius is infinite (planar)
+                    else:
+                        curvature = [0,0,0]
+                        curr_radius = -1
+                        gamma = -1
+
+                else:
+                    if self.adjust_pore_size and self.wall_distance > 0 and debug:
+                        print('\nWARNING: auto-adjust pore size has been disable for p = %.3f mm to create straight walls at %s.' % (self.curr_pore_size, targetName(target)))
+                    curvature = [0,0,0]
+                    curr_radius = -1
+                    gamma = -1
+
+                newX = ptEval[0]
+                newY = ptEval[1]
+                newZ = ptEval[2]
+                self.projection_pos.store(target, ptEval, normal, perp_tangent, direct_tangent, curr_radius, curvature, gamma, uv, self.surfPatch)
+
+                colOffset = 0
+            else:
+                # ===========================================================================
+                # Finding the position following previous point position of layer 1 or 2
+                # Assign a target reference on the last corresponding projected layer
+                if i % 2 == 0:
+                    proj_target = withLayer(target, 1)
+                    if not self.projection_pos.contains(proj_target): # The case of layer 3 (after change from layer 2 to 3, we have a start of layer scheme different than the print approach)
+                        proj_target = withLayer(target, 3)
+                else:
+                    proj_target = withLayer(target, 2)
+
+                # Map the projection data
+                ptProj, normal, perp_tangent, direct_tangent, curr_radius, curvature, gamma = self.projection_pos.projection(proj_target)
+                newX, newY, newZ = ptProj
+
+                # we also add the collision offset of the point under it if the point was offset because of a detected collision
+                colOffset = self.projection_pos.colOffset(proj_target, self.curr_process['id'])
+                if colOffset is None:
+                    # Here it means that the corresponding point of layer 1 or 2 did not collision, hence no collision offset to apply
+                    colOffset = 0
+                elif debug:
+                    print('target : %s, offset = %.3f (from %s)' % (targetName(target), colOffset, targetName(proj_target)))
+
+                # Lift of the nozzle line over the layer below (clearance check of the offset surfaces)
+                colOffset += self.offsetLifts.get((proj_target, i), 0)
+
+            # =================================================================
+            # Calculating the local curvature at layer height
+            if not curr_radius == -1:
+                if curvature[2] > 0: # if curvature is concave, radius is reduced as layers increase
+                    curr_radius = curr_radius - z + self.NOZZLE_DIAMETER#i*layer_height# - colOffset
+                elif curvature[2] < 0:  # if curvature is convex, radius is increased as layers increase
+                    curr_radius = curr_radius + z - self.NOZZLE_DIAMETER#i*layer_height# + colOffset
+
+            # ===============================================================================
+            # If the pore size adjustment is True, then we need to rotate the multinozzle on its axis
+            if self.adjust_pore_size != 'None' and not curr_radius == -1:
+                # Calculation of new projected multinozzle width
+                curr_multinozzle_width = 2*(curr_radius * m.tan(gamma))
+
+                # Calculation of the gap difference to add to the curr_multinozzle_width
+                curr_gap = self.gapDistance * curr_multinozzle_width / self.curr_process['multinozzle_width']
+                curr_multinozzle_width += (self.gapDistance - curr_gap)# + NOZZLE_DIAMETER # ND does not work with p = 184
+
+                if curr_multinozzle_width > self.MULTINOZZLE_TRUE_WIDTH:
+                    if debug:
+                        print('\nWARNING: apparent multinozzle width (%.4f mm) for "%s" cannot be bigger than the real multinozzle width (%.4f mm).' % (curr_multinozzle_width, targetName(target), self.MULTINOZZLE_TRUE_WIDTH))
+                    curr_multinozzle_width = self.MULTINOZZLE_TRUE_WIDTH
+
+                # Calculation of printhead rotation
+                d_theta = m.degrees(m.acos(np.clip((curr_multinozzle_width / self.MULTINOZZLE_TRUE_WIDTH), -1, 1))) - self.theta
+
+            else:
+                d_theta = 0
+            #print('\ni = %i, name = %s, p = %.3f mm, dth = %.3f' % (i, targetName(target), curr_pore_size, d_theta))
+
+            # ===============================================================================
+            # Updating the point position according to the projection informations
+            # listNormal = list(normal)
+            dx = (z + colOffset) * normal[1][0]
+            dy = (z + colOffset) * normal[1][1]
+            dz = (z + colOffset) * normal[1][2]
+            newX += dx
+            newY += dy
+            newZ += dz
+
+            # Update the triad position and rotation according to the new projected position and theta angle
+            normal, perp_tangent, direct_tangent = self.updatePosTriad(normal, perp_tangent, direct_tangent, [newX, newY, newZ])
+            normal, perp_tangent, direct_tangent = self.updateRotTriad(normal, perp_tangent, direct_tangent, self.theta + d_theta)
+
+            # Update the toolpath position to be projected on the surface
+            projectedPosition = [newX, newY, newZ, a, b, c]
+
+            # ===================================================================
+            # Checking multinozzle collision with the printing surface
+            # Check the 1st + 2nd layer and retract position
+            if (i <= 1 or target in specialTargets) and self.check_col and self.curr_process['id'] == 0 and showOnGraph:
+                realPosition, is_collision = self.checkCollision(projectedPosition, perp_tangent, normal, target, debug)
+                normal, perp_tangent, direct_tangent = self.updatePosTriad(normal, perp_tangent, direct_tangent, realPosition[0:3])
+
+                # #Recheck the position as long as there is a collision
+                # while is_collision:
+                #     col_position = realPosition[:]
+                #     if debug:
+                #         print(':::::::::::::::::::::::::::::::::::::::')
+                #         print('Rechecking collision for [%.3f, %.3f, %.3f]' % (col_position[0], col_position[1], col_position[2]))
+                #     realPosition, is_collision = checkCollision(col_position, perp_tangent, normal, target, debug)
+                #     normal, perp_tangent, direct_tangent = updatePosTriad(normal, perp_tangent, direct_tangent, realPosition[0:3])
+            else:
+                realPosition = projectedPosition
+
+            # =====================================================================
+
+            # Updating the overall dimension reference pos for gap adjustment
+            if self.compensateDeformation and self.overallDimRefPos['pos'] is None:
+                layer, row, col = targetFields(target)[0:3]
+                if (layer, row, col) == (1, self.nb_rows, self.nb_cols) and flags == FLAG_PASS:
+                    self.overallDimRefPos['pos'] = [realPosition[0], realPosition[1] - self.NOZZLE_DISTANCE / 2, realPosition[2]]
+
+            # Creation of filaments position for post-process visualization
+            if self.show_geom and showOnGraph:
+                self.generateFilaments(perp_tangent, normal, z, self.project_filaments)
+
+            # # Show the first layer normals & tangeants on the 3D plot
+            # if (i <= 1 or target in specialTargets) and showOnGraph:
+            #     normals.append(normal)
+            #     tangentsu.append(direct_tangent)
+            #     tangentsv.append(perp_tangent)
+
+            # =====================================================================
+            # Construction of the rotation matrix for RoboDK target assignment
+            if not debug:
+                # Re-obtain the Normal and Tangents conversion between tuples and lists before calculating the rotation matrix
+                # listNormal = list(normal)
+                # listPerpTangent = list(perp_tangent)
+                # listTangent = list(direct_tangent)
+
+                # Assign the triad orientation of the target at each point for the TCP orientation
+                # triad = np.matrix([[-listTangent[1][0], -listTangent[1][1], -listTangent[1][2]],
+                #                 [-listPerpTangent[1][0], -listPerpTangent[1][1], -listPerpTangent[1][2]],
+                #                 [-listNormal[1][0], -listNormal[1][1], -listNormal[1][2]]])
+
+                triad = np.matrix([np.multiply(-1, direct_tangent[1]),
+                                np.multiply(-1, perp_tangent[1]),
+                                np.multiply(-1, normal[1])])
+
+                # Construction of the rotation matrix as per RoboDK syntax
+                rotMat = np.matrix(getRotMat(triad))
+                rotMat = np.hstack((rotMat,[[0],[0],[0]])) # Here we add a column of zeros
+                rotMat = np.vstack((rotMat,[0,0,0,1]))  # Here we add a row of zeros and a 1
+
+        # Planar toolpath. No projection on the surface ---------------------------------------------------------
+        else:
+            # Creation of orientation triad for planar
+            if print_direction == '+y' or print_direction == '-y':
+                perp_tangent = [[x,y,z], [-1,0,0]]
+                direct_tangent = [[x,y,z], [0,1,0]]
+            # Triad orientation for deposition going on +/- x
+            elif print_direction == '-x' or print_direction == '+x':
+                perp_tangent = [[x,y,z], [0,1,0]]
+                direct_tangent = [[x,y,z], [1,0,0]]
+            normal = [[x,y,z],[0,0,1]]
+            normal, perp_tangent, direct_tangent = self.updateRotTriad(normal, perp_tangent, direct_tangent, self.theta)
+
+            # Creation of filaments position for post-process visualization
+            if self.show_geom and showOnGraph:
+                self.generateFilaments(perp_tangent, normal, z)
+
+            realPosition = [x, y, z, a, b, c]
+
+        # Show the first layer normals & tangeants on the 3D plot
+        if (i <= 1 or target in specialTargets) and showOnGraph:
+            self.normals.append(normal)
+            self.tangentsu.append(direct_tangent)
+            self.tangentsv.append(perp_tangent)
+
+        # Return the managed position
+        return (realPosition, rotMat, flags)
+
+    # Method assignNewXYZ
+    #
+    #   Description: Assign a new XYZ position on the NURBS surface or outside.
+    #                   The point will be positioned according to surface tangents
+    #                   if the new coordinate is outside the NURBS domain.
+    #
+    #   Returns:
+    #       newX, newY, newZ : float, new XYZ positions inside or outside the NURBS
+    #
+    #   Parameters:
+    #       x : float, x coordinate before projection
+    #       y : float, y coordinate before projection
+    #       evalX : float, evaluated x coordinate on the NURBS
+    #       evalY : float, evaluated y coordinate on the NURBS
+    #       evalZ : float, evaluated z coordinate on the NURBS
+    #       exceedX : bool, True is x < evalX or x > evalX (point is outside the surface)
+    #       exceedY : bool, True is y < evalY or y > evalY (point is outside the surface)
+    #       tangent : tuple, the evaluated tangents (on u and v) at [evalX,evalY,evalZ]
+    #
+    def assignNewXYZ(self, x, y, ptEval, exceedX, exceedY, tangent):
+        evalX = ptEval[0]    # Get the X component of the evaluated point on the surface
+        evalY = ptEval[1]    # Get the Y component of the evaluated point on the surface
+        evalZ = ptEval[2]    # Get the Z component of the evaluated point on the surface
+
+        if not exceedX:
+            newX = evalX
+        else:
+            newX = x
+        if not exceedY:
+            newY = evalY
+        else:
+            newY = y
+
+        if not exceedX and not exceedY:
+            newZ = evalZ
+        else:
+            # If the projected coordinate is outside the surface boundaries,
+            #   we position the coordinate using the trend of the surface tangents
+            posXout = np.array([newX, evalZ])
+            posXborder = np.array([evalX, evalZ])
+            posYout = np.array([newY, evalZ])
+            posYborder = np.array([evalY, evalZ])
+            outXdist = np.linalg.norm(posXout - posXborder)
+            outYdist = np.linalg.norm(posYout - posYborder)
+
+            # Creation of the vector as function of the exceeding side
+            if x < evalX:
+                outXvect = np.array([-outXdist * i for i in tangent[1]])
+            else:
+                outXvect = np.array([outXdist * i for i in tangent[1]])
+            if y < evalY:
+                outYvect = np.array([-outYdist * i for i in tangent[2]])
+            else:
+                outYvect = np.array([outYdist * i for i in tangent[2]])
+
+            outsideVect = outXvect + outYvect
+            posBorder = np.array([evalX, evalY, evalZ])
+            newX, newY, newZ = posBorder + outsideVect
+
+        return np.array([newX, newY, newZ])
+
+    # Method gapAlongSurface
+    #
+    #   Description: places a reference position at an expected distance along the surface from
+    #                the previous reference position, on the isocurve of the position heading to the
+    #                reference position (arc length tables, no closest point search)
+    #
+    #   Returns:
+    #       uv : np.array, u and v position of the placed position (None if it cannot be placed on
+    #            the selected surface patch, the gap is then adjusted by getClosest)
+    #
+    #   Parameters:
+    #       uv_initial : tuple of float, u and v position of the position to place
+    #       refPos : list, the previous reference position
+    #       expectedDist : float, mm, the expected distance along the surface
+    #       dir_vect : np.array, the direction from the position to the reference position
+    #       opposite : bool, set to True to place the position on the other side of the reference position
+    #
+    def gapAlongSurface(self, uv_initial, refPos, expectedDist, dir_vect, opposite):
+        # Isocurve following u if the reference position is mostly on x, following v if mostly on y
+        direction = 0 if abs(dir_vect[0]) >= abs(dir_vect[1]) else 1
+        refU, refV, exceedX, exceedY = self.relativeUVbyXY(refPos[0], refPos[1], False)
+        if exceedX or exceedY:
+            return None
+
+        # Arc lengths of the position and of the reference position on the isocurve of the position
+        uvRef = np.array(uv_initial, dtype=float)
+        uvRef[direction] = [refU, refV][direction]
+        lengths = self.surfArc.length([uv_initial, uvRef], direction)
+        side = np.sign(lengths[0] - lengths[1])
+        if side == 0:
+            return None
+        if opposite:
+            side = -side
+
+        uv, inside = self.surfArc.paramAt([uv_initial], direction, lengths[1] + side * expectedDist)
+        return uv[0] if inside[0] else None
+
+    # Method adjustGap
+    #
+    #   Description: Moves the ptEval coordinates closer to the prevRefPos in order
+    #                to close the gaps created by projection-induced deformation
+    #                of the toolpath
+    #
+    #   Returns:
+    #       ptEval : list, the adjusted evaluated position on the NURBS
+    #       uv : tuple of float, u and v position of ptEval
+    #
+    #   Parameters:
+    #       ptEval : list, the evaluated position on the NURBS to adjust
+    #       i : int, the layer index
+    #       print_direction : string, the direction in which the printing occurs for the current ptEval
+    #       target : int, the identifier of the current target position of ptEval (see targetId)
+    #       flags : int, target's special attributes (FLAG_*)
+    #
+    def adjustGap(self, ptEval, uv_initial, normal, i, print_direction, target, flags):
+        kind, index = targetFields(target)[3:5]
+
+        # mm, the expected distance between two reference positions / printing pass
+        expectedDist = self.MULTINOZZLE_WIDTH + self.gapDistance#  - 2.6
+
+        # mm, the distance offset with calculated distance and expected one
+        diff_vect = np.array([0,0,0])
+
+        # Initialize the reference position and expected distance if set to None
+        if self.prevRefPos['pos'] is None:
+            # First and second layer treatment
+            if i == 0: # if the start of first layer
+                if self.adjustOrigin: # Set reference point near origin
+                    if self.curr_process['id'] == 0:
+                        ptClose_offset = - self.approach_length - self.layer_change_bleed
+                    else:
+                        ptClose_offset = - self.layer_change_bleed
+
+                    expectedDist = (self.MULTINOZZLE_WIDTH + self.NOZZLE_DIAMETER) / 2
+                    ptClose, distance, isClosest, uv = self.getClosest(np.array([self.start_x + self.NOZZLE_DIAMETER/2,
+                                                                         self.start_y + self.NOZZLE_DIAMETER/2 + ptClose_offset,
+                                                                         self.start_z]),
+                                                                  target,
+                                                                  normal[1],
+                                                                  self.col_check_precision, self.col_check_step, self.col_check_stop,
+                                                                  False)
+                else: # Otherwise, set reference point to ptEval
+                    expectedDist = 0
+                    ptClose = ptEval
+                    uv = uv_initial
+            elif i == 1: # if the start of second layer
+                # Set reference position to the position at the end corner of the overvall microscaffold network
+                if self.overallDimRefPos['pos'] is None:
+                    raise Exception('overallDimRefPos is None')
+                ptClose = self.overallDimRefPos['pos']
+                expectedDist = self.layer_change_bleed + (self.MULTINOZZLE_WIDTH + self.NOZZLE_DIAMETER)/2 + self.gapDistance
+
+            # Special target treatment
+            if target == targetId(3, 1, 1, KIND_START, 1): # if the third layer
+                if self.adjustOrigin:
+                    expectedDist = (self.MULTINOZZLE_WIDTH + self.NOZZLE_DIAMETER) / 2
+                    ptClose, distance, isClosest, uv = self.getClosest(np.array([self.start_x + self.NOZZLE_DIAMETER/2,
+                                                                         self.start_y + self.NOZZLE_DIAMETER/2 - self.layer_change_bleed,
+                                                                         self.start_z]),
+                                                                  target,
+                                                                  normal[1],
+                                                                  self.col_check_precision, self.col_check_step, self.col_check_stop,
+                                                                  False)
+                else:
+                    expectedDist = 0
+                    ptClose = ptEval
+                    uv = uv_initial
+
+            elif target == RETRACT_TARGET: # Special treatment for retraction move at end of print
+                expectedDist = 0
+                if i % 2 == 0:
+                    ptClose = [self.overallDimRefPos['pos'][0],
+                               self.overallDimRefPos['pos'][1] + self.NOZZLE_DISTANCE / 2 + self.MULTINOZZLE_WIDTH / 2 + self.retract_length + self.layer_change_bleed + self.NOZZLE_DIAMETER,
+                               self.overallDimRefPos['pos'][2]]
+
+            self.prevRefPos['pos'] = ptClose
+
+        # Initialization the reference position and expected distance if not set to None
+        else:
+            # If start of pass on second layer
+            if (target == targetId(2, 1, 1, KIND_START, 3) and self.layer_change_clearance > 0) or target == targetId(2, 1, 1, KIND_START, 2):
+                if self.overallDimRefPos['pos'] is None:
+                    raise Exception('overallDimRefPos is None')
+                ptClose = self.overallDimRefPos['pos']
+                expectedDist = (self.MULTINOZZLE_WIDTH + self.NOZZLE_DIAMETER) / 2
+                self.prevRefPos['pos'] = ptClose
+
+            # If any pass on the second layer
+            elif i == 1 and flags & FLAG_PASS:
+                if self.lastRef is None:
+                    raise Exception('lastRef is None')
+                ptClose = self.lastRef
+                expectedDist = self.pass_step_x
+                self.prevRefPos['pos'] = ptClose
+
+            elif i == 1 and kind == KIND_CON:
+                if flags & FLAG_LASTPASS or index in (3, 4):
+                    if self.lastRef is None:
+                        raise Exception('lastRef is None')
+                    ptClose = self.lastRef
+                    expectedDist = self.printing_bleed
+                    self.prevRefPos['pos'] = ptClose
+
+        # for plotting ref points Mayavi
+        self.wrongPosGap.append(ptEval) # Purple
+        self.refPositions.append(self.prevRefPos['pos'])  # Blue
+
+        # Calculate distance from prevRefPos and difference with expected distance
+        dist, dir_vect = distanceP1P2(ptEval,self.prevRefPos['pos'])
+
+        # Adjustment of the direction vector of layer 2 depending on the printing direction
+        # This adjustment prevent singularities which messes up the direction vector
+        if i == 1 and 'x' in print_direction:
+            dir_vect[1] = 0
+        elif i == 1 and 'y' in print_direction:
+            dir_vect[0] = 0
+
+        diff = dist - expectedDist
+        #print('-------------------\n%s, ref = %s, diff = %.4f' % (targetName(target), prevRefPos['pos'], diff))
+
+        # Vector direction management for layer 2
+        opposite = False
+        if i == 1 and ((kind == KIND_CON) or (flags & (FLAG_PASS | FLAG_LASTPASS))):
+            if (print_direction == '-x' and ptEval[0] > self.prevRefPos['pos'][0]) or (print_direction == '+x' and ptEval[0] < self.prevRefPos['pos'][0]):
+                diff = dist + expectedDist
+                opposite = True
+
+        # Position placed at the expected distance along the surface (arc length tables)
+        uvArc = None
+        if self.surfArc is not None and abs(diff) > 0 and dir_vect is not None:
+            if self.use_batch_gap_solver and target in self.gapSolution:
+                uvArc = self.gapSolution[target]
+
+                # Check of the batch solution against the sequential adjustment from the same reference position
+                if self.debugGapSolver:
+                    uvSeq = self.gapAlongSurface(uv_initial, self.prevRefPos['pos'], expectedDist, dir_vect, opposite)
+                    if uvSeq is not None:
+                        deviation = distanceP1P2(self.surfaceFrame([float(uvArc[0]), float(uvArc[1])])[0], self.surfaceFrame([float(uvSeq[0]), float(uvSeq[1])])[0])[0]
+                        self.gapSolverReports[-1][7] = max(self.gapSolverReports[-1][7], deviation)
+            else:
+                uvArc = self.gapAlongSurface(uv_initial, self.prevRefPos['pos'], expectedDist, dir_vect, opposite)
+
+        if uvArc is not None:
+            uv = [float(uvArc[0]), float(uvArc[1])]
+            ptArc = self.surfaceFrame(uv)[0]
+            diff_vect = np.array(ptArc) - np.array(ptEval)
+            self.dirVectors.append([ptEval, diff_vect])
+            ptEval = ptArc
+            self.newPosGap.append(ptEval) # Green
+
+        # Distance condition to move the point
+        elif abs(diff) > 0 and dir_vect is not None:
+            diff_vect = np.array(diff * unit_vector(dir_vect))
+
+            # for plotting ref points Mayavi
+            vectToPlot = [ptEval, diff_vect]
+
+            self.dirVectors.append(vectToPlot)
+
+            to_check = np.array(diff_vect + ptEval)
+            self.posToCheck.append(to_check) # Beige
+            if target == RETRACT_TARGET and self.adjust_pore_size != 'None':
+                abortLoop =  True
+            else:
+                abortLoop =  False
+            ptEval, distance, isClosest, uv = self.getClosest(to_check, target, normal[1], self.col_check_precision, self.col_check_step, self.col_check_stop, False, abortLoop, 'gap')
+
+            # for plotting ref points Mayavi
+            self.newPosGap.append(ptEval) # Green
+        else:
+            diff_vect = np.array([0,0,0])
+            uv = uv_initial
+
+        # the last ptEval becomes the new prevRefPos
+        self.prevRefPos['pos'] = ptEval
+        self.prevRefPos['offset'] = diff_vect
+
+        return ptEval, uv
+
+    # Method nominalLayerTargets
+    #
+    #   Description: lists the nominal target positions of a layer of the projected toolpath (layer
+    #                change, passes and connections), the same as the main loop targets before
+    #                their projection
+    #
+    #   Returns:
+    #       targets : list of tuple, the identifier and the nominal position (record of TOOLPATH_DTYPE) of each target of the layer
+    #
+    #   Parameters:
+    #       i : int, the layer index
+    #       il : int, the layer index relative to the current process
+    #       prevPos : record, the last position before the layer
+    #
+    def nominalLayerTargets(self, i, il, prevPos):
+        targets = []
+        if i != 0:
+            # changeOrientation resets prevRefPos, kept for the current layer
+            savedRefPos = self.prevRefPos
+            newOrient = self.changeOrientation(il, prevPos)
+            self.prevRefPos = savedRefPos
+            for j in range(len(newOrient)):
+                targets.append((targetId(il + 1, 1, 1, KIND_START, j + 1), newOrient[j]))
+            prevPos = newOrient[-1]
+
+        for r in range(self.nb_rows if i % 2 == 0 else self.nb_cols):
+            addCoast = self.stopAndGo
+            for c in range(self.nb_cols if i % 2 == 0 else self.nb_rows):
+                newPass = self.addPass(il, r, c, prevPos, addCoast)
+                for j in range(len(newPass)):
+                    if newPass[j]['flags'] == FLAG_COAST:
+                        addCoast = False
+                    targets.append((targetId(il + 1, r + 1, c + 1, KIND_PASS, j + 1), newPass[j]))
+                prevPos = newPass[-1]
+            newConnection = self.addConnection(il, r, prevPos)
+            for j in range(len(newConnection)):
+                targets.append((targetId(il + 1, r + 1, c + 1, KIND_CON, j + 1), newConnection[j]))
+            prevPos = newConnection[-1]
+        return targets
+
+    # Method solveLayerGaps
+    #
+    #   Description: solves the gap adjustment of all the reference positions of one of the first two
+    #                layers at once (solveGapChain), before the targets of the layer are processed.
+    #                The anchors and expected distances follow the rules of adjustGap (previous reference
+    #                or lastPass position, layer origin, overall dimension position), the positions
+    #                before the first reference position follow the offset left by the previous layer.
+    #                The solved uv are kept in gapSolution by target identifier and used by adjustGap.
+    #
+    #   Returns: nothing.
+    #
+    #   Parameters:
+    #       i : int, the layer index
+    #       il : int, the layer index relative to the current process
+    #       targets : list of tuple, the identifier and the nominal position of each target of the layer (nominalLayerTargets)
+    #
+    def solveLayerGaps(self, i, il, targets):
+        self.gapSolution = {}
+        # The tables of a single surface patch are used (the patches of a multi-patch surface are solved sequentially)
+        if self.surfArc is None or self.surfPatchIndex is not None or len(targets) == 0:
+            return
+
+        # The layer change (i != 0) resets prevRefPos, the first layer starts from the approach position
+        lastRefPos = self.prevRefPos if i == 0 else {'pos':None, 'offset':np.array([0,0,0])}
+
+        # Reference positions, their anchor (target index or fixed x, y) and expected distance
+        xy = np.array([[position['x'], position['y']] for target, position in targets], dtype=float)
+        refs, anchors, expected, directions, opposite = [], [], [], [], []
+        refState = None if lastRefPos['pos'] is None else list(lastRefPos['pos'][0:2])
+        for k, (target, position) in enumerate(targets):
+            kind, index = targetFields(target)[3:5]
+            flags = position['flags']
+            print_direction = DIRECTIONS[position['direction']]
+            if flags & FLAG_REFPOS:
+                anchor = refState
+                expectedDist = self.MULTINOZZLE_WIDTH + self.gapDistance
+                if refState is None:
+                    if il == 0 and self.adjustOrigin:
+                        ptClose_offset = - self.approach_length - self.layer_change_bleed if self.curr_process['id'] == 0 else - self.layer_change_bleed
+                        anchor = [self.start_x + self.NOZZLE_DIAMETER/2, self.start_y + self.NOZZLE_DIAMETER/2 + ptClose_offset]
+                        expectedDist = (self.MULTINOZZLE_WIDTH + self.NOZZLE_DIAMETER) / 2
+                    elif il == 0:
+                        anchor = list(xy[k])
+                        expectedDist = 0
+                    else:
+                        if self.overallDimRefPos['pos'] is None:
+                            raise Exception('overallDimRefPos is None')
+                        anchor = list(self.overallDimRefPos['pos'][0:2])
+                        expectedDist = self.layer_change_bleed + (self.MULTINOZZLE_WIDTH + self.NOZZLE_DIAMETER)/2 + self.gapDistance
+                elif (target == targetId(2, 1, 1, KIND_START, 3) and self.layer_change_clearance > 0) or target == targetId(2, 1, 1, KIND_START, 2):
+                    if self.overallDimRefPos['pos'] is None:
+                        raise Exception('overallDimRefPos is None')
+                    anchor = list(self.overallDimRefPos['pos'][0:2])
+                    expectedDist = (self.MULTINOZZLE_WIDTH + self.NOZZLE_DIAMETER) / 2
+                elif il == 1 and flags & FLAG_PASS:
+                    anchor = k - 1
+                    expectedDist = self.pass_step_x
+                elif il == 1 and kind == KIND_CON and (flags & FLAG_LASTPASS or index in (3, 4)):
+                    anchor = k - 1
+                    expectedDist = self.printing_bleed
+
+                anchorXY = xy[anchor] if isinstance(anchor, int) else np.array(anchor, dtype=float)
+                isOpposite = False
+                if il == 1 and ((kind == KIND_CON) or (flags & (FLAG_PASS | FLAG_LASTPASS))):
+                    isOpposite = (print_direction == '-x' and xy[k][0] > anchorXY[0]) or (print_direction == '+x' and xy[k][0] < anchorXY[0])
+                if il == 1:
+                    direction = 0 if 'x' in print_direction else 1
+                else:
+                    delta = xy[k] - anchorXY
+                    direction = 0 if abs(delta[0]) >= abs(delta[1]) else 1
+
+                refs.append(k)
+                anchors.append(anchor)
+                expected.append(expectedDist)
+                directions.append(direction)
+                opposite.append(isOpposite)
+                refState = k
+            elif flags & FLAG_LASTPASS:
+                refState = k
+        if len(refs) == 0:
+            return
+
+        # uv of the nominal targets, the targets before the first reference position moved by the last offset
+        carry = np.zeros(2) if lastRefPos['pos'] is None else np.array(lastRefPos['offset'][0:2], dtype=float)
+        uv = np.zeros((len(targets), 2))
+        exceed = np.zeros(len(targets), dtype=bool)
+        for k in range(len(targets)):
+            x, y = xy[k] + carry if k < refs[0] else xy[k]
+            relu, relv, exceedX, exceedY = self.relativeUVbyXY(x, y, False)
+            uv[k] = [relu, relv]
+            exceed[k] = exceedX or exceedY
+        fixed_uv = np.zeros((len(refs), 2))
+        fixed_exceed = np.zeros(len(refs), dtype=bool)
+        for n, anchor in enumerate(anchors):
+            if not isinstance(anchor, int):
+                relu, relv, exceedX, exceedY = self.relativeUVbyXY(anchor[0], anchor[1], False)
+                fixed_uv[n] = [relu, relv]
+                fixed_exceed[n] = exceedX or exceedY
+        anchor_index = np.array([anchor if isinstance(anchor, int) else -1 for anchor in anchors])
+
+        refs = np.array(refs)
+        expected = np.array(expected, dtype=float)
+
+        # Reference positions (and anchors) out of the surface are left to the sequential adjustment, with the rest of their chain
+        outside = exceed[refs] | fixed_exceed | np.where(anchor_index >= 0, exceed[np.maximum(anchor_index, 0)], False)
+        solved_uv, anchor_uv, valid, iterations, residuals = solveGapChain(self.surfArc, uv, refs, anchor_index, fixed_uv,
+                                                                           np.array(directions), expected, np.array(opposite), outside)
+        for n in np.flatnonzero(valid):
+            self.gapSolution[targets[refs[n]][0]] = solved_uv[n]
+
+        # Chord error from the anchor brought on the isocurve of the reference position (direction of the adjustment)
+        directions = np.array(directions)
+        on_iso = solved_uv.copy()
+        on_iso[np.arange(len(refs)), directions] = anchor_uv[np.arange(len(refs)), directions]
+        chord = np.linalg.norm(self.surfEval.points(solved_uv) - self.surfEval.points(on_iso), axis=1)
+        chordError = np.abs(chord - expected)[valid] if np.any(valid) else np.zeros(1)
+        self.gapSolverReports.append([i + 1, len(refs), iterations, np.max(residuals[valid]) if np.any(valid) else 0,
+                                      np.max(chordError), np.mean(chordError), np.count_nonzero(~valid), 0])
+
+    # Method checkOffsetLayers
+    #
+    #   Description: checks the offset surfaces of the layers above the second, from the first of
+    #                them to the last layer, in one vectorized step per surface patch. The targets
+    #                of the first two layers (projection_pos) are offset at each layer height: the
+    #                folds of the offset surface and the clearance of the nozzle line over the layer
+    #                below are computed for all the layers at once. The nozzle line is lifted by the
+    #                missing clearance (offsetLifts) and the result of each layer is kept in offsetChecks.
+    #
+    #   Returns: nothing.
+    #
+    #   Parameters:
+    #       i : int, the index of the first layer above the second of the thickness level
+    #       layer_index_offset : int, the index of the first layer of the thickness level
+    #
+    def checkOffsetLayers(self, i, layer_index_offset):
+        # Results of the layers of this thickness level (and of its first two layers) replaced
+        for k in [k for k in self.offsetChecks if k >= i - 2]:
+            del self.offsetChecks[k]
+        self.offsetLifts.clear()
+        layers = np.arange(i, self.nb_layers)
+        heights = self.start_z + self.NOZZLE_DIAMETER + layers * self.layer_height
+        half_width = (self.MULTINOZZLE_TRUE_WIDTH + self.NOZZLE_DIAMETER) / 2
+
+        # Targets of the first layers kept in projection_pos, with the direction of their nozzle line
+        #   (the triads kept in projection_pos are already turned by the printhead angle)
+        targets, slots = self.projection_pos.targets()
+        patches = self.projection_pos.patches[slots]
+
+        lifted = np.zeros(len(layers), dtype=int)
+        folds = np.zeros(len(layers), dtype=int)
+        counts = np.zeros(len(layers), dtype=int)
+        minClearance = np.full(len(layers), np.inf)
+        for patch in np.unique(patches):
+            if self.surfPatches[patch][9] is None:
+                continue
+            inPatch = patches == patch
+            patchTargets = targets[inPatch]
+            clearances, folded = self.surfPatches[patch][9].clearances(self.projection_pos.uv[slots][inPatch], self.projection_pos.perp_tangents[slots][inPatch],
+                                                                  heights, half_width, self.layer_height)
+
+            # Layers offsetting each target : the second layer for the even layers, the first (or third) one for the odd layers
+            odd = slots[0][inPatch] == 1
+            used = odd[:, None] == ((layers - layer_index_offset) % 2 == 1)[None, :]
+            for t, l in zip(*np.nonzero(used & (clearances < 0))):
+                self.offsetLifts[(int(patchTargets[t]), int(layers[l] - layer_index_offset))] = -clearances[t, l]
+            lifted += np.count_nonzero(used & (clearances < 0), axis=0)
+            folds += np.count_nonzero(used & folded, axis=0)
+            counts += np.count_nonzero(used, axis=0)
+            minClearance = np.minimum(minClearance, np.min(np.where(used, clearances, np.inf), axis=0))
+
+        for l, k in enumerate(layers):
+            self.offsetChecks[int(k)] = [int(counts[l]), int(lifted[l]), float(minClearance[l]), int(folds[l])]
+
+    # Method addToVisualization
+    #
+    #   Description: adds a given cartesian position to the data collection used for the plot.
+    #
+    #   Returns: nothing.
+    #
+    #   Parameters:
+    #       position : list, the cartesian position to process
+    #
+    def addToVisualization(self, position):
+        self.xs.append(position[0])
+        self.ys.append(position[1])
+        self.zs.append(position[2])
+
+    # Method generateFilaments
+    #
+    #   Description: calcualte the multinozzle extruded filaments position on the given toolpath coordinate
+    #
+    #   Returns: nothing.
+    #
+    #   Parameters:
+    #       tangent : tuple of float, tangent following the position of the nozzle array
+    #       normal : tuple of float, normal perpendicular to the tangent
+    #       z : float, z position of the current layer
+    #       project_filaments : bool, set tu True to project filaments on the curved surface
+    #
+    def generateFilaments(self, tangent, normal, z, project_filaments = False):
+        mltnzl_array_half_width = self.MULTINOZZLE_TRUE_WIDTH / 2
+
+        # We multiply the nozzle index with the nozzle distance and substract the starting position
+        # to give a position for all nozzles along the tangent
+        nozzle_offsets = np.arange(self.NB_NOZZLES) * self.NOZZLE_TRUE_DISTANCE - mltnzl_array_half_width
+        nozzle_pos_direction = np.outer(nozzle_offsets, tangent[1]) + np.array(tangent[0])
+
+        # Filaments projection
+        if project_filaments:
+            filament_height = z - self.NOZZLE_DIAMETER/2
+            # Projection of the filament of each nozzle on the surface
+            # Retrieving the relative u and relative v to evaluate the surface according to the relative position of X and Y over the surface
+            nozzle_xy = nozzle_pos_direction[:, 0:2] - filament_height * np.array(normal[1][0:2])
+
+            # Nozzles grouped by patch of a multi-patch projection surface
+            currentPatch = self.surfPatch
+            if self.surfPatchIndex is not None:
+                nozzle_patches = self.surfPatchIndex.find(nozzle_xy)[0]
+            else:
+                nozzle_patches = np.full(self.NB_NOZZLES, currentPatch)
+
+            relUV = [None] * self.NB_NOZZLES
+            ptsEval = np.zeros((self.NB_NOZZLES, 3))
+            tangentsU = np.zeros((self.NB_NOZZLES, 3))
+            tangentsV = np.zeros((self.NB_NOZZLES, 3))
+            for patch in np.unique(nozzle_patches):
+                self.selectPatch(int(patch))
+                nozzles = np.flatnonzero(nozzle_patches == patch)
+                if self.surfInverse is not None:
+                    # (a nozzle whose x, y has no exact surface point keeps the closest uv found)
+                    uvs, exceeds = self.surfInverse.invert(nozzle_xy[nozzles])[0:2]
+                    for k, nozIndex in enumerate(nozzles):
+                        relUV[nozIndex] = [uvs[k][0], uvs[k][1], exceeds[k][0], exceeds[k][1]]
+                else:
+                    for nozIndex in nozzles:
+                        relUV[nozIndex] = self.relativeUVbyXY(nozzle_xy[nozIndex][0], nozzle_xy[nozIndex][1])
+
+                # The uv list must contain floats value for normal assessment
+                uv = [[float(relUV[nozIndex][0]),float(relUV[nozIndex][1])] for nozIndex in nozzles]
+
+                # Evaluate all the nozzles points of the patch on the surface in a single call
+                sq = self.surfQuery.queryMany(uv)
+                ptsEval[nozzles] = sq['point']
+                tangentsU[nozzles] = sq['tangent_u']
+                tangentsV[nozzles] = sq['tangent_v']
+            self.selectPatch(currentPatch)
+
+            nozzle_pos_list = []
+            for nozIndex in range(self.NB_NOZZLES):
+                x, y = nozzle_xy[nozIndex]
+                exceedX, exceedY = relUV[nozIndex][2:4]
+                newTangent = [ptsEval[nozIndex], tangentsU[nozIndex], tangentsV[nozIndex]]
+                ptEval = self.assignNewXYZ(x, y, ptsEval[nozIndex], exceedX, exceedY, newTangent)
+                nozzle_pos_list.append(ptEval + np.multiply(filament_height, normal[1]))
+        else:
+            nozzle_pos_list = list(nozzle_pos_direction - np.multiply(self.NOZZLE_DIAMETER/2, normal[1]))
+
+        self.nozzles_locations.append(nozzle_pos_list)
+
+    # Method selectPatch
+    #
+    #   Description: assigns the surface objects of a patch of a multi-patch projection surface to
+    #                the surface attributes (surfEval, surfQuery, surfInverse...) used by the projection.
+    #                The closest point searches are not warm-started across patches and the pass
+    #                evaluator of the patch keeps the sweep direction of the current pass.
+    #
+    #   Parameters:
+    #       patch : int, the patch index
+    #
+    def selectPatch(self, patch):
+        if patch == self.surfPatch:
+            return
+        sweep = None
+        if self.surfPatch is not None:
+            self.closestSession.forget()
+            if self.surfPass is not None:
+                sweep = self.surfPass.sweep
+        self.surfPatch = patch
+        self.surfEval, self.surfQuery, self.surfPass, self.surfCorners, self.surfInverse, self.surfIndex, self.surfBVH, self.surfSDF, self.surfArc, self.surfOffset = self.surfPatches[patch]
+        if self.surfPass is not None and sweep is not None:
+            self.surfPass.setSweep(sweep)
+
+    # Method surfaceFrame
+    #
+    #   Description: evaluates the point, the normal and the tangents of the NURBS at a uv pair
+    #                with the memoized surface query. The result has the same layout as the
+    #                NURBS-Python operations.normal and operations.tangent functions.
+    #
+    #   Returns:
+    #       ptEval : list, the evaluated point on the NURBS
+    #       normal : list, [point, unit normal vector]
+    #       tangent : list, [point, unit tangent vector following u, unit tangent vector following v]
+    #
+    #   Parameters:
+    #       uv : list of float, the u and v parameters of the point to evaluate
+    #
+    def surfaceFrame(self, uv):
+        sq = self.surfQuery.query(uv)
+        ptEval = list(sq['point'])
+        normal = [list(sq['point']), list(sq['normal'])]
+        tangent = [list(sq['point']), list(sq['tangent_u']), list(sq['tangent_v'])]
+        return ptEval, normal, tangent
+
+    # Method relativeUVbyXY
+    #
+    #   Description: finds the relative U and V parameters on a NURBS for the toolpath to
+    #                project using its position's X and Y relative value over the NURBS X and Y.
+    #                If the inverse map is enabled (surfInverse), U and V are the exact parameters
+    #                of the surface point at X and Y instead.
+    #
+    #   Returns:
+    #       relu, relv : float, the relative U and V parameters (contained between 0 and 1, inclusively)
+    #       exceedX, exceedY : bool, flags if U and V are not between 0 and 1 (surface limits).
+    #
+    #   Parameters:
+    #       x : float, the coordinate x value of the position to process
+    #       y : float, the coordinate y value of the position to process
+    #       select_patch : bool, selects the patch under x and y of a multi-patch surface (else the selected patch is used)
+    #
+    def relativeUVbyXY(self, x,y, select_patch = True):
+        # Patch under x and y of a multi-patch projection surface
+        if self.surfPatchIndex is not None and select_patch:
+            self.selectPatch(int(self.surfPatchIndex.find([[x, y]])[0][0]))
+
+        # Exact parameters from the inverse map of the surface
+        if self.surfInverse is not None:
+            return self.surfInverse.relativeUV(x, y)
+
+        # min and max x and y components of the surface (corners evaluated once when loading the surface)
+        minX = self.surfCorners[0][0]
+        minY = self.surfCorners[0][1]
+        maxX = self.surfCorners[1][0]
+        maxY = self.surfCorners[1][1]
+        # minX = surf.bbox[0][0]
+        # minY = surf.bbox[0][1]
+        # maxX = surf.bbox[1][0]
+        # maxY = surf.bbox[1][1]
+
+        # rel u and rel v are calculated using the limits of the param surface
+        relu = (x - minX)/(maxX - minX)
+        relv = (y - minY)/(maxY - minY)
+
+        exceedX = False
+        exceedY = False
+
+        # evaluate_single must receive a relative value contained between 0 and 1
+        if relu < 0:
+            relu = 0
+            exceedX = True
+        elif relu > 1:
+            relu = 1
+            exceedX = True
+        if relv < 0:
+            relv = 0
+            exceedY = True
+        elif relv > 1:
+            relv = 1
+            exceedY = True
+        #print('relu = %.4f, exceedX = %s\n' % (relu,str(exceedX)))
+
+        return relu, relv, exceedX, exceedY
+
+    # Method checkCollision
+    #
+    #   Description: calculated if the nozzle array of the multinozzle gets into collision
+    #                with a non-planar NURBS. Adds the multinozzle footprint to the visualization collection.
+    #                If a collision is detected, the footprint is red, else green.
+    #
+    #   Returns:
+    #       newPos : list, the newly calculated position after the collision detection process
+    #       is_collision : bool, the collision result
+    #
+    #   Parameters:
+    #       pos : list, the cartesian position to process
+    #       tangent : tuple, the tangent vector associated with the position
+    #       normal : tuple, the normal vector associated with the position
+    #       target : int, the target identifier (includes layer, row, column indexes, see targetId)
+    #       debug : bool, flag to prevent calling the RoboDK API
+    #
+    def checkCollision(self, pos, tangent, normal, target, debug = True):
+        # Calculation of the nozzles array footprint vector
+        mltnzl_limits = self.MULTINOZZLE_TRUE_WIDTH + self.NOZZLE_DIAMETER
+        mltnzl_footprint = self.getMultinozzleFootprint(tangent, mltnzl_limits)
+
+        # Retrieving the relative u and relative v to evaluate the surface according to the relative position of X and Y over the surface
+        check_mltnzl_limits = []
+        offsets = []
+
+        # Whole nozzle line queried in one call: signed distances of the nozzles to the surface,
+        #   looked up in the signed distance field (closest surface points along its gradient),
+        #   or from the Bézier patches BVH with the crossing of the line between the footprint ends
+        if self.surfSDF is not None or self.surfBVH is not None:
+            line = np.linspace(mltnzl_footprint[0], mltnzl_footprint[1], self.NB_NOZZLES)
+            if self.surfSDF is not None:
+                distances, gradients = self.surfSDF.query(line)
+                ptsEval = line - distances[:, None] * gradients
+                isCrossing = False
+            else:
+                uvs, ptsEval, distances = self.surfBVH.closestPoints(line)
+                isCrossing = self.surfBVH.intersectSegments([mltnzl_footprint[0]], [mltnzl_footprint[1]])[0][0]
+            worst = int(np.argmin(distances))
+            is_collision = bool(distances[worst] <= 0 or isCrossing)
+            if debug:
+                print('\nTesting collision on the nozzle line [%.3f, %.3f, %.3f] - [%.3f, %.3f, %.3f]...' % (tuple(mltnzl_footprint[0]) + tuple(mltnzl_footprint[1])))
+            if is_collision:
+                check_mltnzl_limits.append(is_collision)
+                self.collisions_coords.append(list(ptsEval[worst]))
+                offsets.append(max(-distances[worst], 0))
+                if debug:
+                    print('\t\t...distance UNDER surface = %.3f mm' % offsets[-1])
+            else:
+                offsets.append(distances[worst])
+                if debug:
+                    print('\t\t...distance ABOVE surface = %.3f mm' % offsets[-1])
+
+        # Closest point searches of both footprint ends
+        else:
+            # Starting uv of the searches of both footprint ends, from the surface samples index
+            if self.surfIndex is not None:
+                uv_seeds = self.surfIndex.nearest(mltnzl_footprint)[0]
+            else:
+                uv_seeds = [None] * len(mltnzl_footprint)
+
+            for k, to_check in enumerate(mltnzl_footprint):
+                # Run a brute-force algorithm to find the neareste point on the surface
+                if debug:
+                    print('\nTesting collision on [%.3f, %.3f, %.3f]...' % (to_check[0], to_check[1], to_check[2]))
+                ptEval, distance, isClosest, uv = self.getClosest(to_check, target, normal[1], self.col_check_precision, self.col_check_step, self.col_check_stop, debug, True, 'collision' + str(k+1), uv_seeds[k])
+
+                is_collision = to_check[2] <= ptEval[2] and isClosest
+                if is_collision:
+                    check_mltnzl_limits.append(is_collision) # Add the collision to the check list (one of the nozzle array end)
+                    #collisions_coords.append(list(to_check))  # Add the problematic nozzle array end coordinate to plot collection
+                    self.collisions_coords.append(ptEval)  # Add the surface location where the collision happened to plot collection
+
+                    if debug:
+                        print('\t\t...distance UNDER surface = %.3f mm' % distance)
+                else:
+                    if debug:
+                        # if distance < NOZZLE_DIAMETER:
+                        #     print('\t\t...distance ABOVE surface (smaller than NOZZLE DIA) = %.3f mm' % distance)
+                        print('\t\t...distance ABOVE surface = %.3f mm' % distance)
+
+                offsets.append(distance)
+
+        # If one of the nozzle is in collision with the projected printing surface
+        if any(check_mltnzl_limits):
+            # Add mulinozzle footprint to plot collection
+            self.collisions.append(mltnzl_footprint)
+
+            # Get the worst negative distance from the surface
+            worst_distance = max(offsets)
+
+            if debug:
+                print('\n\tWorst distance from surface = %.3f mm' % worst_distance)
+                print('\tCollision detected !')
+
+            # Add the nozzle diameter distance to try to get a better deposition
+            # TO-DO: make sure the farthest nozzles are AT LEAST at nozzle_dia distance from the surface
+            if self.collision_clearance > 0:
+                deposition_clearance = self.collision_clearance
+            else:
+                deposition_clearance = self.NOZZLE_DIAMETER
+
+            shift_distance = worst_distance + deposition_clearance
+            self.projection_pos.setColOffset(target, self.curr_process['id'], shift_distance)
+
+        # Otherwise, no collision, we don't change the position
+        else:
+            # Add mulinozzle footprint to plot collection
+            self.printhead_locations.append(mltnzl_footprint)
+
+            # Get the smallest positive distance from the surface
+            worst_distance = min(offsets)
+
+            if debug:
+                print('\n\tOK, no collision detected.\n')
+
+            # Calculate the position to get nozzle diameter
+            # distance with the outer most nozzles, even if no collision
+            if self.collision_clearance > 0:
+                deposition_clearance = self.collision_clearance
+            else:
+                deposition_clearance = self.NOZZLE_DIAMETER
+
+            # Check is distance (positive) is smaller than the clearance required
+            if worst_distance < deposition_clearance:
+                shift_distance = deposition_clearance - worst_distance
+                self.projection_pos.setColOffset(target, self.curr_process['id'], shift_distance)
+            else:
+                shift_distance = 0
+
+        if debug:
+            print('\nShifting distance along normal by %.3f mm\n' % shift_distance)
+
+        # Calculate the displacement using the normal
+        dx = shift_distance * normal[1][0]
+        dy = shift_distance * normal[1][1]
+        dz = shift_distance * normal[1][2]
+        newX = pos[0] + dx
+        newY = pos[1] + dy
+        newZ = pos[2] + dz
+
+        # Set the new position
+        newPos = [newX, newY, newZ] + pos[3:6]
+
+        # Return the position after collision check
+        return newPos, is_collision
+
+    # Method getMultinozzleFootprint
+    #
+    #   Description: given a coordinate in space and the limit dimension of the multinozzle,
+    #                   the function returns the tupple coordinate of the multinozzle footprint.
+    #
+    #   Returns:
+    #       tangent : tuplle, position and vectors of tangents at the evaluated point
+    #       mltnzl_limits : float, the limit dimension of the multinozzle
+    #
+    #   Parameters:
+    #       mltnzl_footprint : tupple, coordinate of the multinozzle footprint (in 3D space)
+    #
+    def getMultinozzleFootprint(self, tangent, mltnzl_limits):
+        # For v1 and v2, we multiply each xyz component of the tangent by the half length of the multinozzle limit dimensions
+        v1 = [i*mltnzl_limits/2 for i in tangent[1]]
+        v2 = [i*-1*mltnzl_limits/2 for i in tangent[1]]
+
+        # p1 and p2 are the coordinates of the end of vectors v1 and v2, representation the location of the nozzle array in space
+        p1 = (np.array(v1) + np.array(tangent[0]))
+        p2 = (np.array(v2) + np.array(tangent[0]))
+
+        # The "footprint" is the collection of both end coordinates in space of the multinozzle array
+        mltnzl_footprint = [p1,p2]
+
+        return mltnzl_footprint
+
+    # Method getClosest
+    #
+    #   Description: given a coordinate in space, the function searches
+    #                for the closest coordinated on the NURBS.
+    #                The algorithm starts by looking at the closest point using the function
+    #                relativeUVbyXY. With the exact inverse map (surfInverse) and the 'xy' metric,
+    #                this first point already matches the target x, y and no search is needed, unless
+    #                its x, y residual is above the inverse map tolerance (not converged).
+    #                Otherwise, Newton iterations in uv (projectPoints) find the surface point
+    #                matching the target (on x and y, or in 3D depending on col_check_metric),
+    #                starting from the relative uv corrected by the last search of the same caller
+    #                if any (closestSession), or from the nearest surface sample (surfIndex). The
+    #                warm start, the seeds and the closestSession statistics therefore only apply
+    #                with the 'xyz' metric, without the inverse map, or where it did not converge. If
+    #                Newton does not converge inside the surface, the fixed-step walk (getClosestWalk)
+    #                is used instead. With the 'xy' metric, the targets outside the surface bounds go
+    #                directly to the walk (no surface point matches their x, y). Then, the vector
+    #                between the found point is projected on the normal.
+    #
+    #   Returns:
+    #       ptEval : list, the evaluated point on the NURBS closest to target_pt
+    #       dist : float, the distance between ptEval and target_pt
+    #       isClosest : bool, the search algorithm result
+    #       uv : list of flota, uv pair of the found point
+    #
+    #   Parameters:
+    #       target_pt : list, coordinate for which we need the closest point on the NURBS
+    #       target : int, identifier of the target of the evaluated point (see targetId)
+    #       normal : tuple, the normal vector associated with target_pt
+    #       precision : float, the precision criteria at which to find the solution
+    #       step : float, the increamental step to find the solution
+    #       stop : int, the number of max iteration to find the solution
+    #       debug : bool, flag to prevent calling the RoboDK API
+    #       abort_if_out : bool, flag to abort the function if the point is outside the surface bounds
+    #       caller : string, key of the caller in closestSession to warm-start the search from the
+    #                last uv it found (None to start from the relative uv only)
+    #       uv_seed : list of float, the starting uv if the caller has no last uv (None to use
+    #                 the nearest sample of surfIndex if enabled, or the relative uv)
+    #
+    def getClosest(self, target_pt, target, normal, precision, step, stop, debug = True, abort_if_out = False, caller = None, uv_seed = None):
+        isClosest = False
+        # get a first point on the surface using the target coordinate x, y
+        x = target_pt[0]
+        y = target_pt[1]
+        relu, relv, exceedX, exceedY = self.relativeUVbyXY(x, y)
+        uv = [float(relu),float(relv)]
+
+        # Finding the point and the tangents at the evaluated point
+        ptEval, normal_uv, tangent = self.surfaceFrame(uv)
+        ptEval = self.assignNewXYZ(x, y, ptEval, exceedX, exceedY, tangent)
+
+        # Abort if outside bounds
+        if abort_if_out and (exceedX or exceedY):
+            return (ptEval, 0, False, uv)
+
+        uv_relative = uv
+        isFound = False
+        isNewton = False
+        isWarm = False
+        nbIterations = 0
+        if (self.surfInverse is not None and self.col_check_metric == 'xy' and not (exceedX or exceedY)
+                and np.max(np.abs(np.subtract(ptEval[0:2], [x, y]))) <= self.surfInverse.tolerance):
+            # The exact inverse map already gives the surface point matching the target x, y (no search,
+            #   not counted in the closestSession statistics). A point the inverse map did not converge
+            #   (fold or steep region of the surface) is searched by Newton below
+            isFound = True
+        elif self.col_check_newton and not (self.col_check_metric == 'xy' and (exceedX or exceedY)):
+            # Newton point inversion starting from the relative uv (warm-started by the caller's last search).
+            #   With the 'xy' metric, a target outside the surface bounds has no surface point at its x, y
+            #   and would always be rejected: the step walk handles it directly
+            isNewton = True
+            uv_start, isWarm = self.closestSession.seed(caller, uv_relative)
+            if not isWarm and uv_seed is not None:
+                uv_start = list(uv_seed)
+            elif not isWarm and self.surfIndex is not None:
+                uv_start = list(self.surfIndex.nearest([target_pt])[0][0])
+            axes = (0,1) if self.col_check_metric == 'xy' else (0,1,2)
+            uvFound, ptFound, iterations, converged = projectPoints(self.surfEval, [target_pt], [uv_start], precision, self.col_check_newton_iter, axes)
+            nbIterations = int(iterations[0])
+
+            # The solution must be inside the surface: a target outside the surface stops on its border
+            #   without reaching the target x, y
+            onBorder = np.any((uvFound[0] <= 0) | (uvFound[0] >= 1))
+            outside = np.max(np.abs(ptFound[0][0:2] - np.array([x, y]))) > precision
+            if converged[0] and not (outside and (self.col_check_metric == 'xy' or onBorder)):
+                uv = [float(uvFound[0][0]), float(uvFound[0][1])]
+                ptEval = self.surfaceFrame(uv)[0]
+                isFound = True
+                self.closestSession.record(caller, uv_relative, uv, nbIterations, isWarm, False)
+            elif debug:
+                print('\tNewton search did not converge inside the surface for %s, using the step walk' % targetName(target))
+
+        # Fallback on the fixed-step walk
+        if not isFound:
+            ptEval, uv, walkIterations, isInside = self.getClosestWalk(x, y, ptEval, uv, exceedX, exceedY, target, precision, step, stop, abort_if_out)
+            nbIterations += walkIterations
+            # The walks of the targets outside the surface bounds are only counted when Newton is disabled
+            if isNewton or not self.col_check_newton:
+                self.closestSession.record(caller, uv_relative, uv if isInside else None, nbIterations, isWarm, isNewton)
+            if not isInside:
+                return (ptEval, 0, False, uv)
+
+        # if exceedX:
+        #     # raise Exception('The closest found point u-component is outside its boundary (relu = %.4f)' % relu)
+        #     print('The closest found point u-component is outside its boundary (relu = %.2f, relv = %.2f)' % (relu,relv))
+        # if exceedY:
+        #     # raise Exception('The closest found point v-component is outside its boundary (relv = %.4f)' % relv)
+        #     print('The closest found point v-component is outside its boundary (relu = %.2f, relv = %.2f)' % (relu,relv))
+
+        if debug:
+            print('\tConvergence was met after iteration # %i for %s' % (nbIterations, targetName(target)))
+
+        # Projection of the vector on the normal to get an approximation of the closest point on the surface following the normal
+        vector_normal = np.array(normal)
+        #vector_target_eval = np.array(ptEval) - np.array(target_pt)
+        vector_target_eval = np.subtract(np.array(ptEval), np.array(target_pt))
+        vector_proj = projectVector(vector_target_eval, vector_normal)
+        dist = np.linalg.norm(vector_proj)
+        ptEval = np.array(target_pt) + vector_proj
+        isClosest = True
+
+        return (ptEval, dist, isClosest, uv)
+
+    # Method getClosestWalk
+    #
+    #   Description: iteratively moves the target coordinate x, y by fixed steps until the
+    #                evaluated point on the NURBS matches it (within the precision).
+    #                Used when the Newton search of getClosest does not converge.
+    #
+    #   Returns:
+    #       ptEval : list, the evaluated point on the NURBS matching x, y
+    #       uv : list of float, uv pair of the found point
+    #       nbIterations : int, the number of steps done
+    #       isInside : bool, False if the search was aborted outside the surface bounds
+    #
+    #   Parameters:
+    #       x, y : float, the target coordinate x, y
+    #       ptEval : list, the point on the NURBS evaluated at the starting uv
+    #       uv : list of float, the starting uv pair
+    #       exceedX, exceedY : bool, flags if the starting uv is on the surface limits
+    #       target : int, identifier of the target of the evaluated point (see targetId)
+    #       precision : float, the precision criteria at which to find the solution
+    #       step : float, the increamental step to find the solution
+    #       stop : int, the number of max iteration to find the solution
+    #       abort_if_out : bool, flag to abort the function if the point is outside the surface bounds
+    #
+    def getClosestWalk(self, x, y, ptEval, uv, exceedX, exceedY, target, precision, step, stop, abort_if_out = False):
+        # Initialize the coordinate that will make ptEval move closer to the target x, y
+        nextX = x
+        nextY = y
+
+        # # Reduce the distance in the X axis
+        # dx = ptEval[0] - x
+        # cptx = 0
+        # while abs(dx) > precision: # dx magnitude is greater than precision. the point is not found on x.
+        #     # print('dx = %.4f\n' % dx)
+        #     if abs(dx) < step: print('\nWARNING: step on X is bigger than dx')
+        #     if cptx >= stop: raise Exception('The closest point convergence was not found after %i iteration on X for %s' % (cptx, targetName(target)))
+        #     cptx += 1
+        #     if dx < 0: nextX += step # dx negative, ptEval[0] is smaller than x
+        #     if dx > 0: nextX -= step # dx positive, ptEval[0] is greater than x
+        #     relu, relv, exceedX, exceedY = relativeUVbyXY(nextX, nextY)
+        #     uv = [float(relu),float(relv)]
+        #     ptEval = surf.evaluate_single(uv)
+        #     tangent = operations.tangent(surf, uv, normalize=True)
+        #     ptEval = assignNewXYZ(nextX, nextX, ptEval, exceedX, exceedY, tangent)
+        #     dx = ptEval[0] - x
+
+        # # Reduce the distance in the Y axis
+        # dy = ptEval[1] - y
+        # cpty = 0
+        # while abs(dy) > precision: # dy magnitude is greater than precision. the point is not found on y.
+        #     # print('dy = %.4f\n' % dy)
+        #     if abs(dy) < step: print('\nWARNING: step on Y is bigger than dy')
+        #     if cpty >= stop: raise Exception('The closest point convergence was not found after %i iteration on Y for %s' % (cptx, targetName(target)))
+        #     cpty += 1
+        #     if dy < 0: nextY += step # dy negative, ptEval[1] is smaller than y
+        #     if dy > 0: nextY -= step # dy positive, ptEval[1] is greater than y
+        #     relu, relv, exceedX, exceedY = relativeUVbyXY(nextX, nextY)
+        #     uv = [float(relu),float(relv)]
+        #     ptEval = surf.evaluate_single(uv)
+        #     tangent = operations.tangent(surf, uv, normalize=True)
+        #     ptEval = assignNewXYZ(nextX, nextY, ptEval, exceedX, exceedY, tangent)
+        #     dy = ptEval[1] - y
+
+        dx = np.subtract(ptEval[0], x)
+        cptx = 0
+        dy = np.subtract(ptEval[1], y)
+        cpty = 0
+        while abs(dx) > precision or abs(dy) > precision: # dx magnitude is greater than precision. the point is not found on x.
+            #print('relu = %.4f, exceedX = %s\n' % (relu,str(exceedX)))
+            #print('----------------------')
+            if abort_if_out and (exceedX or exceedY):
+                #print('Aborted')
+                return ptEval, uv, cptx + cpty, False
+
+            #print('dx = %.4f, dy = %.4f\n' % (dx, dy))
+            if abs(dx) > precision:
+                if abs(dx) < step: print('\nWARNING: step on X is bigger than dx')
+                if cptx >= stop:
+                    raise Exception('The closest point convergence was not found after %i iteration on X for %s' % (cptx, targetName(target)))
+                    #return (ptEval, 0, False, uv)
+
+                #cptx += 1
+                cptx = np.sum([cptx,1])
+
+                # if dx < 0: nextX += step # dx negative, ptEval[0] is smaller than x
+                # if dx > 0: nextX -= step # dx positive, ptEval[0] is greater than x
+                if dx < 0: nextX = np.sum([nextX,step]) # dx negative, ptEval[0] is smaller than x
+                if dx > 0: nextX = np.subtract(nextX,step) # dx positive, ptEval[0] is greater than x
+
+            if abs(dy) > precision:
+                if abs(dy) < step: print('\nWARNING: step on Y is bigger than dy')
+                if cpty >= stop:
+                    raise Exception('The closest point convergence was not found after %i iteration on Y for %s' % (cptx, targetName(target)))
+                    #return (ptEval, 0, False, uv)
+
+                #cpty += 1
+                cpty = np.sum([cpty,1])
+
+                if dy < 0: nextY = np.sum([nextY,step]) # dy negative, ptEval[1] is smaller than y
+                if dy > 0: nextY = np.subtract(nextY,step) # dy positive, ptEval[1] is greater than y
+
+            relu, relv, exceedX, exceedY = self.relativeUVbyXY(nextX, nextY)
+            uv = [float(relu),float(relv)]
+            ptEval, normal_uv, tangent = self.surfaceFrame(uv)
+            ptEval = self.assignNewXYZ(nextX, nextX, ptEval, exceedX, exceedY, tangent)
+
+            if abs(dx) > precision: dx = np.subtract(ptEval[0], x)
+            if abs(dy) > precision: dy = np.subtract(ptEval[1], y)
+            #print('dx = %3f, dy = %.3f\n' % (dx, dy))
+
+        return ptEval, uv, cptx + cpty, True
+
+    # Method updatePosTriad
+    #
+    #   Description: the triad of a position is the orthonormal basis composed of a
+    #                position's normal and tangents. The function translate the triad
+    #                vectors to a new position using newXYZ.
+    #
+    #   Returns:
+    #       normal : tuple, the translated normal vector of the triad
+    #       perp_tangent : tuple, the translated tangent vector of the triad perpendicular to the printing direction
+    #       direct_tangent : tuple, the translated tangent vector of the triad directed in the printing direction
+    #
+    #   Parameters:
+    #       normal : tuple, the normal vector of the triad
+    #       perp_tangent : tuple, the tangent vector of the triad perpendicular to the printing direction
+    #       direct_tangent :tuple, the tangent vector of the triad directed in the printing direction
+    #       newXYZ : list, x y and z component of the 3D translation in space
+    #
+    def updatePosTriad(self, normal, perp_tangent, direct_tangent, newXYZ):
+        # newX = newXYZ[0]
+        # newY = newXYZ[1]
+        # newZ = newXYZ[2]
+
+        # Tangents conversion between tuples and lists
+        # listNormal = list(normal)
+        # listPerpTangent = list(perp_tangent)
+        # listTangent = list(direct_tangent)
+
+        # Normals
+        # listNormal[0] = (newX, newY, newZ)
+        # normal = tuple(listNormal)
+        normal[0] = newXYZ
+
+        # Perpendicular tangents
+        # listPerpTangent[0] = (newX, newY, newZ)
+        # perp_tangent = tuple(listPerpTangent)
+        perp_tangent[0] = newXYZ
+
+        # Tangents
+        # listTangent[0] = (newX, newY, newZ)
+        # direct_tangent = tuple(listTangent)
+        direct_tangent[0] = newXYZ
+
+        return normal[:], perp_tangent[:], direct_tangent[:]
+
+    # Method updatePosTriad
+    #
+    #   Description: Update the rotation around the normal of the triad to
+    #                produce the desired pore size (rotation of multinozzle
+    #                around its axis)
+    #
+    #   Returns:
+    #       normal : tuple, the rotated normal vector of the triad
+    #       perp_tangent : tuple, the rotated tangent vector of the triad perpendicular to the printing direction
+    #       direct_tangent :tuple, the rotated tangent vector of the triad directed in the printing direction
+    #
+    #   Parameters:
+    #       normal : tuple, the normal vector of the triad
+    #       perp_tangent : tuple, the tangent vector of the triad perpendicular to the printing direction
+    #       direct_tangent : tuple, the tangent vector of the triad directed in the printing direction
+    #       angle : float, the angle value at which to rotate the triad around the normal vector
+    #
+    def updateRotTriad(self, normal, perp_tangent, direct_tangent, angle):
+        # Obtain the Normal and Tangents conversion between tuples and lists before calculating the rotation matrix
+        # listNormal = list(normal)
+        # listPerpTangent = list(perp_tangent)
+        # listTangent = list(direct_tangent)
+        # tempTriad = np.matrix([[listTangent[1][0], listTangent[1][1], listTangent[1][2]],
+        #                        [listPerpTangent[1][0], listPerpTangent[1][1], listPerpTangent[1][2]],
+        #                        [listNormal[1][0], listNormal[1][1], listNormal[1][2]]])
+
+        tempTriad = np.matrix([direct_tangent[1], perp_tangent[1], normal[1]])
+
+        # Turn the triad around the global Z axis by an angle using the rotation matrix
+        if self.debug:
+            direction = -1
+        else: # for RoboDK
+            direction = 1
+        if self.kernels is not None:
+            tempTriad = np.matrix(self.kernels.rotateTriad(np.asarray(tempTriad, dtype=float), float(direction * angle)))
+        else:
+            # Get the rotation matrix for the temporary triad of normal and tangents
+            rotMat = np.matrix(getRotMat(tempTriad))
+            tempTriad = rotAroundNormal(tempTriad, rotMat, direction * angle)
+
+        # Update the triads components and convert back to tuple
+        # listTangent[1] = tuple(tempTriad.tolist()[0])
+        # listPerpTangent[1] = tuple(tempTriad.tolist()[1])
+        # listNormal[1] = tuple(tempTriad.tolist()[2])
+
+        # direct_tangent = tuple(listTangent)
+        # perp_tangent = tuple(listPerpTangent)
+        # normal = tuple(listNormal)
+        direct_tangent[1] = tempTriad.tolist()[0]
+        perp_tangent[1] = tempTriad.tolist()[1]
+        normal[1] = tempTriad.tolist()[2]
+
+        return normal[:], perp_tangent[:], direct_tangent[:]
@@ -0,0 +1,352 @@
+"""
+-------------------------------------------------------------------------------------------------------------------------
+Multinozzle Toolpath Generator (MTG) for FACMO Chair multinozzle printhead
+(toolpath_targets.py)
+
+Author : Jean-François Chauvette, M.Sc.A, PhD candidate
+Email : jean-francois.chauvette@polymtl.ca, chauvettejf@gmail.com
+Project : FACMO Chair - Objective 4
+
+Laboratory for Multiscale Mechanics (LM2)
+Date created : 2026-10-18
+
+Definition:
+    Integer identifiers of the toolpath targets and table of their projection.
+
+    A target of the microscaffold network is identified by its layer, row and column
+    (1-based, relative to the current process), its kind (start of layer, pass or connection)
+    and its index in the kind, packed in the bits of a single integer:
+
+        layer (16 bits) | row (12 bits) | column (12 bits) | kind (4 bits) | index (16 bits)
+
+    A pass has segments_per_scaffold + 2 targets at most, so the index field holds up to 65535
+    segments per scaffold. A field out of its range raises an exception instead of overflowing
+    into the next field.
+
+    The targets outside the network (travel, approach and retraction) have the layer 0. The
+    target of another layer at the same place is obtained by replacing the layer bits
+    (withLayer), the readable names ('L1R2C3P1', 'L2R1C1Start3', 'Retract') are only built for
+    the exports and the debug (targetName).
+
+    The projection results of the targets of the first layers (position, triad, curvature,
+    uv, surface patch and collision offsets) are kept in the arrays of a projectionTable,
+    indexed directly by the fields of the target identifiers. The arrays grow with the
+    network.
+
+Example of implementation:
+
+    target = targetId(1, 2, 3, KIND_PASS, 1)
+    table = projectionTable()
+    table.store(target, point, normal, perp_tangent, direct_tangent, radius, curvature, aperture, uv, 0)
+    point, normal, perp_tangent, direct_tangent, radius, curvature, aperture = table.projection(withLayer(target, 1))
+    print(targetName(target))
+
+-------------------------------------------------------------------------------------------------------------------------
+Update notes
+
+Date		    Notes
+¯¯¯¯¯¯¯¯¯¯		¯¯¯¯¯¯¯¯¯¯
+2026-10-18		First version of the target identifiers and of the projection table
+                Index field on 16 bits, range check of the fields (targetId, slot)
+
+-------------------------------------------------------------------------------------------------------------------------
+"""
+
+# ========================================================================================
+# IMPORTS
+# ========================================================================================
+import numpy as np
+
+# Kinds of targets, the first three are the targets of the network
+KIND_START = 0                  # start of a layer (layer change)
+KIND_PASS = 1                   # point of a pass
+KIND_CON = 2                    # connection between two passes, end of a layer
+KIND_TRAVEL = 3                 # traveling move before the print
+KIND_APPROACH = 4               # approach move before the print
+KIND_RETRACT = 5                # retraction after the print
+KIND_NAMES = ['Start', 'P', 'CON', 'Travel', 'Approach', 'Retract']
+NB_NETWORK_KINDS = 3
+
+# Bits of the fields of a target identifier
+INDEX_BITS = 16
+KIND_BITS = 4
+COL_BITS = 12
+ROW_BITS = 12
+LAYER_BITS = 16
+KIND_SHIFT = INDEX_BITS
+COL_SHIFT = KIND_SHIFT + KIND_BITS
+ROW_SHIFT = COL_SHIFT + COL_BITS
+LAYER_SHIFT = ROW_SHIFT + ROW_BITS
+
+# ========================================================================================
+# FUNCTION DEFINITIONS
+# ========================================================================================
+
+# Function checkField
+#
+#   Description: raises an exception if a field of a target identifier does not fit in its bits
+#                (works on integers or on arrays of integers)
+#
+#   Parameters:
+#       value : int, the field value
+#       bits : int, the number of bits of the field
+#       name : string, the field name, for the message
+#
+def checkField(value, bits, name):
+    if isinstance(value, (int, np.integer)):
+        low = high = value
+    elif np.size(value):
+        low, high = np.min(value), np.max(value)
+    else:
+        return
+    if low < 0 or high >= (1 << bits):
+        raise Exception('Target %s out of range (0 to %i): %i' % (name, (1 << bits) - 1, low if low < 0 else high))
+
+# Function targetId
+#
+#   Description: identifier of a target (works on integers or on arrays of integers)
+#
+#   Returns:
+#       int, the target identifier
+#
+#   Parameters:
+#       layer : int, 1-based layer index (0 for the targets outside the network)
+#       row : int, 1-based row index
+#       col : int, 1-based column index
+#       kind : int, the kind of target (KIND_*)
+#       index : int, 1-based index of the target in its kind
+#
+def targetId(layer, row, col, kind, index):
+    checkField(layer, LAYER_BITS, 'layer')
+    checkField(row, ROW_BITS, 'row')
+    checkField(col, COL_BITS, 'column')
+    checkField(kind, KIND_BITS, 'kind')
+    checkField(index, INDEX_BITS, 'index')
+    return (layer << LAYER_SHIFT) | (row << ROW_SHIFT) | (col << COL_SHIFT) | (kind << KIND_SHIFT) | index
+
+# Function targetFields
+#
+#   Description: fields of a target identifier (works on integers or on arrays of integers)
+#
+#   Returns:
+#       layer, row, col, kind, index : int, the fields of the identifier (see targetId)
+#
+#   Parameters:
+#       target : int, the target identifier
+#
+def targetFields(target):
+    return (target >> LAYER_SHIFT,
+            (target >> ROW_SHIFT) & ((1 << ROW_BITS) - 1),
+            (target >> COL_SHIFT) & ((1 << COL_BITS) - 1),
+            (target >> KIND_SHIFT) & ((1 << KIND_BITS) - 1),
+            target & ((1 << INDEX_BITS) - 1))
+
+# Function withLayer
+#
+#   Description: identifier of the target at the same place of another layer
+#
+#   Returns:
+#       int, the target identifier
+#
+#   Parameters:
+#       target : int, the target identifier
+#       layer : int, 1-based index of the other layer
+#
+def withLayer(target, layer):
+    return (target & ((1 << LAYER_SHIFT) - 1)) | (layer << LAYER_SHIFT)
+
+# Function targetName
+#
+#   Description: readable name of a target, for the exports and the debug
+#
+#   Returns:
+#       string, the target name ('L1R2C3P1', 'L2R1C1Start3', 'Retract', ...)
+#
+#   Parameters:
+#       target : int, the target identifier
+#
+def targetName(target):
+    layer, row, col, kind, index = targetFields(int(target))
+    if kind >= NB_NETWORK_KINDS:
+        return KIND_NAMES[kind]
+    return 'L%iR%iC%i%s%i' % (layer, row, col, KIND_NAMES[kind], index)
+
+# Identifiers of the targets outside the network
+TRAVEL_TARGET = targetId(0, 0, 0, KIND_TRAVEL, 0)
+APPROACH_TARGET = targetId(0, 0, 0, KIND_APPROACH, 0)
+RETRACT_TARGET = targetId(0, 0, 0, KIND_RETRACT, 0)
+
+# ========================================================================================
+# CLASS DEFINITIONS
+# ========================================================================================
+
+# Class projectionTable
+#
+#   Description: projection results of the targets of the network, in arrays indexed by the
+#                fields of the target identifiers (layer, row, column, kind, index). The targets
+#                outside the network are not kept.
+#
+class projectionTable:
+    def __init__(self):
+        self.shape = (0, 0, 0, NB_NETWORK_KINDS, 0)
+        self.stored = np.zeros(self.shape, dtype=bool)
+        self.points = np.zeros(self.shape + (3,))
+        self.normals = np.zeros(self.shape + (3,))
+        self.perp_tangents = np.zeros(self.shape + (3,))
+        self.direct_tangents = np.zeros(self.shape + (3,))
+        self.radii = np.zeros(self.shape)
+        self.curvatures = np.zeros(self.shape + (3,))
+        self.apertures = np.zeros(self.shape)
+        self.uv = np.zeros(self.shape + (2,))
+        self.patches = np.zeros(self.shape, dtype=int)
+
+        # Collision offsets by process (NaN : no collision offset)
+        self.col_offsets = np.zeros(self.shape + (0,))
+
+    # Method slot
+    #
+    #   Description: index of a target in the arrays
+    #
+    #   Returns:
+    #       tuple of int, the index of the target (None for a target outside the network)
+    #
+    #   Parameters:
+    #       target : int, the target identifier
+    #
+    def slot(self, target):
+        layer, row, col, kind, index = targetFields(target)
+        if layer == 0 or kind >= NB_NETWORK_KINDS:
+            return None
+        if row == 0 or col == 0 or index == 0:
+            raise Exception('Invalid network target %s (the row, column and index are 1-based)' % targetName(target))
+        return (layer - 1, row - 1, col - 1, kind, index - 1)
+
+    # Method grow
+    #
+    #   Description: enlarges the arrays to hold an index (and a number of processes)
+    #
+    #   Parameters:
+    #       slot : tuple of int, the index to hold (see slot)
+    #       processes : int, the number of processes of the collision offsets to hold
+    #
+    def grow(self, slot, processes = 0):
+        shape = tuple(max(n, s + 1) for n, s in zip(self.shape, slot))
+        processes = max(processes, self.col_offsets.shape[-1])
+        if shape == self.shape and processes == self.col_offsets.shape[-1]:
+            return
+        pad = [(0, n - m) for n, m in zip(shape, self.shape)]
+        for attr in ['stored', 'points', 'normals', 'perp_tangents', 'direct_tangents', 'radii', 'curvatures', 'apertures', 'uv', 'patches']:
+            array = getattr(self, attr)
+            setattr(self, attr, np.pad(array, pad + [(0, 0)] * (array.ndim - len(pad))))
+        self.col_offsets = np.pad(self.col_offsets, pad + [(0, processes - self.col_offsets.shape[-1])], constant_values=np.nan)
+        self.shape = shape
+
+    # Method store
+    #
+    #   Description: keeps the projection of a target (a target outside the network is ignored)
+    #
+    #   Parameters:
+    #       target : int, the target identifier
+    #       point : list, the projected position
+    #       normal, perp_tangent, direct_tangent : list, the triad of the target [position, vector]
+    #       radius : float, the local radius of the surface (-1 if not computed)
+    #       curvature : list, the curvature of the surface
+    #       aperture : float, the aperture angle of the local radius (-1 if not computed)
+    #       uv : list, the uv pair of the projected position
+    #       patch : int, the index of the surface patch
+    #
+    def store(self, target, point, normal, perp_tangent, direct_tangent, radius, curvature, aperture, uv, patch):
+        slot = self.slot(target)
+        if slot is None:
+            return
+        self.grow(slot)
+        self.stored[slot] = True
+        self.points[slot] = point[0:3]
+        self.normals[slot] = normal[1]
+        self.perp_tangents[slot] = perp_tangent[1]
+        self.direct_tangents[slot] = direct_tangent[1]
+        self.radii[slot] = radius
+        self.curvatures[slot] = curvature
+        self.apertures[slot] = aperture
+        self.uv[slot] = uv
+        self.patches[slot] = patch
+
+    # Method contains
+    #
+    #   Returns:
+    #       bool, True if the projection of a target is kept
+    #
+    #   Parameters:
+    #       target : int, the target identifier
+    #
+    def contains(self, target):
+        slot = self.slot(target)
+        return slot is not None and all(s < n for s, n in zip(slot, self.shape)) and bool(self.stored[slot])
+
+    # Method projection
+    #
+    #   Description: kept projection of a target, the triads are new lists with the projected
+    #                position as origin
+    #
+    #   Returns:
+    #       point : np.array, the projected position
+    #       normal, perp_tangent, direct_tangent : list, the triad of the target [position, vector]
+    #       radius : float, the local radius of the surface
+    #       curvature : np.array, the curvature of the surface
+    #       aperture : float, the aperture angle of the local radius
+    #
+    #   Parameters:
+    #       target : int, the target identifier
+    #
+    def projection(self, target):
+        if not self.contains(target):
+            raise Exception('No projection kept for the target %s' % targetName(target))
+        slot = self.slot(target)
+        point = self.points[slot]
+        return (point, [list(point), self.normals[slot]], [list(point), self.perp_tangents[slot]], [list(point), self.direct_tangents[slot]],
+                self.radii[slot], self.curvatures[slot], self.apertures[slot])
+
+    # Method targets
+    #
+    #   Description: identifiers of all the kept targets
+    #
+    #   Returns:
+    #       targets : np.array of int, shape (N,), the target identifiers
+    #       slots : tuple of np.array, the index of the targets in the arrays
+    #
+    def targets(self):
+        slots = np.nonzero(self.stored)
+        return targetId(slots[0] + 1, slots[1] + 1, slots[2] + 1, slots[3], slots[4] + 1), slots
+
+    # Method setColOffset
+    #
+    #   Description: keeps the collision offset of a target for a process (a target outside the
+    #                network is ignored)
+    #
+    #   Parameters:
+    #       target : int, the target identifier
+    #       process : int, the process index
+    #       offset : float, mm, the collision offset along the normal
+    #
+    def setColOffset(self, target, process, offset):
+        slot = self.slot(target)
+        if slot is None:
+            return
+        self.grow(slot, process + 1)
+        self.col_offsets[slot + (process,)] = offset
+
+    # Method colOffset
+    #
+    #   Returns:
+    #       float, mm, the collision offset of a target for a process (None without collision offset)
+    #
+    #   Parameters:
+    #       target : int, the target identifier
+    #       process : int, the process index
+    #
+    def colOffset(self, target, process):
+        slot = self.slot(target)
+        if slot is None or not all(s < n for s, n in zip(slot, self.shape)) or process >= self.col_offsets.shape[-1]:
+            return None
+        offset = self.col_offsets[slot + (process,)]
+        return None if np.isnan(offset) else float(offset)
@@ -124,6 +124,79 @@ Version		    Notes
                 Implementation of working automatic pore size adjustment on concave and convex curved surfaces
                 Cleaned-up the modules folder and polished the MTG modules comments / headers
 
+5.7
+2026-10-18      Batch evaluation of the NURBS surface with NumPy (surfaceEvaluator) in place of the
+                    per-point NURBS-Python calls for the projection, the filaments and the 3D plot.
+                Fused point + derivatives surface query with a LRU memo (surfaceQuery). The memo
+                    statistics are added to the run summary.
+                Optional dense lookup tables of the surface (surfaceTables) with an error bound,
+                    cached on disk next to the mesh file (use_surface_tables).
+                Newton point inversion in getClosest (projectPoints) with a bounded line search.
+                    The fixed-step walk is kept as a fallback and the iterations are reported
+                    in the run summary.
+                Warm start of the closest point searches from the last uv found by the same
+                    caller (closestSession: collision footprint ends, Heron points, gap adjustment).
+                    With the inverse map and the 'xy' metric, the points already match their x, y
+                    and no search (nor warm start) is done.
+                Optional KD-tree of dense surface samples (surfaceSampleIndex) for the starting uv
+                    of the closest point searches on strongly curved surfaces (use_surface_index),
+                    with the 'xyz' metric or without the inverse map.
+                Exact x, y to uv inverse map (surfaceInverseMap) in relativeUVbyXY, the projected
+                    targets now land on their x, y. The surface bounds are evaluated once.
+                Isoparametric pass evaluator (isoPassEvaluator): the basis functions of the fixed
+                    direction of a pass are computed once per knot span, only the sweep direction
+                    is evaluated for each target (use_pass_evaluator).
+                Bézier patch decomposition and BVH of the surface (surfaceBVH) with batch segment /
+                    ray intersections and signed minimum distances. checkCollision can check the
+                    whole nozzle line in one call (use_surface_bvh).
+                Local radius of the pore size adjustment from the analytic normal curvature along
+                    the nozzle array (use_analytic_curvature), target by target (the uv of a target
+                    follows the gap adjustment of the previous one). The Heron radius of two closest
+                    points is kept to validate it in debug (debugAutoAdjustPoreSize).
+                Signed distance field of the surface (surfaceDistanceField) cached in the mesh
+                    folder. checkCollision can check the whole nozzle line by constant time
+                    lookups in the field (use_distance_field).
+                Compiled surface format (memory-mapped npz with knot span tables) saved next to the
+                    json or stl surface the first time it is used, with a staleness check against
+                    the source file. exchange.import_json / the stl interpolation are skipped.
+                Multi-patch projection surfaces (all the surfaces of a json file, or several json
+                    files separated by ';'). The patch under each x, y is found with a spatial
+                    index (surfacePatchIndex) and its surface objects are selected (selectPatch).
+                Mesh mode for stl projection surfaces (use_mesh_mode): the raw triangles are loaded
+                    in box trees (meshSurface) answering the surface points, interpolated normals
+                    and nozzle line collisions directly, without the NURBS interpolation.
+                Least-squares approximation of the stl grid (use_surface_approximation) with a
+                    given number of control points or a maximum deviation, and a fit error report.
+                Grid size of the stl vertices detected automatically (size u and v = 0) and grid
+                    sorted by a single lexsort, with errors on missing or duplicate vertices.
+                Memory-mapped binary stl reader (stl_reader) deduplicating the vertices by chunks
+                    within a memory budget, used by the stl interpolation and the mesh mode.
+                The surface last fitted on an unchanged stl file (content hash) with the same fitting
+                    mode is reused without the interpolation parameters window, unless
+                    refit_projection_surface is set.
+                Cumulative arc length tables along the u and v isocurves (arcLengthTables). The gap
+                    adjustment can place the reference positions at the expected distance along
+                    the surface by a binary search in the tables (use_arc_length_gap).
+                Batch gap solver (use_batch_gap_solver): the reference positions of the first two
+                    layers are solved at once from the nominal toolpath of the layer (surface_gaps),
+                    with an error report per layer.
+                Offset surfaces of the layers above the second (use_offset_surfaces): folds of the
+                    offset surfaces and clearance of the nozzle line over the layer below, checked
+                    for all the layers of a thickness level at once (checkOffsetLayers).
+                Optional kernels compiled by Numba (use_jit_kernels) for the surface derivatives
+                    (span search, basis functions) and the triad rotation, with the NumPy fallback.
+                Toolpath points as a structured NumPy array (toolpath_array): pose columns, direction
+                    code and bitmask of the special attributes (FLAG_*) in place of the lists and
+                    special strings. The processed targets are exported with the stats (.npy).
+                Integer target identifiers (toolpath_targets: layer, row, column, kind, index) in place
+                    of the target names. The projections and collision offsets of the first layers
+                    are kept in arrays indexed by the identifier fields (projectionTable), the names
+                    are only built for the debug messages.
+                Generation engine moved to the toolpath_generator module (ToolpathGenerator): the
+                    parameters (DEFAULT_PARAMS) and the state of a generation are kept on the
+                    generator instance, generate() returns the toolpath, the stats and the
+                    visualization data. This script is the input window and plotting front end.
+
 -------------------------------------------------------------------------------------------------------------------------
 """
 # ========================================================================================
@@ -134,7 +207,6 @@ Version		    Notes
 import os
 import glob
 import math as m
-from math import pi
 import numpy as np
 import time
 from datetime import datetime as dt
@@ -147,8 +219,10 @@ from geomdl import *
 
 # MTG modules
 from mtg_modules.inputWindow import inputWindow
-from mtg_modules.math_tools import *
 from mtg_modules.interpolate_surface_from_stl import *
+from mtg_modules.surface_compiled import *
+from mtg_modules.surface_mesh import *
+from mtg_modules.toolpath_generator import *
 
 # ========================================================================================
 # VARIABLES
@@ -159,34 +233,18 @@ scriptname = os.path.basename(__file__)
 FANUC_TRAVEL_CLEARANCE = 100
 
 # Multinozzle configuration
-MLTNZL_CONFIG_MEK_SN123 = {'name':'MEK SN 01-03','nb':26, 'd':0.250, 's':1.000}
-MLTNZL_CONFIGS = [MLTNZL_CONFIG_MEK_SN123]
 MLTNZL_CONFIG_LIST = [i['name'] for i in MLTNZL_CONFIGS]
 MLTNZL_CONFIG_LIST.append(0)
 MLTNZL_CONFIG = ''
 
 # Reservoir parameters
-RESERVOIR_48 = '48 cm³'                 # 48 cm³ reservoir type
-RESERVOIR_250 = '250 cm³'               # 250 cm³ reservoir type
 RESERVOIR_TYPE = ''                     # choosen reservoir type from the list
 RESERVOIR_LIST = [RESERVOIR_48, RESERVOIR_250, 0]   # list of reservoir type to display in the input window
-AVAILABLE_VOLUME_48 = 52.93022 - 5.07999     # cm³, available 48 cm³ ink cartridge volume as per MEK's drawings (= vol piston end - vol piston start)
-AVAILABLE_VOLUME_250 = 250              # cm³, available 250 cm³ ink cartridge volume (= vol piston end - vol piston start)
-AVAILABLE_VOLUME = 0                    # The actual volume variable used in the calculations
 
 # Material parameters
-#   rho: g/cm³, w: wt%, f: vol%, n: -, K: Pa.s^n, eta_inf: Pa.s, eta_0: Pa.s, tau_0: Pa, lambda: s, a: -
-white_color = (210/255,210/255,210/255)
-red_color = (200/255,0,0)
-drak_grey_color = (60/255,60/255,60/255)
-MAT_INK6040 = {'name':'Ink 60/40', 'rho':0.905, 'color':white_color, 'w':0, 'f':0, 'n':0.467858145410312, 'k':603.94862937638, 'eta_inf':0, 'eta_0':0, 'tau_0':0, 'lambda':0, 'a':0}
-MAT_ABRA012C = {'name':'Abra 0:12C', 'rho':1.272, 'color':drak_grey_color, 'w':12, 'f':24, 'n':0.5392, 'k':1351.06, 'eta_inf':0, 'eta_0':0, 'tau_0':0, 'lambda':0, 'a':0}
-MAT_EPON014 = {'name':'EPON 0:14', 'rho':1.2137, 'color':red_color, 'w':0, 'f':0, 'n':0.618, 'k':582.45, 'eta_inf':0, 'eta_0':0, 'tau_0':0, 'lambda':0, 'a':0}
-MATERIALS = [MAT_INK6040, MAT_ABRA012C, MAT_EPON014] #MAT_ABRA510, MAT_ABRA108, MAT_ABRABENCH, MAT_EPON014, MAT_EPON512, MAT_EPON1010]
 MATERIALS_LIST = [i['name'] for i in MATERIALS]
 MATERIALS_LIST.append(0)
 MATERIAL_CHOICE = ''
-TX = 1.20                              # empirical tax multiplier to account for over-extrusion (start, wall creation, end)
 
 # MTG parameters / user input
 travel_speed = 100                      # mm/s, default max travel speed for the Fanuc movements
@@ -199,8 +257,6 @@ scaff_extr_speed = ['0-1 VDC','1-2 VDC','2-3 VDC','3-4 VDC','4-5 VDC','5-6 VDC',
 pressure_buildup_time = 5.0            # s, time in seconds to wait for the pressure to build up before starting the print
 pressure_buildup_z = 7.0                # mm, adds a Z offset when building up the pressure to avoir accumulating material on the printhead
 pressure_retract_time = 1.0             # s, time in seconds to wait for the pressure to relief in the reservoir before no more material should be extruded
-pressure_post_retract_time = 2.0*1000        # TO-DO : include in input window. s, wait time after changing layer before starting next extrusion
-coast_at_end = scaff_speed * pressure_retract_time # mm, the distance from the retract point at which to stop the retraction
 pressure_retract_dip = 0.200            # TO-DO : use or delete. mm, the slight negative Z offset to dip down for breaking the remaining filaments after extrusion
 layer_height_fraction = 80.0            # %, default layer height fraction = 85% of nozzle diameter
 layer_xy_offset = 0.0                   # TO-DO : use or delete. mm, default alternate layer offset in XY
@@ -210,10 +266,8 @@ start_z = 0.0
 center_print = ['None','On X','On Y','Both',0] # Apply the necessary offset to center the scaffold network on X axis, Y axis or both. Works when start_x and start y = 0
 layer_change_clearance =  0.0           # mm, the clearange distance at which to raise the printhead while rotating & changing layer to prevent colision. MIGHT BE USELESS
 layer_change_bleed_nominal = '26.0, 40.0'
-layer_change_bleed = 26.0               # mm, length of deposition for first layer before first wall and after last wall
 layer_change_bleed_clearance = 4.0      # mm, vertical offset applied to the end of bleeding when changing layers to avoid gathering / smudging material under the printhead
 printing_bleed_nominal = '8.0, 18.75'
-printing_bleed = 8.0                    # mm, length of deposition for second layer before first wall and after last wall
 approach_length = 10.0                  # mm, length of travel to the first point
 retract_length = 10.0                   # mm, length of retraction from the last point
 nb_layers = 2                           # number of layers
@@ -239,7 +293,7 @@ compensateDeformation = [True,False,0]      # Set to True to compensate gaps due
 adjustOrigin = [True,False,1]           # Set to True to move the projected origin to the corresponding X and Y origin on the non-planar surface
 exportPrintGeometry = [True,False,1]              # Export the microscaffold print filaments as a vtp object
 
-# MTG parameters / not user input, for dev
+# MTG parameters / not user input, for dev (the generation options are the DEFAULT_PARAMS of the toolpath generator)
 logoPath = "logo\MTG_logo_v2_156x62.png" # MTG logo image path 
 logo = [logoPath,156,62]                 # MTG logo infos
 prefFolder = 'prefs\\'                   # The folder where the general preferences are located
@@ -251,40 +305,19 @@ last_params_file = 'mltnzl_last_params.json'                   # The file where
 last_projection_params_file = 'projection_last_params.json'    # The file where the last user parameters are saved in
 rdk_reupload_prog_file = ''             # A .py file that can be used to reupload the already generated toolpath in RoboDK
 rdk_reupload_fid = ''                   # The RDK reupload file id
-rotOdd = [180, 0, -90]                  # Euler angles Rx, Ry, Rz values for Odd layers
-rotEven = [180, 0, -180]                # Euler angles Rx, Ry, Rz values for Even layers
-wall_distance = 0                       # mm, distance traveled by the nozzles for the walls creation, for each pore_size_nominal
-curr_process = {'id':0,'multinozzle_width':0,'nozzle_distance':0,'layer_change_bleed':0, 'printing_bleed':0}
-prev_process = {'id':0,'multinozzle_width':0,'nozzle_distance':0,'layer_change_bleed':0, 'printing_bleed':0}
-theta = 0                               # printhead rotation angle around Z for pore size variation
-theta_threshold = 15                     # deg, theta angle threshold to detect for various toolpath adjustments (at 90-75 = 15° for side-by-side deposition when shifting the multinozzle sideways)
-retraction_time = 5000                  # ms, time to wait at the end of the print for retraction when pressure is retrieved
-xOffset = 0                             # Distance required to center the print on X axis
-yOffset = 0                             # Distance required to center the print on Y axis
-projection_pos = {}                     # Dict of all layer 1 and 2 x,y,z projected positions to be reused for other layers (preventing re-evaluation of the NURBS)
-col_offsets = {}    	                # Dict of collision offsets of the first layer to offset the other layers
-collision_clearance = 0.250             # mm, offset aplied to a position via its normal when in collision with the surface
-prevRefPos = {'pos':None, 'offset':np.array([0,0,0])}   # reference position variable for gap adjustment
-overallDimRefPos = {'pos':None}         # position of the overall dimension of the microscaffoldm located in the middle of the last printed microscaffold unit
 show_footprint = True                   # Show or hide the multinozzle footprint on the Mayavi plot
-project_filaments = False                # Project each filaments on the surface if show_geom is True
-
-# Plot variables
-xs = []                                 # X list of values for 3D plot
-ys = []                                 # Y list of values for 3D plot
-zs = []                                 # Z list of values for 3D plot
-normals = []                            # vector list of normal
-tangentsu = []                          # vector list of tangents following u
-tangentsv = []                          # vector list of tangents following v
-collisions = []                         # vector list of collision footprints
-collisions_coords = []                  # XYZ coordinates list for collision coordinates
-printhead_locations = []                # XYZ coordinates list for 3D plot of multinozzle footprint
-nozzles_locations = []                  # XYZ coordinates list for 3D plot of filaments
-
-heronFoot = []
-heronPt1 = []
-heronPt2 = []
-heronPt3 = []
+surfEvals = []                          # Batch evaluators of the patches of the projection surface
+surfDeltas = []                         # Evaluation delta of each patch following u and v (plot sample sizes)
+surfSources = []                        # Source file (json or stl) of each patch
+use_mesh_mode = False                   # Project directly on the triangles of a stl projection surface instead of interpolating a NURBS surface
+mesh_leaf_size = 8                      # Maximum number of triangles in a leaf of the mesh box trees
+stl_memory_budget = 256e6               # bytes, working memory of the vertex deduplication of a stl projection surface (interpolation)
+mesh_plot_delta = 0.02                  # Evaluation delta following u and v of the mesh projection surface plot
+use_surface_approximation = False       # Approximate the stl grid by least squares with fewer control points instead of interpolating each vertex
+approximation_ctrlpts_size = None       # [size u, size v], number of control points of the approximation (None to use approximation_max_deviation)
+approximation_max_deviation = 0.01      # mm, maximum deviation of the stl grid vertices from the approximated surface
+refit_projection_surface = False        # Ask the interpolation parameters and fit the stl again instead of reusing the surface last fitted on it
+stl_grid_tolerance = None               # mm, largest gap inside a grid line of the stl vertices when the grid size is detected (size 0, None : a quarter of the largest gap)
 
 # Colors (RGB format, normalized)
 meshColor = (205/255, 196/255, 180/255)
@@ -301,1517 +334,13 @@ blueColor = (0,0,1)
 beigeColor = (1,1,0.5)
 blueGreenishColor = (0,1,0.5)
 
-# Gap adjustment variables
-targetGapDistance = 0                   # mm, target distance of adjusted gap between printing pass
-gapDistance = 0
+# Debug visualization variables
 debugGapAdjust = False                   # Set to True to add the gap adjustment collection items to the visualization
 debugAutoAdjustPoreSize = False          # Set to True to add the gap adjustment collection items to the visualization (see Heron pts as well)
-lastRef = None                          # Position of the last reference point for the second layer
-refPositions = []                       # List of reference positions to adjust the gap
-wrongPosGap = []                        # List of initial positions of unadjusted toolpath coordinates
-newPosGap = []                          # List of newly adjusted positions of toolpath coordinates
-posToCheck = []                         # List of points used to find the closest point on the surface for adjusting gaps
-dirVectors = []                         # List of vectors showing the direction of the gap adjustment for each coordinate
-
-# Iteration parameters of the getClosest function
-col_check_precision = 0.05             # mm, the precision at which the nearest coordinate can be found
-col_check_step = 0.05                  # mm, the step distance to move to get closer to the target point
-col_check_stop = 100000                 # number of iteration to stop the getClosest function algorithm
 
 # Post-process variables
 program_name = ''                       # Program name for RoboDK and other exports filename
-currPos = [0,0,0]                       # Current position used for statistics calculation
-lastPos = [0,0,0]                       # Last current position used for statistics calculation
-print_dist = 0                          # Total forecast of the print distance
-tot_volume = 0                          # Total forecast print volume
-print_time = 0                          # Total forecast printing time
-travel_time = 0                         # Total forecast traveling time
-tot_time = 0                            # Total forecast program time
-
-
-# ========================================================================================
-# FUNCTION DEFINITIONS
-# ========================================================================================
-
-# Function addPass
-#
-#   Description: calculates a linear movement the length equivalent to 1 microscaffold,
-#                to compose a row or column of the network.
-#
-#   Returns:
-#       coords: list, the set of coordinates to be added to the toolpath.
-#
-#   Parameters:
-#       i : int, layer index
-#       r : int, network row index
-#       c : int, network column index
-#       prevPos : list, previous cartesian position kept in memory
-#       addCoast : bool, coast at end parameter (distance for retraction)
-#
-def addPass(i, r, c, prevPos, addCoast):
-    coords = []
-    needCoast = True
-
-    # print('----------------------------------')
-    for k in range(segments_per_scaffold):
-        # Odd layers 1,3,5,... (i = 0, 2, 4, ...) ---------------------------------
-        if i % 2 == 0:
-            if r % 2 == 0:
-                y = prevPos[1] + pass_step_y
-                print_direction = '+y'
-            else:
-                y = prevPos[1] - pass_step_y
-                print_direction = '-y'
-            x = prevPos[0]
-
-            # Coast at end --------------------------------------------------------
-            # For the layer end, if the next coordinate exceed the coast at end dimension,
-            # then we add the coast at end point before adding the coordinate
-            if addCoast and needCoast and r == nb_rows - 1:
-                coastY = start_y + totDimY - coast_at_end
-                if y > coastY:
-                    needCoast = False
-                    coastCoord = [x, coastY] + prevPos[2:6] + [print_direction] + ['coast']
-                    coords.append(coastCoord)
-
-        # Even layers 2,4,6,... (i = 1, 3, 5, ...) --------------------------------
-        else:
-            if r % 2 == 0:
-                x = prevPos[0] - pass_step_x
-                print_direction = '-x'
-            else:
-                x = prevPos[0] + pass_step_x
-                print_direction = '+x'
-            y = prevPos[1]
-
-            # For the layer end, if the next coordinate exceed the coast at end dimension,
-            # then we add the coast at end point before adding the coordinate
-            if addCoast and needCoast and r == nb_cols - 1:
-                coastX = start_x + coast_at_end
-                if x < coastX:
-                    needCoast = False
-                    coastCoord = [coastX, y] + prevPos[2:6] + [print_direction] + ['coast']
-                    coords.append(coastCoord)
-
-        prevPos = [x, y] + prevPos[2:6] + [print_direction] + ['pass']
-        if i == 1:
-            prevPos[7] += ',refPos'
-        coords.append(prevPos)
-    # print(coords)
-    # print('----------------------------------')
-        
-    # Perpendicular offset for wall creation ---------------------------------
-    # if the printed scaffold is not the last one of the col or row
-    if wall_distance > 0 and c != (nb_cols if i % 2 == 0 else nb_rows) - 1:
-        # Wall direction depending on the theta angle
-        cos_d = np.cos(np.radians(theta)) * wall_distance
-        sin_d = np.sin(np.radians(theta)) * wall_distance
-
-        if c % 2 == 0: # if scaffold to be printing is after even values of c
-            if i % 2 == 0:
-                #x = prevPos[0] - wall_distance
-                x = prevPos[0] - cos_d
-                y = prevPos[1] - sin_d
-            else:
-                #y = prevPos[1] + wall_distance
-                x = prevPos[0] - sin_d
-                y = prevPos[1] + cos_d
-        else: # if scaffold to be printing is after odd values of c
-            if i % 2 == 0:
-                #x = prevPos[0] + wall_distance
-                x = prevPos[0] + cos_d
-                y = prevPos[1] + sin_d
-            else:
-                #y = prevPos[1] - wall_distance
-                x = prevPos[0] + sin_d
-                y = prevPos[1] - cos_d
-
-        prevPos = [x, y] + prevPos[2:7] + ['wall']
-        coords.append(prevPos)
-
-    return coords
-
-# Function addConnection
-#
-#   Description: calculates a connection coordinate between rows of the network.
-#
-#   Returns:
-#       coords: list, the set of coordinates to be added to the toolpath.
-#
-#   Parameters:
-#       i : int, layer index
-#       r : int, network row index
-#       prevPos : list, previous cartesian position kept in memory
-#
-def addConnection(i, r, prevPos):
-    coords = []
-
-    # Always add a bleeding after all the pass
-    if r == (nb_rows if i % 2 == 0 else nb_cols) - 1: # if last pass of the layer
-        firstBleed = layer_change_bleed
-        special = ''
-        if stopAndGo:
-            special += ',coast pause'
-        if layer_change_bleed_clearance > 0:
-            #pecial = 'None'
-            special += ',clearColNP'
-    else: # if last pass of a printing pass (not the last of the layer)
-        firstBleed = printing_bleed
-        #special = ''
-        special = 'lastPass'
-        if i == 1:
-            special += ',refPos'
-    if i % 2 == 0:
-        if r % 2 == 0:
-            y = prevPos[1] +  firstBleed
-            print_direction = '+y'
-        else:
-            y = prevPos[1] -  firstBleed
-            print_direction = '-y'
-        x = prevPos[0]
-    else:
-        if r % 2 == 0:
-            x = prevPos[0] -  firstBleed
-            print_direction = '-x'
-        else:
-            x = prevPos[0] +  firstBleed
-            print_direction = '+x'
-        y = prevPos[1]
-
-    prevPos = [x, y] + prevPos[2:6] + [print_direction] + [special]
-    coords.append(prevPos)
-    special = ''
-
-    # Travel from on pass to the other if it's not the last pass of the layer
-    if r != (nb_rows if i % 2 == 0 else nb_cols) - 1:
-        # Create a middle point for a curve path,
-        # only if theta angle is under the threshold,
-        # otherwise, we don't need this point.
-        if theta < theta_threshold:
-            if i % 2 == 0:
-                x = prevPos[0] + (MULTINOZZLE_WIDTH + NOZZLE_DISTANCE)/2
-                if r % 2 == 0:
-                    y = prevPos[1] + printing_bleed
-                    print_direction = '+y'
-                else:
-                    y = prevPos[1] - printing_bleed
-                    print_direction = '-y'
-            else:
-                if r % 2 == 0:
-                    x = prevPos[0] - printing_bleed
-                    print_direction = '-x'
-                else:
-                    x = prevPos[0] + printing_bleed
-                    print_direction = '+x'
-                y = prevPos[1] - (MULTINOZZLE_WIDTH + NOZZLE_DISTANCE)/2
-
-            prevPos = [x, y] + prevPos[2:6] + [print_direction] + [special]
-            coords.append(prevPos)
-
-        # Create a point to switch from a pass to another
-        if i % 2 == 0:
-            # For odd layers
-            if theta < theta_threshold:
-                x = prevPos[0] + (MULTINOZZLE_WIDTH + NOZZLE_DISTANCE)/2
-                if r % 2 == 0:
-                    y = prevPos[1] - printing_bleed
-                    print_direction = '-y'
-                else:
-                    y = prevPos[1] + printing_bleed
-                    print_direction = '+y'
-            else:
-                x = prevPos[0] + (MULTINOZZLE_WIDTH + NOZZLE_DISTANCE)
-                if r % 2 == 0:
-                    print_direction = '-y'
-                else:
-                    print_direction = '+y'
-        else:
-            # For even layers
-            if theta < theta_threshold:
-                y = prevPos[1] - (MULTINOZZLE_WIDTH + NOZZLE_DISTANCE)/2
-                if r % 2 == 0:
-                    x = prevPos[0] + printing_bleed
-                    print_direction = '+x'
-                else:
-                    x = prevPos[0] - printing_bleed
-                    print_direction = '-x'
-            else:
-                y = prevPos[1] - (MULTINOZZLE_WIDTH + NOZZLE_DISTANCE)
-                if r % 2 == 0:
-                    print_direction = '+x'
-                else:
-                    print_direction = '-x'
-
-        special = 'refPos' if i < 1 else ''
-        prevPos = [x, y] + prevPos[2:6] + [print_direction] + [special]
-        coords.append(prevPos)
-        special = ''
-
-        # Create a new Start point after the first bleeding traveling from one pass to another
-        if i % 2 == 0:
-            if r % 2 == 0:
-                y = prevPos[1] -  printing_bleed
-                print_direction = '-y'
-            else:
-                y = prevPos[1] +  printing_bleed
-                print_direction = '+y'
-            x = prevPos[0]
-        else:
-            if r % 2 == 0:
-                x = prevPos[0] +  printing_bleed
-                print_direction = '+x'
-            else:
-                x = prevPos[0] -  printing_bleed
-                print_direction = '-x'
-            y = prevPos[1]
-
-        special = 'refPos' if i == 1 else ''
-        prevPos = [x, y] + prevPos[2:6] + [print_direction] + [special]
-        coords.append(prevPos)
-        
-    else:   # If we are at end of a layer
-        # +Z offset to clear the non-planar surface when rotating the printhead (if curving the network)
-        if layer_change_clearance > 0: 
-            offsetZ = prevPos[2] + layer_change_clearance
-            prevPos = prevPos[0:2] + [offsetZ] + prevPos[3:-1] + [special]
-            coords.append(prevPos)
-
-    return coords
-
-# Function changeOrientation
-#
-#   Description: calculates a change of direction and Z increment between layers of the network.
-#
-#   Returns:
-#       coords: list, the set of coordinates to be added to the toolpath.
-#
-#   Parameters:
-#       i : int, layer index<
-#       prevPos : list, previous cartesian position kept in memory
-#
-def changeOrientation(i, prevPos):
-    global prevRefPos
-    coords = []
-
-    # +Z offset to clear the non-planar surface when rotating the printhead (if curving the network)
-    # IMPORTANT : here, we calculate the new Z offset but we don't add it to the coordinates collection coords,
-    #             because the Z value of prevPos has been reset to the proper Z value for the layer with no offset
-    if layer_change_clearance > 0:
-        offsetZ = prevPos[2] + layer_change_clearance
-        prevPos = prevPos[0:2] + [offsetZ] + prevPos[3:]
-        # coords.append(prevPos)
-
-    # Backing up to get in position for next layer's pass
-    if i % 2 ==0:
-        x = prevPos[0] + (layer_change_bleed + MULTINOZZLE_WIDTH / 2 + NOZZLE_DISTANCE) + (prev_process['nozzle_distance'] - curr_process['nozzle_distance']) + (prev_process['layer_change_bleed'] - curr_process['layer_change_bleed'])
-        y = prevPos[1] - (layer_change_bleed + MULTINOZZLE_WIDTH / 2) + (curr_process['multinozzle_width']/2 - prev_process['multinozzle_width']/2)# + (prev_process['layer_change_bleed'] - curr_process['layer_change_bleed'])
-        print_direction = '+y'
-    else:
-        x = prevPos[0] + (layer_change_bleed + MULTINOZZLE_WIDTH / 2)
-        y = prevPos[1] - (layer_change_bleed + MULTINOZZLE_WIDTH / 2 + NOZZLE_DISTANCE)
-        print_direction = '-x'
-
-    # prevRefPos always resets at layer change
-    if not proj_file == 'None':
-        prevRefPos = {'pos':None, 'offset':np.array([0,0,0])}
-    
-    # Special target attribut selection
-    if i <= 2:
-        special = 'refPos'
-    else:
-        special = ''
-    # if stopAndGo:
-    #     special += ',coast pause'
-    # else:   
-    #     special += ',clearColNP'
-        
-    prevPos = [x, y] + prevPos[2:6] + [print_direction] + [special]  
-    coords.append(prevPos)
-    special = ''
-
-
-    # -Z offset to clear the non-planar surface when rotating the printhead (if curving the network)
-    if layer_change_clearance > 0:
-        offsetZ = prevPos[2] - layer_change_clearance
-        prevPos = prevPos[0:2] + [offsetZ] + prevPos[3:-1] + [special]
-        coords.append(prevPos)
-
-    # Adding a new point for the bleeding / start of new layer
-    # New layer is odd : 1,3,5,... (i = 0, 2, 4, ...) ----------------------------------
-    if i % 2 == 0:
-        y = prevPos[1] + layer_change_bleed
-        print_direction = '+y'
-    # New layer is even : 2,4,6,... (i = 1, 3, 5, ...) --------------------------------
-    else:
-        x = prevPos[0] - layer_change_bleed
-        print_direction = '-x'
-        
-    if i == 1:
-        special = 'refPos'
-    #     special = 'refPos'
-    #     prevRefPos = {'pos':None, 'offset':0.0}
-    else:
-        special = ''
-    prevPos = [x, y] + prevPos[2:6] + [print_direction] + [special]
-    coords.append(prevPos)
-    special = ''
-
-    return coords
-
-# Function targetAndMove
-#
-#   Description: processes each calculated coordinate of the network. The function
-#                calls the non-planar projection method, integrates the toolpath 
-#                with RoboDK, manages special moves and calculates
-#                the print distance.
-#
-#   Returns: nothing.
-#
-#   Parameters:
-#       name : string, the coordinate name (includes layer, row, column indexes)
-#       position : list, the cartesian position to process
-#       i : int, layer index
-#       debug : bool, flag to prevent calling the RoboDK API
-#       showOnGraph : bool, flag to add processed data to the visualization plot
-#       calculateDist : bool, flag to include the processed position into the
-#                       distance calculation or not
-#
-def targetAndMove(name, position, i, debug=False, showOnGraph=True, calculateDist=True):
-    global currPos
-    global lastPos
-    global print_dist
-
-    # Get the position's real position (projected or not), it's rotation matrix and special target attribution
-    realPosition, rotMat, special = managePosProjection(name, position, i, debug, showOnGraph)
-
-    # # Z position clearance to try and avoid smudging the material losses accumulation when changing layers
-    # if ('clearColNP' in special or 'purge' in special or 'coast pause' in special) and layer_change_bleed_clearance > 0:
-    #     realPosition[2] = realPosition[2] + layer_change_bleed_clearance # mm
-                   
-    # RoboDK integration ------------------------------------------------------------------------------
-    if not debug:
-        #target = RDK.AddTarget(name)
-        
-        if not proj_file == 'None':
-            # Creation of the pose matrix by RoboDK's syntax using the projected point's rotation matrix
-            target = transl(realPosition[0], realPosition[1], realPosition[2])*Mat(rotMat.tolist())
-            #target.setPose(poseMat)
-        else:
-            # Creation of the pose matrix by RoboDK's syntax using the planar generated coordinate
-            #target.setPose(Fanuc_2_Pose(realPosition))
-            target = Fanuc_2_Pose(realPosition)
-
-        # RoboDK move instruction
-        prog.MoveL(target)
-
-        # Special specific instructions that may be include with the target
-        if 'coast' in special:
-            # Stop the extrusion for the end of a layer
-            prog.RunInstruction('Extruder(''OFF'')')
-        elif 'coast pause' in special:            
-            # Add a pause after the completion of a layer
-            prog.Pause(pressure_post_retract_time)
-        elif 'purge' in special: 
-            # Start the extrusion for next layer
-            prog.RunInstruction('Extruder(''ON'','+scaff_extr_speed+')')
-            prog.Pause(pressure_buildup_time)
-            
-
-    # Toolpath visualization intergration and statistics ----------------------------------------------
-    # Updating the plot collection and toolpath statistics
-    if showOnGraph:
-        addToVisualization(realPosition)
-
-    # Updating the current/last position and calculation of toolpath print distance
-    currPos = [realPosition[0], realPosition[1], realPosition[2]]
-    if calculateDist:
-        print_dist += np.linalg.norm(np.array(currPos)-np.array(lastPos))
-
-    lastPos = currPos
-
-# Function managePosProjection
-#
-#   Description: manages the projection of each position of the toolpath
-#                calls the collision detection function 
-#
-#   Returns:
-#       realPosition : list, the final position of the coordinate, planar or not
-#       rotMat : np.matrix, the rotation matrix of the realPosition
-#       special : string, a special target attribution for the position
-#
-#   Parameters:
-#       name : string, the coordinate name (includes layer, row, column indexes)
-#       position : list, the cartesian position to process
-#       i : int, layer index
-#       debug : bool, flag to prevent calling the RoboDK API
-#       showOnGraph : bool, flag to add processed data to the visualization plot
-#
-def managePosProjection(name, position, i, debug, showOnGraph):
-    rotMat = None
-    global lastRef
-    
-    # Uncomment to debug targets
-    #print('%s = %s' % (name, str(position)))
-    
-    # Retrieving the position's informations
-    if len(position) > 7:
-        x, y, z, a, b, c, print_direction, special = position
-    else:
-        x, y, z, a, b, c, print_direction = position
-        special = ''
-   
-    # List of special targets requiring collision check, triad definition or specific operations
-    specialTargets = ['Retract', 'L3R1C1Start1', 'L3R1C1Start2']#, 'L3R1C1Start3']
-
-    # Z position clearance to try and avoid smudging the material losses accumulation when changing layers
-    if ('clearColNP' in special) and layer_change_bleed_clearance > 0:
-        z = z + layer_change_bleed_clearance # mm
-      
-    # Non-planar toolpath. Projection of the coordinate on the surface ------------------------------------------------------
-    if not proj_file == 'None':
-        # ===============================================================
-        # retrieve the surface information for the first two layers
-        if i <= 1 or name in specialTargets:
-            # Retrieving the relative u and relative v to evaluate the surface according to the relative position of X and Y over the surface
-            relu, relv, exceedX, exceedY = relativeUVbyXY(x, y)
-
-            # The uv list must contain floats value for normal assessment
-            uv = [float(relu),float(relv)]
-            
-            # Finding the normal at the evaluated point of the first two layers only
-            normal = operations.normal(surf, uv, normalize=True)
-            normal = [list(n) for n in normal]
-
-            # Finding the tangents (in the printing direction and perpendicular) at the evaluated point of the first two layers
-            tangent = operations.tangent(surf, uv, normalize=True)
-            tangent = [list(ta) for ta in tangent]
-     
-            ptEval = surf.evaluate_single(uv)   # Evaluate the point on the surface according to it's relative position on x and y
-                
-            # Assign new coordinates inside or outside the NURBS
-            ptEval = assignNewXYZ(x, y, ptEval, exceedX, exceedY, tangent)                    
-            
-            # ==============================================================================
-            # Adjustment of the toolpath to correct the gap created by toolpath deformation
-            if compensateDeformation and (i <= 1 or name in specialTargets):
-                normal = operations.normal(surf, uv, normalize=True)
-                normal = [list(n) for n in normal]
-                
-                if 'refPos' in special:      
-                    # Calling the adjustGap method for reference positions
-                    ptEval, uv = adjustGap(ptEval, uv, normal, i, print_direction, name, special)
-                else:
-                    # Side adjustment of the rest of the point for the first layer according to the previous 
-                    #   calculated offset for the current printing pass
-                    offset = prevRefPos['offset']
-                    
-                    if np.linalg.norm(offset) > 0:
-                        to_check = offset + ptEval
-                        ptEval, distance, isClosest, uv = getClosest(to_check, name, normal[1], col_check_precision, col_check_step, col_check_stop, False, True)
-                     
-                lastRef = ptEval                       
-                if 'lastPass' in special:
-                    prevRefPos['pos'] = ptEval
-                                           
-                relu, relv, exceedX, exceedY = relativeUVbyXY(ptEval[0], ptEval[1])
-                
-                # Finding the normal at the evaluated point of the first two layers only
-                normal = operations.normal(surf, uv, normalize=True)
-                normal = [list(n) for n in normal]
-
-                # Finding the tangents (in the printing direction and perpendicular) at the evaluated point of the first two layers
-                tangent = operations.tangent(surf, uv, normalize=True)  
-                tangent = [list(ta) for ta in tangent]         
-             
-            # =============================================================================
-            # Tangents identification with respect to printing direction
-            # Triad orientation for deposition going on +/- y
-            if print_direction == '+y' or print_direction == '-y':
-                if not debug: # for RoboDK
-                    perp_tangent = [tangent[0], tangent[1]]
-                    #direct_tangent = tangent[0], tuple(i*-1 for i in tangent[2])
-                else:
-                    perp_tangent = [tangent[0], list(np.multiply(-1, tangent[1]))]
-                    # perp_tangent = [tangent[0], [i*-1 for i in tangent[1]]]
-                direct_tangent = [tangent[0], tangent[2]]
-            # Triad orientation for deposition going on +/- x
-            elif print_direction == '-x' or print_direction == '+x':
-                if not debug: # for RoboDK
-                    perp_tangent = [tangent[0], list(np.multiply(-1, tangent[2]))]
-                    # perp_tangent = [tangent[0], [i*-1 for i in tangent[2]]]
-                else:
-                    perp_tangent = [tangent[0], tangent[2]]
-                direct_tangent = [tangent[0], tangent[1]]
-   
-            # ===============================================================================
-            # Checking the local curvature for concave of convex local region
-            if wall_distance == 0 and ((i == 0 and 'X' in adjust_pore_size) or (i == 1 and 'Y' in adjust_pore_size) or 'Both' in adjust_pore_size):
-                # Calculating the three points of the circle arc
-                mltnzl_limit_coords = getMultinozzleFootprint(perp_tangent, MULTINOZZLE_WIDTH)
-                # p1_getClosest = multiprocessing.Process(target = getClosest, args=(list(mltnzl_limit_coords[1]),'ptHeron1',normal[1], col_check_precision, col_check_step, col_check_stop, False, True))
-                # p2_getClosest = multiprocessing.Process(target = getClosest, args=(list(mltnzl_limit_coords[0]),'ptHeron2',normal[1], col_check_precision, col_check_step, col_check_stop, False, True))
-                ptHeron1 = getClosest(mltnzl_limit_coords[1],name + '_ptHeron1',normal[1], col_check_precision, col_check_step, col_check_stop, False, True)[0]
-                ptHeron2 = getClosest(mltnzl_limit_coords[0],name + '_ptHeron2',normal[1], col_check_precision, col_check_step, col_check_stop, False, True)[0]
-                local_three_pts = [np.array(ptHeron1), np.array(perp_tangent[0]), np.array(ptHeron2)]                
-                
-                # Debugging plot
-                heronFoot.append(mltnzl_limit_coords)
-                heronPt1.append(ptHeron1)
-                heronPt2.append(perp_tangent[0])
-                heronPt3.append(ptHeron2)
-                
-                # Calculating the local radius at the multinozzle footprint
-                local_radius = heronRadius(local_three_pts)
-                
-                # If radius is not infinite (non-planar)
-                if not m.isinf(local_radius):
-                    curr_radius = local_radius
-                    gamma = m.atan(0.5*curr_process['multinozzle_width'] / curr_radius)
-                    
-                    # Calculating second derivative at the ptEval
-                    ders = surf.derivatives(uv[0], uv[1], 2)
-                    if i == 0:
-                        curvature = ders[2][0]    # fuu = second derivite of w.r.t u
-                    else:
-                        curvature = ders[0][2]    # fuu = second derivite of w.r.t v
-                                    
-                    # # Calculating current radius
-                    # if curvature[2] > 0: # if curvature is concave, radius is reduced as layers increase
-                    #     curr_radius = local_radius - z#NOZZLE_DIAMETER - i*layer_height
-                    # elif curvature[2] < 0:  # if curvature is convex, radius is increased as layers increase
-                    #     curr_radius = local_radius + z#NOZZLE_DIAMETER + i*layer_height
-                    # else:   # no curvature (planar)
-                    #     curr_radius = local_radius
-                    
-                    # Calculating aperture angle on the multinozzle
-                    #gamma = m.atan(0.5*MULTINOZZLE_WIDTH / curr_radius)
-                    #gamma = m.atan(0.5*curr_process['multinozzle_width'] / curr_radius)
-                    
-                    # Calculating current radius
-                    # if curvature[2] > 0: # if curvature is concave, radius is reduced as layers increase
-                    #     curr_radius = local_radius - z#NOZZLE_DIAMETER - i*layer_height
-                    # elif curvature[2] < 0:  # if curvature is convex, radius is increased as layers increase
-                    #     curr_radius = local_radius + z#NOZZLE_DIAMETER + i*layer_height
-                    # else:   # no curvature (planar)
-                    #     curr_radius = local_radius
-                        
-                # If radius is infinite (planar)
-                else:
-                    curvature = [0,0,0]
-                    curr_radius = -1
-                    gamma = -1
-                
-            else:
-                if adjust_pore_size and wall_distance > 0 and debug:
-                    print('\nWARNING: auto-adjust pore size has been disable for p = %.3f mm to create straight walls at %s.' % (curr_pore_size, name))
-                curvature = [0,0,0]
-                curr_radius = -1
-                gamma = -1
-            
-            newX = ptEval[0]
-            newY = ptEval[1]
-            newZ = ptEval[2]
-            projection_pos[name] = {'x':newX, 'y':newY, 'z':newZ, 'normal':normal, 'perp_tangent':perp_tangent, 'direct_tangent':direct_tangent, 'curr_radius':curr_radius, 'curvature':curvature, 'aperture':gamma}
-            
-            colOffset = 0
-        else: 
-            # ===========================================================================
-            # Finding the position following previous point position of layer 1 or 2
-            # Assign a target reference on the last corresponding projected layer
-            if i % 2 == 0:
-                try:
-                    proj_target = 'L1' + name[len('L'+str(i+1)):]
-                    projection_pos[proj_target]
-                except: # The case of layer 3 (after change from layer 2 to 3, we have a start of layer scheme different than the print approach)
-                    proj_target = 'L3' + name[len('L'+str(i+1)):]
-                    projection_pos[proj_target]
-
-            else:
-                proj_target = 'L2' + name[len('L'+str(i+1)):]
-
-            # Map the projection data
-            newX = projection_pos[proj_target]['x']
-            newY = projection_pos[proj_target]['y']
-            newZ = projection_pos[proj_target]['z']
-            normal = projection_pos[proj_target]['normal']
-            perp_tangent = projection_pos[proj_target]['perp_tangent']
-            direct_tangent = projection_pos[proj_target]['direct_tangent']
-            curr_radius = projection_pos[proj_target]['curr_radius']
-            curvature = projection_pos[proj_target]['curvature']
-            gamma = projection_pos[proj_target]['aperture']
-            
-            try:
-                # we also try to add the collision offset of the point under it if the point was offset because of a detected collision
-                colTarget = ''.join([proj_target, '_process', str(curr_process['id'])])
-                colOffset = col_offsets[colTarget]
-                if debug:
-                    print('target : %s, offset = %.3f (from %s)' % (name, colOffset, colTarget))#'L1' + name[len('L'+str(i)):]))
-            except:
-                # Here it means that the corresponding point of layer 1 or 2 did not collision, hence no collision offset to apply
-                colOffset = 0
-                    
-        # =================================================================
-        # Calculating the local curvature at layer height
-        if not curr_radius == -1:
-            if curvature[2] > 0: # if curvature is concave, radius is reduced as layers increase
-                curr_radius = curr_radius - z + NOZZLE_DIAMETER#i*layer_height# - colOffset
-            elif curvature[2] < 0:  # if curvature is convex, radius is increased as layers increase
-                curr_radius = curr_radius + z - NOZZLE_DIAMETER#i*layer_height# + colOffset
-
-        # ===============================================================================
-        # If the pore size adjustment is True, then we need to rotate the multinozzle on its axis
-        if adjust_pore_size != 'None' and not curr_radius == -1:                
-            # Calculation of new projected multinozzle width
-            curr_multinozzle_width = 2*(curr_radius * m.tan(gamma))
-            
-            # Calculation of the gap difference to add to the curr_multinozzle_width
-            curr_gap = gapDistance * curr_multinozzle_width / curr_process['multinozzle_width']
-            curr_multinozzle_width += (gapDistance - curr_gap)# + NOZZLE_DIAMETER # ND does not work with p = 184
-            
-            if curr_multinozzle_width > MULTINOZZLE_TRUE_WIDTH:
-                if debug:
-                    print('\nWARNING: apparent multinozzle width (%.4f mm) for "%s" cannot be bigger than the real multinozzle width (%.4f mm).' % (curr_multinozzle_width, name, MULTINOZZLE_TRUE_WIDTH))
-                curr_multinozzle_width = MULTINOZZLE_TRUE_WIDTH
-                
-            # Calculation of printhead rotation
-            d_theta = m.degrees(m.acos(np.clip((curr_multinozzle_width / MULTINOZZLE_TRUE_WIDTH), -1, 1))) - theta
-
-        else:
-            d_theta = 0
-        #print('\ni = %i, name = %s, p = %.3f mm, dth = %.3f' % (i, name, curr_pore_size, d_theta))
-        
-        # ===============================================================================
-        # Updating the point position according to the projection informations
-        # listNormal = list(normal)
-        dx = (z + colOffset) * normal[1][0]
-        dy = (z + colOffset) * normal[1][1]
-        dz = (z + colOffset) * normal[1][2]
-        newX += dx
-        newY += dy
-        newZ += dz
-        
-        # Update the triad position and rotation according to the new projected position and theta angle
-        normal, perp_tangent, direct_tangent = updatePosTriad(normal, perp_tangent, direct_tangent, [newX, newY, newZ])
-        normal, perp_tangent, direct_tangent = updateRotTriad(normal, perp_tangent, direct_tangent, theta + d_theta)
-
-        # Update the toolpath position to be projected on the surface
-        projectedPosition = [newX, newY, newZ, a, b, c]
-
-        # ===================================================================
-        # Checking multinozzle collision with the printing surface
-        # Check the 1st + 2nd layer and retract position
-        if (i <= 1 or name in specialTargets) and check_col and curr_process['id'] == 0 and showOnGraph:
-            realPosition, is_collision = checkCollision(projectedPosition, perp_tangent, normal, name, debug)
-            normal, perp_tangent, direct_tangent = updatePosTriad(normal, perp_tangent, direct_tangent, realPosition[0:3])
-
-            # #Recheck the position as long as there is a collision
-            # while is_collision:
-            #     col_position = realPosition[:]
-            #     if debug:
-            #         print(':::::::::::::::::::::::::::::::::::::::')
-            #         print('Rechecking collision for [%.3f, %.3f, %.3f]' % (col_position[0], col_position[1], col_position[2]))
-            #     realPosition, is_collision = checkCollision(col_position, perp_tangent, normal, name, debug)
-            #     normal, perp_tangent, direct_tangent = updatePosTriad(normal, perp_tangent, direct_tangent, realPosition[0:3])
-        else:
-            realPosition = projectedPosition
-        
-        # =====================================================================
-        
-        # Updating the overall dimension reference pos for gap adjustment
-        if compensateDeformation and overallDimRefPos['pos'] is None:
-            strLastLayerPos = 'L1' + 'R' + str(nb_rows) + 'C' + str(nb_cols)
-            if strLastLayerPos in name and special == 'pass':
-                overallDimRefPos['pos'] = [realPosition[0], realPosition[1] - NOZZLE_DISTANCE / 2, realPosition[2]]
-            
-        # Creation of filaments position for post-process visualization
-        if show_geom and showOnGraph:
-            generateFilaments(perp_tangent, normal, z, project_filaments)
-
-        # # Show the first layer normals & tangeants on the 3D plot
-        # if (i <= 1 or name in specialTargets) and showOnGraph:
-        #     normals.append(normal)
-        #     tangentsu.append(direct_tangent)
-        #     tangentsv.append(perp_tangent)
-
-        # =====================================================================
-        # Construction of the rotation matrix for RoboDK target assignment
-        if not debug:
-            # Re-obtain the Normal and Tangents conversion between tuples and lists before calculating the rotation matrix
-            # listNormal = list(normal)
-            # listPerpTangent = list(perp_tangent)
-            # listTangent = list(direct_tangent)
-
-            # Assign the triad orientation of the target at each point for the TCP orientation
-            # triad = np.matrix([[-listTangent[1][0], -listTangent[1][1], -listTangent[1][2]],
-            #                 [-listPerpTangent[1][0], -listPerpTangent[1][1], -listPerpTangent[1][2]],
-            #                 [-listNormal[1][0], -listNormal[1][1], -listNormal[1][2]]])
-            
-            triad = np.matrix([np.multiply(-1, direct_tangent[1]),
-                            np.multiply(-1, perp_tangent[1]),
-                            np.multiply(-1, normal[1])])
-
-            # Construction of the rotation matrix as per RoboDK syntax
-            rotMat = np.matrix(getRotMat(triad))
-            rotMat = np.hstack((rotMat,[[0],[0],[0]])) # Here we add a column of zeros
-            rotMat = np.vstack((rotMat,[0,0,0,1]))  # Here we add a row of zeros and a 1
-
-    # Planar toolpath. No projection on the surface ---------------------------------------------------------
-    else:        
-        # Creation of orientation triad for planar 
-        if print_direction == '+y' or print_direction == '-y':
-            perp_tangent = [[x,y,z], [-1,0,0]]
-            direct_tangent = [[x,y,z], [0,1,0]]
-        # Triad orientation for deposition going on +/- x
-        elif print_direction == '-x' or print_direction == '+x':
-            perp_tangent = [[x,y,z], [0,1,0]]
-            direct_tangent = [[x,y,z], [1,0,0]]
-        normal = [[x,y,z],[0,0,1]]
-        normal, perp_tangent, direct_tangent = updateRotTriad(normal, perp_tangent, direct_tangent, theta)
-        
-        # Creation of filaments position for post-process visualization
-        if show_geom and showOnGraph:
-            generateFilaments(perp_tangent, normal, z)
-
-        realPosition = [x, y, z, a, b, c]
-        
-    # Show the first layer normals & tangeants on the 3D plot
-    if (i <= 1 or name in specialTargets) and showOnGraph:
-        normals.append(normal)
-        tangentsu.append(direct_tangent)
-        tangentsv.append(perp_tangent)
-        
-    # Return the managed position
-    return (realPosition, rotMat, special)
-
-# Function assignNewXYZ
-#
-#   Description: Assign a new XYZ position on the NURBS surface or outside.
-#                   The point will be positioned according to surface tangents
-#                   if the new coordinate is outside the NURBS domain.
-#
-#   Returns:
-#       newX, newY, newZ : float, new XYZ positions inside or outside the NURBS
-#
-#   Parameters:
-#       x : float, x coordinate before projection
-#       y : float, y coordinate before projection
-#       evalX : float, evaluated x coordinate on the NURBS
-#       evalY : float, evaluated y coordinate on the NURBS
-#       evalZ : float, evaluated z coordinate on the NURBS
-#       exceedX : bool, True is x < evalX or x > evalX (point is outside the surface)
-#       exceedY : bool, True is y < evalY or y > evalY (point is outside the surface)
-#       tangent : tuple, the evaluated tangents (on u and v) at [evalX,evalY,evalZ]
-#
-def assignNewXYZ(x, y, ptEval, exceedX, exceedY, tangent):
-    evalX = ptEval[0]    # Get the X component of the evaluated point on the surface
-    evalY = ptEval[1]    # Get the Y component of the evaluated point on the surface
-    evalZ = ptEval[2]    # Get the Z component of the evaluated point on the surface
-
-    if not exceedX:
-        newX = evalX
-    else:
-        newX = x                
-    if not exceedY:
-        newY = evalY
-    else:
-        newY = y                
-       
-    if not exceedX and not exceedY:
-        newZ = evalZ
-    else:   
-        # If the projected coordinate is outside the surface boundaries,
-        #   we position the coordinate using the trend of the surface tangents
-        posXout = np.array([newX, evalZ])
-        posXborder = np.array([evalX, evalZ])
-        posYout = np.array([newY, evalZ])
-        posYborder = np.array([evalY, evalZ])
-        outXdist = np.linalg.norm(posXout - posXborder)
-        outYdist = np.linalg.norm(posYout - posYborder)
-        
-        # Creation of the vector as function of the exceeding side
-        if x < evalX:
-            outXvect = np.array([-outXdist * i for i in tangent[1]])                    
-        else:
-            outXvect = np.array([outXdist * i for i in tangent[1]])    
-        if y < evalY:
-            outYvect = np.array([-outYdist * i for i in tangent[2]])                    
-        else:
-            outYvect = np.array([outYdist * i for i in tangent[2]])    
-        
-        outsideVect = outXvect + outYvect
-        posBorder = np.array([evalX, evalY, evalZ])
-        newX, newY, newZ = posBorder + outsideVect
-    
-    return np.array([newX, newY, newZ])
-
-# Function adjustGap
-#
-#   Description: Moves the ptEval coordinates closer to the prevRefPos in order
-#                to close the gaps created by projection-induced deformation 
-#                of the toolpath
-#
-#   Returns:
-#       ptEval : list, the adjusted evaluated position on the NURBS
-#       uv : tuple of float, u and v position of ptEval
-#
-#   Parameters:
-#       ptEval : list, the evaluated position on the NURBS to adjust
-#       i : int, the layer index
-#       print_direction : string, the direction in which the printing occurs for the current ptEval
-#       name : string, name of the current target position of ptEval
-#       special : string, target's specific attribute
-#
-def adjustGap(ptEval, uv_initial, normal, i, print_direction, name, special):
-    global prevRefPos
-    global lastRef
-    
-    # mm, the expected distance between two reference positions / printing pass
-    expectedDist = MULTINOZZLE_WIDTH + gapDistance#  - 2.6
-    
-    # mm, the distance offset with calculated distance and expected one  
-    diff_vect = np.array([0,0,0])
-    
-    # Initialize the reference position and expected distance if set to None
-    if prevRefPos['pos'] is None:
-        # First and second layer treatment
-        if i == 0: # if the start of first layer
-            if adjustOrigin: # Set reference point near origin
-                if curr_process['id'] == 0:
-                    ptClose_offset = - approach_length - layer_change_bleed
-                else:
-                    ptClose_offset = - layer_change_bleed
-                    
-                expectedDist = (MULTINOZZLE_WIDTH + NOZZLE_DIAMETER) / 2 
-                ptClose, distance, isClosest, uv = getClosest(np.array([start_x + NOZZLE_DIAMETER/2, 
-                                                                     start_y + NOZZLE_DIAMETER/2 + ptClose_offset, 
-                                                                     start_z]),
-                                                              name,
-                                                              normal[1],
-                                                              col_check_precision, col_check_step, col_check_stop,
-                                                              False)
-            else: # Otherwise, set reference point to ptEval
-                expectedDist = 0
-                ptClose = ptEval
-                uv = uv_initial
-        elif i == 1: # if the start of second layer
-            # Set reference position to the position at the end corner of the overvall microscaffold network
-            if overallDimRefPos['pos'] is None: 
-                raise Exception('overallDimRefPos is None')
-            ptClose = overallDimRefPos['pos']
-            expectedDist = layer_change_bleed + (MULTINOZZLE_WIDTH + NOZZLE_DIAMETER)/2 + gapDistance
-        
-        # Special target treatment
-        if name == 'L3R1C1Start1': # if the third layer
-            if adjustOrigin:
-                expectedDist = (MULTINOZZLE_WIDTH + NOZZLE_DIAMETER) / 2                     
-                ptClose, distance, isClosest, uv = getClosest(np.array([start_x + NOZZLE_DIAMETER/2, 
-                                                                     start_y + NOZZLE_DIAMETER/2 - layer_change_bleed, 
-                                                                     start_z]),
-                                                              name,
-                                                              normal[1],
-                                                              col_check_precision, col_check_step, col_check_stop,
-                                                              False)
-            else:
-                expectedDist = 0
-                ptClose = ptEval
-                uv = uv_initial
-        
-        elif name == 'Retract': # Special treatment for retraction move at end of print
-            expectedDist = 0
-            if i % 2 == 0:
-                ptClose = [overallDimRefPos['pos'][0],
-                           overallDimRefPos['pos'][1] + NOZZLE_DISTANCE / 2 + MULTINOZZLE_WIDTH / 2 + retract_length + layer_change_bleed + NOZZLE_DIAMETER,
-                           overallDimRefPos['pos'][2]]
-                
-        prevRefPos['pos'] = ptClose
-    
-    # Initialization the reference position and expected distance if not set to None
-    else:
-        # If start of pass on second layer
-        if (name == 'L2R1C1Start3' and layer_change_clearance > 0) or name == 'L2R1C1Start2':
-            if overallDimRefPos['pos'] is None:
-                raise Exception('overallDimRefPos is None')
-            ptClose = overallDimRefPos['pos']
-            expectedDist = (MULTINOZZLE_WIDTH + NOZZLE_DIAMETER) / 2 
-            prevRefPos['pos'] = ptClose
-            
-        # If any pass on the second layer
-        elif i == 1 and 'pass' in special:
-            if lastRef is None:
-                raise Exception('lastRef is None')
-            ptClose = lastRef
-            expectedDist = pass_step_x
-            prevRefPos['pos'] = ptClose
-            
-        elif i == 1 and 'CON' in name: 
-            if 'lastPass' in special or 'CON4' in name or 'CON3' in name:                
-                if lastRef is None:
-                    raise Exception('lastRef is None')
-                ptClose = lastRef
-                expectedDist = printing_bleed
-                prevRefPos['pos'] = ptClose
-    
-    # for plotting ref points Mayavi
-    wrongPosGap.append(ptEval) # Purple
-    refPositions.append(prevRefPos['pos'])  # Blue
-       
-    # Calculate distance from prevRefPos and difference with expected distance
-    dist, dir_vect = distanceP1P2(ptEval,prevRefPos['pos'])  
-    
-    # Adjustment of the direction vector of layer 2 depending on the printing direction
-    # This adjustment prevent singularities which messes up the direction vector
-    if i == 1 and 'x' in print_direction:
-        dir_vect[1] = 0
-    elif i == 1 and 'y' in print_direction:
-        dir_vect[0] = 0
-        
-    diff = dist - expectedDist
-    #print('-------------------\n%s, ref = %s, diff = %.4f' % (name, prevRefPos['pos'], diff))
-    
-    # Vector direction management for layer 2
-    if i == 1 and (('CON' in name) or ('pass' in special) or ('lastPass' in special)):
-        if (print_direction == '-x' and ptEval[0] > prevRefPos['pos'][0]) or (print_direction == '+x' and ptEval[0] < prevRefPos['pos'][0]):                  
-            diff = dist + expectedDist
-            
-    # Distance condition to move the point
-    if abs(diff) > 0 and dir_vect is not None:
-        diff_vect = np.array(diff * unit_vector(dir_vect))
-                
-        # for plotting ref points Mayavi
-        vectToPlot = [ptEval, diff_vect]
-                
-        dirVectors.append(vectToPlot)
-    
-        to_check = np.array(diff_vect + ptEval)
-        posToCheck.append(to_check) # Beige
-        if 'Retract' in name and adjust_pore_size != 'None':
-            abortLoop =  True 
-        else:
-            abortLoop =  False
-        ptEval, distance, isClosest, uv = getClosest(to_check, name, normal[1], col_check_precision, col_check_step, col_check_stop, False, abortLoop)
-            
-        # for plotting ref points Mayavi
-        newPosGap.append(ptEval) # Green
-    else:
-        diff_vect = np.array([0,0,0])
-        uv = uv_initial
-   
-    # the last ptEval becomes the new prevRefPos
-    prevRefPos['pos'] = ptEval
-    prevRefPos['offset'] = diff_vect
-    
-    return ptEval, uv
-
-# Function addToVisualization
-#
-#   Description: adds a given cartesian position to the data collection used for the plot.
-#
-#   Returns: nothing.
-#
-#   Parameters:
-#       position : list, the cartesian position to process
-#
-def addToVisualization(position):
-    xs.append(position[0])
-    ys.append(position[1])
-    zs.append(position[2])
-    
-# Function generateFilaments
-#
-#   Description: calcualte the multinozzle extruded filaments position on the given toolpath coordinate
-#
-#   Returns: nothing.
-#
-#   Parameters:
-#       tangent : tuple of float, tangent following the position of the nozzle array
-#       normal : tuple of float, normal perpendicular to the tangent
-#       z : float, z position of the current layer
-#       project_filaments : bool, set tu True to project filaments on the curved surface
-#
-def generateFilaments(tangent, normal, z, project_filaments = False):
-    mltnzl_array_half_width = MULTINOZZLE_TRUE_WIDTH / 2
-    nozzle_pos_list = []
-    #listNormal = list(normal)
-    
-    # Filaments projection
-    for nozIndex in range(NB_NOZZLES):        
-        # We multiply the nozzle index with the nozzle distance and substract the starting position
-        # to give a position for all nozzles along the tangent
-        # nozzle_pos_direction = [i* (nozIndex * NOZZLE_TRUE_DISTANCE - mltnzl_array_half_width) for i in tangent[1]]
-        nozzle_pos_direction = np.multiply([nozIndex * NOZZLE_TRUE_DISTANCE - mltnzl_array_half_width], tangent[1])
-        
-        if project_filaments:
-            filament_height = z - NOZZLE_DIAMETER/2
-            # Projection of the filament of each nozzle on the surface
-            # Retrieving the relative u and relative v to evaluate the surface according to the relative position of X and Y over the surface
-            nozzle_pos = np.array(nozzle_pos_direction) + np.array(tangent[0])
-            # x = nozzle_pos[0] - z * listNormal[1][0]
-            # y = nozzle_pos[1] - z * listNormal[1][1]
-            x = nozzle_pos[0] - filament_height * normal[1][0]
-            y = nozzle_pos[1] - filament_height * normal[1][1]
-            #z = nozzle_pos[2]
-            relu, relv, exceedX, exceedY = relativeUVbyXY(x, y)
-    
-            # The uv list must contain floats value for normal assessment
-            uv = [float(relu),float(relv)]
-    
-            ptEval = surf.evaluate_single(uv)   # Evaluate the point on the surface according to it's relative position on x and y
-            newTangent = operations.tangent(surf, uv, normalize=True)
-            newTangent = [list(nta) for nta in newTangent]     
-            
-            ptEval = assignNewXYZ(x, y, ptEval, exceedX, exceedY, newTangent)
-            #[newX, newY, newZ] = ptEval
-            
-            # dx = NOZZLE_DIAMETER * normal[1][0]
-            # dy = NOZZLE_DIAMETER * normal[1][1]
-            # dz = NOZZLE_DIAMETER * normal[1][2]
-            # [dx, dy, dz] = np.multiply(NOZZLE_DIAMETER, normal[1])
-            # newX += dx
-            # newY += dy
-            # newZ += dz
-            
-            nozzle_pos_direction = ptEval + np.multiply(filament_height, normal[1])#np.array([newX,newY,newZ])
-        else:
-            nozzle_pos_direction = np.array(nozzle_pos_direction) + np.array(tangent[0]) - np.multiply(NOZZLE_DIAMETER/2, normal[1])
-        
-        nozzle_pos = nozzle_pos_direction#tuple(np.array(nozzle_pos_direction) + np.array(tangent[0]))
-        nozzle_pos_list.append(nozzle_pos)
-    
-    nozzle_pos_tupple = nozzle_pos_list
-    nozzles_locations.append(nozzle_pos_tupple)
-
-# Function relativeUVbyXY
-#
-#   Description: finds the relative U and V parameters on a NURBS for the toolpath to
-#                project using its position's X and Y relative value over the NURBS X and Y.
-#
-#   Returns:
-#       relu, relv : float, the relative U and V parameters (contained between 0 and 1, inclusively)
-#       exceedX, exceedY : bool, flags if U and V are not between 0 and 1 (surface limits).
-#
-#   Parameters:
-#       x : float, the coordinate x value of the position to process
-#       y : float, the coordinate y value of the position to process
-#
-def relativeUVbyXY(x,y):
-    # min and max x and y components of the surface
-    minX = surf.evaluate_single([0,0])[0]
-    minY = surf.evaluate_single([0,0])[1]
-    maxX = surf.evaluate_single([1,1])[0]
-    maxY = surf.evaluate_single([1,1])[1]
-    # minX = surf.bbox[0][0]
-    # minY = surf.bbox[0][1]
-    # maxX = surf.bbox[1][0]
-    # maxY = surf.bbox[1][1]
-
-    # rel u and rel v are calculated using the limits of the param surface
-    relu = (x - minX)/(maxX - minX)
-    relv = (y - minY)/(maxY - minY)
-
-    exceedX = False
-    exceedY = False
-
-    # evaluate_single must receive a relative value contained between 0 and 1
-    if relu < 0:
-        relu = 0
-        exceedX = True
-    elif relu > 1:
-        relu = 1
-        exceedX = True
-    if relv < 0:
-        relv = 0
-        exceedY = True
-    elif relv > 1:
-        relv = 1
-        exceedY = True
-    #print('relu = %.4f, exceedX = %s\n' % (relu,str(exceedX)))
-
-    return relu, relv, exceedX, exceedY
-
-# Function checkCollision
-#
-#   Description: calculated if the nozzle array of the multinozzle gets into collision
-#                with a non-planar NURBS. Adds the multinozzle footprint to the visualization collection.
-#                If a collision is detected, the footprint is red, else green.
-#
-#   Returns:
-#       newPos : list, the newly calculated position after the collision detection process
-#       is_collision : bool, the collision result
-#
-#   Parameters:
-#       pos : list, the cartesian position to process
-#       tangent : tuple, the tangent vector associated with the position
-#       normal : tuple, the normal vector associated with the position
-#       targetName : string, the coordinate name (includes layer, row, column indexes)
-#       debug : bool, flag to prevent calling the RoboDK API
-#
-def checkCollision(pos, tangent, normal, targetName, debug = True):
-    # Calculation of the nozzles array footprint vector
-    mltnzl_limits = MULTINOZZLE_TRUE_WIDTH + NOZZLE_DIAMETER
-    mltnzl_footprint = getMultinozzleFootprint(tangent, mltnzl_limits)
-    
-    # Retrieving the relative u and relative v to evaluate the surface according to the relative position of X and Y over the surface
-    check_mltnzl_limits = []
-    offsets = []
-
-    for to_check in mltnzl_footprint:
-        # Run a brute-force algorithm to find the neareste point on the surface
-        if debug:
-            print('\nTesting collision on [%.3f, %.3f, %.3f]...' % (to_check[0], to_check[1], to_check[2]))
-        ptEval, distance, isClosest, uv = getClosest(to_check, targetName, normal[1], col_check_precision, col_check_step, col_check_stop, debug, True)
-
-        is_collision = to_check[2] <= ptEval[2] and isClosest
-        if is_collision:
-            check_mltnzl_limits.append(is_collision) # Add the collision to the check list (one of the nozzle array end)
-            #collisions_coords.append(list(to_check))  # Add the problematic nozzle array end coordinate to plot collection
-            collisions_coords.append(ptEval)  # Add the surface location where the collision happened to plot collection
-
-            if debug:
-                print('\t\t...distance UNDER surface = %.3f mm' % distance)
-        else:
-            if debug:
-                # if distance < NOZZLE_DIAMETER:
-                #     print('\t\t...distance ABOVE surface (smaller than NOZZLE DIA) = %.3f mm' % distance)
-                print('\t\t...distance ABOVE surface = %.3f mm' % distance)
-
-        offsets.append(distance)
-
-    # If one of the nozzle is in collision with the projected printing surface
-    if any(check_mltnzl_limits):
-        # Add mulinozzle footprint to plot collection
-        collisions.append(mltnzl_footprint)
-
-        # Get the worst negative distance from the surface
-        worst_distance = max(offsets)
-
-        if debug:
-            print('\n\tWorst distance from surface = %.3f mm' % worst_distance)
-            print('\tCollision detected !')
-
-        # Add the nozzle diameter distance to try to get a better deposition
-        # TO-DO: make sure the farthest nozzles are AT LEAST at nozzle_dia distance from the surface
-        if collision_clearance > 0:
-            deposition_clearance = collision_clearance
-        else:
-            deposition_clearance = NOZZLE_DIAMETER
-
-        shift_distance = worst_distance + deposition_clearance
-        col_offsets[''.join([targetName, '_process', str(curr_process['id'])])] = shift_distance
-
-    # Otherwise, no collision, we don't change the position
-    else:
-        # Add mulinozzle footprint to plot collection
-        printhead_locations.append(mltnzl_footprint)
-
-        # Get the smallest positive distance from the surface
-        worst_distance = min(offsets)
-
-        if debug:
-            print('\n\tOK, no collision detected.\n')
-
-        # Calculate the position to get nozzle diameter
-        # distance with the outer most nozzles, even if no collision
-        if collision_clearance > 0:
-            deposition_clearance = collision_clearance
-        else:
-            deposition_clearance = NOZZLE_DIAMETER
-
-        # Check is distance (positive) is smaller than the clearance required
-        if worst_distance < deposition_clearance:
-            shift_distance = deposition_clearance - worst_distance
-            col_offsets[''.join([targetName, '_process', str(curr_process['id'])])] = shift_distance
-        else:
-            shift_distance = 0
-
-    if debug:
-        print('\nShifting distance along normal by %.3f mm\n' % shift_distance)
-
-    # Calculate the displacement using the normal
-    dx = shift_distance * normal[1][0]
-    dy = shift_distance * normal[1][1]
-    dz = shift_distance * normal[1][2]
-    newX = pos[0] + dx
-    newY = pos[1] + dy
-    newZ = pos[2] + dz
-
-    # Set the new position
-    newPos = [newX, newY, newZ] + pos[3:6]
-
-    # Return the position after collision check
-    return newPos, is_collision
-
-# Function getMultinozzleFootprint
-#
-#   Description: given a coordinate in space and the limit dimension of the multinozzle, 
-#                   the function returns the tupple coordinate of the multinozzle footprint.
-#
-#   Returns:
-#       tangent : tuplle, position and vectors of tangents at the evaluated point
-#       mltnzl_limits : float, the limit dimension of the multinozzle
-#
-#   Parameters:
-#       mltnzl_footprint : tupple, coordinate of the multinozzle footprint (in 3D space)
-#
-def getMultinozzleFootprint(tangent, mltnzl_limits):
-    # For v1 and v2, we multiply each xyz component of the tangent by the half length of the multinozzle limit dimensions
-    v1 = [i*mltnzl_limits/2 for i in tangent[1]]
-    v2 = [i*-1*mltnzl_limits/2 for i in tangent[1]]
-    
-    # p1 and p2 are the coordinates of the end of vectors v1 and v2, representation the location of the nozzle array in space
-    p1 = (np.array(v1) + np.array(tangent[0]))     
-    p2 = (np.array(v2) + np.array(tangent[0]))
-    
-    # The "footprint" is the collection of both end coordinates in space of the multinozzle array
-    mltnzl_footprint = [p1,p2]
-    
-    return mltnzl_footprint
-
-# Function getClosest
-#
-#   Description: given a coordinate in space, the function iteratively searches 
-#                for the closest coordinated on the NURBS.
-#                The algorithm starts by looking at the closest point using the function
-#                relativeUVbyXY. Then, the vector between the found point is projected
-#                on the normal.
-#
-#   Returns:
-#       ptEval : list, the evaluated point on the NURBS closest to target_pt
-#       dist : float, the distance between ptEval and target_pt
-#       isClosest : bool, the search algorithm result
-#       uv : list of flota, uv pair of the found point
-#
-#   Parameters:
-#       target_pt : list, coordinate for which we need the closest point on the NURBS
-#       name : string, name of the evaluated point
-#       normal : tuple, the normal vector associated with target_pt
-#       precision : float, the precision criteria at which to find the solution
-#       step : float, the increamental step to find the solution
-#       stop : int, the number of max iteration to find the solution
-#       debug : bool, flag to prevent calling the RoboDK API
-#       abort_if_out : bool, flag to abort the function if the point is outside the surface bounds
-#
-def getClosest(target_pt, name, normal, precision, step, stop, debug = True, abort_if_out = False):
-    isClosest = False
-    # get a first point on the surface using the target coordinate x, y
-    x = target_pt[0]
-    y = target_pt[1]
-    relu, relv, exceedX, exceedY = relativeUVbyXY(x, y)
-    uv = [float(relu),float(relv)]
-    ptEval = surf.evaluate_single(uv)
-    
-    # Finding the tangents at the evaluated point
-    tangent = operations.tangent(surf, uv, normalize=True)
-    tangent = [list(ta) for ta in tangent]
-    ptEval = assignNewXYZ(x, y, ptEval, exceedX, exceedY, tangent) 
-    
-    # Abort if outside bounds
-    if abort_if_out and (exceedX or exceedY):
-        return (ptEval, 0, False, uv)
-    
-    # Initialize the coordinate that will make ptEval move closer to the target x, y
-    nextX = x
-    nextY = y
-
-    # # Reduce the distance in the X axis
-    # dx = ptEval[0] - x
-    # cptx = 0
-    # while abs(dx) > precision: # dx magnitude is greater than precision. the point is not found on x.
-    #     # print('dx = %.4f\n' % dx)
-    #     if abs(dx) < step: print('\nWARNING: step on X is bigger than dx')
-    #     if cptx >= stop: raise Exception('The closest point convergence was not found after %i iteration on X for %s' % (cptx, name))
-    #     cptx += 1
-    #     if dx < 0: nextX += step # dx negative, ptEval[0] is smaller than x
-    #     if dx > 0: nextX -= step # dx positive, ptEval[0] is greater than x
-    #     relu, relv, exceedX, exceedY = relativeUVbyXY(nextX, nextY)
-    #     uv = [float(relu),float(relv)]
-    #     ptEval = surf.evaluate_single(uv)
-    #     tangent = operations.tangent(surf, uv, normalize=True)
-    #     ptEval = assignNewXYZ(nextX, nextX, ptEval, exceedX, exceedY, tangent) 
-    #     dx = ptEval[0] - x
-
-    # # Reduce the distance in the Y axis
-    # dy = ptEval[1] - y
-    # cpty = 0
-    # while abs(dy) > precision: # dy magnitude is greater than precision. the point is not found on y.
-    #     # print('dy = %.4f\n' % dy)
-    #     if abs(dy) < step: print('\nWARNING: step on Y is bigger than dy')
-    #     if cpty >= stop: raise Exception('The closest point convergence was not found after %i iteration on Y for %s' % (cptx, name))
-    #     cpty += 1
-    #     if dy < 0: nextY += step # dy negative, ptEval[1] is smaller than y
-    #     if dy > 0: nextY -= step # dy positive, ptEval[1] is greater than y
-    #     relu, relv, exceedX, exceedY = relativeUVbyXY(nextX, nextY)
-    #     uv = [float(relu),float(relv)]
-    #     ptEval = surf.evaluate_single(uv)
-    #     tangent = operations.tangent(surf, uv, normalize=True)
-    #     ptEval = assignNewXYZ(nextX, nextY, ptEval, exceedX, exceedY, tangent) 
-    #     dy = ptEval[1] - y
-    
-    dx = np.subtract(ptEval[0], x)
-    cptx = 0
-    dy = np.subtract(ptEval[1], y)
-    cpty = 0
-    while abs(dx) > precision or abs(dy) > precision: # dx magnitude is greater than precision. the point is not found on x.
-        #print('relu = %.4f, exceedX = %s\n' % (relu,str(exceedX)))
-        #print('----------------------')
-        if abort_if_out and (exceedX or exceedY):
-            #print('Aborted')
-            return (ptEval, 0, False, uv)
-        
-        #print('dx = %.4f, dy = %.4f\n' % (dx, dy))
-        if abs(dx) > precision:
-            if abs(dx) < step: print('\nWARNING: step on X is bigger than dx')
-            if cptx >= stop: 
-                raise Exception('The closest point convergence was not found after %i iteration on X for %s' % (cptx, name))
-                #return (ptEval, 0, False, uv)
-            
-            #cptx += 1
-            cptx = np.sum([cptx,1])
-            
-            # if dx < 0: nextX += step # dx negative, ptEval[0] is smaller than x
-            # if dx > 0: nextX -= step # dx positive, ptEval[0] is greater than x
-            if dx < 0: nextX = np.sum([nextX,step]) # dx negative, ptEval[0] is smaller than x
-            if dx > 0: nextX = np.subtract(nextX,step) # dx positive, ptEval[0] is greater than x
-            
-        if abs(dy) > precision:
-            if abs(dy) < step: print('\nWARNING: step on Y is bigger than dy')
-            if cpty >= stop: 
-                raise Exception('The closest point convergence was not found after %i iteration on Y for %s' % (cptx, name))
-                #return (ptEval, 0, False, uv)
-            
-            #cpty += 1
-            cpty = np.sum([cpty,1])
- 
-            if dy < 0: nextY = np.sum([nextY,step]) # dy negative, ptEval[1] is smaller than y
-            if dy > 0: nextY = np.subtract(nextY,step) # dy positive, ptEval[1] is greater than y
-        
-        relu, relv, exceedX, exceedY = relativeUVbyXY(nextX, nextY)
-        uv = [float(relu),float(relv)]
-        ptEval = surf.evaluate_single(uv)
-        tangent = operations.tangent(surf, uv, normalize=True)
-        tangent = [list(ta) for ta in tangent]
-        ptEval = assignNewXYZ(nextX, nextX, ptEval, exceedX, exceedY, tangent) 
-                
-        if abs(dx) > precision: dx = np.subtract(ptEval[0], x)
-        if abs(dy) > precision: dy = np.subtract(ptEval[1], y)
-        #print('dx = %3f, dy = %.3f\n' % (dx, dy))
-
-    # if exceedX:
-    #     # raise Exception('The closest found point u-component is outside its boundary (relu = %.4f)' % relu)
-    #     print('The closest found point u-component is outside its boundary (relu = %.2f, relv = %.2f)' % (relu,relv))
-    # if exceedY:
-    #     # raise Exception('The closest found point v-component is outside its boundary (relv = %.4f)' % relv)
-    #     print('The closest found point v-component is outside its boundary (relu = %.2f, relv = %.2f)' % (relu,relv))
-
-    if debug:
-        print('\tConvergence was met after iteration # %i for %s' % (cptx + cpty, name))
-
-    # Projection of the vector on the normal to get an approximation of the closest point on the surface following the normal
-    vector_normal = np.array(normal)
-    #vector_target_eval = np.array(ptEval) - np.array(target_pt)
-    vector_target_eval = np.subtract(np.array(ptEval), np.array(target_pt))
-    vector_proj = projectVector(vector_target_eval, vector_normal)
-    dist = np.linalg.norm(vector_proj)
-    ptEval = np.array(target_pt) + vector_proj
-    isClosest = True
-
-    return (ptEval, dist, isClosest, uv)
-
-# Function updatePosTriad
-#
-#   Description: the triad of a position is the orthonormal basis composed of a
-#                position's normal and tangents. The function translate the triad
-#                vectors to a new position using newXYZ.
-#
-#   Returns:
-#       normal : tuple, the translated normal vector of the triad
-#       perp_tangent : tuple, the translated tangent vector of the triad perpendicular to the printing direction
-#       direct_tangent : tuple, the translated tangent vector of the triad directed in the printing direction
-#
-#   Parameters:
-#       normal : tuple, the normal vector of the triad
-#       perp_tangent : tuple, the tangent vector of the triad perpendicular to the printing direction
-#       direct_tangent :tuple, the tangent vector of the triad directed in the printing direction
-#       newXYZ : list, x y and z component of the 3D translation in space
-#
-def updatePosTriad(normal, perp_tangent, direct_tangent, newXYZ):
-    # newX = newXYZ[0]
-    # newY = newXYZ[1]
-    # newZ = newXYZ[2]
-
-    # Tangents conversion between tuples and lists
-    # listNormal = list(normal)
-    # listPerpTangent = list(perp_tangent)
-    # listTangent = list(direct_tangent)
-
-    # Normals
-    # listNormal[0] = (newX, newY, newZ)
-    # normal = tuple(listNormal)
-    normal[0] = newXYZ
-
-    # Perpendicular tangents
-    # listPerpTangent[0] = (newX, newY, newZ)
-    # perp_tangent = tuple(listPerpTangent)
-    perp_tangent[0] = newXYZ
-
-    # Tangents
-    # listTangent[0] = (newX, newY, newZ)
-    # direct_tangent = tuple(listTangent)
-    direct_tangent[0] = newXYZ
-
-    return normal[:], perp_tangent[:], direct_tangent[:]
-
-# Function updatePosTriad
-#
-#   Description: Update the rotation around the normal of the triad to 
-#                produce the desired pore size (rotation of multinozzle 
-#                around its axis)
-#
-#   Returns:
-#       normal : tuple, the rotated normal vector of the triad
-#       perp_tangent : tuple, the rotated tangent vector of the triad perpendicular to the printing direction
-#       direct_tangent :tuple, the rotated tangent vector of the triad directed in the printing direction
-#
-#   Parameters:
-#       normal : tuple, the normal vector of the triad
-#       perp_tangent : tuple, the tangent vector of the triad perpendicular to the printing direction
-#       direct_tangent : tuple, the tangent vector of the triad directed in the printing direction
-#       angle : float, the angle value at which to rotate the triad around the normal vector
-#
-def updateRotTriad(normal, perp_tangent, direct_tangent, angle):
-    # Obtain the Normal and Tangents conversion between tuples and lists before calculating the rotation matrix
-    # listNormal = list(normal)
-    # listPerpTangent = list(perp_tangent)
-    # listTangent = list(direct_tangent)
-    # tempTriad = np.matrix([[listTangent[1][0], listTangent[1][1], listTangent[1][2]],
-    #                        [listPerpTangent[1][0], listPerpTangent[1][1], listPerpTangent[1][2]],
-    #                        [listNormal[1][0], listNormal[1][1], listNormal[1][2]]])
-    
-    tempTriad = np.matrix([direct_tangent[1], perp_tangent[1], normal[1]])
-
-    # Get the rotation matrix for the temporary triad of normal and tangents
-    rotMat = np.matrix(getRotMat(tempTriad))
-
-    # Turn the triad around the global Z axis by an angle using the rotation matrix
-    if debug:
-        direction = -1
-    else: # for RoboDK
-        direction = 1
-    tempTriad = rotAroundNormal(tempTriad, rotMat, direction * angle)
-
-    # Update the triads components and convert back to tuple
-    # listTangent[1] = tuple(tempTriad.tolist()[0])
-    # listPerpTangent[1] = tuple(tempTriad.tolist()[1])
-    # listNormal[1] = tuple(tempTriad.tolist()[2])
-
-    # direct_tangent = tuple(listTangent)
-    # perp_tangent = tuple(listPerpTangent)
-    # normal = tuple(listNormal)
-    direct_tangent[1] = tempTriad.tolist()[0]
-    perp_tangent[1] = tempTriad.tolist()[1]
-    normal[1] = tempTriad.tolist()[2]
-    
-    return normal[:], perp_tangent[:], direct_tangent[:]
-
+toolpath = None                         # Structured array of the processed targets (poses, direction codes and flags)
 
 # ========================================================================================
 # MAIN PROGRAM
@@ -2169,194 +698,148 @@ if myWindow.values:
 
 # Program execution if the input window is not canceled  --------------------------------------
 if myWindow.values:
-    # Check if either row or col is an even value
-    if nb_rows % 2 == 0 or nb_cols % 2 == 0:
-        raise Exception('Toolpath error : the number of rows and columns must be and odd number.\n')
-        
-    # Auto-adjust wall_distance list to pore_size_nominal list
-    if len(wall_distance_nominal) == 1 and wall_distance_nominal[0] == 0:
-        wall_distance_nominal = list(np.zeros(len(pore_size_nominal)))
-        
-    # if len(wall_distance_nominal) < len(pore_size_nominal):
-    #     wall_distance_nominal = wall_distance_nominal
-        
-    # Check if wall_distance, pore_size_nominal and thickness_nominal have same length
-    if not len(wall_distance_nominal) == len(pore_size_nominal) and not len(pore_size_nominal) == len(thickness_nominal):
-        raise Exception('Printing parameters error : the length for wall_distance, pore_size and thickness must all be equal.\n')
-    
-    # Multinozzle configuration parameters
-    for config in MLTNZL_CONFIGS:
-        if MLTNZL_CONFIG == config['name']:
-            MLTNZL_CONFIG = config
-    print('Using "%s" mutlinozzle configuration' % MLTNZL_CONFIG['name'])
-    
-    # Material choice parameters
-    for mat in MATERIALS:
-        if MATERIAL_CHOICE == mat['name']:
-            MATERIAL_CHOICE = mat
-    rho_selected = MATERIAL_CHOICE['rho']
-    print('Using "%s" material' % MATERIAL_CHOICE['name'])
-
-    # Initialization of the multinozzle parameters
-    NB_NOZZLES = MLTNZL_CONFIG['nb']            # Number of nozzles. Also, width of the deposition in mm
-    NOZZLE_DIAMETER = MLTNZL_CONFIG['d']        # mm, default nozzle diameter
-    NOZZLE_TRUE_DISTANCE = MLTNZL_CONFIG['s']   # mm, distance between the center of each nozzle (is the real, unchanged, physical width)
-    NOZZLE_DISTANCE = MLTNZL_CONFIG['s']        # mm, distance between the center of each nozzle (will vary depending on the multinozzle rotation around its axis)
-    MULTINOZZLE_TRUE_WIDTH = (NB_NOZZLES - 1) * NOZZLE_TRUE_DISTANCE    # mm, width of the multinozzle nozzles array (is the real, unchanged, physical width)
-    MULTINOZZLE_WIDTH = (NB_NOZZLES - 1) * NOZZLE_DISTANCE              # mm, width of the multinozzle nozzles array (will vary depending on the multinozzle rotation around its axis)
-    NOZZLE_AREA = pi * (NOZZLE_DIAMETER / 2)**2
-   
-    # Nominal layer_change_bleeding parameter
-    if len(layer_change_bleed_nominal) < len(thickness_nominal):
-        layer_change_bleed_nominal = list(np.multiply(layer_change_bleed_nominal[0], np.ones(len(thickness_nominal))))
-    layer_change_bleed = layer_change_bleed_nominal[0]
-    
-    # Nominal printing_bleed parameter
-    if len(printing_bleed_nominal) < len(thickness_nominal):
-        printing_bleed_nominal = list(np.multiply(printing_bleed_nominal[0], np.ones(len(thickness_nominal))))
-    printing_bleed = printing_bleed_nominal[0]
-   
-    # Check if wall_distance is greater than the nozzle distance
-    for wall in wall_distance_nominal:
-        if wall > NOZZLE_DISTANCE:
-            print('\nWARNING: wall distance (%.1f) is greater than Nozzle distance (%.1f).' % (wall, NOZZLE_DISTANCE))
-    
-    # Check if walls are compatible with pore size
-    for i in range(len(pore_size_nominal)):
-        if pore_size_nominal[i] < NOZZLE_TRUE_DISTANCE - NOZZLE_DIAMETER and wall_distance_nominal[i] > 0:
-            # Pore size is reduced = multinozzle rotates = walls are incompatible
-            print('\nWARNING: wall_distance = %.2f is not compatible with p = %.3f mm. wall_distance is set to 0.' % (wall_distance_nominal[i], pore_size_nominal[i]))
-            wall_distance_nominal[i] = 0
-    wall_distance = wall_distance_nominal[0]
-
-    # Reservoir type parameters
-    if RESERVOIR_TYPE == RESERVOIR_48:
-        AVAILABLE_VOLUME = AVAILABLE_VOLUME_48
-    elif RESERVOIR_TYPE == RESERVOIR_250:
-        AVAILABLE_VOLUME = AVAILABLE_VOLUME_250
-
-    # Nominal pore size parameters
-    for i in range(len(pore_size_nominal)):
-        if pore_size_nominal[i] < 0:
-            pore_size_nominal[i] = 0
-        elif pore_size_nominal[i] > (NOZZLE_TRUE_DISTANCE - NOZZLE_DIAMETER):
-            pore_size_nominal[i] = (NOZZLE_TRUE_DISTANCE - NOZZLE_DIAMETER)
-    curr_pore_size = pore_size_nominal[0]
-    
-    # Initialize last pore size and wall distance values
-    last_pore_size = pore_size_nominal[0]
-    last_wall_distance = wall_distance_nominal[0]
-    
-    # Calculation of the required printhead rotation and new apparent width to obtain the desired nominal pore size
-    #   for first thickness here
-    if (curr_pore_size + NOZZLE_DIAMETER) > NOZZLE_TRUE_DISTANCE:
-        raise Exception('Multinozzle configuration error. The nominal pore size cannot be greater than the nozzle diameter + center-to-center spacing.')
-    theta = m.degrees(m.acos((curr_pore_size + NOZZLE_DIAMETER) / NOZZLE_TRUE_DISTANCE))
-    MULTINOZZLE_WIDTH = MULTINOZZLE_TRUE_WIDTH * m.cos(m.radians(theta))
-    NOZZLE_DISTANCE = NOZZLE_TRUE_DISTANCE * m.cos(m.radians(theta))
-    curr_process['multinozzle_width'] = MULTINOZZLE_WIDTH
-    curr_process['nozzle_distance'] = NOZZLE_DISTANCE
-    curr_process['layer_change_bleed'] = layer_change_bleed
-    curr_process['printing_bleed'] = printing_bleed
-    prev_process['multinozzle_width'] = MULTINOZZLE_WIDTH
-    prev_process['nozzle_distance'] = NOZZLE_DISTANCE
-    prev_process['layer_change_bleed'] = layer_change_bleed
-    prev_process['printing_bleed'] = printing_bleed
-        
-    gapDistance = NOZZLE_DISTANCE
-    pass_amplitude_x = (MULTINOZZLE_WIDTH + gapDistance)
-    pass_amplitude_y = (MULTINOZZLE_WIDTH + NOZZLE_DISTANCE)
-    pass_step_x = pass_amplitude_x / segments_per_scaffold
-    pass_step_y = pass_amplitude_y / segments_per_scaffold
+    # Toolpath generator parameters (the others keep the DEFAULT_PARAMS of the toolpath generator)
+    generatorParams = {'travel_speed': travel_speed,
+                       'scaff_speed': scaff_speed,
+                       'reg_travel_speed': reg_travel_speed,
+                       'reg_scaff_speed': reg_scaff_speed,
+                       'reg_rot_speed': reg_rot_speed,
+                       'scaff_extr_speed': scaff_extr_speed,
+                       'MLTNZL_CONFIG': MLTNZL_CONFIG,
+                       'MATERIAL_CHOICE': MATERIAL_CHOICE,
+                       'RESERVOIR_TYPE': RESERVOIR_TYPE,
+                       'pressure_buildup_time': pressure_buildup_time,
+                       'pressure_buildup_z': pressure_buildup_z,
+                       'pressure_retract_time': pressure_retract_time,
+                       'stopAndGo': stopAndGo,
+                       'CLEARANCE': FANUC_TRAVEL_CLEARANCE,
+                       'start_x': start_x,
+                       'start_y': start_y,
+                       'start_z': start_z,
+                       'center_print': center_print,
+                       'nb_layers': nb_layers,
+                       'nb_rows': nb_rows,
+                       'nb_cols': nb_cols,
+                       'layer_height_fraction': layer_height_fraction,
+                       'layer_xy_offset': layer_xy_offset,
+                       'layer_change_clearance': layer_change_clearance,
+                       'layer_change_bleed_nominal': layer_change_bleed_nominal,
+                       'layer_change_bleed_clearance': layer_change_bleed_clearance,
+                       'printing_bleed_nominal': printing_bleed_nominal,
+                       'approach_length': approach_length,
+                       'retract_length': retract_length,
+                       'segments_per_scaffold': segments_per_scaffold,
+                       'wall_distance_nominal': wall_distance_nominal,
+                       'pore_size_nominal': pore_size_nominal,
+                       'thickness_nominal': thickness_nominal,
+                       'compensateDeformation': compensateDeformation,
+                       'adjustOrigin': adjustOrigin,
+                       'check_col': check_col,
+                       'adjust_pore_size': adjust_pore_size,
+                       'show_geom': show_geom,
+                       'debug': debug,
+                       'debugAutoAdjustPoreSize': debugAutoAdjustPoreSize}
 
     # Projection parameters --------------------------------
+
     # Import the existing interpolated surface data if the chosen file is a json format
+    #   (all the surfaces of the file, or of several files separated by ';', are the patches of the projection surface)
     if not proj_file == 'None':
         if not proj_file.find('.json') == -1:
-            surf = exchange.import_json(meshFolder + proj_file)[0]
-            print('Importing surface data from : %s...\n' % proj_file)
+            for jsonFile in proj_file.split(';'):
+                evaluators, deltas = loadCompiledSurface(meshFolder + jsonFile)
+                if evaluators is None:
+                    surfs = exchange.import_json(meshFolder + jsonFile)
+                    print('Importing surface data from : %s...\n' % jsonFile)
+                    evaluators, deltas = compileSurface(surfs, meshFolder + jsonFile)
+                surfEvals += evaluators
+                surfDeltas += deltas
+                surfSources += [meshFolder + jsonFile] * len(evaluators)
+        # Mesh mode : direct projection on the triangles of the stl file (no NURBS interpolation)
+        elif use_mesh_mode:
+            print('Loading surface mesh from : %s...\n' % proj_file)
+            surfEvals = [meshSurface.fromFile(meshFolder + proj_file, mesh_leaf_size)]
+            surfDeltas = [[mesh_plot_delta, mesh_plot_delta]]
+            surfSources = [meshFolder + proj_file]
         # Else, create a new interpolated surface and create the json file
         else:
-            # Secondary input window to get surface interpolation parameters
-            titleSurf = 'Surface interpolation parameters'
-            instructionsSurf = 'Assign the required following parameters to interpolate the surface mesh from file : ' + proj_file
-            fieldsSurf = ['Size u (nb ctrl points)',
-                      'Size v (nb ctrl points)',
-                      'Degree in u-direction',
-                      'Degree in v-direction',
-                      'Interpolation delta']
-
-            # Try to load the last parameters from the json file
-            try:
-                with open(prefFolder + last_projection_params_file) as infile:
-                    # Loading dict from the json file
-                    last_params_dict = json.load(infile)
-                    defaultParams = list(last_params_dict.values())
-
-                print('Importing projection surface parameters ' + prefFolder + last_projection_params_file)
-            except:
-                print('Could not import projection surface parameters ' + prefFolder + last_projection_params_file)
-                defaultParams = [5,5,2,2,0.05]
-
-            # Creationg of the window instance
-            windowWidth = 400
-            windowHeight= 260
-            print('Waiting for user input...')
-            paramWindow = inputWindow.inputWindow(titleSurf, instructionsSurf, windowWidth, windowHeight, fieldsSurf, defaultParams)
-
-            if paramWindow.values:
-                #Writing json file
-                paramWindow.export_json(prefFolder + last_projection_params_file, defaultParams)
-                [nu,nv,degu,degv,delta] = paramWindow.values
-
-                # Data conversion
-                nu = int(nu)
-                nv = int(nv)
-                degu = int(degu)
-                degv = int(degv)
-                delta = float(delta)
-            else:
-                msg = 'User canceled'
-                raise Exception(msg)
-
-            surf = interpolate_surface_from_stl(meshFolder + proj_file,nu,nv,degu,degv,delta)
-            print('Interpolating surface from : %s...\n' % proj_file)
+            # Fitting mode parameters (approximation mode)
+            fitParams = {}
+            if use_surface_approximation:
+                fitParams = {'ctrlpts_size': approximation_ctrlpts_size,
+                             'max_deviation': None if approximation_ctrlpts_size else approximation_max_deviation}
+
+            # Surface already fitted on the unchanged stl file with the same fitting mode : reused without asking the parameters
+            surfParams = None
+            if not refit_projection_surface:
+                for params in compiledParams(meshFolder + proj_file):
+                    if params[5:] == list(fitParams.values()):
+                        surfParams = params
+                        print('Reusing the surface fitted on %s (size %i × %i, degrees %i × %i, delta %g)\n' % ((proj_file,) + tuple(params[0:5])))
+                        break
+
+            if surfParams is None:
+                # Secondary input window to get surface interpolation parameters
+                titleSurf = 'Surface interpolation parameters'
+                instructionsSurf = 'Assign the required following parameters to interpolate the surface mesh from file : ' + proj_file
+                fieldsSurf = ['Size u (nb ctrl points, 0 = auto)',
+                          'Size v (nb ctrl points, 0 = auto)',
+                          'Degree in u-direction',
+                          'Degree in v-direction',
+                          'Interpolation delta']
+
+                # Try to load the last parameters from the json file
+                try:
+                    with open(prefFolder + last_projection_params_file) as infile:
+                        # Loading dict from the json file
+                        last_params_dict = json.load(infile)
+                        defaultParams = list(last_params_dict.values())
+
+                    print('Importing projection surface parameters ' + prefFolder + last_projection_params_file)
+                except:
+                    print('Could not import projection surface parameters ' + prefFolder + last_projection_params_file)
+                    defaultParams = [0,0,2,2,0.05]
+
+                # Creationg of the window instance
+                windowWidth = 400
+                windowHeight= 260
+                print('Waiting for user input...')
+                paramWindow = inputWindow.inputWindow(titleSurf, instructionsSurf, windowWidth, windowHeight, fieldsSurf, defaultParams)
+
+                if paramWindow.values:
+                    #Writing json file
+                    paramWindow.export_json(prefFolder + last_projection_params_file, defaultParams)
+                    [nu,nv,degu,degv,delta] = paramWindow.values
+
+                    # Data conversion
+                    nu = int(nu)
+                    nv = int(nv)
+                    degu = int(degu)
+                    degv = int(degv)
+                    delta = float(delta)
+                else:
+                    msg = 'User canceled'
+                    raise Exception(msg)
+
+                surfParams = [nu, nv, degu, degv, delta] + list(fitParams.values())
+
+            [nu, nv, degu, degv, delta] = surfParams[0:5]
+            surfEvals, surfDeltas = None, None
+            if not refit_projection_surface:
+                surfEvals, surfDeltas = loadCompiledSurface(meshFolder + proj_file, *surfParams)
+            if surfEvals is None:
+                surf = interpolate_surface_from_stl(meshFolder + proj_file,nu,nv,degu,degv,delta,memory_budget=stl_memory_budget,grid_tolerance=stl_grid_tolerance,**fitParams)
+                print('Interpolating surface from : %s...\n' % proj_file)
+
+                # Compiled surface saved the first time the surface is used (or when its source changed)
+                surfEvals, surfDeltas = compileSurface([surf], meshFolder + proj_file, *surfParams)
+            surfSources = [meshFolder + proj_file]
             
-    else: # Planar printing (no projection file)
-        surf = None
-
-    # Start calculating script time
-    scriptStart = dt.now()
-
-    # Centering options --------------------------------
-    # to center the whole print, we divide by 2 the total width and length of the network
-    #
-    #   The total dimensions are composed of :
-    #       the multinozzle width × number or rows and columns,
-    #       the nozzle distance (offset separation scaffolds),
-    #       2× half of a nozzle diameter (from both sides of the print)
-    #       and the wall distances between scaffolds
-    
-    init_rows = nb_rows
-    init_cols = nb_cols
-    totDimX = nb_rows * MULTINOZZLE_WIDTH + (nb_rows-1) * NOZZLE_DISTANCE + NOZZLE_DIAMETER + wall_distance
-    totDimY = nb_cols * MULTINOZZLE_WIDTH + (nb_cols-1) * NOZZLE_DISTANCE + NOZZLE_DIAMETER + wall_distance
-    if center_print == 'On X' or center_print == 'Both':
-        xOffset = totDimX / 2
-        start_x = 0
-    if center_print == 'On Y' or center_print == 'Both':
-        yOffset = totDimY / 2
-        start_y = 0
-    start_x -= xOffset
-    start_y -= yOffset
-
-    # Coast at end parameter for layer change
-    coast_at_end = scaff_speed * pressure_retract_time/1000
-    if stopAndGo and (coast_at_end > totDimX or coast_at_end > totDimY):
-        raise Exception('Toolpath error : the required coast at end dimension is greater than at least one of the sides of the network. Review the ramp down time parameter or enlarge the network.\n\nCoast at end = %.2f mm\nDim X = %.2f mm\nDim Y = %.2f mm\n' % (coast_at_end, totDimX, totDimY))
+    # Toolpath generator : checks the parameters, prepares the surface patches and calculates the network dimensions
+    generator = ToolpathGenerator(generatorParams, surfEvals, surfSources)
 
     # Program creation --------------------------------
-    program_name = MATERIAL_CHOICE['name'][0] + str(nb_layers)+str(int(curr_pore_size*1000))
+    program_name = generator.program_name
     exportFile = last_params_file[0:last_params_file.find('.json')] + '_' + program_name
 
     # # Exporting a .py file for reuploading the toolpath in RoboDK without having to recalculate everything
@@ -2368,6 +851,7 @@ if myWindow.values:
     # rdk_reupload_fid.write('RDK.Render(False)\n')
     # rdk_reupload_fid.close()
 
+    prog = None
     if not debug:
         from robolink import *    # RoboDK API
         from robodk import *      # Robot toolbox
@@ -2378,7 +862,6 @@ if myWindow.values:
 
         robot = RDK.Item('Fanuc M-20iB/25')
         if robot.Valid():
-            CLEARANCE = FANUC_TRAVEL_CLEARANCE                         # mm, clearance value to travel before the approach point
             tool = RDK.ItemUserPick('Pick a tool', ITEM_TYPE_TOOL)
             robot.setPoseTool(tool)
             frame = RDK.ItemUserPick('Pick a reference frame', ITEM_TYPE_FRAME)
@@ -2407,270 +890,20 @@ if myWindow.values:
 
     else:
         # For debugging purposes
-        CLEARANCE = 100;
         program_name = program_name + '00_debug'
 
-    # Setting the rotation layer height parameters and Z offset for the first time
-    rot = rotOdd
-    layer_height = layer_height_fraction * NOZZLE_DIAMETER
-    totDimZ = NOZZLE_DIAMETER + nb_layers * layer_height
-
-    # Traveling & Approach --------------------------------
-    if not debug:
-        prog.RunInstruction('SetSpeedByRegister('+reg_travel_speed+')')
-        prog.RunInstruction('Traveling move', INSTRUCTION_COMMENT)
-
-    posApp = [
-        start_x + (MULTINOZZLE_WIDTH + NOZZLE_DIAMETER)/2,
-        start_y - approach_length - layer_change_bleed + NOZZLE_DIAMETER/2,
-        CLEARANCE,
-        rot[0],
-        rot[1],
-        rot[2] + theta,
-        '+y']
-    targetAndMove('Travel', posApp, 0, debug, False, False)
-
-    if not debug:
-        prog.RunInstruction('SetSpeedByRegister('+reg_scaff_speed+')')
-        prog.RunInstruction('Approach move', INSTRUCTION_COMMENT)
+    # Toolpath generation --------------------------------
+    toolpath, stats, visual = generator.generate(prog)
+    [xs, ys, zs, normals, tangentsu, tangentsv, collisions, collisions_coords, printhead_locations, nozzles_locations,
+     heronFoot, heronPt1, heronPt2, heronPt3, refPositions, wrongPosGap, newPosGap, posToCheck, dirVectors] = [visual[name] for name in VISUAL_FIELDS]
 
-    posApp[2] = start_z + NOZZLE_DIAMETER + pressure_buildup_z
-    posApp.append('refPos') # A the refPos special attribute for the approach position
-    targetAndMove('Approach', posApp, 0, debug, True, False)
-    posApp.pop() # Remove the special name for the first posApp
-    if not debug:
-        prog.RunInstruction('Start of print', INSTRUCTION_COMMENT)
-        prog.RunInstruction('Extruder(''ON'','+scaff_extr_speed+')')
-        prog.Pause(pressure_buildup_time)
-
-    posApp[1] += approach_length
-    posApp[2] -= pressure_buildup_z / 2
-    targetAndMove('L1R1C1Start2', posApp, 0, debug, True, True)
-
-    # Print's toolpath MAIN LOOP (loop for each layer) --------------------------------
-    prevPos = posApp
-    prevPos[1] +=  layer_change_bleed
-    prevPos[2] -= pressure_buildup_z / 2
-    targetAndMove('L1R1C1Start3', prevPos, 0, debug)
-
-    #--------------------------------------------------------------------------------------------------------------------
-    # Main loop on each layer.
-    #--------------------------------------------------------------------------------------------------------------------            
-    layer_index_offset = 0
-    
-    # For every layer,
-    #   we loop on the number of columns and rows to generate the array containing the scaffolds.
-    for i in tqdm(range(nb_layers),'Layers generated'):  # First layer starts at i = 0
-        # RoboDK comment for each layer
-        if not debug:
-            prog.RunInstruction('Layer %i' % (i+1), INSTRUCTION_COMMENT)
-            
-        # Setting the same z and rotation for one particular layer
-        rot = rotOdd if i % 2 == 0 else rotEven
-
-        # Setting the Z position according to the layer index
-        z = start_z + NOZZLE_DIAMETER + i*layer_height
-        prevPos[2] = z
-        
-        # Choosing the current process parameters according z relative to the thickness
-        #   parameters include : wall_distance, pore_size, printing_bleed and layer_change_bleed
-        if i % 2 == 0:
-            curr_pore_size = pore_size_nominal[-1]
-            for k in range(len(thickness_nominal)):
-                if z < thickness_nominal[k] - layer_height:
-                    # Save some previous process parameters
-                    prev_process['multinozzle_width'] = MULTINOZZLE_WIDTH
-                    prev_process['nozzle_distance'] = NOZZLE_DISTANCE
-                    prev_process['layer_change_bleed'] = layer_change_bleed
-                    prev_process['printing_bleed'] = printing_bleed
-                    
-                    # Update current  values                    
-                    curr_pore_size = pore_size_nominal[k]
-                    wall_distance = wall_distance_nominal[k]
-                    
-                    # Nominal bleeding parameters
-                    layer_change_bleed = layer_change_bleed_nominal[k]
-                    printing_bleed = printing_bleed_nominal[k]
-                    
-                    # Add the layer to the list of layers to be projected if pore size or wall values change
-                    if (curr_pore_size != last_pore_size or wall_distance != last_wall_distance):# and i % 2 == 0:
-                        overallDimRefPos = {'pos':None}
-                        layer_index_offset = i                            
-                        curr_process['id'] = k
-                        
-                        # Definition of the new thickness's microscaffold network geometry
-                        theta = m.degrees(m.acos((curr_pore_size + NOZZLE_DIAMETER) / NOZZLE_TRUE_DISTANCE))
-                        MULTINOZZLE_WIDTH = MULTINOZZLE_TRUE_WIDTH * m.cos(m.radians(theta))
-                        NOZZLE_DISTANCE = NOZZLE_TRUE_DISTANCE * m.cos(m.radians(theta))
-                        
-                        gapDistance = NOZZLE_DISTANCE
-                        pass_amplitude_x = (MULTINOZZLE_WIDTH + gapDistance)
-                        pass_amplitude_y = (MULTINOZZLE_WIDTH + NOZZLE_DISTANCE)
-                        pass_step_x = pass_amplitude_x / segments_per_scaffold
-                        pass_step_y = pass_amplitude_y / segments_per_scaffold
-                        
-                        nb_rows = m.ceil((totDimX - wall_distance - NOZZLE_DIAMETER - (init_rows-1) * NOZZLE_DISTANCE) / MULTINOZZLE_WIDTH)
-                        nb_cols = m.ceil((totDimY - NOZZLE_DIAMETER - wall_distance - (init_cols-1) * NOZZLE_DISTANCE) / MULTINOZZLE_WIDTH)
-                        
-                        # new process dimension
-                        newTotDimX = nb_rows * MULTINOZZLE_WIDTH + (nb_rows-1) * NOZZLE_DISTANCE + NOZZLE_DIAMETER + wall_distance
-                        newTotDimY = nb_cols * MULTINOZZLE_WIDTH + (nb_cols-1) * NOZZLE_DISTANCE + NOZZLE_DIAMETER + wall_distance
-                        
-                        if nb_rows % 2 == 0: 
-                            if newTotDimX - MULTINOZZLE_WIDTH > totDimX:
-                                nb_rows -= 1
-                            else:
-                                nb_rows += 1
-                        if nb_cols % 2 == 0: 
-                            if newTotDimY - MULTINOZZLE_WIDTH > totDimY:
-                                nb_cols -= 1
-                            else:
-                                nb_cols += 1
-                        
-                    break         
-            
-            # Update last values
-            #if i % 2 == 0:
-            last_pore_size = curr_pore_size
-            last_wall_distance = wall_distance 
-            curr_process['multinozzle_width'] = MULTINOZZLE_WIDTH
-            curr_process['nozzle_distance'] = NOZZLE_DISTANCE
-            curr_process['layer_change_bleed'] = layer_change_bleed
-            curr_process['printing_bleed'] = printing_bleed
-        
-        # Switching layer if not the first one
-        if i != 0:
-            # Setting the motion speed to a different speed for rotations
-            if not debug:
-                prog.RunInstruction('SetSpeedByRegister('+reg_rot_speed+')')
-
-            newOrient = changeOrientation(i - layer_index_offset, prevPos)
-            # Remove the last point to the newOrient if we don't need walls, otherwise we add a useless point
-            nbPointsToAdd = len(newOrient)
-            if proj_file == 'None' and wall_distance == 0 and len(newOrient) > 1 and layer_change_bleed_clearance == 0:
-                nbPointsToAdd = len(newOrient)-1
-
-            for j in range(nbPointsToAdd):
-                # Calculating an index offset as function of layer change bleed clearance
-                if proj_file == 'None':
-                    if layer_change_bleed_clearance > 0:
-                        nbPointsOffset = 2
-                    else:
-                        nbPointsOffset = 1
-                else:
-                    nbPointsOffset = 2
-                
-                # Adding the special attribute "purge" to the target position
-                if stopAndGo and j == nbPointsToAdd - nbPointsOffset:
-                    if len(newOrient[j]) > 7:
-                        newOrient[j][7] += ',purge'
-                    else:
-                        newOrient[j].append('purge')
-                
-                # Adding the special attribute "clearColNP" to the target position
-                if layer_change_bleed_clearance > 0 and j == nbPointsToAdd - nbPointsOffset:
-                    if len(newOrient[j]) > 7:
-                        newOrient[j][7] += ',clearColNP'
-                    else:
-                        newOrient[j].append('clearColNP')
-
-                targetAndMove('L'+str(i - layer_index_offset + 1)+'R1C1Start'+str(j+1), newOrient[j], i - layer_index_offset, debug)
-
-                # Setting the motion speed to a higher speed for printing scaffolds before printing the network again
-                if not debug and ((nbPointsToAdd > 1 and j == nbPointsToAdd-1) or nbPointsToAdd == 1):
-                    prog.RunInstruction('SetSpeedByRegister('+reg_scaff_speed+')')
-
-            prevPos = newOrient[-1]
-
-        # Loop on r is used to create passes according to the columns and rows of scaffolds of nb_cols X nb_rows needed
-        #--------------------------
-        # To always have the same grid of c x r, we permute this loop max value when the layer changes
-        for r in range(nb_rows if i % 2 == 0 else nb_cols):#tqdm(range(nb_rows if i % 2 == 0 else nb_cols),'rows generated'):
-            # Loop on c is used to create passes according to the columns and rows of scaffolds of nb_cols X nb_rows needed
-            #--------------------------
-            # To always have the same grid of c x r, we permute this loop max value when the layer changes
-
-            # Adding coast at end by default
-            addCoast = stopAndGo
-            for c in range(nb_cols if i % 2 == 0 else nb_rows):
-                # Pass for scaffold
-                newPass = addPass(i - layer_index_offset, r, c, prevPos, addCoast)
-                
-                # Add points to the toolpath for non-planar
-                if not proj_file == 'None' or wall_distance > 0: # if we need walls (while planar), otherwise we add points when curving (walls or not)
-                    for j in range(len(newPass)):
-                        if newPass[j][-1] == 'coast':
-                            addCoast = False
-                        targetAndMove('L'+str(i - layer_index_offset + 1)+'R'+str(r+1)+'C'+str(c+1)+'P'+str(j+1), newPass[j], i - layer_index_offset, debug)
-
-                # Add points to the toolpath in planar mode
-                if proj_file == 'None':
-                    # if we need to add a coast in planar mode
-                    if addCoast:
-                        for j in range(len(newPass)):
-                            if newPass[j][-1] == 'coast':
-                                addCoast = False
-                                targetAndMove('L'+str(i - layer_index_offset + 1)+'R'+str(r+1)+'C'+str(c+1)+'P'+str(j+1), newPass[j], i - layer_index_offset, debug)
-                     
-                    # if there is a layer change bleed clearance, we need to add the last point of the last pass
-                    if layer_change_bleed_clearance > 0 and (r == (nb_rows-1 if i % 2 == 0 else nb_cols-1)) and (c == (nb_cols-1 if i % 2 == 0 else nb_rows-1)):
-                        targetAndMove('L'+str(i - layer_index_offset + 1)+'R'+str(r+1)+'C'+str(c+1)+'P'+str(1), newPass[-1], i - layer_index_offset, debug)
-                    
-                prevPos = newPass[-1]
-            #--------------------------
-            # EndLoop "for c" (cols)
-
-            newConnection = addConnection(i - layer_index_offset, r, prevPos)
-            # Remove the last point to the newConnection if we don't need walls, otherwise we add a useless point
-            nbPointsToAdd = len(newConnection)
-            if proj_file == 'None' and wall_distance == 0 and len(newConnection) > 2:
-                nbPointsToAdd = len(newConnection)-1
-            
-            for j in range(nbPointsToAdd):
-                targetAndMove('L'+str(i - layer_index_offset + 1)+'R'+str(r+1)+'C'+str(c+1)+'CON'+str(j+1), newConnection[j], i - layer_index_offset, debug)
-            prevPos = newConnection[-1]
-        #--------------------------
-        # EndLoop "for r" (rows)
-    #--------------------------
-    # EndLoop "for i" (layers)
-
-    # Retraction -------------------------------------------------------------
-    if not debug:
-        prog.RunInstruction('Extruder(''OFF'')')
-        prog.RunInstruction('End of print', INSTRUCTION_COMMENT)
-    posRet = prevPos
-    # Even number of layers
-    if nb_layers % 2 == 0:
-        offset = layer_xy_offset if (nb_layers-4) % 4 == 0 else 0
-        posRet[0] -= (offset + retract_length)
-        posRet[1] += offset
-        
-    # Odd number of layers
-    else:
-        offset = layer_xy_offset if (nb_layers-3) % 4 == 0 else 0
-        posRet[0] += offset
-        posRet[1] += (offset + retract_length)
-    #posRet[2] += layer_height
-
-    # Resetting the previous ref position for non-planar gap compensation
-    if not proj_file == 'None' and not nb_layers % 2 == 0:
-        prevRefPos = {'pos':None, 'offset':np.array([0,0,0])}
-        posRet[7] = 'refPos'
-    
-    targetAndMove('Retract', posRet, i, debug, True, False)
-    
     # RoboDK program completion
     if not debug:
-        prog.Pause(retraction_time) # Wait for retraction to complete
-        prog.RunInstruction('onPathFinish')
-        prog.RunInstruction('GoHome')
         prog.ShowTargets(show_targets)
         RDK.Update()
 
-    # Stop calculating script time
-    scriptEnd = dt.now()
-    delta = scriptEnd - scriptStart
-    deltaFormated = str(delta)
+    # Script execution time
+    deltaFormated = str(stats['execution_time'])
 
     # Visualization -------------------------------------------------------------------
     if show_plot:
@@ -2691,31 +924,33 @@ if myWindow.values:
             if not proj_file == 'None':
                 print('Plotting surface...')
                 # Plot parametrized printing surface
-                evalpts = np.array(surf.evalpts)
-                # evalpts = np.array(surf.ctrlpts)
-
-                Xsurf = evalpts[:, 0]
-                Ysurf = evalpts[:, 1]
-                Zsurf = evalpts[:, 2]
-                
-                shapeX = int(1/surf.delta[0])
-                shapeY = int(1/surf.delta[1])
-                # shapeX = surf.ctrlpts_size_u
-                # shapeY = surf.ctrlpts_size_v
-                
-                X = np.reshape(Xsurf,[shapeX,shapeY])
-                Y = np.reshape(Ysurf,[shapeX,shapeY])
-                Z = np.reshape(Zsurf,[shapeX,shapeY])
-                
-                #mlab.mesh(X, Y, Z-0.5, color=meshColor, opacity=1, name='mesh')    # Mesh
-                boite = mlab.mesh(X, Y, Z, color=NURBScolor, opacity=0.5, name='NURBS infill')  # NURBS infill
-                mlab.mesh(X, Y, Z, color=NURBSwireColor, representation='wireframe', opacity=1, line_width = 1.0, name='NURBS wireframe') # NURBS wireframe
+                Xsurf, Ysurf, Zsurf = [], [], []
+                for patch, surfDelta in zip(generator.surfPatches, surfDeltas):
+                    shapeX = int(1/surfDelta[0])
+                    shapeY = int(1/surfDelta[1])
+                    evalpts = patch[0].evaluateGrid(shapeX, shapeY)
+                    # evalpts = np.array(surf.ctrlpts)
+
+                    Xsurf = np.concatenate((Xsurf, evalpts[:, 0]))
+                    Ysurf = np.concatenate((Ysurf, evalpts[:, 1]))
+                    Zsurf = np.concatenate((Zsurf, evalpts[:, 2]))
+                    
+                    # shapeX = surf.ctrlpts_size_u
+                    # shapeY = surf.ctrlpts_size_v
+                    
+                    X = np.reshape(evalpts[:, 0],[shapeX,shapeY])
+                    Y = np.reshape(evalpts[:, 1],[shapeX,shapeY])
+                    Z = np.reshape(evalpts[:, 2],[shapeX,shapeY])
+                    
+                    #mlab.mesh(X, Y, Z-0.5, color=meshColor, opacity=1, name='mesh')    # Mesh
+                    boite = mlab.mesh(X, Y, Z, color=NURBScolor, opacity=0.5, name='NURBS infill')  # NURBS infill
+                    mlab.mesh(X, Y, Z, color=NURBSwireColor, representation='wireframe', opacity=1, line_width = 1.0, name='NURBS wireframe') # NURBS wireframe
 
             # Expected printed geometry (showing filaments)
             if show_geom:                
                 filament_radius = 0.14 # Calibrated for 0.14 = 250 µm diameter
                 filament_sides = 12 # 6 for default performance, 12 gives nice rounded shape
-                filaments_locations = np.empty([NB_NOZZLES, 3, np.shape(nozzles_locations)[0]])
+                filaments_locations = np.empty([generator.NB_NOZZLES, 3, np.shape(nozzles_locations)[0]])
                 
                 if len(nozzles_locations) > 0:
                     print('Plotting microscaffold network geometry...')
@@ -2730,7 +965,7 @@ if myWindow.values:
                         xf = filament_location[0]
                         yf = filament_location[1]
                         zf = filament_location[2]
-                        mlab.plot3d(xf,yf,zf, color=MATERIAL_CHOICE['color'], tube_radius = filament_radius, tube_sides = filament_sides, name='filament')
+                        mlab.plot3d(xf,yf,zf, color=generator.MATERIAL_CHOICE['color'], tube_radius = filament_radius, tube_sides = filament_sides, name='filament')
                     
             # end if show_geom
                                 
@@ -2965,20 +1200,17 @@ if myWindow.values:
     now = dt.now() # Tic for timestamp in file identification 
     if debug or RDK.Item(program_name).Valid():
         # Stats calculation
-        # To-do : take over-extrusion into consideration
-        totDim = str(round(totDimX,2)) + ' mm × ' + str(round(totDimY,2)) + ' mm × ' + str(round(totDimZ,2)) + ' mm'
-        if wall_distance == 0: TX = 1
-        tot_volume = print_dist * NOZZLE_AREA * NB_NOZZLES *(1/1000) * TX # mm³ to cm³
-        tot_mass = tot_volume * rho_selected
-        travel_time = CLEARANCE / travel_speed + pressure_buildup_time/1000 + retraction_time/1000 # TO-DO : add other purge & retraction time
-        print_time = (print_dist + m.sqrt(approach_length**2 + layer_height**2) + m.sqrt(retract_length**2 + layer_height**2)) / scaff_speed
+        totDim = str(round(stats['totDimX'],2)) + ' mm × ' + str(round(stats['totDimY'],2)) + ' mm × ' + str(round(stats['totDimZ'],2)) + ' mm'
+        print_time = stats['print_time']
         print_time_min = [m.floor(print_time/60), (print_time/60 - m.floor(print_time/60))*60]
-        tot_time = travel_time + print_time
 
         msg = '%s generated successfully using %s\n\n Script execution time : %s\n\n Print dimensions (X × Y × Z) = %s\n Print distance = %.2f mm\n Total mass = %.2f g\n Print volume = %.2f cm³\n Available volume = %.2f cm³\n Print time = %.2f s (%d m %d s)\n Number of collision avoided = %s\n'
-        paramsList = ""
-        
-        nbColToPrint = str(len(collisions)) if check_col else 'Deactivated'
+
+        nbColToPrint = str(stats['collisions']) if check_col else 'Deactivated'
+        summary = msg % (program_name, scriptname, deltaFormated, totDim, stats['print_dist'], stats['tot_mass'], stats['tot_volume'], stats['available_volume'], print_time, print_time_min[0], print_time_min[1], nbColToPrint)
+
+        # Surface evaluation statistics of the non-planar projection
+        summary += stats['surface_summary']
 
         # Create log file for data information
         if export_stats:
@@ -2986,7 +1218,7 @@ if myWindow.values:
             flog = open(exportFolder + logFile, 'w+')
             flog.write(program_name+' infos log file\n')
             flog.write('Generated on : '+now.strftime("%d/%m/%y")+', '+now.strftime("%H:%M:%S")+'\n\n')
-            flog.write(msg % (program_name, scriptname, deltaFormated, totDim, print_dist, tot_mass, tot_volume, AVAILABLE_VOLUME, print_time, print_time_min[0], print_time_min[1], nbColToPrint))
+            flog.write(summary)
             
             # Printing parameters. TO-DO : change for json based structure for easy copy-paste in mltnzl_params.json file
             flog.write('\nPrinting parameters :\n\n')
@@ -2997,6 +1229,9 @@ if myWindow.values:
             flog.writelines(line + '\n' for line in tableParams.tolist()[0])
             flog.close()
 
+            # Processed targets of the toolpath (structured array, see toolpath_array)
+            np.save(exportFolder + exportFile + '_toolpath_' + now.strftime("%d-%m-%y") + '_' + now.strftime("%H%M%S") + '.npy', toolpath)
+
         # Show 3D plot after all is done
         if show_plot and plotType == '3D':
             print('Showing plot now')
@@ -3026,10 +1261,10 @@ if myWindow.values:
             mlab.show(stop=True)
 
         if not debug:
-            mbox(msg % (program_name, scriptname, deltaFormated, totDim, print_dist, tot_mass, tot_volume, AVAILABLE_VOLUME, print_time, print_time_min[0], print_time_min[1], nbColToPrint))
+            mbox(summary)
             RDK.Update()
         
-        print(msg % (program_name, scriptname, deltaFormated, totDim, print_dist, tot_mass, tot_volume, AVAILABLE_VOLUME, print_time, print_time_min[0], print_time_min[1], nbColToPrint))
+        print(summary)
         
         # Saving expected print geometry as .vtp file --------------------------------
         #   To save as STL : 1) read with Paraview, 2) export scene as .x3d, 3) open with Blender and export .stl